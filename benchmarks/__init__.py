@@ -0,0 +1 @@
+# Benchmarks package: synthetic datasets and repeatable performance measurements
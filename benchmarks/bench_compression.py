@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Measure story compression against a synthetic dataset: storage ratio and
+the read/write overhead it adds to StoryDatabase.
+
+For each available codec the dataset is copied, a dictionary is trained,
+every story is recompressed and the file is vacuumed.
+
+Usage: python -m benchmarks.bench_compression [--stories 100k] [--sample 5000]
+"""
+import argparse
+import shutil
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.common import measure
+from benchmarks.datagen import SIZES, get_dataset
+from models import compression
+from models.story import StoryDatabase
+
+
+def _storage(path: Path) -> dict:
+    with sqlite3.connect(path) as conn:
+        conn.execute("VACUUM")
+        text_bytes = conn.execute("SELECT SUM(LENGTH(CAST(story_text AS BLOB))) FROM stories").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    return {'text_bytes': text_bytes, 'file_bytes': page_size * pages}
+
+
+def _timings(db: StoryDatabase, heavy_user: int) -> dict:
+    read = measure(lambda: db.get_user_stories(heavy_user), repeat=5, min_time=0.3)
+    write = measure(lambda: db.save_story(heavy_user, "Saw a heron by the canal on the way home today."),
+                    repeat=5, min_time=0.3)
+    return {'read_ms': read['median_ms'], 'write_ms': write['median_ms']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--stories', default='100k', help="dataset size: " + ', '.join(SIZES))
+    parser.add_argument('--sample', type=int, default=5000, help="stories sampled to train the dictionary")
+    parser.add_argument('--dict-size', type=int, default=compression.DEFAULT_DICT_SIZE)
+    args = parser.parse_args()
+
+    stories = SIZES.get(args.stories.lower()) or int(args.stories)
+    source = get_dataset(stories)
+    codecs = ['zlib'] + (['zstd'] if compression.zstandard is not None else [])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain_path = Path(tmp) / "plain.db"
+        shutil.copy(source, plain_path)
+        plain = StoryDatabase(str(plain_path), compression='off')
+        with sqlite3.connect(plain_path) as conn:
+            heavy_user = conn.execute(
+                "SELECT user_id FROM stories GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1"
+            ).fetchone()[0]
+        heavy_count = plain.count_user_stories(heavy_user)
+        baseline = {**_storage(plain_path), **_timings(plain, heavy_user)}
+
+        print(f"📊 Story compression on {stories:,} stories "
+              f"(reads: {heavy_count} stories of the heaviest user)\n")
+        print(f"   {'codec':<8}{'text MiB':>10}{'ratio':>8}{'file MiB':>10}{'read ms':>10}{'write ms':>10}")
+        print(f"   {'none':<8}{baseline['text_bytes'] / 2**20:>10.2f}{1.0:>8.2f}"
+              f"{baseline['file_bytes'] / 2**20:>10.2f}{baseline['read_ms']:>10.3f}{baseline['write_ms']:>10.3f}")
+
+        for codec in codecs:
+            path = Path(tmp) / f"{codec}.db"
+            shutil.copy(source, path)
+            db = StoryDatabase(str(path), compression=codec)
+            db.train_compression_dictionary(sample_size=args.sample, dict_size=args.dict_size)
+            db.compress_stories(batch_size=5000)
+            result = {**_storage(path), **_timings(db, heavy_user)}
+            ratio = baseline['text_bytes'] / result['text_bytes']
+            print(f"   {codec:<8}{result['text_bytes'] / 2**20:>10.2f}{ratio:>8.2f}"
+                  f"{result['file_bytes'] / 2**20:>10.2f}{result['read_ms']:>10.3f}{result['write_ms']:>10.3f}")
+
+        if 'zstd' not in codecs:
+            print("\n   (zstd skipped: pip install zstandard)")
+
+
+if __name__ == '__main__':
+    main()
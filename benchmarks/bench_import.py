@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Measure /import throughput on large files, against saving the same
+entries one save_story() call (one transaction) at a time.
+
+A file of --lines entries is written in each format and imported into an
+empty database with StoryImporter, at a few batch sizes. The per-row
+baseline saves a --baseline-rows sample, since a full run takes minutes.
+
+Usage: python -m benchmarks.bench_import [--lines 100000] [--baseline-rows 2000]
+"""
+import argparse
+import csv
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.story import StoryDatabase
+from services.story_import import StoryImporter
+from utils.renderers import build_export_content
+
+TEXTS = [
+    "Walked the dog past the bakery and the owner waved me in for a warm roll.",
+    "The bus driver waited for a woman running with groceries and everyone clapped.",
+    "My daughter explained black holes to me with a colander and two oranges.",
+]
+_SUFFIXES = {'jsonl': 'jsonl', 'csv': 'csv', 'text': 'txt', 'html': 'html'}
+
+
+def _entries(lines: int):
+    # Spread over the past, a few minutes apart, so none fall in the future
+    start = datetime(2026, 1, 1) - timedelta(minutes=10 * lines)
+    return [((start + timedelta(minutes=10 * i)).strftime('%Y-%m-%d %H:%M:%S'), f"{i}: {TEXTS[i % len(TEXTS)]}")
+            for i in range(lines)]
+
+
+def _write(directory: Path, file_format: str, entries) -> Path:
+    path = directory / f"moments.{_SUFFIXES[file_format]}"
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if file_format == 'jsonl':
+            f.writelines(json.dumps({'created_at': at, 'story_text': text}) + '\n' for at, text in entries)
+        elif file_format == 'csv':
+            writer = csv.writer(f)
+            writer.writerow(['created_at', 'story_text'])
+            writer.writerows(entries)
+        elif file_format == 'text':
+            f.writelines(f"[{at}] {text}\n" for at, text in entries)
+        else:
+            # The export is newest first and shows days only: one entry per day keeps them distinct
+            first_day = datetime(1700, 1, 1)
+            days = [(f"{first_day + timedelta(days=i):%Y-%m-%d}", text) for i, (_, text) in enumerate(entries)]
+            f.write(build_export_content(days[::-1], "Bench", "2026-01-01"))
+    return path
+
+
+def _import(directory: Path, path: Path, batch_size: int) -> float:
+    db = StoryDatabase(str(directory / f"import-{path.suffix[1:]}-{batch_size}.db"))
+    started = time.perf_counter()
+    for _ in StoryImporter(db, 1, path, path.name, batch_size=batch_size).run():
+        pass
+    return time.perf_counter() - started
+
+
+def _save_one_by_one(directory: Path, entries) -> float:
+    db = StoryDatabase(str(directory / "save_story.db"))
+    started = time.perf_counter()
+    for _, text in entries:
+        db.save_story(1, text)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--lines', type=int, default=100_000)
+    parser.add_argument('--baseline-rows', type=int, default=2000)
+    parser.add_argument('--batch-sizes', default='100,1000,5000')
+    args = parser.parse_args()
+
+    entries = _entries(args.lines)
+    batch_sizes = [int(size) for size in args.batch_sizes.split(',')]
+    print(f"📥 Importing {args.lines:,} entries\n")
+    print(f"   {'method':<28}{'batch':>7}{'seconds':>10}{'rows/s':>10}{'MiB':>7}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        baseline = _save_one_by_one(directory, entries[:args.baseline_rows])
+        rate = args.baseline_rows / baseline
+        print(f"   {'save_story per row':<28}{1:>7}{args.lines / rate:>9.1f}*{rate:>10,.0f}{'':>7}")
+        for file_format in ('jsonl', 'csv', 'text', 'html'):
+            path = _write(directory, file_format, entries)
+            size = path.stat().st_size / 2**20
+            for batch_size in batch_sizes:
+                elapsed = _import(directory, path, batch_size)
+                print(f"   {'import ' + file_format:<28}{batch_size:>7}{elapsed:>10.1f}"
+                      f"{args.lines / elapsed:>10,.0f}{size:>7.1f}")
+    print(f"\n   * extrapolated from {args.baseline_rows:,} rows")
+
+
+if __name__ == '__main__':
+    main()
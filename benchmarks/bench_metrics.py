@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-observation overhead of utils/metrics.py.
+
+Usage: python benchmarks/bench_metrics.py
+"""
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.metrics import Counter, Histogram, MetricsRegistry, instrument_handlers
+
+N = 200_000
+
+
+def bench(label, func, n=N):
+    start = time.perf_counter()
+    func(n)
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<40} {elapsed / n * 1e6:8.3f} µs/op")
+
+
+def main():
+    registry = MetricsRegistry()
+    histogram = Histogram('bench_seconds', 'Bench.', ['op'], registry=registry)
+    counter = Counter('bench_total', 'Bench.', ['op'], registry=registry)
+    child = histogram.labels('x')
+    counter_child = counter.labels('x')
+
+    def baseline(n):
+        for i in range(n):
+            pass
+
+    def observe(n):
+        for i in range(n):
+            child.observe(0.003)
+
+    def observe_with_labels(n):
+        for i in range(n):
+            histogram.labels('x').observe(0.003)
+
+    def inc(n):
+        for i in range(n):
+            counter_child.inc()
+
+    def timer(n):
+        for i in range(n):
+            with child.time():
+                pass
+
+    @instrument_handlers
+    class Handlers:
+        @staticmethod
+        async def noop(update, context):
+            return None
+
+    async def raw_noop(update, context):
+        return None
+
+    def handler_overhead(n):
+        async def run(fn):
+            for i in range(n):
+                await fn(None, None)
+        start = time.perf_counter()
+        asyncio.run(run(raw_noop))
+        raw = time.perf_counter() - start
+        start = time.perf_counter()
+        asyncio.run(run(Handlers.noop))
+        wrapped = time.perf_counter() - start
+        print(f"   {'instrumented handler (net overhead)':<40} {(wrapped - raw) / n * 1e6:8.3f} µs/op")
+
+    print("📊 Metrics overhead\n")
+    bench("empty loop", baseline)
+    bench("Histogram child .observe()", observe)
+    bench("Histogram .labels().observe()", observe_with_labels)
+    bench("Counter child .inc()", inc)
+    bench("Histogram child .time() context", timer)
+    handler_overhead(N)
+
+    for _ in range(50):
+        histogram.labels(str(_)).observe(0.01)
+    start = time.perf_counter()
+    registry.render()
+    print(f"\n   render() with 51 series: {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark bot startup reminder scheduling with many active reminders.
+
+Compares the previous schedule_reminder_job (two print(..., flush=True) calls and
+an eagerly formatted f-string log per user) with the current implementation
+behind the queue-backed logging pipeline.
+
+Usage: python benchmarks/bench_reminder_startup.py [reminders]   (default 50000)
+"""
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import time as datetime_time, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.common import FakeJobQueue
+
+TIMEZONES = ['UTC', 'America/New_York', 'Europe/London', 'Asia/Tokyo', 'Asia/Kolkata', 'Australia/Sydney']
+
+
+def legacy_schedule_all_reminders(job_queue, reminders, out):
+    """The pre-pipeline implementation, with print() redirected to ``out``."""
+    logger = logging.getLogger('handlers.shared')
+    for reminder in reminders:
+        user_id = reminder['user_id']
+        reminder_time_str = reminder['reminder_time']
+        timezone_str = reminder['timezone']
+        print(f"⏰ schedule_reminder_job called: user={user_id}, time={reminder_time_str}, tz={timezone_str}",
+              file=out, flush=True)
+        job_queue.get_jobs_by_name(f"reminder_{user_id}")
+        hour, minute = map(int, reminder_time_str.split(':'))
+        reminder_time = datetime_time(hour=hour, minute=minute, tzinfo=timezone.utc)
+        job_queue.run_daily(None, time=reminder_time, name=f"reminder_{user_id}")
+        print(f"⏰ Daily job scheduled for user {user_id} at {reminder_time_str} UTC", file=out, flush=True)
+        logger.info(f"Scheduled daily reminder for user {user_id} at {reminder_time_str} ({timezone_str})")
+    return len(reminders)
+
+
+def build_db(path, count):
+    from models.story import StoryDatabase
+
+    db = StoryDatabase(path)
+    with sqlite3.connect(db.db_path) as conn:
+        conn.executemany(
+            "INSERT INTO reminder_preferences (user_id, reminder_time, timezone, enabled) VALUES (?, ?, ?, 1)",
+            ((i, f"{i % 24:02d}:{i % 60:02d}", TIMEZONES[i % len(TIMEZONES)]) for i in range(1, count + 1)),
+        )
+    return db
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = build_db(os.path.join(tmp, 'stories.db'), count)
+        out_path = os.path.join(tmp, 'stdout.log')
+
+        # Before: basicConfig at WARNING, prints flushed to a real file per line
+        logging.basicConfig(level=logging.WARNING)
+        with open(out_path, 'w') as out:
+            start = time.perf_counter()
+            reminders = db.get_all_active_reminders()
+            legacy_schedule_all_reminders(FakeJobQueue(), reminders, out)
+            before = time.perf_counter() - start
+
+        # After: queue-backed pipeline, no prints
+        from utils.logging_config import configure_logging, stop_logging
+        from handlers import shared
+
+        with open(out_path, 'w') as out:
+            configure_logging(level='WARNING', module_levels='', stream=out)
+            with patch.object(shared, 'story_db', db):
+                start = time.perf_counter()
+                shared.schedule_all_reminders(FakeJobQueue())
+                after = time.perf_counter() - start
+            stop_logging()
+
+    print(f"⏱️  Scheduling {count:,} reminders at startup\n")
+    print(f"   before (print + flush):   {before * 1000:9.1f} ms")
+    print(f"   after  (queue logging):   {after * 1000:9.1f} ms")
+    print(f"   speedup:                  {before / after:9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
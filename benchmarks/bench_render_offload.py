@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark event-loop lag while large exports render, inline vs in the render pool.
+
+A ticker task sleeps 5 ms at a time and records how late it wakes up; that
+lateness is what every other update waits while a render blocks the loop.
+
+Usage: python benchmarks/bench_render_offload.py [--stories 5000] [--exports 8]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from services.render_pool import render_export, shutdown_render_pool
+
+TICK = 0.005
+
+
+def synthetic_entries(count: int):
+    rng = random.Random(5)
+    words = "the a quiet walk bus kid heron canal coffee friend laughed rain window late train".split()
+    start = datetime(2020, 1, 1)
+    entries = []
+    for i in range(count):
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(12, 60)))
+        entries.append(((start + timedelta(days=i)).strftime('%Y-%m-%d %H:%M:%S'), text))
+    entries.reverse()  # newest first, like get_user_stories
+    return entries
+
+
+async def run(entries, exports: int):
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            expected = time.perf_counter() + TICK
+            await asyncio.sleep(TICK)
+            lags.append(max(time.perf_counter() - expected, 0.0))
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(TICK * 4)
+    started = time.perf_counter()
+    await asyncio.gather(*(render_export(entries, "Bench", "2026-01-01") for _ in range(exports)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await tick_task
+
+    lags.sort()
+    return elapsed, lags[int(len(lags) * 0.99) - 1] if lags else 0.0, lags[-1] if lags else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--stories', type=int, default=5000)
+    parser.add_argument('--exports', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+
+    entries = synthetic_entries(args.stories)
+    size_kb = sum(len(text) for _, text in entries) / 1024
+    print(f"📊 {args.exports} concurrent exports of {args.stories} stories ({size_kb:.0f} KiB of text each)\n")
+    print(f"   {'mode':<22}{'wall ms':>10}{'p99 lag ms':>12}{'max lag ms':>12}")
+
+    for label, workers in (("inline", 0), (f"pool ({args.workers} workers)", args.workers)):
+        settings.RENDER_WORKERS = workers
+        settings.RENDER_OFFLOAD_MIN_BYTES = 0
+        if workers:
+            # Start the workers before timing, as a running bot would have
+            asyncio.run(render_export(entries[:1], "Bench", "2026-01-01"))
+        elapsed, p99, worst = asyncio.run(run(entries, args.exports))
+        print(f"   {label:<22}{elapsed * 1000:>10.0f}{p99 * 1000:>12.1f}{worst * 1000:>12.1f}")
+        shutdown_render_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Measure Mini App page serving: the old FileResponse route against the
+in-memory, precompressed assets in webapp/static_assets.py.
+
+Requests go straight to the ASGI app in-process (httpx's ASGITransport), so
+requests/sec is the app's own cost per request, without sockets; bytes per
+response show what a phone would have to download.
+
+Usage: python -m benchmarks.bench_static [--requests 3000]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import httpx
+from fastapi import FastAPI
+from fastapi.responses import FileResponse
+
+from webapp.app import static_assets, webapp_app
+
+PAGE = Path(__file__).parent.parent / "webapp" / "static" / "reminder.html"
+
+
+def _file_response_app() -> FastAPI:
+    """The route as it was: read from disk on every open, no validators, no compression."""
+    app = FastAPI()
+
+    @app.get("/webapp/reminder")
+    async def serve_reminder_page():
+        return FileResponse(PAGE, media_type="text/html")
+
+    return app
+
+
+async def _get(client, path: str, headers: dict):
+    # Raw bytes: decoding gzip/br would be the client's cost, not the server's
+    async with client.stream("GET", path, headers=headers) as response:
+        size = sum([len(chunk) async for chunk in response.aiter_raw()])
+    return response.status_code, size
+
+
+async def _measure(app, path: str, headers: dict, requests: int, repeats: int = 3):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        status, size = await _get(client, path, headers)
+        best = float('inf')
+        for _ in range(repeats):
+            started = time.perf_counter()
+            for _ in range(requests):
+                await _get(client, path, headers)
+            best = min(best, time.perf_counter() - started)
+    return status, size, requests / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--requests', type=int, default=3000)
+    args = parser.parse_args()
+
+    asset = static_assets.get("reminder.html")
+    hashed = static_assets.url("reminder.html")
+    gzip_only = {"Accept-Encoding": "gzip"}
+    cases = [
+        ("FileResponse (before)", _file_response_app(), "/webapp/reminder", gzip_only),
+        ("in memory, identity", webapp_app, "/webapp/reminder", {"Accept-Encoding": "identity"}),
+        ("in memory, gzip", webapp_app, "/webapp/reminder", gzip_only),
+        ("revalidated, 304", webapp_app, "/webapp/reminder",
+         {**gzip_only, "If-None-Match": asset.etags['gzip']}),
+        ("hashed URL, gzip", webapp_app, hashed, gzip_only),
+    ]
+    if 'br' in asset.bodies:
+        cases.insert(3, ("in memory, brotli", webapp_app, "/webapp/reminder", {"Accept-Encoding": "br, gzip"}))
+
+    print(f"📄 Serving reminder.html ({PAGE.stat().st_size:,} bytes), {args.requests:,} requests per case\n")
+    print(f"   {'case':<24}{'status':>7}{'bytes':>8}{'req/s':>10}")
+    baseline = None
+    for label, app, path, headers in cases:
+        status, size, rate = asyncio.run(_measure(app, path, headers, args.requests))
+        baseline = baseline or rate
+        print(f"   {label:<24}{status:>7}{size:>8,}{rate:>10,.0f}  ({rate / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Measure what each story-reading handler costs with full dict rows against
+the projection queries (dates only, StoryText tuples, batched iterator).
+
+One user with years of daily stories, read the way /mystories, /export and
+/report all read them before and after. Time is the median per call; peak
+is the tracemalloc high-water mark of a single call, result included.
+
+Usage: python -m benchmarks.bench_story_rows [--stories 3650] [--compression zlib]
+"""
+import argparse
+import sqlite3
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.common import measure
+from handlers.report_commands import _moments_prompt
+from handlers.story_commands import _stories_summary
+from models.story import StoryDatabase
+from utils.renderers import export_entries
+
+STORY_TEXT = "Walked the dog past the bakery and the owner waved me in for a warm roll. " * 4
+
+
+def _peak(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _dict_prompt(db, user_id):
+    # What _send_report did with get_user_stories
+    return _moments_prompt((s['created_at'], s['story_text']) for s in db.get_user_stories(user_id))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--stories', type=int, default=3650)
+    parser.add_argument('--compression', default='zlib', help="story codec: off, zlib or zstd")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "stories.db")
+        db = StoryDatabase(path, compression=args.compression)
+        for i in range(args.stories):
+            db.save_story(1, f"{i}: {STORY_TEXT}")
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE stories SET created_at = datetime('now', '-' || (id - 1) || ' days')")
+
+        cases = [
+            ("summary", "dict rows", lambda: _stories_summary([s['created_at'] for s in db.get_user_stories(1)])),
+            ("summary", "get_story_dates", lambda: _stories_summary(db.get_story_dates(1))),
+            ("export", "dict rows", lambda: export_entries(db.get_user_stories(1))),
+            ("export", "get_story_texts", lambda: db.get_story_texts(1)),
+            ("report", "dict rows", lambda: _dict_prompt(db, 1)),
+            ("report", "iter_story_texts", lambda: _moments_prompt(db.iter_story_texts(1))),
+        ]
+        print(f"📚 Story reads for one user with {args.stories:,} stories ({args.compression})\n")
+        print(f"   {'handler':<9}{'read':<18}{'median ms':>11}{'peak KiB':>11}")
+        baseline = {}
+        for handler, label, func in cases:
+            median = measure(func, repeat=5, min_time=0.3)['median_ms']
+            peak = _peak(func)
+            base_ms, base_peak = baseline.setdefault(handler, (median, peak))
+            print(f"   {handler:<9}{label:<18}{median:>11.2f}{peak / 1024:>11,.0f}  "
+                  f"({median / base_ms:.2f}x time, {peak / base_peak:.2f}x memory)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Measure memory per idle user: PTB's user_data dicts against the slotted,
+evicting store in services/user_state.py.
+
+Each simulated user was sent one reminder and never replied, the common
+case. Before, that left ``user_data[user_id] = {'awaiting_story': {...}}``
+in memory forever; after, one UserState until the TTL evicts it. Sizes are
+traced allocations (tracemalloc), divided by the number of users; both
+sides hold the same two datetimes per user.
+
+Usage: python -m benchmarks.bench_user_state [--users 100000]
+"""
+import argparse
+import sys
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.user_state import UserStateStore
+
+
+def _reminder_times(users: int):
+    base = datetime(2026, 1, 1, 9, 0)
+    return [(base + timedelta(seconds=i), base + timedelta(seconds=i, milliseconds=40)) for i in range(users)]
+
+
+def _measure(build, users: int) -> float:
+    times = _reminder_times(users)
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        holder = build(times)
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del holder
+    return used / users
+
+
+def _user_data(times):
+    # What send_reminder_to_user used to do with application.user_data
+    user_data = defaultdict(dict)
+    for user_id, (scheduled_at, sent_at) in enumerate(times):
+        user_data[user_id]['awaiting_story'] = {'scheduled_at': scheduled_at, 'sent_at': sent_at}
+    return user_data
+
+
+def _store(times):
+    store = UserStateStore(max_users=len(times))
+    for user_id, (scheduled_at, sent_at) in enumerate(times):
+        store.expect_story(user_id, scheduled_at, sent_at)
+    return store
+
+
+def _store_after_ttl(times):
+    clock = [0.0]
+    store = UserStateStore(ttl=3600, max_users=len(times), clock=lambda: clock[0])
+    for user_id, (scheduled_at, sent_at) in enumerate(times):
+        store.expect_story(user_id, scheduled_at, sent_at)
+    clock[0] = 7200
+    store.evict()
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--users', type=int, default=100_000)
+    args = parser.parse_args()
+
+    cases = [
+        ("user_data dicts (before)", _user_data),
+        ("UserStateStore", _store),
+        ("UserStateStore, after TTL", _store_after_ttl),
+    ]
+    print(f"🧠 Memory per idle user with a pending reminder, {args.users:,} users\n")
+    print(f"   {'case':<28}{'bytes/user':>11}{'total MiB':>11}")
+    baseline = None
+    for label, build in cases:
+        per_user = _measure(build, args.users)
+        baseline = baseline or per_user
+        print(f"   {label:<28}{per_user:>11,.0f}{per_user * args.users / 2**20:>11.1f}  "
+              f"({per_user / baseline:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
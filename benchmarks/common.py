@@ -0,0 +1,53 @@
+"""
+Shared helpers for benchmark scripts.
+"""
+import statistics
+import time
+from typing import Callable, Dict
+
+
+class FakeJobQueue:
+    """Just enough of PTB's JobQueue for scheduling: named jobs in a dict."""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def run_daily(self, callback, time, name):
+        self.jobs[name] = (callback, time)
+
+    def get_jobs_by_name(self, name):
+        return []
+
+
+def measure(func: Callable[[], object], repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """
+    Time ``func`` like timeit: calibrate a loop count that runs for at least
+    ``min_time`` seconds, then take ``repeat`` samples of that loop.
+
+    Returns:
+        Per-call timings in milliseconds (min, median, max) and the loop count
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+
+    return {
+        'min_ms': min(samples) * 1000,
+        'median_ms': statistics.median(samples) * 1000,
+        'max_ms': max(samples) * 1000,
+        'number': number,
+        'repeat': repeat,
+    }
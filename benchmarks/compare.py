@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Compare two benchmark result files written by ``benchmarks.run``.
+
+Usage: python -m benchmarks.compare BASE.json NEW.json [--threshold 0.10]
+
+Exits with status 1 when any benchmark's median got slower than the threshold.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def compare(base: dict, new: dict, threshold: float):
+    """Yield (size, name, base_ms, new_ms, ratio, regressed) for benchmarks in both files."""
+    for size, benchmarks in new['results'].items():
+        for name, timing in benchmarks.items():
+            old = base['results'].get(size, {}).get(name)
+            if old is None:
+                continue
+            ratio = timing['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+            yield size, name, old['median_ms'], timing['median_ms'], ratio, ratio > 1 + threshold
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.10, help="allowed slowdown (default 0.10)")
+    args = parser.parse_args()
+
+    base = json.loads(Path(args.base).read_text(encoding='utf-8'))
+    new = json.loads(Path(args.new).read_text(encoding='utf-8'))
+
+    print(f"📊 {base['meta']['commit']} → {new['meta']['commit']}\n")
+    print(f"   {'size':<6}{'benchmark':<42}{'base ms':>12}{'new ms':>12}{'change':>10}")
+    regressions = 0
+    for size, name, old_ms, new_ms, ratio, regressed in compare(base, new, args.threshold):
+        marker = " ⚠️" if regressed else ""
+        print(f"   {size:<6}{name:<42}{old_ms:12.3f}{new_ms:12.3f}{(ratio - 1) * 100:+9.1f}%{marker}")
+        regressions += regressed
+
+    if regressions:
+        print(f"\n❌ {regressions} benchmark(s) slower than {args.threshold:.0%}")
+        sys.exit(1)
+    print("\n✅ No regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Synthetic dataset generator for benchmarks.
+
+Builds a stories.db with the production schema, filled with deterministic
+fake data: stories spread over the last three years across many users (a few
+power users write far more than the rest), reminder preferences for about a
+third of the users, and some feedback.
+
+Usage: python -m benchmarks.datagen <stories> [--users N] [--output PATH] [--seed N]
+"""
+import argparse
+import random
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.story import StoryDatabase
+
+DATA_DIR = Path(__file__).parent / ".data"
+
+# Bump when the generated data or schema changes so cached datasets are rebuilt
+DATASET_VERSION = 2
+
+SIZES = {'10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+TIMEZONES = [
+    'UTC', 'America/New_York', 'America/Los_Angeles', 'America/Chicago', 'Europe/London',
+    'Europe/Paris', 'Asia/Tokyo', 'Asia/Shanghai', 'Asia/Kolkata', 'Australia/Sydney',
+]
+
+_WORDS = (
+    "today I noticed my daughter laughing at the kitchen table while rain hit the window "
+    "and the coffee went cold because a stranger on the train asked about my book "
+    "we walked home slowly after dinner talking about nothing and everything "
+    "my father called just to say he found an old photo of us at the lake "
+    "the bus driver waited for a woman running with groceries and everyone clapped "
+    "I finally fixed the bike and rode it around the block feeling twelve again "
+    "a colleague remembered my birthday when nobody else did "
+    "the dog refused to leave the warm patch of sun on the floor"
+).split()
+
+FIRST_NAMES = ['Alice', 'Bob', 'Chen', 'Dana', 'Eli', 'Fatima', 'Goran', 'Hana', 'Ivan', 'Jia']
+
+
+def default_users(stories: int) -> int:
+    return max(50, stories // 100)
+
+
+def dataset_path(stories: int, users: int = None, seed: int = 1) -> Path:
+    users = users or default_users(stories)
+    return DATA_DIR / f"stories_v{DATASET_VERSION}_{stories}_{users}_{seed}.db"
+
+
+def _story_text(rng: random.Random) -> str:
+    start = rng.randrange(len(_WORDS))
+    length = rng.randint(5, 40)
+    words = [_WORDS[(start + i) % len(_WORDS)] for i in range(length)]
+    text = ' '.join(words)
+    if rng.random() < 0.1:
+        text += "\n\nIt made me think about <home> & \"what matters\"."
+    return text[0].upper() + text[1:] + '.'
+
+
+def generate(path: Path, stories: int, users: int = None, seed: int = 1,
+             batch_size: int = 10_000) -> Path:
+    """Create a synthetic database at ``path`` (overwriting any existing file)."""
+    users = users or default_users(stories)
+    rng = random.Random(seed)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for suffix in ('', '-wal', '-shm'):
+        Path(str(path) + suffix).unlink(missing_ok=True)
+
+    db = StoryDatabase(str(path))
+
+    # 1% of users are power users with 20x the weight of everyone else
+    user_ids = list(range(1_000_000, 1_000_000 + users))
+    weights = [20 if i < max(1, users // 100) else 1 for i in range(users)]
+    now = datetime(2026, 1, 1)
+    span_seconds = 3 * 365 * 86400
+
+    with sqlite3.connect(db.db_path) as conn:
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA journal_mode = MEMORY")
+
+        remaining = stories
+        while remaining:
+            n = min(batch_size, remaining)
+            remaining -= n
+            rows = []
+            for user_id in rng.choices(user_ids, weights=weights, k=n):
+                created = now - timedelta(seconds=rng.randrange(span_seconds))
+                rows.append((user_id, _story_text(rng), created.strftime('%Y-%m-%d %H:%M:%S')))
+            conn.executemany("""
+                INSERT INTO stories (user_id, story_text, created_at)
+                VALUES (?, ?, ?)
+            """, rows)
+
+        conn.executemany("""
+            INSERT INTO users (user_id, username, first_name)
+            VALUES (?, ?, ?)
+        """, [(user_id, f"user{user_id}", FIRST_NAMES[user_id % len(FIRST_NAMES)]) for user_id in user_ids])
+
+        conn.executemany("""
+            INSERT INTO reminder_preferences (user_id, reminder_time, timezone, enabled)
+            VALUES (?, ?, ?, ?)
+        """, [
+            (user_id, f"{rng.randrange(24):02d}:{rng.randrange(0, 60, 5):02d}",
+             rng.choice(TIMEZONES), 1 if rng.random() < 0.9 else 0)
+            for user_id in user_ids if rng.random() < 0.33
+        ])
+
+        conn.executemany("""
+            INSERT INTO feedback (user_id, feedback_text, created_at)
+            VALUES (?, ?, ?)
+        """, [
+            (user_id, _story_text(rng),
+             (now - timedelta(seconds=rng.randrange(span_seconds))).strftime('%Y-%m-%d %H:%M:%S'))
+            for user_id in rng.sample(user_ids, min(len(user_ids), max(10, users // 20)))
+        ])
+        conn.commit()
+
+    return path
+
+
+def get_dataset(stories: int, users: int = None, seed: int = 1) -> Path:
+    """Return a cached dataset, generating it on first use."""
+    path = dataset_path(stories, users, seed)
+    if not path.exists():
+        tmp = path.with_suffix('.tmp')
+        generate(tmp, stories, users, seed)
+        tmp.rename(path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('stories', help="number of stories, or one of: " + ', '.join(SIZES))
+    parser.add_argument('--users', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', default=None, help="database path (default: cached dataset)")
+    args = parser.parse_args()
+
+    stories = SIZES.get(args.stories.lower()) or int(args.stories)
+    if args.output:
+        path = generate(Path(args.output), stories, args.users, args.seed)
+    else:
+        path = get_dataset(stories, args.users, args.seed)
+    print(f"✅ {stories:,} stories written to {path}")
+
+
+if __name__ == '__main__':
+    main()
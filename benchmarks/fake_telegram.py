@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Telegram Bot API.
+
+A small ASGI app implementing the methods the bot uses (getUpdates,
+sendMessage, editMessageText, sendDocument, answerCallbackQuery, ...) well
+enough for python-telegram-bot to run against it via ``base_url``. Latency
+and 429 "Too Many Requests" responses can be injected to see how the bot
+behaves when Telegram is slow or rate limiting.
+
+Updates are queued with ``push_update`` (or ``POST /_updates`` when run
+standalone) and handed out to the bot's long-poll ``getUpdates``.
+
+Usage:
+    python -m benchmarks.fake_telegram [--port 8081] [--latency-ms 50] [--rate-429 0.01]
+    TELEGRAM_BASE_URL=http://127.0.0.1:8081/bot python bot.py
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from collections import Counter, deque
+from email.parser import BytesParser
+from email.policy import HTTP
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qsl
+
+BOT_USER = {
+    'id': 1000000001,
+    'is_bot': True,
+    'first_name': 'Moments Bot',
+    'username': 'fake_moments_bot',
+    'can_join_groups': False,
+    'can_read_all_group_messages': False,
+    'supports_inline_queries': False,
+}
+
+_METHOD_PATH = re.compile(r'^/bot([^/]+)/(\w+)$')
+
+# Methods that deliver something to a chat, reported to the on_bot_call hook
+CHAT_METHODS = frozenset({'sendMessage', 'editMessageText', 'sendDocument', 'deleteMessage'})
+
+
+def _parse_body(content_type: str, body: bytes) -> Dict[str, object]:
+    """Decode a Bot API request body (urlencoded, multipart or JSON) into a dict.
+
+    Uploaded files are replaced by their size in bytes.
+    """
+    if not body:
+        return {}
+    if content_type.startswith('application/json'):
+        return json.loads(body)
+    if content_type.startswith('multipart/form-data'):
+        message = BytesParser(policy=HTTP).parsebytes(
+            b'Content-Type: ' + content_type.encode('latin-1') + b'\r\n\r\n' + body
+        )
+        params = {}
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            payload = part.get_payload(decode=True) or b''
+            if part.get_filename():
+                params[name] = len(payload)
+            else:
+                params[name] = payload.decode('utf-8')
+        return params
+    return dict(parse_qsl(body.decode('utf-8'), keep_blank_values=True))
+
+
+def _json_param(params: Dict[str, object], name: str, default=None):
+    """Bot API clients send non-string values JSON encoded inside form fields."""
+    value = params.get(name, default)
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+class FakeTelegramServer:
+    """ASGI app emulating the subset of the Bot API used by the bot.
+
+    Args:
+        latency: Seconds added to every method except getUpdates
+        jitter: Extra random latency, uniform in [0, jitter] seconds
+        rate_429: Probability that a method call is answered with 429
+        retry_after: ``retry_after`` seconds reported in 429 responses
+        on_bot_call: Called as ``on_bot_call(method, params, result)`` for
+            every successful call that delivers to a chat
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_429: float = 0.0,
+                 retry_after: int = 1, on_bot_call: Optional[Callable] = None, seed: int = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.on_bot_call = on_bot_call
+        self.calls: Counter = Counter()
+        self.throttled: Counter = Counter()
+        self._random = random.Random(seed)
+        self._updates: deque = deque()
+        self._next_update_id = 1
+        self._next_message_id = 1
+        self._new_update: Optional[asyncio.Event] = None
+
+    # --- Driver side ---
+
+    def push_update(self, update: dict) -> int:
+        """Queue an update (without ``update_id``) for the bot; returns its id."""
+        update_id = self._next_update_id
+        self._next_update_id += 1
+        self._updates.append(dict(update, update_id=update_id))
+        if self._new_update is not None:
+            self._new_update.set()
+        return update_id
+
+    def next_message_id(self) -> int:
+        message_id = self._next_message_id
+        self._next_message_id += 1
+        return message_id
+
+    @property
+    def pending_updates(self) -> int:
+        return len(self._updates)
+
+    # --- ASGI ---
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            while True:
+                message = await receive()
+                if message['type'] == 'lifespan.startup':
+                    await send({'type': 'lifespan.startup.complete'})
+                elif message['type'] == 'lifespan.shutdown':
+                    await send({'type': 'lifespan.shutdown.complete'})
+                    return
+        if scope['type'] != 'http':
+            return
+
+        body = b''
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get('body', b'')
+            more_body = message.get('more_body', False)
+        headers = dict(scope['headers'])
+        content_type = headers.get(b'content-type', b'').decode('latin-1')
+
+        status, payload = await self.handle(scope['path'], content_type, body)
+        data = json.dumps(payload).encode('utf-8')
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(data)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': data})
+
+    async def handle(self, path: str, content_type: str, body: bytes):
+        """Dispatch one request. Returns ``(http_status, json_payload)``."""
+        if path == '/_updates':
+            update_id = self.push_update(json.loads(body))
+            return 200, {'ok': True, 'result': update_id}
+        if path == '/_stats':
+            return 200, {'ok': True, 'result': {'calls': dict(self.calls), 'throttled': dict(self.throttled),
+                                                'pending_updates': self.pending_updates}}
+
+        match = _METHOD_PATH.match(path)
+        if match is None:
+            return 404, {'ok': False, 'error_code': 404, 'description': 'Not Found'}
+        method = match.group(2)
+        params = _parse_body(content_type, body)
+        self.calls[method] += 1
+
+        if method == 'getUpdates':
+            return 200, {'ok': True, 'result': await self._get_updates(params)}
+
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        if self.rate_429 and self._random.random() < self.rate_429:
+            self.throttled[method] += 1
+            return 429, {
+                'ok': False,
+                'error_code': 429,
+                'description': f'Too Many Requests: retry after {self.retry_after}',
+                'parameters': {'retry_after': self.retry_after},
+            }
+
+        result = self._result(method, params)
+        if self.on_bot_call is not None and method in CHAT_METHODS:
+            self.on_bot_call(method, params, result)
+        return 200, {'ok': True, 'result': result}
+
+    async def _get_updates(self, params: Dict[str, object]) -> list:
+        offset = int(_json_param(params, 'offset', 0) or 0)
+        limit = int(_json_param(params, 'limit', 100) or 100)
+        timeout = float(_json_param(params, 'timeout', 0) or 0)
+
+        # Telegram forgets updates once a later offset has been requested
+        while self._updates and self._updates[0]['update_id'] < offset:
+            self._updates.popleft()
+
+        if not self._updates and timeout:
+            if self._new_update is None:
+                self._new_update = asyncio.Event()
+            self._new_update.clear()
+            try:
+                await asyncio.wait_for(self._new_update.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return [self._updates[i] for i in range(min(limit, len(self._updates)))]
+
+    def _message(self, params: Dict[str, object], message_id: int = None, **fields) -> dict:
+        chat_id = int(_json_param(params, 'chat_id', 0))
+        message = {
+            'message_id': message_id or self.next_message_id(),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+        }
+        message.update(fields)
+        return message
+
+    def _result(self, method: str, params: Dict[str, object]):
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'sendMessage':
+            return self._message(params, text=params.get('text', ''))
+        if method == 'editMessageText':
+            if params.get('inline_message_id'):
+                return True
+            return self._message(params, int(_json_param(params, 'message_id')),
+                                 text=params.get('text', ''), edit_date=int(time.time()))
+        if method == 'sendDocument':
+            message_id = self.next_message_id()
+            document = {
+                'file_id': f'doc{message_id}',
+                'file_unique_id': f'udoc{message_id}',
+                'file_name': params.get('filename') or 'document',
+                'file_size': params.get('document') if isinstance(params.get('document'), int) else 0,
+            }
+            return self._message(params, message_id, document=document, caption=params.get('caption', ''))
+        # answerCallbackQuery, deleteMessage, setMyCommands, deleteWebhook, ...
+        return True
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a fake Telegram Bot API server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="latency added to every method call")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="extra random latency per call")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="fraction of calls answered with 429")
+    parser.add_argument('--retry-after', type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeTelegramServer(args.latency_ms / 1000, args.jitter_ms / 1000, args.rate_429, args.retry_after)
+    print(f"🤖 Fake Bot API on http://{args.host}:{args.port}/bot (POST updates to /_updates)")
+    uvicorn.run(server, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == '__main__':
+    main()
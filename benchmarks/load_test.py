@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test against the fake Bot API.
+
+Runs the real Application from bot.py (all handlers, a throwaway SQLite
+database, OpenAI replaced by a fake with fixed latency) in a background
+thread, pointed at benchmarks/fake_telegram.py. Simulated users then go
+through four phases:
+
+    story      /story, then reply with a moment
+    reminder   every user's reminder fires at once; users reply to it
+    export     /export
+    report     /report
+
+Latency is measured from queueing an update to the last bot message the
+action produces; throughput is updates handled per second.
+
+Usage:
+    python -m benchmarks.load_test [--users 2000] [--latency-ms 30] [--rate-429 0.0]
+                                   [--openai-ms 500] [--phases story,reminder,export,report]
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.fake_telegram import FakeTelegramServer
+
+PHASES = ('story', 'reminder', 'export', 'report')
+FIRST_USER_ID = 500000000
+ERROR_MARKERS = ("Oops", "Something went wrong")
+
+
+class FakeOpenAIClient:
+    """Stands in for AsyncOpenAI: responses.create sleeps, then returns a canned report."""
+
+    def __init__(self, delay: float):
+        self.responses = self
+        self.delay = delay
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        return SimpleNamespace(output_text=(
+            "# Your two weeks\n\nYou noticed **small things**.\n\n"
+            "## Small moments that were bigger\n\n- A *quiet* walk\n- A conversation that ended"
+        ))
+
+
+class BotThread:
+    """The bot's Application running on its own event loop in a daemon thread."""
+
+    def __init__(self, base_url: str, concurrent_updates):
+        from bot import build_application
+
+        self.application = build_application("123456:LOADTEST", base_url, concurrent_updates)
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._stop = None
+        self._thread = threading.Thread(target=self._run, name="bot", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+        if not self._ready.wait(30):
+            raise RuntimeError("bot did not start")
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join(30)
+
+    def call_soon(self, func, *args) -> None:
+        self.loop.call_soon_threadsafe(func, *args)
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_until_complete(self._main())
+
+    async def _main(self) -> None:
+        app = self.application
+        self._stop = asyncio.Event()
+        await app.initialize()
+        await app.updater.start_polling(poll_interval=0, timeout=1)
+        await app.start()
+        self._ready.set()
+        await self._stop.wait()
+        await app.updater.stop()
+        await app.stop()
+        await app.shutdown()
+
+
+class LoadDriver:
+    """Simulated users talking to the bot through the fake server."""
+
+    def __init__(self, server: FakeTelegramServer, bot: BotThread, users: int, timeout: float, ramp: float):
+        self.server = server
+        self.bot = bot
+        self.user_ids = [FIRST_USER_ID + i for i in range(users)]
+        self.timeout = timeout
+        self.ramp = ramp
+        self.inboxes: Dict[int, asyncio.Queue] = defaultdict(asyncio.Queue)
+        self.has_stories = set()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.timeouts: Dict[str, int] = defaultdict(int)
+        self.updates_sent = 0
+        server.on_bot_call = self._on_bot_call
+
+    def _on_bot_call(self, method, params, result) -> None:
+        chat_id = params.get('chat_id')
+        if chat_id is not None:
+            self.inboxes[int(chat_id)].put_nowait((method, params.get('text') or params.get('caption') or ''))
+
+    def _send(self, user_id: int, text: str) -> None:
+        message = {
+            'message_id': self.server.next_message_id(),
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private', 'first_name': f"User{user_id}"},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f"User{user_id}"},
+            'text': text,
+        }
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        self.server.push_update({'message': message})
+        self.updates_sent += 1
+
+    async def _expect(self, action: str, user_id: int, count: int, started: float) -> bool:
+        """Wait for ``count`` bot messages to a user and record the action's latency."""
+        inbox = self.inboxes[user_id]
+        deadline = started + self.timeout
+        failed = False
+        for _ in range(count):
+            try:
+                _, text = await asyncio.wait_for(inbox.get(), max(deadline - time.perf_counter(), 0.001))
+            except asyncio.TimeoutError:
+                self.timeouts[action] += 1
+                return False
+            if any(marker in text for marker in ERROR_MARKERS):
+                failed = True
+        if failed:
+            self.errors[action] += 1
+            return False
+        self.latencies[action].append(time.perf_counter() - started)
+        return True
+
+    async def _user(self, phase: str, user_id: int) -> None:
+        if self.ramp:
+            await asyncio.sleep(random.uniform(0, self.ramp))
+
+        if phase == 'story':
+            started = time.perf_counter()
+            self._send(user_id, "/story")
+            if await self._expect('story_prompt', user_id, 1, started):
+                started = time.perf_counter()
+                self._send(user_id, f"Saw a heron by the canal on the way home ({user_id})")
+                if await self._expect('story_save', user_id, 1, started):
+                    self.has_stories.add(user_id)
+
+        elif phase == 'reminder':
+            started = time.perf_counter()
+            if await self._expect('reminder', user_id, 1, started):
+                started = time.perf_counter()
+                self._send(user_id, "The bus driver waited for a running kid")
+                if await self._expect('reminder_reply', user_id, 1, started):
+                    self.has_stories.add(user_id)
+
+        elif phase == 'export':
+            started = time.perf_counter()
+            self._send(user_id, "/export")
+            await self._expect('export', user_id, 1, started)
+
+        elif phase == 'report':
+            started = time.perf_counter()
+            self._send(user_id, "/report")
+            # thinking message, edited report intro, report document
+            await self._expect('report', user_id, 3 if user_id in self.has_stories else 1, started)
+
+    def _fire_reminders(self) -> None:
+        from handlers.shared import daily_reminder_callback
+
+        job_queue = self.bot.application.job_queue
+
+        def schedule():
+            for user_id in self.user_ids:
+                job_queue.run_once(daily_reminder_callback, 0, name=f"reminder_{user_id}")
+
+        self.bot.call_soon(schedule)
+
+    async def run_phase(self, phase: str) -> float:
+        # Drop stray messages from a previous phase (e.g. late replies after a timeout)
+        for inbox in self.inboxes.values():
+            while not inbox.empty():
+                inbox.get_nowait()
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(self._user(phase, user_id)) for user_id in self.user_ids]
+        if phase == 'reminder':
+            self._fire_reminders()
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    ordered = sorted(values)
+    index = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def summarize(driver: LoadDriver, wall: float, phase_times: Dict[str, float]) -> dict:
+    actions = {}
+    for action in sorted(set(driver.latencies) | set(driver.errors) | set(driver.timeouts)):
+        values = driver.latencies.get(action, [])
+        entry = {'ok': len(values), 'errors': driver.errors.get(action, 0), 'timeouts': driver.timeouts.get(action, 0)}
+        if values:
+            entry.update({
+                f'p{pct}_ms': round(percentile(values, pct) * 1000, 1) for pct in (50, 90, 99)
+            })
+            entry['max_ms'] = round(max(values) * 1000, 1)
+        actions[action] = entry
+    return {
+        'users': len(driver.user_ids),
+        'wall_seconds': round(wall, 2),
+        'updates': driver.updates_sent,
+        'updates_per_second': round(driver.updates_sent / wall, 1) if wall else 0.0,
+        'phase_seconds': {phase: round(seconds, 2) for phase, seconds in phase_times.items()},
+        'api_calls': dict(driver.server.calls),
+        'throttled': dict(driver.server.throttled),
+        'actions': actions,
+    }
+
+
+def print_summary(summary: dict) -> None:
+    print(f"\n👥 {summary['users']} users, {summary['updates']} updates in {summary['wall_seconds']}s "
+          f"({summary['updates_per_second']} updates/s)")
+    print("   phases: " + ", ".join(f"{k} {v}s" for k, v in summary['phase_seconds'].items()))
+    if summary['throttled']:
+        print(f"   429s injected: {sum(summary['throttled'].values())}")
+    print(f"\n{'action':<16}{'ok':>7}{'err':>6}{'tmo':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for action, entry in summary['actions'].items():
+        print(f"{action:<16}{entry['ok']:>7}{entry['errors']:>6}{entry['timeouts']:>6}"
+              + ''.join(f"{entry.get(key, float('nan')):>10.1f}" for key in ('p50_ms', 'p90_ms', 'p99_ms', 'max_ms')))
+
+
+async def run_load_test(args) -> dict:
+    import uvicorn
+
+    server = FakeTelegramServer(args.latency_ms / 1000, args.jitter_ms / 1000, args.rate_429,
+                                args.retry_after, seed=args.seed)
+    config = uvicorn.Config(server, host='127.0.0.1', port=args.port, log_level='warning', lifespan='off')
+    http = uvicorn.Server(config)
+    serve_task = asyncio.create_task(http.serve())
+    while not http.started:
+        if serve_task.done():
+            serve_task.result()
+        await asyncio.sleep(0.01)
+    port = http.servers[0].sockets[0].getsockname()[1]
+
+    concurrent = args.concurrent_updates if args.concurrent_updates > 1 else False
+    bot = BotThread(f"http://127.0.0.1:{port}/bot", concurrent)
+    # The fake server shares this loop, so wait for the bot's getMe off-loop
+    await asyncio.get_running_loop().run_in_executor(None, bot.start)
+    driver = LoadDriver(server, bot, args.users, args.timeout, args.ramp)
+
+    phase_times = {}
+    started = time.perf_counter()
+    try:
+        for phase in args.phases:
+            print(f"▶️  {phase} ({args.users} users)")
+            phase_times[phase] = await driver.run_phase(phase)
+    finally:
+        wall = time.perf_counter() - started
+        await asyncio.get_running_loop().run_in_executor(None, bot.stop)
+        http.should_exit = True
+        await serve_task
+
+    return summarize(driver, wall, phase_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end bot load test against a fake Bot API")
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--phases', default=','.join(PHASES), help=f"comma separated, from {','.join(PHASES)}")
+    parser.add_argument('--latency-ms', type=float, default=30.0, help="fake Bot API latency per call")
+    parser.add_argument('--jitter-ms', type=float, default=20.0)
+    parser.add_argument('--rate-429', type=float, default=0.0, help="fraction of Bot API calls answered with 429")
+    parser.add_argument('--retry-after', type=int, default=1)
+    parser.add_argument('--openai-ms', type=float, default=500.0, help="fake OpenAI response time")
+    parser.add_argument('--concurrent-updates', type=int, default=0,
+                        help="process up to N updates at once (default: sequential, as in production)")
+    parser.add_argument('--ramp', type=float, default=0.0, help="spread each phase's user starts over N seconds")
+    parser.add_argument('--timeout', type=float, default=120.0, help="seconds before an action counts as timed out")
+    parser.add_argument('--port', type=int, default=0, help="fake Bot API port (default: any free port)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="also write the summary as JSON to this path")
+    args = parser.parse_args()
+    args.phases = [p.strip() for p in args.phases.split(',') if p.strip()]
+    unknown = set(args.phases) - set(PHASES)
+    if unknown:
+        parser.error(f"unknown phases: {', '.join(sorted(unknown))}")
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="moments-load-") as db_dir:
+        # Settings and the shared StoryDatabase are created at import time
+        os.environ['DB_DIR'] = db_dir
+        os.environ.setdefault('LOG_LEVEL', 'ERROR')
+        fake_openai = FakeOpenAIClient(args.openai_ms / 1000)
+        with patch('handlers.report_commands.get_openai_client', return_value=fake_openai):
+            summary = asyncio.run(run_load_test(args))
+
+    print_summary(summary)
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2) + '\n')
+        print(f"\n💾 Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Repeatable benchmark suite over synthetic datasets.
+
+Runs every registered benchmark against each dataset size and writes the
+results to a JSON file, so two commits can be compared with
+``python -m benchmarks.compare``.
+
+Usage:
+    python -m benchmarks.run [--sizes 10k,100k,1m] [--filter TEXT] [--output PATH]
+"""
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from itertools import cycle
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+from unittest.mock import patch
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.common import FakeJobQueue, measure
+from benchmarks.datagen import SIZES, get_dataset
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+_BENCHMARKS: List[Tuple[str, Callable]] = []
+
+
+def benchmark(name: str):
+    """Register a benchmark. The decorated setup function receives a Context
+    and returns the zero-argument callable to time."""
+    def register(setup):
+        _BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+class Context:
+    """Per-dataset state shared by benchmarks: a private copy of the database
+    (writes never touch the cached dataset) and some representative users."""
+
+    def __init__(self, db_path: Path):
+        import sqlite3
+        from models.story import StoryDatabase
+
+        self.db = StoryDatabase(str(db_path))
+        with sqlite3.connect(self.db.db_path) as conn:
+            counts = conn.execute("""
+                SELECT user_id, COUNT(*) AS n FROM stories GROUP BY user_id ORDER BY n DESC
+            """).fetchall()
+            self.reminder_users = [row[0] for row in conn.execute(
+                "SELECT user_id FROM reminder_preferences WHERE enabled = 1"
+            )]
+        self.heavy_user = counts[0][0]
+        self.typical_user = counts[len(counts) // 2][0]
+        self.heavy_stories = self.db.get_user_stories(self.heavy_user)
+        self.typical_stories = self.db.get_user_stories(self.typical_user)
+        self.heavy_dates = self.db.get_story_dates(self.heavy_user)
+        self.heavy_story_date = datetime.strptime(self.heavy_stories[0]['created_at'][:10], '%Y-%m-%d')
+        self.report_markdown = _synthetic_report(self.heavy_stories[:60])
+
+
+def _synthetic_report(stories) -> str:
+    """A report shaped like the OpenAI output _generate_and_send_report receives."""
+    parts = ["# Your two weeks in moments", "", "You noticed **small things** and _people_.", ""]
+    parts.append("## Small moments that were bigger")
+    for story in stories:
+        parts.append("")
+        parts.append(f"### {story['created_at'][:10]}")
+        parts.append(f"*{story['story_text']}*")
+        parts.append("- Why it mattered: **attention** to __detail__")
+        parts.append("- What to tell: `the moment` before the change")
+    return '\n'.join(parts)
+
+
+# --- StoryDatabase ---
+
+@benchmark("db.save_story")
+def _(ctx):
+    return lambda: ctx.db.save_story(ctx.typical_user, "A benchmark moment.", "bench", "Bench")
+
+
+@benchmark("db.get_user_stories[typical]")
+def _(ctx):
+    return lambda: ctx.db.get_user_stories(ctx.typical_user)
+
+
+@benchmark("db.get_user_stories[heavy]")
+def _(ctx):
+    return lambda: ctx.db.get_user_stories(ctx.heavy_user)
+
+
+@benchmark("db.get_user_stories[limit=1]")
+def _(ctx):
+    return lambda: ctx.db.get_user_stories(ctx.heavy_user, limit=1)
+
+
+@benchmark("db.get_story_dates[heavy]")
+def _(ctx):
+    return lambda: ctx.db.get_story_dates(ctx.heavy_user)
+
+
+@benchmark("db.get_story_texts[heavy]")
+def _(ctx):
+    return lambda: ctx.db.get_story_texts(ctx.heavy_user)
+
+
+@benchmark("db.iter_story_texts[heavy]")
+def _(ctx):
+    return lambda: sum(1 for _ in ctx.db.iter_story_texts(ctx.heavy_user))
+
+
+@benchmark("db.get_stories_by_date")
+def _(ctx):
+    return lambda: ctx.db.get_stories_by_date(ctx.heavy_user, ctx.heavy_story_date)
+
+
+@benchmark("db.count_user_stories")
+def _(ctx):
+    return lambda: ctx.db.count_user_stories(ctx.heavy_user)
+
+
+@benchmark("db.set_reminder")
+def _(ctx):
+    users = cycle(ctx.reminder_users)
+    return lambda: ctx.db.set_reminder(next(users), "09:00", "Europe/London")
+
+
+@benchmark("db.disable_reminder")
+def _(ctx):
+    users = cycle(ctx.reminder_users)
+    return lambda: ctx.db.disable_reminder(next(users))
+
+
+@benchmark("db.get_reminder_preference")
+def _(ctx):
+    users = cycle(ctx.reminder_users)
+    return lambda: ctx.db.get_reminder_preference(next(users))
+
+
+@benchmark("db.get_all_active_reminders")
+def _(ctx):
+    return ctx.db.get_all_active_reminders
+
+
+@benchmark("db.save_feedback")
+def _(ctx):
+    return lambda: ctx.db.save_feedback(ctx.typical_user, "Benchmark feedback.", "bench", "Bench")
+
+
+@benchmark("db.get_all_feedback")
+def _(ctx):
+    return ctx.db.get_all_feedback
+
+
+# --- Renderers ---
+
+@benchmark("render._stories_summary[heavy]")
+def _(ctx):
+    from handlers.story_commands import _stories_summary
+    return lambda: _stories_summary(ctx.heavy_dates)
+
+
+@benchmark("render.build_export_content[typical]")
+def _(ctx):
+    from utils.renderers import build_export_content, export_entries
+    entries = export_entries(ctx.typical_stories)
+    return lambda: build_export_content(entries, "Bench", "2026-01-01")
+
+
+@benchmark("render.build_export_content[heavy]")
+def _(ctx):
+    from utils.renderers import build_export_content, export_entries
+    entries = export_entries(ctx.heavy_stories)
+    return lambda: build_export_content(entries, "Bench", "2026-01-01")
+
+
+@benchmark("render.build_report_html")
+def _(ctx):
+    from handlers.report_commands import _split_report
+    from utils.renderers import build_report_html
+    _, rest = _split_report(ctx.report_markdown)
+    return lambda: build_report_html(rest, "2025-12-18 to 2026-01-01")
+
+
+@benchmark("render._md_to_html+_split_text")
+def _(ctx):
+    from handlers.report_commands import TELEGRAM_MAX_LENGTH, _md_to_html, _split_text
+    return lambda: _split_text(_md_to_html(ctx.report_markdown), TELEGRAM_MAX_LENGTH)
+
+
+# --- Scheduling ---
+
+@benchmark("schedule_all_reminders")
+def _(ctx):
+    from handlers import shared
+
+    def run():
+        with patch.object(shared, 'story_db', ctx.db):
+            shared.schedule_all_reminders(FakeJobQueue())
+    return run
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent, text=True,
+            stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def run_suite(sizes: List[str], name_filter: str = '', repeat: int = 5) -> Dict:
+    commit = _git_commit()
+    results = {
+        'meta': {
+            'commit': commit,
+            'timestamp': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'results': {},
+    }
+
+    for size in sizes:
+        stories = SIZES[size]
+        print(f"\n📦 {size} ({stories:,} stories)")
+        dataset = get_dataset(stories)
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = Path(tmp) / 'stories.db'
+            shutil.copyfile(dataset, db_path)
+            ctx = Context(db_path)
+            size_results = results['results'].setdefault(size, {})
+            for name, setup in _BENCHMARKS:
+                if name_filter and name_filter not in name:
+                    continue
+                timing = measure(setup(ctx), repeat=repeat)
+                size_results[name] = timing
+                print(f"   {name:<42} {timing['median_ms']:10.3f} ms  (min {timing['min_ms']:.3f})")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument('--sizes', default='10k,100k', help="comma separated: " + ', '.join(SIZES))
+    parser.add_argument('--filter', default='', help="only run benchmarks whose name contains this")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None, help="JSON path (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+
+    sizes = [s.strip().lower() for s in args.sizes.split(',') if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes: {', '.join(unknown)}")
+
+    results = run_suite(sizes, args.filter, args.repeat)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{results['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + '\n', encoding='utf-8')
+    print(f"\n💾 Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,45 +3,38 @@
 Telegram Bot for capturing daily storyworthy moments
 """
 
+import asyncio
 import logging
 import sys
 import threading
-from telegram import BotCommand
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ConversationHandler, CallbackQueryHandler
-
-from config.settings import settings
-from handlers import (
-    BasicCommandHandlers,
-    StoryCommandHandlers,
-    ReminderCommandHandlers,
-    ReportCommandHandlers,
-    quick_action_router,
-    WAITING_FOR_STORY,
-    WAITING_FOR_REMINDER_TIME,
-    WAITING_FOR_TIMEZONE,
-)
-
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.WARNING  # Reduced from INFO to save memory
-)
+from typing import TYPE_CHECKING
+
+# Only the standard library at module level: render pool workers re-import
+# this file as __mp_main__ (services/render_pool.py), so telegram, settings
+# and the logging setup are loaded where they're used
+if TYPE_CHECKING:
+    from telegram.ext import Application
 
 logger = logging.getLogger(__name__)
 
 # Start FastAPI web server for Mini App in a daemon thread
-def _start_web_server():
+def _start_web_server(application: 'Application', bot_loop):
     import uvicorn
     from webapp.app import webapp_app
+    # Lets endpoints like POST /api/reminder run work on the bot's loop
+    webapp_app.state.telegram_app = application
+    webapp_app.state.bot_loop = bot_loop
     try:
-        print("🌐 Starting web server on 0.0.0.0:8080...", flush=True)
+        logger.info("Starting web server on 0.0.0.0:8080")
         uvicorn.run(webapp_app, host="0.0.0.0", port=8080, log_level="warning")
-    except Exception as e:
-        print(f"❌ Web server failed to start: {e}", flush=True)
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("Web server failed to start")
 
-async def post_init(application: Application) -> None:
+async def post_init(application: 'Application') -> None:
     """Set bot commands, schedule reminders, and start web server after initialization."""
+    from telegram import BotCommand
+    from config.settings import settings
+
     commands = [
         BotCommand("story", "📝 Record today's moment"),
         BotCommand("mystories", "📚 Your stats + export"),
@@ -52,22 +45,85 @@ async def post_init(application: Application) -> None:
     await application.bot.set_my_commands(commands)
     logger.info("Bot commands registered with Telegram")
 
-    from handlers.shared import schedule_all_reminders
+    from handlers.shared import (schedule_all_reminders, schedule_archiver, schedule_backups,
+                                 schedule_reminder_event_flush, schedule_rollups, schedule_user_state_eviction,
+                                 schedule_wal_archiving, start_readiness_probe)
     count = schedule_all_reminders(application.job_queue)
-    logger.info(f"Scheduled {count} daily reminder(s)")
+    schedule_reminder_event_flush(application.job_queue)
+    schedule_user_state_eviction(application.job_queue)
+    logger.info("Scheduled %s daily reminder(s)", count)
+    if schedule_archiver(application.job_queue):
+        logger.info("Archiving stories older than %s days nightly", settings.ARCHIVE_AFTER_DAYS)
+    if schedule_backups(application.job_queue):
+        logger.info("Backing up to %s every %s hours", settings.BACKUP_DIR, settings.BACKUP_INTERVAL_HOURS)
+    if schedule_wal_archiving(application.job_queue):
+        logger.info("Archiving the WAL to %s every %ss", settings.WAL_ARCHIVE_DIR, settings.WAL_ARCHIVE_INTERVAL)
+    if schedule_rollups(application.job_queue):
+        logger.info("Refreshing admin stats every %s minutes", settings.STATS_ROLLUP_MINUTES)
+    if start_readiness_probe(application.job_queue):
+        logger.info("Probing the event loop for /ready every %ss", settings.READY_PROBE_INTERVAL)
 
-    web_thread = threading.Thread(target=_start_web_server, daemon=True)
+    web_thread = threading.Thread(target=_start_web_server, args=(application, asyncio.get_running_loop()),
+                                  daemon=True)
     web_thread.start()
     logger.info("Web server thread started on port 8080")
 
-def main():
-    """Main function to run the Telegram bot"""
-    if not settings.validate():
-        print("Please set BOT_TOKEN environment variable")
-        sys.exit(1)
+async def post_shutdown(application: 'Application') -> None:
+    """Stop the readiness probe and render workers, and write reminder events still buffered."""
+    from handlers.shared import reminder_events, stop_readiness_probe
+    from services.render_pool import shutdown_render_pool
+    stop_readiness_probe()
+    shutdown_render_pool()
+    reminder_events.flush()
 
-    print("🤖 Starting Bot...")
-    telegram_app = Application.builder().token(settings.BOT_TOKEN).build()
+def build_application(token: str, base_url: str = None, concurrent_updates=False) -> 'Application':
+    """
+    Build the Application with all handlers registered.
+
+    Args:
+        token: Bot token
+        base_url: Optional Bot API base URL (e.g. a local Bot API server or the
+            fake server in benchmarks/fake_telegram.py), ending in ``/bot``
+        concurrent_updates: Passed to ApplicationBuilder.concurrent_updates
+    """
+    from telegram import Update
+    from telegram.ext import (Application, CallbackQueryHandler, CommandHandler, ConversationHandler,
+                              MessageHandler, TypeHandler, filters)
+    from config.settings import settings
+    # Imported here so a missing BOT_TOKEN fails fast, before the handlers
+    # (and the database they open) are loaded
+    from handlers import (
+        BasicCommandHandlers,
+        StoryCommandHandlers,
+        ReminderCommandHandlers,
+        ReportCommandHandlers,
+        AdminCommandHandlers,
+        ImportCommandHandlers,
+        quick_action_router,
+        UpdateTimingMiddleware,
+        WAITING_FOR_STORY,
+        WAITING_FOR_REMINDER_TIME,
+        WAITING_FOR_TIMEZONE,
+        WAITING_FOR_IMPORT,
+    )
+
+    # Unfinished /story, /setreminder and /import conversations end after this, so
+    # abandoned ones don't stay in the handlers' state forever
+    conversation_timeout = settings.CONVERSATION_TIMEOUT_MINUTES * 60 or None
+
+    builder = Application.builder().token(token).concurrent_updates(concurrent_updates)
+    if base_url:
+        builder = builder.base_url(base_url)
+        if base_url.endswith('/bot'):
+            builder = builder.base_file_url(base_url[:-len('bot')] + 'file/bot')
+    telegram_app = builder.build()
+
+    # Time every update end to end (group -1 runs before all other handlers)
+    UpdateTimingMiddleware().register(telegram_app)
+
+    # Record each user's current names in the users table
+    from handlers.shared import USER_TRACKING_GROUP, track_user
+    telegram_app.add_handler(TypeHandler(Update, track_user), group=USER_TRACKING_GROUP)
 
     # Quick action conversation handler (from /start inline buttons)
     quick_action_conversation = ConversationHandler(
@@ -80,7 +136,8 @@ def main():
         fallbacks=[
             CommandHandler("cancel", StoryCommandHandlers.cancel_story),
             CallbackQueryHandler(StoryCommandHandlers.cancel_story_callback, pattern="^cancel:story")
-        ]
+        ],
+        conversation_timeout=conversation_timeout,
     )
     telegram_app.add_handler(quick_action_conversation)
 
@@ -95,7 +152,8 @@ def main():
         fallbacks=[
             CommandHandler("cancel", StoryCommandHandlers.cancel_story),
             CallbackQueryHandler(StoryCommandHandlers.cancel_story_callback, pattern="^cancel:story")
-        ]
+        ],
+        conversation_timeout=conversation_timeout,
     )
     telegram_app.add_handler(story_conversation)
     
@@ -112,14 +170,33 @@ def main():
             ],
             WAITING_FOR_REMINDER_TIME: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, ReminderCommandHandlers.receive_reminder_time)
-            ]
+            ],
+            ConversationHandler.TIMEOUT: [TypeHandler(Update, ReminderCommandHandlers.reminder_setup_timeout)],
         },
         fallbacks=[
             CommandHandler("cancel", ReminderCommandHandlers.cancel_reminder),
             CallbackQueryHandler(ReminderCommandHandlers.cancel_reminder_callback, pattern="^cancel:reminder")
-        ]
+        ],
+        conversation_timeout=conversation_timeout,
     )
     telegram_app.add_handler(reminder_conversation)
+
+    # Import from an uploaded file
+    import_conversation = ConversationHandler(
+        entry_points=[CommandHandler("import", ImportCommandHandlers.import_command)],
+        states={
+            WAITING_FOR_IMPORT: [
+                MessageHandler(filters.Document.ALL, ImportCommandHandlers.receive_import_file),
+                MessageHandler(filters.TEXT & ~filters.COMMAND, ImportCommandHandlers.expect_document)
+            ]
+        },
+        fallbacks=[
+            CommandHandler("cancel", ImportCommandHandlers.cancel_import),
+            CallbackQueryHandler(ImportCommandHandlers.cancel_import_callback, pattern="^cancel:import")
+        ],
+        conversation_timeout=conversation_timeout,
+    )
+    telegram_app.add_handler(import_conversation)
     
     # Other commands
     telegram_app.add_handler(CommandHandler("start", BasicCommandHandlers.start_command))
@@ -130,12 +207,29 @@ def main():
     telegram_app.add_handler(CommandHandler("reminders", ReminderCommandHandlers.reminders_command))
     telegram_app.add_handler(CommandHandler("report", ReportCommandHandlers.report_command))
     telegram_app.add_handler(CallbackQueryHandler(ReportCommandHandlers.report_all_callback, pattern="^report:all$"))
+    telegram_app.add_handler(CommandHandler("admin", AdminCommandHandlers.admin_command))
+    telegram_app.add_handler(CallbackQueryHandler(AdminCommandHandlers.feedback_page_callback, pattern="^admin:fb:"))
     telegram_app.add_handler(MessageHandler(filters.StatusUpdate.WEB_APP_DATA, ReminderCommandHandlers.handle_web_app_data))
     telegram_app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, StoryCommandHandlers.receive_story_after_reminder))
     telegram_app.add_handler(MessageHandler(filters.COMMAND, BasicCommandHandlers.unknown_command))
     telegram_app.add_error_handler(BasicCommandHandlers.error_handler)
-    
+    return telegram_app
+
+def main():
+    """Main function to run the Telegram bot"""
+    from config.settings import settings
+    from utils.logging_config import configure_logging
+
+    # Queue-backed logging; level WARNING by default (LOG_LEVEL / LOG_LEVELS to override)
+    configure_logging()
+    if not settings.validate():
+        print("Please fix the settings above in the environment or .env")
+        sys.exit(1)
+
+    print("🤖 Starting Bot...")
+    telegram_app = build_application(settings.BOT_TOKEN, settings.TELEGRAM_BASE_URL)
     telegram_app.post_init = post_init
+    telegram_app.post_shutdown = post_shutdown
     
     logger.info("Bot running. Press Ctrl+C to stop.")
     logger.info("Reminder system activated - daily jobs loaded.")
@@ -12,17 +12,89 @@ class Settings:
     
     # Bot configuration
     BOT_TOKEN: str = os.getenv('BOT_TOKEN', '')
+    # Optional Bot API server override, e.g. http://127.0.0.1:8081/bot
+    TELEGRAM_BASE_URL: str = os.getenv('TELEGRAM_BASE_URL', '')
 
     # OpenAI configuration
     OPENAI_API_KEY: str = os.getenv('OPENAI_API_KEY', '')
     OPENAI_MODEL: str = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')
 
+    # Slow update diagnostics
+    SLOW_UPDATE_THRESHOLD_MS: int = int(os.getenv('SLOW_UPDATE_THRESHOLD_MS', '2000'))
+    SLOW_UPDATE_DIR: str = os.getenv('SLOW_UPDATE_DIR', os.path.join(os.getenv('DB_DIR', 'data'), 'slow_updates'))
+    SLOW_UPDATE_MAX_FILES: int = int(os.getenv('SLOW_UPDATE_MAX_FILES', '50'))
+    # Fraction of updates run under cProfile (profiles are only kept when slow)
+    SLOW_UPDATE_PROFILE_RATE: float = float(os.getenv('SLOW_UPDATE_PROFILE_RATE', '0.0'))
+
+    # Export/report rendering: worker processes (0 renders everything inline)
+    # and the input size from which a render is sent to them
+    RENDER_WORKERS: int = int(os.getenv('RENDER_WORKERS', '1'))
+    RENDER_OFFLOAD_MIN_BYTES: int = int(os.getenv('RENDER_OFFLOAD_MIN_BYTES', '65536'))
+
+    # Master key for encrypting story text at rest (unset = stories are stored unencrypted)
+    STORY_ENCRYPTION_KEY: str = os.getenv('STORY_ENCRYPTION_KEY', '')
+
+    # Stories older than this many days move nightly to stories_archive.db (0 = never)
+    ARCHIVE_AFTER_DAYS: int = int(os.getenv('ARCHIVE_AFTER_DAYS', '0'))
+
+    # Online snapshots of stories.db (and the archive) every BACKUP_INTERVAL_HOURS (0 = never)
+    BACKUP_DIR: str = os.getenv('BACKUP_DIR', os.path.join(os.getenv('DB_DIR', 'data'), 'backups'))
+    BACKUP_INTERVAL_HOURS: float = float(os.getenv('BACKUP_INTERVAL_HOURS', '24'))
+    BACKUP_KEEP: int = int(os.getenv('BACKUP_KEEP', '7'))
+
+    # Ship committed WAL frames every WAL_ARCHIVE_INTERVAL seconds for point-in-time restore (0 = off)
+    WAL_ARCHIVE_DIR: str = os.getenv('WAL_ARCHIVE_DIR', os.path.join(os.getenv('DB_DIR', 'data'), 'wal_archive'))
+    WAL_ARCHIVE_INTERVAL: float = float(os.getenv('WAL_ARCHIVE_INTERVAL', '0'))
+    WAL_ARCHIVE_KEEP: int = int(os.getenv('WAL_ARCHIVE_KEEP', '7'))
+
+    # Admins: Telegram user IDs allowed to run /admin, and the bearer token
+    # for the webapp's /api/admin endpoints (unset = those endpoints are off)
+    ADMIN_USER_IDS: frozenset = frozenset(
+        int(user_id) for user_id in os.getenv('ADMIN_USER_IDS', '').replace(',', ' ').split()
+    )
+    ADMIN_API_TOKEN: str = os.getenv('ADMIN_API_TOKEN', '')
+    # Minutes between refreshes of the admin stats rollups (0 = never)
+    STATS_ROLLUP_MINUTES: float = float(os.getenv('STATS_ROLLUP_MINUTES', '60'))
+
+    # Transient per-user state (pending reminder replies, /setreminder progress):
+    # forgotten after USER_STATE_TTL_HOURS idle, oldest first past USER_STATE_MAX_USERS
+    USER_STATE_TTL_HOURS: float = float(os.getenv('USER_STATE_TTL_HOURS', '24'))
+    USER_STATE_MAX_USERS: int = int(os.getenv('USER_STATE_MAX_USERS', '50000'))
+    # Minutes before an unfinished /story, /setreminder or /import conversation is dropped (0 = never)
+    CONVERSATION_TIMEOUT_MINUTES: float = float(os.getenv('CONVERSATION_TIMEOUT_MINUTES', '30'))
+
+    # /import: largest upload accepted (the Bot API downloads at most 20 MB),
+    # stories inserted per transaction, and seconds between progress edits
+    IMPORT_MAX_BYTES: int = int(os.getenv('IMPORT_MAX_BYTES', str(20 * 1024 * 1024)))
+    IMPORT_BATCH_SIZE: int = int(os.getenv('IMPORT_BATCH_SIZE', '1000'))
+    IMPORT_PROGRESS_SECONDS: float = float(os.getenv('IMPORT_PROGRESS_SECONDS', '2'))
+
+    # /ready: seconds between event loop probes (0 = off, /ready then reports
+    # not ready), and the limits past which the instance counts as degraded
+    READY_PROBE_INTERVAL: float = float(os.getenv('READY_PROBE_INTERVAL', '1'))
+    READY_MAX_LOOP_LAG: float = float(os.getenv('READY_MAX_LOOP_LAG', '1'))
+    READY_MAX_DB_LATENCY: float = float(os.getenv('READY_MAX_DB_LATENCY', '1'))
+    READY_MAX_JOB_LAG: float = float(os.getenv('READY_MAX_JOB_LAG', '60'))
+    # Seconds without a processed update before /ready fails (0 = not checked)
+    READY_MAX_UPDATE_AGE: float = float(os.getenv('READY_MAX_UPDATE_AGE', '0'))
+
     @classmethod
     def validate(cls) -> bool:
         """Validate that required settings are present"""
         if not cls.BOT_TOKEN:
             print("❌ Error: BOT_TOKEN not found in environment variables!")
             return False
+        if cls.STORY_ENCRYPTION_KEY:
+            # Checked here so a bad key stops the bot with a reason, not a traceback
+            from models.encryption import AESGCM, load_master_key
+            if AESGCM is None:
+                print("❌ Error: STORY_ENCRYPTION_KEY is set but the cryptography package is not installed!")
+                return False
+            try:
+                load_master_key(cls.STORY_ENCRYPTION_KEY)
+            except ValueError as e:
+                print(f"❌ Error: {e}!")
+                return False
         return True
 
 # Global settings instance
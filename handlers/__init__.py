@@ -4,15 +4,22 @@ from .basic_commands import BasicCommandHandlers
 from .story_commands import StoryCommandHandlers, WAITING_FOR_STORY
 from .reminder_commands import ReminderCommandHandlers, WAITING_FOR_REMINDER_TIME, WAITING_FOR_TIMEZONE
 from .report_commands import ReportCommandHandlers
+from .admin_commands import AdminCommandHandlers
+from .import_commands import ImportCommandHandlers, WAITING_FOR_IMPORT
 from .quick_actions import quick_action_router
+from .update_timing import UpdateTimingMiddleware
 
 __all__ = [
     'BasicCommandHandlers',
     'StoryCommandHandlers',
     'ReminderCommandHandlers',
     'ReportCommandHandlers',
+    'AdminCommandHandlers',
+    'ImportCommandHandlers',
     'quick_action_router',
+    'UpdateTimingMiddleware',
     'WAITING_FOR_STORY',
     'WAITING_FOR_REMINDER_TIME',
     'WAITING_FOR_TIMEZONE',
+    'WAITING_FOR_IMPORT',
 ]
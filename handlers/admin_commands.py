@@ -0,0 +1,165 @@
+"""
+Admin-only commands: /admin stats reads the precomputed rollups, never the
+stories table itself; /admin feedback pages through feedback with an inline
+keyboard and /admin feedback_csv exports it; /admin mem shows RSS and
+tracemalloc's top allocators or snapshot diffs.
+"""
+import asyncio
+import html
+import logging
+import os
+import tempfile
+from datetime import datetime
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.ext import ContextTypes
+from config.settings import settings
+from .shared import story_db
+from utils.memory import profiler
+from utils.metrics import instrument_handlers
+from utils.renderers import feedback_csv
+
+logger = logging.getLogger(__name__)
+
+STATS_DAYS = 7
+FEEDBACK_PAGE_SIZE = 5
+# Longer feedback is cut in the browser (the CSV has it in full)
+FEEDBACK_PREVIEW_CHARS = 600
+
+USAGE = (
+    "Usage:\n"
+    "/admin stats\n"
+    "/admin feedback [user_id]\n"
+    "/admin feedback_csv [user_id]\n"
+    "/admin mem [start|top|diff|stop]"
+)
+
+# Leaves room for the <pre> wrapper and escaping within Telegram's 4096
+MEM_REPORT_CHARS = 3500
+
+
+def format_stats(stats: dict) -> str:
+    """Render get_stats() output as an HTML message with a monospaced table."""
+    totals, last_24h = stats['totals'], stats['last_24h']
+    lines = [
+        f"{'Day':<10} {'DAU':>5} {'Stories':>7} {'New':>4} {'Fdbk':>4}",
+        *(f"{row['day']:<10} {row['active_users']:>5} {row['stories']:>7} {row['new_users']:>4} {row['feedback']:>4}"
+          for row in stats['daily']),
+    ]
+    return (
+        f"📊 <b>Stats</b> (UTC, updated {html.escape(str(stats['updated_at'] or 'never'))})\n\n"
+        f"Last 24h: {last_24h['stories']} stories, {last_24h['feedback']} feedback\n"
+        f"Users: {totals['users']} total, {totals['reminders_enabled']} with reminders on\n"
+        f"All time: {totals['stories']} stories, {totals['feedback']} feedback\n\n"
+        f"<pre>{html.escape(chr(10).join(lines))}</pre>"
+    )
+
+
+def format_feedback_page(rows: list, user_id: int = None) -> str:
+    """Render one page of feedback as HTML."""
+    title = "💬 <b>Feedback</b>" + (f" from user {user_id}" if user_id else "") + ", newest first"
+    if not rows:
+        return f"{title}\n\n📭 Nothing here."
+    entries = []
+    for row in rows:
+        who = html.escape(row['first_name'] or "?")
+        if row['username']:
+            who += f" (@{html.escape(row['username'])})"
+        text = row['feedback_text']
+        if len(text) > FEEDBACK_PREVIEW_CHARS:
+            text = text[:FEEDBACK_PREVIEW_CHARS] + "…"
+        entries.append(f"<b>{row['created_at'][:16]}</b> · {who} · <code>{row['user_id']}</code>\n"
+                       f"{html.escape(text)}")
+    return f"{title}\n\n" + "\n\n".join(entries)
+
+
+def _feedback_keyboard(user_id: int, next_cursor: str, at_start: bool):
+    # callback_data is capped at 64 bytes: "admin:fb:<user>:<created_at>|<id>" fits
+    prefix = f"admin:fb:{user_id or ''}:"
+    buttons = []
+    if not at_start:
+        buttons.append(InlineKeyboardButton("⏮ Newest", callback_data=prefix))
+    if next_cursor:
+        buttons.append(InlineKeyboardButton("Older ▶", callback_data=prefix + next_cursor))
+    return InlineKeyboardMarkup([buttons]) if buttons else None
+
+
+def _is_admin(update: Update) -> bool:
+    return update.effective_user.id in settings.ADMIN_USER_IDS
+
+
+def _user_id_arg(args: list):
+    return int(args[0]) if args and args[0].isdigit() else None
+
+
+@instrument_handlers
+class AdminCommandHandlers:
+    story_db = story_db
+
+    @staticmethod
+    async def admin_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Handle /admin <subcommand>; anyone not in ADMIN_USER_IDS gets the unknown-command reply."""
+        if not _is_admin(update):
+            await update.message.reply_text(
+                "🤔 I don't recognize that command. Use /help to see all available commands!"
+            )
+            return
+
+        subcommand, args = (context.args or [''])[0], (context.args or [])[1:]
+        if subcommand == 'stats':
+            # A handful of rollup rows, cheap enough for the event loop
+            stats = AdminCommandHandlers.story_db.get_stats(STATS_DAYS)
+            await update.message.reply_text(format_stats(stats), parse_mode='HTML')
+        elif subcommand == 'feedback':
+            user_id = _user_id_arg(args)
+            rows, next_cursor = AdminCommandHandlers.story_db.get_feedback_page(FEEDBACK_PAGE_SIZE, user_id=user_id)
+            await update.message.reply_text(
+                format_feedback_page(rows, user_id),
+                parse_mode='HTML',
+                reply_markup=_feedback_keyboard(user_id, next_cursor, at_start=True),
+            )
+        elif subcommand == 'feedback_csv':
+            await AdminCommandHandlers._send_feedback_csv(update, _user_id_arg(args))
+        elif subcommand == 'mem':
+            # Snapshots walk every traced block: off the event loop
+            report = await asyncio.to_thread(profiler.run, args[0] if args else 'top')
+            await update.message.reply_text(f"<pre>{html.escape(report[:MEM_REPORT_CHARS])}</pre>", parse_mode='HTML')
+        else:
+            await update.message.reply_text(USAGE)
+
+    @staticmethod
+    async def feedback_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Show the feedback page after the cursor in ``admin:fb:<user_id>:<cursor>``."""
+        query = update.callback_query
+        await query.answer()
+        if not _is_admin(update):
+            return
+
+        user_part, _, cursor = query.data[len("admin:fb:"):].partition(':')
+        user_id = int(user_part) if user_part else None
+        try:
+            rows, next_cursor = AdminCommandHandlers.story_db.get_feedback_page(
+                FEEDBACK_PAGE_SIZE, before=cursor or None, user_id=user_id
+            )
+        except ValueError:
+            logger.warning("Bad feedback cursor in callback: %s", query.data)
+            return
+        await query.edit_message_text(
+            format_feedback_page(rows, user_id),
+            parse_mode='HTML',
+            reply_markup=_feedback_keyboard(user_id, next_cursor, at_start=not cursor),
+        )
+
+    @staticmethod
+    async def _send_feedback_csv(update: Update, user_id: int = None) -> None:
+        """Stream feedback into a temporary CSV file off the event loop and send it."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, f"feedback-{datetime.utcnow():%Y%m%d}.csv")
+
+            def write() -> None:
+                with open(path, 'w', newline='', encoding='utf-8') as f:
+                    for chunk in feedback_csv(AdminCommandHandlers.story_db.iter_feedback(user_id=user_id)):
+                        f.write(chunk)
+
+            await asyncio.to_thread(write)
+            with open(path, 'rb') as f:
+                await update.message.reply_document(document=f, filename=os.path.basename(path))
@@ -5,11 +5,13 @@ import logging
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from utils.assets import load_about_message
+from utils.metrics import instrument_handlers
 from .shared import story_db
 
 logger = logging.getLogger(__name__)
 
 
+@instrument_handlers
 class BasicCommandHandlers:
     """Basic command handlers for start, about, help, and error handling"""
     
@@ -62,6 +64,7 @@ class BasicCommandHandlers:
             "/reminders — manage daily reminders\n"
             "/mystories — your stats + export\n"
             "/export — download all stories as a file\n"
+            "/import — add moments from a file\n"
             "/about — what is Homework for Life",
         )
     
@@ -113,6 +116,7 @@ class BasicCommandHandlers:
             "/reminders — manage daily reminders\n"
             "/mystories — your stats + export\n"
             "/export — download all stories as a file\n"
+            "/import — add moments from a file\n"
             "/about — what is Homework for Life",
         )
         return ConversationHandler.END
@@ -0,0 +1,157 @@
+"""
+/import — bulk import of old moments from an uploaded file
+"""
+import asyncio
+import html
+import logging
+import os
+import tempfile
+import time
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import TelegramError
+from telegram.ext import ContextTypes, ConversationHandler
+from config.settings import settings
+from services.story_import import ImportFormatError, StoryImporter
+from utils.metrics import instrument_handlers
+from .shared import story_db
+
+logger = logging.getLogger(__name__)
+
+# Conversation states
+WAITING_FOR_IMPORT = 4
+
+# Users with an import running; another upload is turned away until it finishes
+_importing = set()
+
+
+@instrument_handlers
+class ImportCommandHandlers:
+    """Handlers for importing stories from a file"""
+    story_db = story_db
+
+    @staticmethod
+    async def import_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Ask for the file to import."""
+        keyboard = [[InlineKeyboardButton("❌ Cancel", callback_data="cancel:import")]]
+        await update.message.reply_text(
+            "📥 <b>Import moments</b>\n\n"
+            "Send me a file as a document. I can read:\n"
+            "• an HTML file from /export\n"
+            "• JSONL or CSV with a date and a text for each moment\n"
+            "• plain text where each moment starts with a date, like <code>2024-03-01: …</code>\n\n"
+            "Moments you already have are skipped.",
+            parse_mode='HTML',
+            reply_markup=InlineKeyboardMarkup(keyboard)
+        )
+        return WAITING_FOR_IMPORT
+
+    @staticmethod
+    async def receive_import_file(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Check the upload and start importing it in the background."""
+        user = update.effective_user
+        document = update.message.document
+
+        if document.file_size and document.file_size > settings.IMPORT_MAX_BYTES:
+            await update.message.reply_text(
+                f"😅 That file is too big. I can import files up to "
+                f"{settings.IMPORT_MAX_BYTES // (1024 * 1024)} MB."
+            )
+            return ConversationHandler.END
+        if user.id in _importing:
+            await update.message.reply_text("⏳ Your last import is still running. I'll tell you when it's done.")
+            return ConversationHandler.END
+
+        _importing.add(user.id)
+        name = html.escape(document.file_name or 'your file')
+        status = await update.message.reply_text(f"📥 Importing <b>{name}</b>…", parse_mode='HTML')
+        # Updates are handled one at a time: a long import must not hold up everyone else's
+        context.application.create_task(_run_import(document, status, user.id), update=update)
+        return ConversationHandler.END
+
+    @staticmethod
+    async def expect_document(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Remind the user that the import needs a file, not a message."""
+        await update.message.reply_text("📎 Please send the file as a document, or /cancel.")
+        return WAITING_FOR_IMPORT
+
+    @staticmethod
+    async def cancel_import(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Cancel the import conversation."""
+        await update.message.reply_text("No problem! Nothing was imported.")
+        return ConversationHandler.END
+
+    @staticmethod
+    async def cancel_import_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+        """Handle cancel button click for the import."""
+        query = update.callback_query
+        await query.answer()
+        await query.edit_message_text("No problem! Nothing was imported.")
+        return ConversationHandler.END
+
+
+async def _edit_status(status, text: str, **kwargs) -> None:
+    try:
+        await status.edit_text(text, parse_mode='HTML', **kwargs)
+    except TelegramError as e:
+        # Progress is best effort (e.g. "message is not modified")
+        logger.debug("Couldn't update import status: %s", e)
+
+
+def _progress_text(stats) -> str:
+    return (
+        f"📥 Importing… <b>{stats.fraction:.0%}</b>\n\n"
+        f"{stats.imported:,} moments added, {stats.duplicates:,} already there."
+    )
+
+
+def _summary_text(stats) -> str:
+    lines = [f"✅ Imported <b>{stats.imported:,}</b> moment{'s' if stats.imported != 1 else ''}."]
+    if stats.duplicates:
+        lines.append(f"Skipped {stats.duplicates:,} you already had.")
+    if stats.invalid:
+        lines.append(f"Skipped {stats.invalid:,} I couldn't read:")
+        lines.extend(f"• line {line_no}: {html.escape(reason)}" for line_no, reason in stats.errors)
+    return "\n".join(lines)
+
+
+def _failure_text(reason: str, stats) -> str:
+    text = f"😅 {reason}"
+    if stats is not None and stats.imported:
+        # Batches commit as they go; a retry skips them as duplicates
+        text += (f"\n\n{stats.imported:,} moments were imported before that. "
+                 "Sending the file again skips them.")
+    return text
+
+
+async def _run_import(document, status, user_id: int) -> None:
+    """Download the file, import it batch by batch off the event loop and report progress."""
+    final = None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'import')
+            file = await document.get_file()
+            await file.download_to_drive(path)
+
+            importer = StoryImporter(ImportCommandHandlers.story_db, user_id, path, document.file_name,
+                                     batch_size=settings.IMPORT_BATCH_SIZE)
+            batches = importer.run()
+            last_edit = time.monotonic()
+            while True:
+                stats = await asyncio.to_thread(next, batches, None)
+                if stats is None:
+                    break
+                final = stats
+                if time.monotonic() - last_edit >= settings.IMPORT_PROGRESS_SECONDS:
+                    await _edit_status(status, _progress_text(stats))
+                    last_edit = time.monotonic()
+
+        keyboard = [[InlineKeyboardButton("📚 View My Stories", callback_data="quick:mystories")]]
+        await _edit_status(status, _summary_text(final), reply_markup=InlineKeyboardMarkup(keyboard))
+    except ImportFormatError as e:
+        await _edit_status(status, _failure_text(f"I couldn't import that file. {html.escape(str(e))}.", final))
+    except Exception:
+        logger.exception("Import failed for user %s", user_id)
+        await _edit_status(status, _failure_text(
+            "Oops! Something went wrong importing your file. Please try again with /import", final))
+    finally:
+        _importing.discard(user_id)
@@ -35,7 +35,7 @@ async def quick_action_router(update: Update, context: ContextTypes.DEFAULT_TYPE
     try:
         action = query.data.split(':')[1]
     except IndexError:
-        logger.error(f"Invalid callback data format: {query.data}")
+        logger.error("Invalid callback data format: %s", query.data)
         await query.answer("❌ Invalid action", show_alert=True)
         return
     
@@ -43,9 +43,9 @@ async def quick_action_router(update: Update, context: ContextTypes.DEFAULT_TYPE
     handler = QUICK_ACTION_HANDLERS.get(action)
     
     if handler:
-        logger.info(f"Routing quick action '{action}' to {handler.__name__}")
+        logger.info("Routing quick action '%s' to %s", action, handler.__name__)
         return await handler(update, context)
     else:
-        logger.warning(f"Unknown quick action: {action}")
+        logger.warning("Unknown quick action: %s", action)
         await query.answer("❌ Unknown action", show_alert=True)
         return
@@ -1,15 +1,21 @@
 """
 Reminder-related command handlers for the Telegram Bot
 """
+import html
 import json
 import logging
-import os
 import re
-from datetime import datetime
-import pytz
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, KeyboardButton, ReplyKeyboardMarkup, WebAppInfo
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 from telegram.ext import ContextTypes, ConversationHandler
-from .shared import story_db, schedule_reminder_job, cancel_reminder_job
+from utils.metrics import instrument_handlers
+from .shared import story_db, schedule_reminder_job, cancel_reminder_job, user_state, webapp_url
+from services.timezones import (
+    UnknownTimezoneError,
+    is_valid_timezone,
+    local_now,
+    local_to_utc,
+    utc_to_local,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,20 +24,50 @@ WAITING_FOR_REMINDER_TIME = 2
 WAITING_FOR_TIMEZONE = 3
 
 
-def _get_webapp_url() -> str:
-    """Return the public URL for the Mini App."""
-    url = os.environ.get("WEBAPP_URL")
-    if not url:
-        logger.warning("WEBAPP_URL env var not set — Mini App buttons will use localhost")
-        return "http://localhost:8080"
-    return url
-
-
 def _webapp_reminder_url() -> str:
     """Return Mini App URL."""
-    return _get_webapp_url() + "/webapp/reminder"
+    return webapp_url("reminder.html")
+
+
+def _quick_picker_button() -> InlineKeyboardButton:
+    """
+    Inline button opening the reminder Mini App. Launched this way, Telegram
+    hands the app signed initData, which POST /api/reminder needs (reply
+    keyboard buttons only allow sendData).
+    """
+    return InlineKeyboardButton("⚡ Set Reminder (Quick)", web_app=WebAppInfo(url=_webapp_reminder_url()))
+
+
+_TIME_PATTERN = re.compile(r'^([0-1]?[0-9]|2[0-3]):([0-5][0-9])$')
+
+
+class InvalidReminderError(ValueError):
+    """A reminder time or timezone from the Mini App doesn't parse."""
 
 
+async def apply_reminder(job_queue, user_id: int, time_str: str, timezone_str: str) -> str:
+    """
+    Save a reminder given in local time and (re)schedule its daily job.
+    Must run on the bot's event loop, which owns the job queue.
+
+    Returns:
+        The reminder time in UTC (HH:MM)
+
+    Raises:
+        InvalidReminderError: if the time or timezone is invalid
+    """
+    if not isinstance(time_str, str) or not _TIME_PATTERN.match(time_str):
+        raise InvalidReminderError("Invalid time format")
+    if not is_valid_timezone(timezone_str):
+        raise InvalidReminderError(f"Unknown timezone {timezone_str}")
+
+    utc_time_str = local_to_utc(time_str, timezone_str)
+    story_db.set_reminder(user_id=user_id, reminder_time=utc_time_str, timezone=timezone_str)
+    schedule_reminder_job(job_queue, user_id, utc_time_str, timezone_str)
+    return utc_time_str
+
+
+@instrument_handlers
 class ReminderCommandHandlers:
     """Handlers for reminder management"""
     
@@ -49,24 +85,18 @@ class ReminderCommandHandlers:
         status_text = ""
         if reminder_pref and reminder_pref['enabled']:
             try:
+                # Convert stored UTC time to the user's local time
                 timezone_str = reminder_pref.get('timezone', 'UTC')
-                user_tz = pytz.timezone(timezone_str)
-                
-                # Parse UTC time and convert to local
-                utc_time_str = reminder_pref['reminder_time']
-                hour, minute = map(int, utc_time_str.split(':'))
-                utc_now = datetime.now(pytz.UTC)
-                utc_time = utc_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                local_time = utc_time.astimezone(user_tz)
-                local_time_str = local_time.strftime('%H:%M')
+                local_time_str = utc_to_local(reminder_pref['reminder_time'], timezone_str)
                 
                 status_text = f"\n\n✅ <b>Active Reminder:</b> {local_time_str} ({timezone_str})"
-            except:
+            except Exception:
                 status_text = f"\n\n✅ <b>Active Reminder:</b> {reminder_pref['reminder_time']} UTC"
         else:
             status_text = "\n\n🔕 No active reminder set"
         
         keyboard = [
+            [_quick_picker_button()],
             [InlineKeyboardButton("⏰ Set Daily Reminder", callback_data="reminder:set")],
             [InlineKeyboardButton("🔕 Stop Reminders", callback_data="reminder:stop")],
         ]
@@ -75,17 +105,10 @@ class ReminderCommandHandlers:
         message = (
             "⏰ <b>Reminder Settings</b>\n\n"
             "Set up daily reminders to capture your storyworthy moments.{status_text}\n\n"
-            "Choose an option below, or tap the button at the bottom to use the quick visual picker:"
+            "Choose an option below, or open the quick visual picker:"
         ).format(status_text=status_text)
         
         await update.message.reply_text(message, parse_mode='HTML', reply_markup=reply_markup)
-        
-        webapp_markup = ReplyKeyboardMarkup(
-            [[KeyboardButton("⚡ Set Reminder (Quick)", web_app=WebAppInfo(url=_webapp_reminder_url()))]],
-            one_time_keyboard=True,
-            resize_keyboard=True
-        )
-        await update.message.reply_text("👇 Tap below for the quick time picker:", reply_markup=webapp_markup)
     
     @staticmethod
     async def setreminder_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -174,17 +197,7 @@ class ReminderCommandHandlers:
         # Convert UTC time to user's local timezone
         try:
             timezone_str = reminder_pref.get('timezone', 'UTC')
-            user_tz = pytz.timezone(timezone_str)
-            
-            # Parse UTC time
-            utc_time_str = reminder_pref['reminder_time']
-            hour, minute = map(int, utc_time_str.split(':'))
-            
-            # Create UTC datetime and convert to user's timezone
-            utc_now = datetime.now(pytz.UTC)
-            utc_time = utc_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            local_time = utc_time.astimezone(user_tz)
-            local_time_str = local_time.strftime('%H:%M')
+            local_time_str = utc_to_local(reminder_pref['reminder_time'], timezone_str)
             
             info_message = (
                 f"⏰ <b>Reminder Status</b>\n\n"
@@ -193,7 +206,7 @@ class ReminderCommandHandlers:
                 f"Timezone: <b>{timezone_str}</b>\n\n"
             )
         except Exception as e:
-            logger.error(f"Error converting timezone: {e}")
+            logger.error("Error converting timezone: %s", e)
             info_message = (
                 f"⏰ <b>Reminder Status</b>\n\n"
                 f"Status: {status}\n"
@@ -212,6 +225,7 @@ class ReminderCommandHandlers:
     @staticmethod
     async def cancel_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
         """Cancel the reminder setup conversation."""
+        user_state.clear_timezone(update.effective_user.id)
         await update.message.reply_text(
             "No problem! Your reminder wasn't changed.\n\n"
             "Use /setreminder whenever you want to set it up! 👋"
@@ -223,6 +237,7 @@ class ReminderCommandHandlers:
         """Handle cancel button click for reminder setup."""
         query = update.callback_query
         await query.answer()
+        user_state.clear_timezone(query.from_user.id)
         
         await query.edit_message_text(
             "No problem! Your reminder wasn't changed.\n\n"
@@ -230,9 +245,20 @@ class ReminderCommandHandlers:
         )
         return ConversationHandler.END
     
+    @staticmethod
+    async def reminder_setup_timeout(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Drop the timezone of a /setreminder conversation that timed out."""
+        user = update.effective_user if update else None
+        if user is not None:
+            user_state.clear_timezone(user.id)
+    
     @staticmethod
     async def handle_web_app_data(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-        """Handle data sent from the Telegram Mini App."""
+        """
+        Handle data sent from the Telegram Mini App. Only reply-keyboard
+        launches (keyboards sent before the inline button) get here; inline
+        launches save through POST /api/reminder.
+        """
         user = update.effective_user
         raw = update.effective_message.web_app_data.data
 
@@ -247,53 +273,31 @@ class ReminderCommandHandlers:
             )
             return
 
-        time_pattern = re.compile(r'^([0-1]?[0-9]|2[0-3]):([0-5][0-9])$')
-        if not time_str or not time_pattern.match(time_str):
-            await update.message.reply_text(
-                "⚠️ Invalid time format. Please try the Mini App again or use /setreminder.",
-                parse_mode='HTML',
-            )
-            return
-
         try:
-            user_tz = pytz.timezone(timezone_str)
-        except pytz.exceptions.UnknownTimeZoneError:
+            utc_time_str = await apply_reminder(context.application.job_queue, user.id, time_str, timezone_str)
+        except InvalidReminderError as e:
             await update.message.reply_text(
-                f"⚠️ Unknown timezone <code>{timezone_str}</code>. Please try again or use /setreminder.",
+                f"⚠️ {html.escape(str(e))}. Please try the Mini App again or use /setreminder.",
                 parse_mode='HTML',
             )
             return
-
-        try:
-            hour, minute = map(int, time_str.split(':'))
-            now = datetime.now(user_tz)
-            local_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            utc_time = local_time.astimezone(pytz.UTC)
-            utc_time_str = utc_time.strftime('%H:%M')
-
-            story_db.set_reminder(
-                user_id=user.id,
-                reminder_time=utc_time_str,
-                timezone=timezone_str,
-            )
-
-            schedule_reminder_job(context.application.job_queue, user.id, utc_time_str, timezone_str)
-
-            await update.message.reply_text(
-                f"✅ Reminder set for <b>{time_str}</b> ({timezone_str}).\n\n"
-                f"I'll nudge you every day to capture your moment. 🌟\n\n"
-                f"Use /reminders to manage your settings.",
-                parse_mode='HTML',
-            )
-            logger.info(
-                f"MiniApp reminder set for user {user.id} ({user.first_name}) "
-                f"at {time_str} {timezone_str} (UTC: {utc_time_str})"
-            )
         except Exception as e:
-            logger.error(f"Error handling web_app_data: {e}")
+            logger.error("Error handling web_app_data: %s", e)
             await update.message.reply_text(
                 "😅 Something went wrong setting your reminder. Please try again with /setreminder."
             )
+            return
+
+        await update.message.reply_text(
+            f"✅ Reminder set for <b>{time_str}</b> ({timezone_str}).\n\n"
+            f"I'll nudge you every day to capture your moment. 🌟\n\n"
+            f"Use /reminders to manage your settings.",
+            parse_mode='HTML',
+        )
+        logger.info(
+            "MiniApp reminder set for user %s (%s) at %s %s (UTC: %s)",
+            user.id, user.first_name, time_str, timezone_str, utc_time_str,
+        )
     
     @staticmethod
     async def reminder_menu_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -326,7 +330,8 @@ class ReminderCommandHandlers:
                  InlineKeyboardButton("🇨🇳 Shanghai", callback_data="tz:Asia/Shanghai")],
                 [InlineKeyboardButton("🇮🇳 India", callback_data="tz:Asia/Kolkata"),
                  InlineKeyboardButton("🇦🇺 Sydney", callback_data="tz:Australia/Sydney")],
-                [InlineKeyboardButton("🌍 Other (type manually)", callback_data="tz:manual")]
+                [InlineKeyboardButton("🌍 Other (type manually)", callback_data="tz:manual")],
+                [_quick_picker_button()]
             ]
             reply_markup = InlineKeyboardMarkup(keyboard)
             
@@ -337,13 +342,6 @@ class ReminderCommandHandlers:
             )
             
             await query.edit_message_text(prompt_message, parse_mode='HTML', reply_markup=reply_markup)
-            
-            webapp_markup = ReplyKeyboardMarkup(
-                [[KeyboardButton("⚡ Set Reminder (Quick)", web_app=WebAppInfo(url=_webapp_reminder_url()))]],
-                one_time_keyboard=True,
-                resize_keyboard=True
-            )
-            await query.message.reply_text("👇 Or tap below for the quick time picker:", reply_markup=webapp_markup)
             return WAITING_FOR_TIMEZONE
 
         elif action == 'stop':
@@ -380,23 +378,18 @@ class ReminderCommandHandlers:
         status_text = ""
         if reminder_pref and reminder_pref['enabled']:
             try:
+                # Convert stored UTC time to the user's local time
                 timezone_str = reminder_pref.get('timezone', 'UTC')
-                user_tz = pytz.timezone(timezone_str)
-                
-                utc_time_str = reminder_pref['reminder_time']
-                hour, minute = map(int, utc_time_str.split(':'))
-                utc_now = datetime.now(pytz.UTC)
-                utc_time = utc_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                local_time = utc_time.astimezone(user_tz)
-                local_time_str = local_time.strftime('%H:%M')
+                local_time_str = utc_to_local(reminder_pref['reminder_time'], timezone_str)
                 
                 status_text = f"\n\n✅ <b>Active Reminder:</b> {local_time_str} ({timezone_str})"
-            except:
+            except Exception:
                 status_text = f"\n\n✅ <b>Active Reminder:</b> {reminder_pref['reminder_time']} UTC"
         else:
             status_text = "\n\n🔕 No active reminder set"
         
         keyboard = [
+            [_quick_picker_button()],
             [InlineKeyboardButton("⏰ Set Daily Reminder", callback_data="reminder:set")],
             [InlineKeyboardButton("🔕 Stop Reminders", callback_data="reminder:stop")],
         ]
@@ -405,17 +398,10 @@ class ReminderCommandHandlers:
         message = (
             "⏰ <b>Reminder Settings</b>\n\n"
             "Set up daily reminders to capture your storyworthy moments.{status_text}\n\n"
-            "Choose an option below, or tap the button at the bottom to use the quick visual picker:"
+            "Choose an option below, or open the quick visual picker:"
         ).format(status_text=status_text)
         
         await query.edit_message_text(message, parse_mode='HTML', reply_markup=reply_markup)
-        
-        webapp_markup = ReplyKeyboardMarkup(
-            [[KeyboardButton("⚡ Set Reminder (Quick)", web_app=WebAppInfo(url=_webapp_reminder_url()))]],
-            one_time_keyboard=True,
-            resize_keyboard=True
-        )
-        await query.message.reply_text("👇 Tap below for the quick time picker:", reply_markup=webapp_markup)
         return ConversationHandler.END
     
     @staticmethod
@@ -443,12 +429,8 @@ class ReminderCommandHandlers:
         
         # Validate and use the selected timezone
         try:
-            tz = pytz.timezone(timezone_data)
-            context.user_data['timezone'] = timezone_data
-            
-            # Show current time in their timezone
-            now_in_tz = datetime.now(tz)
-            current_time = now_in_tz.strftime('%H:%M')
+            current_time = local_now(timezone_data).strftime('%H:%M')
+            user_state.set_timezone(query.from_user.id, timezone_data)
             
             prompt_message = (
                 f"✅ Timezone set to <b>{timezone_data}</b>\n"
@@ -465,7 +447,7 @@ class ReminderCommandHandlers:
             await query.edit_message_text(prompt_message, parse_mode='HTML')
             return WAITING_FOR_REMINDER_TIME
             
-        except pytz.exceptions.UnknownTimeZoneError:
+        except UnknownTimezoneError:
             await query.edit_message_text(
                 f"⚠️ Something went wrong. Please try /setreminder again.",
                 parse_mode='HTML'
@@ -482,13 +464,10 @@ class ReminderCommandHandlers:
         
         # Validate timezone
         try:
-            tz = pytz.timezone(timezone_text)
-            # Store timezone in context for next step
-            context.user_data['timezone'] = timezone_text
-            
             # Show current time in their timezone
-            now_in_tz = datetime.now(tz)
-            current_time = now_in_tz.strftime('%H:%M')
+            current_time = local_now(timezone_text).strftime('%H:%M')
+            # Keep the timezone for the next step
+            user_state.set_timezone(user.id, timezone_text)
             
             prompt_message = (
                 f"✅ Great! Timezone set to <b>{timezone_text}</b>.\n"
@@ -505,7 +484,7 @@ class ReminderCommandHandlers:
             await update.message.reply_text(prompt_message, parse_mode='HTML')
             return WAITING_FOR_REMINDER_TIME
             
-        except pytz.exceptions.UnknownTimeZoneError:
+        except UnknownTimezoneError:
             await update.message.reply_text(
                 f"⚠️ I don't recognize <code>{timezone_text}</code> as a valid timezone.\n\n"
                 f"Please try again with a timezone like:\n"
@@ -543,20 +522,11 @@ class ReminderCommandHandlers:
             return WAITING_FOR_REMINDER_TIME
         
         try:
-            # Get timezone from context
-            timezone_str = context.user_data.get('timezone', 'UTC')
-            user_tz = pytz.timezone(timezone_str)
-            
-            # Parse the time
-            hour, minute = map(int, time_text.split(':'))
+            # Timezone picked in the previous step
+            timezone_str = user_state.get_timezone(user.id, 'UTC')
             
-            # Create a datetime in user's timezone for today
-            now = datetime.now(user_tz)
-            local_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-            
-            # Convert to UTC
-            utc_time = local_time.astimezone(pytz.UTC)
-            utc_time_str = utc_time.strftime('%H:%M')
+            # Convert the local time (on today's date there) to UTC
+            utc_time_str = local_to_utc(time_text, timezone_str)
             
             # Save the reminder preference with UTC time
             ReminderCommandHandlers.story_db.set_reminder(
@@ -577,13 +547,15 @@ class ReminderCommandHandlers:
             
             await update.message.reply_text(response, parse_mode='HTML')
             
-            logger.info(f"Reminder set for user {user.id} ({user.first_name}) at {time_text} {timezone_str} (UTC: {utc_time_str})")
+            logger.info(
+                "Reminder set for user %s (%s) at %s %s (UTC: %s)",
+                user.id, user.first_name, time_text, timezone_str, utc_time_str,
+            )
             
-            # Clear user data
-            context.user_data.clear()
+            user_state.clear_timezone(user.id)
             
         except Exception as e:
-            logger.error(f"Error setting reminder: {e}")
+            logger.error("Error setting reminder: %s", e)
             await update.message.reply_text(
                 "😅 Oops! Something went wrong setting your reminder. Please try again with /setreminder"
             )
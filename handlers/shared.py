@@ -1,19 +1,37 @@
 """
 Shared resources for all handler modules
 """
+import asyncio
 import logging
+import os
 import random
-from datetime import time as datetime_time
+import time
+from datetime import datetime, timedelta, time as datetime_time
+from pathlib import Path
 
-import pytz
-from telegram.ext import CallbackContext
+from telegram import Update
+from telegram.ext import CallbackContext, ContextTypes
 
+from config.settings import settings
 from models.story import StoryDatabase
+from services.reminder_events import ReminderEventWriter
+from services.timezones import UTC, preload_zones
+from services.user_state import UserStateStore
+from utils.metrics import REMINDER_LAG, REMINDERS_SENT, USER_STATES
 
 logger = logging.getLogger(__name__)
 
-# Single shared database instance used by all handlers
-story_db = StoryDatabase()
+# Single shared database instance used by all handlers. With WAL archiving
+# on, only the archiver checkpoints, so no frame is reset before it is copied.
+story_db = StoryDatabase(wal_autocheckpoint=0 if settings.WAL_ARCHIVE_INTERVAL > 0 else None)
+
+# Reminder delivery/response events, flushed to reminder_events by a job
+reminder_events = ReminderEventWriter(story_db)
+
+# Pending reminder replies and /setreminder progress, instead of PTB's
+# unbounded user_data
+user_state = UserStateStore(ttl=settings.USER_STATE_TTL_HOURS * 3600, max_users=settings.USER_STATE_MAX_USERS)
+USER_STATES.set_function(lambda: len(user_state))
 
 # Conversation states
 WAITING_FOR_STORY = 1
@@ -21,6 +39,30 @@ WAITING_FOR_REMINDER_TIME = 2
 WAITING_FOR_TIMEZONE = 3
 WAITING_FOR_FEEDBACK = 10
 
+# Handler group for track_user: after the command handlers, so replies aren't
+# held up by the write, and before the update timing middleware finishes
+USER_TRACKING_GROUP = 999
+
+
+async def track_user(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Keep the users table current; a no-op unless the user's names changed."""
+    user = update.effective_user
+    if user is not None:
+        story_db.upsert_user(user.id, user.username, user.first_name)
+
+
+def webapp_url(asset: str) -> str:
+    """
+    Public URL of a Mini App page under webapp/static, content-hashed so
+    clients can cache it until it changes.
+    """
+    from webapp.static_assets import default_assets
+    base = os.environ.get("WEBAPP_URL")
+    if not base:
+        logger.warning("WEBAPP_URL env var not set — Mini App buttons will use localhost")
+        base = "http://localhost:8080"
+    return base + default_assets().url(asset)
+
 
 # --- Reminder messages ---
 
@@ -90,18 +132,29 @@ async def send_reminder_to_user(context: CallbackContext, user_id: int, first_na
     if not first_name:
         first_name = "there"
 
-    context.application.user_data[user_id]['awaiting_story'] = True
+    scheduled_at = _scheduled_time(context.job)
     reminder_message = random.choice(_REMINDER_TEMPLATES).format(name=first_name)
 
+    started_at = datetime.utcnow()
+    started = time.perf_counter()
     try:
         await context.bot.send_message(
             chat_id=user_id,
             text=reminder_message,
             parse_mode='HTML',
         )
-        logger.info(f"Reminder sent to user {user_id}")
     except Exception as e:
-        logger.error(f"Failed to send reminder to user {user_id}: {e}")
+        reminder_events.sent(user_id, scheduled_at, started_at, time.perf_counter() - started,
+                             error=type(e).__name__)
+        REMINDERS_SENT.labels("failed").inc()
+        logger.error("Failed to send reminder to user %s: %s", user_id, e)
+        return
+
+    reminder_events.sent(user_id, scheduled_at, started_at, time.perf_counter() - started)
+    REMINDERS_SENT.labels("sent").inc()
+    # A plain-text reply is taken as the story (receive_story_after_reminder)
+    user_state.expect_story(user_id, scheduled_at, started_at)
+    logger.info("Reminder sent to user %s", user_id)
 
 
 # --- Job queue scheduling helpers ---
@@ -111,35 +164,55 @@ async def daily_reminder_callback(context: CallbackContext) -> None:
     Callback fired by APScheduler's run_daily for each user's reminder.
     """
     try:
+        _observe_reminder_lag(context.job)
         job_name = context.job.name
         user_id = int(job_name.split("_")[1])
 
-        stories = story_db.get_user_stories(user_id, limit=1)
-        first_name = stories[0]['first_name'] if stories and stories[0]['first_name'] else None
+        user = story_db.get_user(user_id)
+        first_name = user['first_name'] if user else None
 
         await send_reminder_to_user(context, user_id, first_name)
     except Exception as e:
-        logger.error(f"Error in daily_reminder_callback: {e}")
+        logger.error("Error in daily_reminder_callback: %s", e)
+
 
+def _scheduled_time(job) -> datetime:
+    """The naive UTC time a daily reminder job was due, or None if unknown."""
+    # By the time the callback runs APScheduler has already moved next_t on by a day
+    next_t = getattr(job, 'next_t', None)
+    if not isinstance(next_t, datetime):
+        return None
+    return (next_t - timedelta(days=1)).astimezone(UTC).replace(tzinfo=None)
 
-def schedule_reminder_job(job_queue, user_id: int, reminder_time_str: str, timezone_str: str) -> None:
+
+def _observe_reminder_lag(job) -> None:
+    """Record how late a daily job fired relative to its scheduled time."""
+    scheduled_at = _scheduled_time(job)
+    if scheduled_at is None:
+        return
+    lag = datetime.utcnow() - scheduled_at
+    REMINDER_LAG.observe(max(lag.total_seconds(), 0.0))
+
+
+def schedule_reminder_job(job_queue, user_id: int, reminder_time_str: str, timezone_str: str,
+                          replace: bool = True) -> None:
     """
     Schedule a daily run_daily job for a user's reminder.
-    Cancels any existing job for this user first.
+    Cancels any existing job for this user first, unless ``replace`` is False
+    (the caller knows there is none).
     """
-    print(f"⏰ schedule_reminder_job called: user={user_id}, time={reminder_time_str}, tz={timezone_str}", flush=True)
-    cancel_reminder_job(job_queue, user_id)
+    if replace:
+        cancel_reminder_job(job_queue, user_id)
 
     hour, minute = map(int, reminder_time_str.split(':'))
-    reminder_time = datetime_time(hour=hour, minute=minute, tzinfo=pytz.UTC)
+    reminder_time = datetime_time(hour=hour, minute=minute, tzinfo=UTC)
 
     job_queue.run_daily(
         daily_reminder_callback,
         time=reminder_time,
         name=f"reminder_{user_id}",
     )
-    print(f"⏰ Daily job scheduled for user {user_id} at {reminder_time_str} UTC", flush=True)
-    logger.info(f"Scheduled daily reminder for user {user_id} at {reminder_time_str} ({timezone_str})")
+    logger.debug("Scheduled daily reminder for user %s at %s UTC (%s)", user_id, reminder_time_str, timezone_str)
 
 
 def cancel_reminder_job(job_queue, user_id: int) -> None:
@@ -150,21 +223,212 @@ def cancel_reminder_job(job_queue, user_id: int) -> None:
     for job in jobs:
         job.schedule_removal()
     if jobs:
-        logger.info(f"Cancelled reminder job for user {user_id}")
+        logger.debug("Cancelled reminder job for user %s", user_id)
 
 
 def schedule_all_reminders(job_queue) -> int:
     """
     Load all active reminders from DB and schedule run_daily jobs for each.
-    Called on bot startup.
+    Called on bot startup, before any reminder job exists: looking each user's
+    job up by name scans every job, which made startup quadratic in users.
     Returns the number of reminders scheduled.
     """
     reminders = story_db.get_all_active_reminders()
+    preload_zones(reminder['timezone'] for reminder in reminders)
     for reminder in reminders:
         schedule_reminder_job(
             job_queue,
             reminder['user_id'],
             reminder['reminder_time'],
             reminder['timezone'],
+            replace=False,
         )
     return len(reminders)
+
+
+# --- Archiving ---
+
+# Quiet hour (UTC) for moving old stories to the archive tier
+ARCHIVE_TIME = datetime_time(hour=3, minute=30, tzinfo=UTC)
+
+
+async def archive_stories_callback(context: CallbackContext) -> None:
+    """Nightly job: move stories older than ARCHIVE_AFTER_DAYS into the archive tier."""
+    try:
+        # Batched and committed per batch, but still disk-bound: keep it off the event loop
+        moved = await asyncio.to_thread(story_db.archive_stories, settings.ARCHIVE_AFTER_DAYS)
+        logger.info("Archive job moved %s stories", moved)
+    except Exception as e:
+        logger.error("Error in archive_stories_callback: %s", e)
+
+
+def schedule_archiver(job_queue) -> bool:
+    """
+    Schedule the nightly archive job if ARCHIVE_AFTER_DAYS is set.
+    Returns whether it was scheduled.
+    """
+    if settings.ARCHIVE_AFTER_DAYS <= 0:
+        return False
+    job_queue.run_daily(archive_stories_callback, time=ARCHIVE_TIME, name="archive_stories")
+    return True
+
+
+# --- Backups ---
+
+async def backup_callback(context: CallbackContext) -> None:
+    """Snapshot the story databases with the SQLite backup API."""
+    from services.backup import backup_databases
+    try:
+        await asyncio.to_thread(backup_databases, (story_db.db_path, story_db.archive_path),
+                                settings.BACKUP_DIR, settings.BACKUP_KEEP)
+    except Exception as e:
+        logger.error("Error in backup_callback: %s", e)
+
+
+def schedule_backups(job_queue) -> bool:
+    """
+    Schedule repeating backups if BACKUP_INTERVAL_HOURS is set.
+    The first run is timed from the newest snapshot, so frequent restarts
+    neither skip backups nor take one each time.
+    Returns whether backups were scheduled.
+    """
+    if settings.BACKUP_INTERVAL_HOURS <= 0:
+        return False
+    from services.backup import seconds_until_due
+    interval = settings.BACKUP_INTERVAL_HOURS * 3600
+    first = seconds_until_due(settings.BACKUP_DIR, Path(story_db.db_path).stem, interval)
+    job_queue.run_repeating(backup_callback, interval=interval, first=max(first, 60), name="backup")
+    return True
+
+
+# --- WAL archiving ---
+
+# Consecutive failed polls after which SQLite checkpoints on its own again
+WAL_ARCHIVE_MAX_FAILURES = 5
+_wal_archive_failures = 0
+
+
+async def wal_archive_callback(context: CallbackContext) -> None:
+    """
+    Ship newly committed WAL frames (see services/wal_archive.py). While the
+    archiver keeps failing, autocheckpointing is handed back to SQLite so the
+    WAL stays bounded; the archiver starts a new generation once it recovers.
+    """
+    global _wal_archive_failures
+    try:
+        await asyncio.to_thread(context.job.data.poll)
+    except Exception as e:
+        _wal_archive_failures += 1
+        logger.error("Error in wal_archive_callback: %s", e)
+        if _wal_archive_failures == WAL_ARCHIVE_MAX_FAILURES:
+            logger.error("WAL archiving failed %d times in a row; re-enabling autocheckpoint",
+                         _wal_archive_failures)
+            story_db.wal_autocheckpoint = None
+        return
+    if _wal_archive_failures >= WAL_ARCHIVE_MAX_FAILURES:
+        logger.info("WAL archiving recovered; the archiver owns checkpointing again")
+        story_db.wal_autocheckpoint = 0
+    _wal_archive_failures = 0
+
+
+def schedule_wal_archiving(job_queue) -> bool:
+    """
+    Start polling the WAL into WAL_ARCHIVE_DIR if WAL_ARCHIVE_INTERVAL is set.
+    Returns whether archiving was scheduled.
+    """
+    if settings.WAL_ARCHIVE_INTERVAL <= 0:
+        return False
+    from services.wal_archive import LocalWalStore, WalArchiver
+    archiver = WalArchiver(story_db.db_path, LocalWalStore(settings.WAL_ARCHIVE_DIR), keep=settings.WAL_ARCHIVE_KEEP)
+    job_queue.run_repeating(wal_archive_callback, interval=settings.WAL_ARCHIVE_INTERVAL, first=1,
+                            name="wal_archive", data=archiver)
+    return True
+
+
+# --- Admin stats rollups ---
+
+async def rollup_stats_callback(context: CallbackContext) -> None:
+    """Refresh the stats_hourly/stats_daily rollups behind /admin stats."""
+    try:
+        await asyncio.to_thread(story_db.refresh_rollups)
+    except Exception as e:
+        logger.error("Error in rollup_stats_callback: %s", e)
+
+
+def schedule_rollups(job_queue) -> bool:
+    """
+    Refresh the admin stats rollups every STATS_ROLLUP_MINUTES, starting
+    shortly after startup. Returns whether the job was scheduled.
+    """
+    if settings.STATS_ROLLUP_MINUTES <= 0:
+        return False
+    job_queue.run_repeating(rollup_stats_callback, interval=settings.STATS_ROLLUP_MINUTES * 60, first=30,
+                            name="rollup_stats")
+    return True
+
+
+# --- User state eviction ---
+
+# Seconds between sweeps of idle users' transient state
+USER_STATE_EVICT_INTERVAL = 600
+
+
+async def evict_user_state_callback(context: CallbackContext) -> None:
+    """Forget transient state of users idle past USER_STATE_TTL_HOURS."""
+    evicted = user_state.evict()
+    if evicted:
+        logger.info("Evicted transient state of %s idle users", evicted)
+
+
+def schedule_user_state_eviction(job_queue) -> None:
+    job_queue.run_repeating(evict_user_state_callback, interval=USER_STATE_EVICT_INTERVAL,
+                            first=USER_STATE_EVICT_INTERVAL, name="evict_user_state")
+
+
+# --- Readiness probe ---
+
+_readiness_task = None
+
+
+def start_readiness_probe(job_queue) -> bool:
+    """
+    Start the /ready probe on the running (bot) loop, every
+    READY_PROBE_INTERVAL seconds. Returns whether it was started.
+    """
+    global _readiness_task
+    if settings.READY_PROBE_INTERVAL <= 0:
+        return False
+    from services.health import readiness
+    readiness.interval = settings.READY_PROBE_INTERVAL
+    # A plain task rather than a job: JobQueue delays are one of the things it measures
+    _readiness_task = asyncio.get_running_loop().create_task(readiness.run(job_queue), name="readiness_probe")
+    return True
+
+
+def stop_readiness_probe() -> None:
+    global _readiness_task
+    if _readiness_task is not None:
+        _readiness_task.cancel()
+        _readiness_task = None
+
+
+# --- Reminder events ---
+
+# Seconds between writes of buffered reminder events
+REMINDER_EVENT_FLUSH_INTERVAL = 5
+
+
+async def flush_reminder_events_callback(context: CallbackContext) -> None:
+    """Write buffered reminder events in one batch, off the event loop."""
+    if not len(reminder_events):
+        return
+    try:
+        await asyncio.to_thread(reminder_events.flush)
+    except Exception as e:
+        logger.error("Error in flush_reminder_events_callback: %s", e)
+
+
+def schedule_reminder_event_flush(job_queue) -> None:
+    """Flush reminder events every REMINDER_EVENT_FLUSH_INTERVAL seconds."""
+    job_queue.run_repeating(flush_reminder_events_callback, interval=REMINDER_EVENT_FLUSH_INTERVAL,
+                            name="flush_reminder_events")
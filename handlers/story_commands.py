@@ -2,12 +2,12 @@
 Story-related command handlers for the Telegram Bot
 """
 import logging
-import tempfile
-import os
 from datetime import datetime
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, WebAppInfo
 from telegram.ext import ContextTypes, ConversationHandler
-from .shared import story_db
+from services.render_pool import render_export
+from utils.metrics import instrument_handlers
+from .shared import reminder_events, story_db, user_state, webapp_url
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +15,7 @@ logger = logging.getLogger(__name__)
 WAITING_FOR_STORY = 1
 
 
+@instrument_handlers
 class StoryCommandHandlers:
     """Handlers for story recording, viewing, and exporting"""
     
@@ -91,10 +92,10 @@ class StoryCommandHandlers:
             
             await update.message.reply_text(response, parse_mode='HTML', reply_markup=reply_markup)
             
-            logger.info(f"Story {story_id} saved for user {user.id} ({user.first_name})")
+            logger.info("Story %s saved for user %s (%s)", story_id, user.id, user.first_name)
             
         except Exception as e:
-            logger.error(f"Error saving story: {e}")
+            logger.error("Error saving story: %s", e)
             await update.message.reply_text(
                 "😅 Oops! Something went wrong saving your story. Please try again with /story"
             )
@@ -127,9 +128,9 @@ class StoryCommandHandlers:
     async def mystories_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Show a summary card of the user's stories"""
         user = update.effective_user
-        stories = StoryCommandHandlers.story_db.get_user_stories(user.id)
+        dates = StoryCommandHandlers.story_db.get_story_dates(user.id)
 
-        if not stories:
+        if not dates:
             keyboard = [[InlineKeyboardButton("📝 Record Your First Story", callback_data="quick:story")]]
             await update.message.reply_text(
                 "You haven't saved any moments yet.\n\nUse /story to capture your first one.",
@@ -138,10 +139,11 @@ class StoryCommandHandlers:
             return
 
         keyboard = [
+            [InlineKeyboardButton("📖 Browse in the app", web_app=WebAppInfo(url=webapp_url("stories.html")))],
             [InlineKeyboardButton("📥 Export All Stories", callback_data="quick:export")],
         ]
         await update.message.reply_text(
-            _stories_summary(stories),
+            _stories_summary(dates),
             parse_mode='HTML',
             reply_markup=InlineKeyboardMarkup(keyboard)
         )
@@ -152,7 +154,7 @@ class StoryCommandHandlers:
         user = update.effective_user
         
         # Get all stories for the user
-        stories = StoryCommandHandlers.story_db.get_user_stories(user.id)
+        stories = StoryCommandHandlers.story_db.get_story_texts(user.id)
         
         if not stories:
             # Add action button for empty state
@@ -168,31 +170,26 @@ class StoryCommandHandlers:
             return
         
         export_date = datetime.now().strftime('%Y-%m-%d')
-        content = _build_export_content(stories, user.first_name, export_date)
-
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
-            f.write(content)
-            temp_path = f.name
+        content = await render_export(stories, user.first_name, export_date)
 
-        try:
-            filename = f"moments_{user.first_name}_{export_date}.html"
-            with open(temp_path, 'rb') as f:
-                await update.message.reply_document(
-                    document=f,
-                    filename=filename,
-                    caption=f"📚 Here are your <b>{len(stories)}</b> storyworthy moments!\n\nKeep capturing life's meaningful moments. ✨",
-                    parse_mode='HTML'
-                )
-            logger.info(f"Exported {len(stories)} stories for user {user.id} ({user.first_name})")
-        finally:
-            os.unlink(temp_path)
+        filename = f"moments_{user.first_name}_{export_date}.html"
+        await update.message.reply_document(
+            document=content,
+            filename=filename,
+            caption=f"📚 Here are your <b>{len(stories)}</b> storyworthy moments!\n\nKeep capturing life's meaningful moments. ✨",
+            parse_mode='HTML'
+        )
+        logger.info("Exported %s stories for user %s (%s)", len(stories), user.id, user.first_name)
     
     @staticmethod
     async def receive_story_after_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Capture a story from a user who typed directly after receiving a reminder."""
-        if not context.user_data.pop('awaiting_story', False):
+        reminder = user_state.pop_awaiting_story(update.effective_user.id)
+        if reminder is None:
             return
         await StoryCommandHandlers.receive_story(update, context)
+        scheduled_at, sent_at = reminder
+        reminder_events.story(update.effective_user.id, scheduled_at, sent_at, datetime.utcnow())
 
     @staticmethod
     async def story_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -223,9 +220,9 @@ class StoryCommandHandlers:
         await query.answer()
         
         user = query.from_user
-        stories = StoryCommandHandlers.story_db.get_user_stories(user.id, limit=10)
+        dates = StoryCommandHandlers.story_db.get_story_dates(user.id)
         
-        if not stories:
+        if not dates:
             await query.edit_message_text(
                 "📭 You haven't saved any stories yet!\n\n"
                 "Use /story to capture your first moment.",
@@ -233,10 +230,9 @@ class StoryCommandHandlers:
             )
             return ConversationHandler.END
         
-        stories = StoryCommandHandlers.story_db.get_user_stories(user.id)
         keyboard = [[InlineKeyboardButton("📥 Export All Stories", callback_data="quick:export")]]
         await query.edit_message_text(
-            _stories_summary(stories),
+            _stories_summary(dates),
             parse_mode='HTML',
             reply_markup=InlineKeyboardMarkup(keyboard)
         )
@@ -249,7 +245,7 @@ class StoryCommandHandlers:
         await query.answer()
         
         user = query.from_user
-        stories = StoryCommandHandlers.story_db.get_user_stories(user.id)
+        stories = StoryCommandHandlers.story_db.get_story_texts(user.id)
         
         if not stories:
             await query.edit_message_text(
@@ -260,39 +256,31 @@ class StoryCommandHandlers:
             return ConversationHandler.END
         
         export_date = datetime.now().strftime('%Y-%m-%d')
-        content = _build_export_content(stories, user.first_name, export_date)
+        content = await render_export(stories, user.first_name, export_date)
 
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as f:
-            f.write(content)
-            temp_path = f.name
-
-        try:
-            filename = f"moments_{user.first_name}_{export_date}.html"
-            with open(temp_path, 'rb') as f:
-                await query.message.reply_document(
-                    document=f,
-                    filename=filename,
-                    caption=f"📚 Here are your <b>{len(stories)}</b> storyworthy moments!\n\nKeep capturing life's meaningful moments. ✨",
-                    parse_mode='HTML'
-                )
-            await query.edit_message_text(f"✅ Exported {len(stories)} stories!\n\nCheck the file above. 📥")
-            logger.info(f"Exported {len(stories)} stories for user {user.id} ({user.first_name}) via callback")
-        finally:
-            os.unlink(temp_path)
+        filename = f"moments_{user.first_name}_{export_date}.html"
+        await query.message.reply_document(
+            document=content,
+            filename=filename,
+            caption=f"📚 Here are your <b>{len(stories)}</b> storyworthy moments!\n\nKeep capturing life's meaningful moments. ✨",
+            parse_mode='HTML'
+        )
+        await query.edit_message_text(f"✅ Exported {len(stories)} stories!\n\nCheck the file above. 📥")
+        logger.info("Exported %s stories for user %s (%s) via callback", len(stories), user.id, user.first_name)
 
         return ConversationHandler.END
 
 
-def _stories_summary(stories: list) -> str:
-    total = len(stories)
-    # stories are newest-first
-    first_date = datetime.strptime(stories[-1]['created_at'][:10], '%Y-%m-%d').strftime('%B %-d, %Y')
-    last_date = datetime.strptime(stories[0]['created_at'][:10], '%Y-%m-%d').strftime('%B %-d, %Y')
+def _stories_summary(dates: list) -> str:
+    total = len(dates)
+    # created_at strings, newest-first
+    first_date = datetime.strptime(dates[-1][:10], '%Y-%m-%d').strftime('%B %-d, %Y')
+    last_date = datetime.strptime(dates[0][:10], '%Y-%m-%d').strftime('%B %-d, %Y')
 
     from datetime import date, timedelta
     today = date.today()
     two_weeks_ago = str(today - timedelta(weeks=2))
-    recent = sum(1 for s in stories if s['created_at'][:10] >= two_weeks_ago)
+    recent = sum(1 for created_at in dates if created_at[:10] >= two_weeks_ago)
 
     lines = [
         "📚 <b>Your Moments</b>",
@@ -304,121 +292,3 @@ def _stories_summary(stories: list) -> str:
     ]
     return "\n".join(lines)
 
-
-def _build_export_content(stories: list, first_name: str, export_date: str) -> str:
-    import html as html_mod
-
-    count = len(stories)
-    story_word = 'moment' if count == 1 else 'moments'
-
-    entries_html = []
-    current_month = None
-    for story in stories:  # newest first
-        raw_date = story['created_at'][:10]
-        dt = datetime.strptime(raw_date, '%Y-%m-%d')
-        month_heading = dt.strftime('%B %Y')
-        day_heading = dt.strftime('%B %-d, %Y')
-
-        if month_heading != current_month:
-            if current_month is not None:
-                entries_html.append('</section>')
-            entries_html.append(f'<section><h2>{month_heading}</h2>')
-            current_month = month_heading
-
-        text = html_mod.escape(story['story_text']).replace('\n', '<br>')
-        entries_html.append(
-            f'<article><time>{day_heading}</time><p>{text}</p></article>'
-        )
-
-    if current_month is not None:
-        entries_html.append('</section>')
-
-    body = "\n".join(entries_html)
-
-    return f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8">
-  <meta name="viewport" content="width=device-width, initial-scale=1">
-  <title>My Storyworthy Moments</title>
-  <style>
-    body {{
-      font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
-      max-width: 680px;
-      margin: 0 auto;
-      padding: 24px 20px 60px;
-      background: #fafaf8;
-      color: #1a1a1a;
-    }}
-    header {{
-      border-bottom: 2px solid #e8e4de;
-      padding-bottom: 20px;
-      margin-bottom: 36px;
-    }}
-    header h1 {{
-      font-size: 1.8rem;
-      font-weight: 700;
-      margin: 0 0 6px;
-    }}
-    header p {{
-      color: #888;
-      font-size: 0.9rem;
-      margin: 0;
-    }}
-    section {{ margin-bottom: 40px; }}
-    h2 {{
-      font-size: 1rem;
-      font-weight: 600;
-      text-transform: uppercase;
-      letter-spacing: 0.08em;
-      color: #888;
-      border-bottom: 1px solid #e8e4de;
-      padding-bottom: 6px;
-      margin-bottom: 20px;
-    }}
-    article {{
-      margin-bottom: 24px;
-      padding-left: 14px;
-      border-left: 3px solid #d4c9b8;
-    }}
-    time {{
-      display: block;
-      font-size: 0.78rem;
-      font-weight: 600;
-      color: #aaa;
-      text-transform: uppercase;
-      letter-spacing: 0.05em;
-      margin-bottom: 6px;
-    }}
-    p {{
-      margin: 0;
-      font-size: 1rem;
-      line-height: 1.65;
-      color: #2d2d2d;
-    }}
-    footer {{
-      margin-top: 48px;
-      padding-top: 20px;
-      border-top: 1px solid #e8e4de;
-      font-style: italic;
-      color: #aaa;
-      font-size: 0.88rem;
-      line-height: 1.6;
-    }}
-  </style>
-</head>
-<body>
-  <header>
-    <h1>My Storyworthy Moments</h1>
-    <p>{html_mod.escape(first_name)} &middot; {export_date} &middot; {count} {story_word}</p>
-  </header>
-
-  {body}
-
-  <footer>
-    &ldquo;When you start looking for story-worthy moments in your life,
-    you start to see them everywhere.&rdquo;<br>
-    &mdash; Matthew Dicks
-  </footer>
-</body>
-</html>"""
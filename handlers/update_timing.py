@@ -0,0 +1,214 @@
+"""
+Update timing middleware with sampled profiling of slow updates.
+
+Two TypeHandlers bracket every update: one in group -1 starts the clock and one
+in the last group stops it. Time is attributed to the first instrumented handler
+that ran for the update (e.g. ``StoryCommandHandlers.receive_story``).
+
+When an update runs past the slow threshold a watchdog thread starts sampling
+the event loop thread's stack, so the dump shows where the time went even when
+the loop itself is blocked. A configurable fraction of updates also runs under
+cProfile. Dumps are only written for slow updates, into a directory that keeps
+the newest ``max_files`` entries. Updates processed concurrently share the loop
+thread, so a sample may show another update's work.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter as _Counter
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+from telegram import Update
+from telegram.ext import Application, ContextTypes, TypeHandler
+
+from config.settings import settings
+from services.health import readiness
+from utils.metrics import SLOW_UPDATES, UPDATE_LATENCY, matched_handlers
+
+logger = logging.getLogger(__name__)
+
+TIMING_GROUP = -1
+FINISH_GROUP = 1000
+
+# Stack samples kept per slow update before the sampler stops recording
+MAX_SAMPLES_PER_UPDATE = 2000
+# Drop in-flight entries never finished (e.g. a handler raised ApplicationHandlerStop)
+STALE_UPDATE_SECONDS = 600
+
+
+class _UpdateTiming:
+    __slots__ = ('update_id', 'started', 'thread_id', 'handlers', 'profiler', 'samples')
+
+    def __init__(self, update_id, thread_id, handlers, profiler):
+        self.update_id = update_id
+        self.started = time.perf_counter()
+        self.thread_id = thread_id
+        self.handlers = handlers
+        self.profiler = profiler
+        self.samples: Optional[_Counter] = None
+
+
+_current: ContextVar[Optional[_UpdateTiming]] = ContextVar('update_timing', default=None)
+
+
+def _folded_stack(frame) -> str:
+    """Render a frame chain as a flamegraph 'folded' line, outermost first."""
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
+
+
+class UpdateTimingMiddleware:
+    """Times every update and captures diagnostics for slow ones."""
+
+    def __init__(self, threshold_ms: int = None, profile_dir: str = None,
+                 max_files: int = None, profile_rate: float = None,
+                 sample_interval: float = 0.01):
+        self.threshold = (threshold_ms if threshold_ms is not None else settings.SLOW_UPDATE_THRESHOLD_MS) / 1000
+        self.profile_dir = Path(profile_dir or settings.SLOW_UPDATE_DIR)
+        self.max_files = max_files if max_files is not None else settings.SLOW_UPDATE_MAX_FILES
+        self.profile_rate = profile_rate if profile_rate is not None else settings.SLOW_UPDATE_PROFILE_RATE
+        self.sample_interval = sample_interval
+        self._in_flight: Dict[int, _UpdateTiming] = {}
+        self._profiling = False
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def register(self, application: Application) -> None:
+        """Add the bracketing TypeHandlers and start the stack sampler."""
+        application.add_handler(TypeHandler(Update, self.start_update), group=TIMING_GROUP)
+        application.add_handler(TypeHandler(Update, self.finish_update), group=FINISH_GROUP)
+        self.start_watchdog()
+
+    def start_watchdog(self) -> None:
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name="update-timing-sampler", daemon=True)
+            self._watchdog.start()
+
+    def stop_watchdog(self) -> None:
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def start_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        handlers = []
+        profiler = None
+        if self.profile_rate and not self._profiling and random.random() < self.profile_rate:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                self._profiling = True
+            except ValueError:
+                # Another profiler is already active on this thread
+                profiler = None
+
+        timing = _UpdateTiming(update.update_id, threading.get_ident(), handlers, profiler)
+        matched_handlers.set(handlers)
+        _current.set(timing)
+        self._in_flight[id(timing)] = timing
+
+    async def finish_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        timing = _current.get()
+        if timing is None:
+            return
+        _current.set(None)
+        matched_handlers.set(None)
+        self._in_flight.pop(id(timing), None)
+        self.complete(timing)
+
+    def complete(self, timing: _UpdateTiming) -> float:
+        """Record the elapsed time for an update and dump diagnostics when slow."""
+        elapsed = time.perf_counter() - timing.started
+        readiness.update_processed()
+        if timing.profiler is not None:
+            timing.profiler.disable()
+            self._profiling = False
+
+        label = timing.handlers[0] if timing.handlers else 'unhandled'
+        UPDATE_LATENCY.labels(label).observe(elapsed)
+
+        if elapsed >= self.threshold:
+            SLOW_UPDATES.labels(label).inc()
+            logger.warning("Slow update %s: %.0f ms in %s", timing.update_id, elapsed * 1000, label)
+            try:
+                self._write_dump(timing, label, elapsed)
+            except OSError as e:
+                logger.error("Could not write slow update profile: %s", e)
+        return elapsed
+
+    def _write_dump(self, timing: _UpdateTiming, label: str, elapsed: float) -> None:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        safe_label = re.sub(r'[^A-Za-z0-9_.-]', '_', label)
+        base = str(self.profile_dir / f"{stamp}_{timing.update_id}_{safe_label}")
+
+        lines = [
+            f"# update {timing.update_id} handler={label} elapsed_ms={elapsed * 1000:.0f} "
+            f"handlers={','.join(timing.handlers)}",
+            f"# folded stacks sampled every {self.sample_interval * 1000:.0f} ms after "
+            f"{self.threshold * 1000:.0f} ms",
+        ]
+        if timing.samples:
+            lines.extend(f"{stack} {count}" for stack, count in timing.samples.most_common())
+        Path(base + '.stacks.txt').write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+        if timing.profiler is not None:
+            timing.profiler.dump_stats(base + '.prof')
+            summary = io.StringIO()
+            pstats.Stats(timing.profiler, stream=summary).sort_stats('cumulative').print_stats(40)
+            Path(base + '.prof.txt').write_text(summary.getvalue(), encoding='utf-8')
+
+        self._rotate()
+
+    def _rotate(self) -> None:
+        """Keep only the newest max_files dumps (a dump may span several files)."""
+        files = sorted(
+            (p for p in self.profile_dir.iterdir() if p.is_file()),
+            key=lambda p: p.stat().st_mtime,
+            reverse=True,
+        )
+        for path in files[self.max_files:]:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.sample_interval):
+            self.sample_once()
+
+    def sample_once(self) -> None:
+        """Record one stack sample for every in-flight update past the threshold."""
+        if not self._in_flight:
+            return
+        now = time.perf_counter()
+        frames = None
+        for key, timing in list(self._in_flight.items()):
+            age = now - timing.started
+            if age > STALE_UPDATE_SECONDS:
+                self._in_flight.pop(key, None)
+                continue
+            if age < self.threshold:
+                continue
+            if timing.samples is None:
+                timing.samples = _Counter()
+            elif sum(timing.samples.values()) >= MAX_SAMPLES_PER_UPDATE:
+                continue
+            if frames is None:
+                frames = sys._current_frames()
+            frame = frames.get(timing.thread_id)
+            if frame is not None:
+                timing.samples[_folded_stack(frame)] += 1
@@ -0,0 +1,186 @@
+"""
+Transparent compression for story text.
+
+Stories are short and share a lot of vocabulary across users, so on their
+own they barely compress. A shared dictionary trained on existing stories
+gives the compressor that common context up front. zstd dictionaries are used
+when the optional ``zstandard`` package is installed, otherwise zlib with a
+preset dictionary.
+
+Stored format: uncompressed stories stay TEXT, compressed ones are BLOBs with
+a 3-byte header (format byte, then the big-endian id of the dictionary in
+``compression_dicts``, 0 meaning none), so old and new rows can coexist and a
+dictionary can be retrained without rewriting the table.
+"""
+import random
+import re
+import struct
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+FORMAT_ZLIB = 1
+FORMAT_ZSTD = 2
+
+CODECS = {'zlib': FORMAT_ZLIB, 'zstd': FORMAT_ZSTD}
+
+HEADER = struct.Struct('>BH')
+
+# zlib can only reference the last 32 KiB, so a larger preset dictionary is wasted
+ZLIB_MAX_DICT_SIZE = 32 * 1024
+DEFAULT_DICT_SIZE = 16 * 1024
+
+_ZLIB_LEVEL = 9
+_ZSTD_LEVEL = 9
+
+_PHRASE = re.compile(r"\w+(?:\W+\w+){0,3}\W*")
+
+
+def resolve_codec(name: str) -> Optional[str]:
+    """Map a STORY_COMPRESSION setting ('off', 'zlib', 'zstd', 'auto') to a codec name or None."""
+    name = (name or 'off').lower()
+    if name in ('', 'off', 'none', '0', 'false'):
+        return None
+    if name == 'auto':
+        return 'zstd' if zstandard is not None else 'zlib'
+    if name not in CODECS:
+        raise ValueError(f"Unknown story compression codec: {name}")
+    if name == 'zstd' and zstandard is None:
+        raise RuntimeError("STORY_COMPRESSION=zstd needs the zstandard package")
+    return name
+
+
+def train_dictionary(samples: List[str], codec: str, size: int = DEFAULT_DICT_SIZE) -> bytes:
+    """
+    Build a shared dictionary from sample story texts.
+
+    zstd uses its own trainer. For zlib, the most common phrases (weighted by
+    frequency times length) are packed into the dictionary with the most
+    valuable last, where zlib's match distances are shortest.
+    """
+    encoded = [text.encode('utf-8') for text in samples if text]
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Training a zstd dictionary needs the zstandard package")
+        return zstandard.train_dictionary(size, encoded).as_bytes()
+
+    size = min(size, ZLIB_MAX_DICT_SIZE)
+    phrases = Counter()
+    for text in samples:
+        for match in _PHRASE.finditer(text):
+            phrases[match.group()] += 1
+        phrases.update(text.split())
+
+    chosen = []
+    used = 0
+    for phrase, count in sorted(phrases.items(), key=lambda item: item[1] * len(item[0]), reverse=True):
+        if count < 2:
+            continue
+        data = phrase.encode('utf-8')
+        if used + len(data) > size:
+            continue
+        chosen.append(data)
+        used += len(data)
+    return b''.join(reversed(chosen))
+
+
+def sample_texts(texts: Iterable[str], count: int, seed: int = 0) -> List[str]:
+    """Reservoir-sample up to ``count`` texts."""
+    rng = random.Random(seed)
+    reservoir = []
+    for i, text in enumerate(texts):
+        if i < count:
+            reservoir.append(text)
+        else:
+            j = rng.randrange(i + 1)
+            if j < count:
+                reservoir[j] = text
+    return reservoir
+
+
+class StoryCodec:
+    """
+    Encodes story text for storage and decodes any stored format.
+
+    Args:
+        dictionaries: ``{dict_id: (codec, data)}`` for every stored dictionary
+        codec: Codec for new writes ('zlib' or 'zstd'), or None to store plain text
+        active_id: Dictionary used for new writes (0 or None for no dictionary)
+    """
+
+    def __init__(self, dictionaries: Dict[int, Tuple[str, bytes]] = None,
+                 codec: Optional[str] = None, active_id: Optional[int] = None):
+        self.dictionaries = dict(dictionaries or {})
+        self.codec = codec
+        self.active_id = active_id or 0
+        self._compressor = None
+        self._decompressors: Dict[Tuple[int, int], object] = {}
+        if codec is not None:
+            self._compressor = self._make_compressor(codec, self._dictionary(self.active_id, codec))
+
+    def _dictionary(self, dict_id: int, codec: str) -> Optional[bytes]:
+        if not dict_id:
+            return None
+        stored_codec, data = self.dictionaries[dict_id]
+        if stored_codec != codec:
+            raise ValueError(f"Dictionary {dict_id} was trained for {stored_codec}, not {codec}")
+        return data
+
+    @staticmethod
+    def _make_compressor(codec: str, data: Optional[bytes]):
+        if codec == 'zstd':
+            zdict = zstandard.ZstdCompressionDict(data) if data else None
+            return zstandard.ZstdCompressor(level=_ZSTD_LEVEL, dict_data=zdict, write_content_size=True,
+                                            write_checksum=False, write_dict_id=False)
+        # Priming a compressobj with the dictionary costs more than compressing
+        # a story, so prime once and copy() per story
+        if data:
+            return zlib.compressobj(_ZLIB_LEVEL, zlib.DEFLATED, -15, zdict=data)
+        return zlib.compressobj(_ZLIB_LEVEL, zlib.DEFLATED, -15)
+
+    def encode(self, text: str) -> Union[str, bytes]:
+        """Compress ``text``, or return it unchanged when compression is off or doesn't pay."""
+        if self._compressor is None or not text:
+            return text
+        raw = text.encode('utf-8')
+        if self.codec == 'zstd':
+            body = self._compressor.compress(raw)
+            fmt = FORMAT_ZSTD
+        else:
+            compressor = self._compressor.copy()
+            body = compressor.compress(raw) + compressor.flush()
+            fmt = FORMAT_ZLIB
+        if len(body) + HEADER.size >= len(raw):
+            return text
+        return HEADER.pack(fmt, self.active_id) + body
+
+    def decode(self, value: Union[str, bytes, None]) -> Optional[str]:
+        """Return the text of a stored story in any format."""
+        if value is None or isinstance(value, str):
+            return value
+        fmt, dict_id = HEADER.unpack_from(value)
+        body = memoryview(value)[HEADER.size:]
+        decompressor = self._decompressors.get((fmt, dict_id))
+        if decompressor is None:
+            decompressor = self._decompressors[(fmt, dict_id)] = self._make_decompressor(fmt, dict_id)
+        if fmt == FORMAT_ZSTD:
+            return decompressor.decompress(body).decode('utf-8')
+        inflater = decompressor.copy()
+        return (inflater.decompress(body) + inflater.flush()).decode('utf-8')
+
+    def _make_decompressor(self, fmt: int, dict_id: int):
+        if fmt == FORMAT_ZSTD:
+            if zstandard is None:
+                raise RuntimeError("Reading zstd-compressed stories needs the zstandard package")
+            data = self._dictionary(dict_id, 'zstd')
+            zdict = zstandard.ZstdCompressionDict(data) if data else None
+            return zstandard.ZstdDecompressor(dict_data=zdict)
+        if fmt == FORMAT_ZLIB:
+            data = self._dictionary(dict_id, 'zlib')
+            return zlib.decompressobj(-15, zdict=data) if data else zlib.decompressobj(-15)
+        raise ValueError(f"Unknown story format byte {fmt}")
@@ -0,0 +1,153 @@
+"""
+Field-level encryption of story text at rest.
+
+Each user gets a random 256-bit data key. Data keys are stored in
+``user_keys`` wrapped (AES-GCM encrypted) with the master key from
+STORY_ENCRYPTION_KEY, so the database alone reveals nothing and deleting a
+user's key row crypto-shreds their stories. Unwrapped keys are kept in an LRU,
+and a read of many stories unwraps each user's key once, then opens and
+decompresses the rows in a single loop.
+
+Stored format: a BLOB starting with FORMAT_ENCRYPTED, a 12-byte nonce, then
+the AES-GCM ciphertext and tag of the (possibly compressed) story. The user
+ID is bound in as associated data, so a row copied to another user fails to
+decrypt.
+
+Requires the optional ``cryptography`` package.
+"""
+import base64
+import os
+import sqlite3
+import struct
+from collections import OrderedDict
+from typing import Callable, List, Optional, Union
+
+try:
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+except ImportError:  # optional dependency
+    AESGCM = None
+
+# Distinct from the compression format bytes (models/compression.py)
+FORMAT_ENCRYPTED = 0x80
+# Inner marker for an uncompressed story inside an encrypted envelope
+_INNER_PLAIN = b'\x00'
+
+NONCE_SIZE = 12
+KEY_CACHE_SIZE = 1024
+
+_USER_AAD = struct.Struct('>q')
+
+
+def generate_master_key() -> str:
+    """Return a new master key in the STORY_ENCRYPTION_KEY format (urlsafe base64)."""
+    return base64.urlsafe_b64encode(os.urandom(32)).decode('ascii')
+
+
+def load_master_key(value: str) -> bytes:
+    """Decode STORY_ENCRYPTION_KEY, rejecting anything that isn't 32 bytes."""
+    try:
+        key = base64.urlsafe_b64decode(value.strip().encode('ascii'))
+    except ValueError as e:
+        raise ValueError("STORY_ENCRYPTION_KEY is not valid base64") from e
+    if len(key) != 32:
+        raise ValueError("STORY_ENCRYPTION_KEY must decode to 32 bytes")
+    return key
+
+
+def is_encrypted(value) -> bool:
+    return isinstance(value, bytes) and bool(value) and value[0] == FORMAT_ENCRYPTED
+
+
+class KeyRing:
+    """
+    Per-user data keys, wrapped by a master key and cached once unwrapped.
+
+    Args:
+        master_key: 32-byte master key
+        cache_size: Number of unwrapped user keys kept in memory
+    """
+
+    def __init__(self, master_key: bytes, cache_size: int = KEY_CACHE_SIZE):
+        if AESGCM is None:
+            raise RuntimeError("Story encryption needs the cryptography package")
+        self._master = AESGCM(master_key)
+        self.cache_size = cache_size
+        self._ciphers: "OrderedDict[int, AESGCM]" = OrderedDict()
+
+    def cipher(self, conn: sqlite3.Connection, user_id: int, create: bool = False) -> Optional['AESGCM']:
+        """
+        Return the user's data key cipher, creating the key if asked.
+
+        Returns:
+            The cipher, or None if the user has no key and create is False
+        """
+        cipher = self._ciphers.get(user_id)
+        if cipher is not None:
+            self._ciphers.move_to_end(user_id)
+            return cipher
+
+        row = conn.execute("SELECT wrapped_key FROM user_keys WHERE user_id = ?", (user_id,)).fetchone()
+        if row is None:
+            if not create:
+                return None
+            nonce = os.urandom(NONCE_SIZE)
+            wrapped = nonce + self._master.encrypt(nonce, AESGCM.generate_key(256), self._aad(user_id))
+            # Another process may have created one first; theirs wins
+            conn.execute("INSERT OR IGNORE INTO user_keys (user_id, wrapped_key) VALUES (?, ?)", (user_id, wrapped))
+            conn.commit()
+            row = conn.execute("SELECT wrapped_key FROM user_keys WHERE user_id = ?", (user_id,)).fetchone()
+
+        wrapped = row[0]
+        data_key = self._master.decrypt(wrapped[:NONCE_SIZE], wrapped[NONCE_SIZE:], self._aad(user_id))
+        cipher = self._ciphers[user_id] = AESGCM(data_key)
+        if len(self._ciphers) > self.cache_size:
+            self._ciphers.popitem(last=False)
+        return cipher
+
+    def forget(self, user_id: int) -> None:
+        self._ciphers.pop(user_id, None)
+
+    @staticmethod
+    def _aad(user_id: int) -> bytes:
+        return b'user-key' + _USER_AAD.pack(user_id)
+
+
+def seal(cipher: 'AESGCM', user_id: int, value: Union[str, bytes]) -> bytes:
+    """Encrypt a stored story value (plain text or a compressed blob)."""
+    inner = _INNER_PLAIN + value.encode('utf-8') if isinstance(value, str) else value
+    nonce = os.urandom(NONCE_SIZE)
+    return bytes((FORMAT_ENCRYPTED,)) + nonce + cipher.encrypt(nonce, inner, _USER_AAD.pack(user_id))
+
+
+def open_sealed(cipher: 'AESGCM', user_id: int, value: bytes) -> Union[str, bytes]:
+    """Decrypt a sealed value back to plain text or the compressed blob inside it."""
+    inner = cipher.decrypt(value[1:1 + NONCE_SIZE], value[1 + NONCE_SIZE:], _USER_AAD.pack(user_id))
+    if inner[:1] == _INNER_PLAIN:
+        return inner[1:].decode('utf-8')
+    return inner
+
+
+def open_rows(cipher_for: Callable[[int], 'AESGCM'], user_ids: List[int], values: list,
+              decode: Callable[[bytes], str]) -> List[str]:
+    """
+    Turn stored story values of any users into plain text in one pass.
+
+    Sealed values are opened with their user's cipher, fetched through
+    ``cipher_for`` once per user; values that are (or turn out to be)
+    compressed go through ``decode``.
+    """
+    openers = {}
+    start = 1 + NONCE_SIZE
+    texts = []
+    append = texts.append
+    for user_id, value in zip(user_ids, values):
+        if value.__class__ is bytes and value[0] == FORMAT_ENCRYPTED:
+            opener = openers.get(user_id)
+            if opener is None:
+                opener = openers[user_id] = (cipher_for(user_id).decrypt, _USER_AAD.pack(user_id))
+            value = opener[0](value[1:start], value[start:], opener[1])
+            if value[0] == 0:
+                append(value[1:].decode('utf-8'))
+                continue
+        append(decode(value) if value.__class__ is bytes else value)
+    return texts
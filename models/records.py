@@ -0,0 +1,15 @@
+"""
+Lean story records for the projection queries in models/story.py.
+
+Tuples, not dicts: no per-row hash table, and the render pool can pickle
+them without its workers importing the database layer (this module only
+needs the standard library).
+"""
+from typing import NamedTuple
+
+
+class StoryText(NamedTuple):
+    """A story's timestamp and plain text; what /export and /report read."""
+
+    created_at: str
+    story_text: str
@@ -3,16 +3,74 @@ Story model for storing user's storyworthy moments
 """
 import sqlite3
 import os
-from datetime import datetime
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
 import logging
 
+from models.compression import DEFAULT_DICT_SIZE, StoryCodec, resolve_codec, sample_texts, train_dictionary
+from models.encryption import FORMAT_ENCRYPTED, KeyRing, load_master_key, open_rows, open_sealed, seal
+from models.records import StoryText
+from utils.metrics import instrument_methods
+
 logger = logging.getLogger(__name__)
 
+# Bumped by each migration in _migrate; stored in PRAGMA user_version
+SCHEMA_VERSION = 2
+
+# Users whose last known names are remembered, so unchanged upserts skip the database
+USER_CACHE_SIZE = 10_000
+
+# Stay well under SQLite's bound parameter limit in IN (...) queries
+IN_BATCH_SIZE = 500
+
+# Hourly rollup rows older than this are dropped; daily rows are kept
+HOURLY_STATS_DAYS = 14
+
+# Free pages returned to the filesystem per write transaction after archiving
+VACUUM_STEP_PAGES = 1000
+
+_STORY_COLUMNS = "id, user_id, story_text, created_at"
+# Projections: id stays in so UNION across the tiers can't merge distinct stories
+_DATE_COLUMNS = "id, created_at"
+_TEXT_COLUMNS = "id, created_at, story_text"
+
+
+def page_cursor(row: dict) -> str:
+    """Opaque position after ``row`` for get_story_page/get_feedback_page(before=...)."""
+    return f"{row['created_at']}|{row['id']}"
+
+
+def _parse_cursor(cursor: str) -> tuple:
+    created_at, sep, row_id = cursor.rpartition('|')
+    if not sep or not row_id.isdigit():
+        raise ValueError(f"Invalid page cursor: {cursor!r}")
+    return created_at, int(row_id)
+
+@instrument_methods
 class StoryDatabase:
     """Manage story storage in SQLite database"""
     
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, compression: str = None, encryption_key: str = None,
+                 archive_path: str = None, wal_autocheckpoint: int = None):
+        """
+        Args:
+            db_path: Database file (default: $DB_DIR/stories.db)
+            archive_path: Cold tier for old stories, attached when a read
+                reaches back into it (default: stories_archive.db next to db_path)
+            compression: Codec for new stories: 'off', 'zlib', 'zstd' or 'auto'
+                (default: $STORY_COMPRESSION, off). Compressed stories are
+                always readable, whatever this is set to.
+            encryption_key: Master key for story encryption (default:
+                $STORY_ENCRYPTION_KEY). When set, new stories are encrypted;
+                reading encrypted stories needs it.
+            wal_autocheckpoint: WAL pages after which a commit checkpoints
+                (default: SQLite's 1000). 0 leaves checkpoints to the WAL
+                archiver (services/wal_archive.py), which must see every frame.
+        """
         if db_path is None:
             # Use /data for Fly.io persistent volume, fall back to local for development
             db_dir = os.getenv('DB_DIR', 'data')
@@ -24,22 +82,64 @@ class StoryDatabase:
         db_path.parent.mkdir(parents=True, exist_ok=True)
         
         self.db_path = str(db_path)
+        if archive_path is None:
+            archive_path = db_path.with_name(f"{db_path.stem}_archive{db_path.suffix}")
+        self.archive_path = str(archive_path)
+        self.wal_autocheckpoint = wal_autocheckpoint
+        self._user_cache: "OrderedDict[int, tuple]" = OrderedDict()
+        if compression is None:
+            compression = os.getenv('STORY_COMPRESSION', 'off')
+        self._compression = resolve_codec(compression)
+        self._codec = StoryCodec()
+        if encryption_key is None:
+            encryption_key = os.getenv('STORY_ENCRYPTION_KEY')
+        self._keys = KeyRing(load_master_key(encryption_key)) if encryption_key else None
         self._init_database()
     
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open a connection for one method call: commits (or rolls back) like
+        ``with sqlite3.connect()``, then closes it. Left to the garbage
+        collector, connections would linger and keep the WAL open.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            if self.wal_autocheckpoint is not None:
+                # Per connection, so it has to be set on every one
+                conn.execute(f"PRAGMA wal_autocheckpoint = {int(self.wal_autocheckpoint)}")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
     def _init_database(self):
         """Initialize the database schema"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
+            # Only takes effect on a new file; _migrate converts older ones
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            # Readers don't block the writer, and the WAL can be archived (persistent)
+            conn.execute("PRAGMA journal_mode = WAL")
             cursor = conn.cursor()
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS stories (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     user_id INTEGER NOT NULL,
-                    username TEXT,
-                    first_name TEXT,
                     story_text TEXT NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
+
+            # One row per Telegram user with their latest known names
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS users (
+                    user_id INTEGER PRIMARY KEY,
+                    username TEXT,
+                    first_name TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
             
             # Create reminder preferences table
             cursor.execute("""
@@ -58,26 +158,526 @@ class StoryDatabase:
                 CREATE TABLE IF NOT EXISTS feedback (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     user_id INTEGER NOT NULL,
-                    username TEXT,
-                    first_name TEXT,
                     feedback_text TEXT NOT NULL,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
             
-            # Create index for faster user queries
+            # A user's stories in date order (and by id, the rowid, within a
+            # timestamp): serves per-user reads and keyset pages without a sort
             cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_user_id 
-                ON stories(user_id)
+                CREATE INDEX IF NOT EXISTS idx_user_created
+                ON stories(user_id, created_at)
             """)
+            # Superseded by idx_user_created
+            cursor.execute("DROP INDEX IF EXISTS idx_user_id")
             
             cursor.execute("""
                 CREATE INDEX IF NOT EXISTS idx_created_at 
                 ON stories(created_at)
             """)
+
+            # Keyset pagination of feedback, newest first (get_feedback_page)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_feedback_created_id
+                ON feedback(created_at, id)
+            """)
+
+            # Shared dictionaries for compressed story text (see models/compression.py)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS compression_dicts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    codec TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            # Single row: stories created before archived_before may be in the archive tier
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS archive_state (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    archived_before TIMESTAMP NOT NULL
+                )
+            """)
+
+            # Append-only reminder delivery and response log, written in
+            # batches by services/reminder_events.py; times are UTC
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS reminder_events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    event TEXT NOT NULL,
+                    scheduled_at TIMESTAMP,
+                    occurred_at TIMESTAMP NOT NULL,
+                    lag_ms INTEGER,
+                    latency_ms INTEGER,
+                    response_seconds INTEGER,
+                    error TEXT
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_reminder_events_occurred
+                ON reminder_events(occurred_at)
+            """)
+
+            # Admin stats rollups, refreshed by a background job (refresh_rollups);
+            # hour and day are UTC, as 'YYYY-MM-DD HH:00:00' and 'YYYY-MM-DD'
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stats_hourly (
+                    hour TEXT PRIMARY KEY,
+                    stories INTEGER NOT NULL,
+                    feedback INTEGER NOT NULL,
+                    active_users INTEGER NOT NULL
+                )
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS stats_daily (
+                    day TEXT PRIMARY KEY,
+                    stories INTEGER NOT NULL,
+                    feedback INTEGER NOT NULL,
+                    active_users INTEGER NOT NULL,
+                    new_users INTEGER NOT NULL DEFAULT 0,
+                    reminders_enabled INTEGER,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_users_created_at
+                ON users(created_at)
+            """)
+
+            # Per-user story keys, wrapped by the master key (see models/encryption.py)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS user_keys (
+                    user_id INTEGER PRIMARY KEY,
+                    wrapped_key BLOB NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            conn.commit()
+            self._migrate(conn)
+            self._load_codec(conn)
+            logger.info("Database initialized at %s", self.db_path)
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """Bring a database created by an older version up to SCHEMA_VERSION."""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        vacuum = False
+        conn.isolation_level = None
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if version < 1:
+                vacuum = self._migrate_users(conn) or vacuum
+            if version < 2:
+                # v2: incremental auto_vacuum, so archive_stories can shrink the
+                # file a few pages at a time; switching takes one full VACUUM
+                if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    vacuum = True
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        if vacuum:
+            # Rewrite the file so the dropped columns' space is returned (and
+            # a new auto_vacuum mode applies)
+            conn.execute("VACUUM")
+        conn.isolation_level = ''
+
+    @staticmethod
+    def _migrate_users(conn: sqlite3.Connection) -> bool:
+        """
+        v1: move username/first_name out of stories and feedback into users,
+        keeping each user's most recent names.
+
+        Returns:
+            True if columns were dropped
+        """
+        def columns(table):
+            return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+        legacy = [table for table in ('stories', 'feedback') if 'first_name' in columns(table)]
+        if not legacy:
+            return False
+
+        union = " UNION ALL ".join(
+            f"SELECT id, user_id, username, first_name, created_at, {i} AS source FROM {table}"
+            for i, table in enumerate(legacy)
+        )
+        conn.execute(f"""
+            INSERT OR IGNORE INTO users (user_id, username, first_name, created_at, updated_at)
+            SELECT user_id, username, first_name, first_seen, created_at
+            FROM (
+                SELECT user_id, username, first_name, created_at,
+                       MIN(created_at) OVER (PARTITION BY user_id) AS first_seen,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY user_id ORDER BY created_at DESC, source DESC, id DESC
+                       ) AS rn
+                FROM ({union})
+            )
+            WHERE rn = 1
+        """)
+        for table in legacy:
+            conn.execute(f"ALTER TABLE {table} DROP COLUMN username")
+            conn.execute(f"ALTER TABLE {table} DROP COLUMN first_name")
+        logger.info("Migrated user names from %s into users", ', '.join(legacy))
+        return True
+
+    def _load_codec(self, conn: sqlite3.Connection = None) -> None:
+        """(Re)load compression dictionaries; new stories use the newest one for the configured codec."""
+        if conn is None:
+            with self._connect() as conn:
+                return self._load_codec(conn)
+        dictionaries = {
+            row[0]: (row[1], row[2])
+            for row in conn.execute("SELECT id, codec, data FROM compression_dicts")
+        }
+        active_id = max(
+            (dict_id for dict_id, (codec, _) in dictionaries.items() if codec == self._compression),
+            default=None,
+        )
+        self._codec = StoryCodec(dictionaries, self._compression, active_id)
+
+    def _cipher(self, conn: sqlite3.Connection, user_id: int):
+        """Return the user's key for reading encrypted stories."""
+        if self._keys is None:
+            raise RuntimeError("Stories are encrypted; set STORY_ENCRYPTION_KEY to read them")
+        cipher = self._keys.cipher(conn, user_id)
+        if cipher is None:
+            raise RuntimeError(f"No encryption key for user {user_id}")
+        return cipher
+
+    def _encode_story(self, conn: sqlite3.Connection, user_id: int, text: str):
+        """Compress and, when a master key is set, encrypt story text for storage."""
+        value = self._codec.encode(text)
+        if self._keys is not None:
+            value = seal(self._keys.cipher(conn, user_id, create=True), user_id, value)
+        return value
+
+    def _decode_story(self, conn: sqlite3.Connection, user_id: int, value):
+        """Return the plain text of one stored story in any format."""
+        if isinstance(value, bytes) and value[0] == FORMAT_ENCRYPTED:
+            value = open_sealed(self._cipher(conn, user_id), user_id, value)
+        return self._codec.decode(value)
+
+    def _decode_stories(self, conn: sqlite3.Connection, rows) -> list:
+        """Turn story rows into dictionaries with plain story_text."""
+        stories = [dict(row) for row in rows]
+        texts = self._plain_texts(conn, [story['user_id'] for story in stories],
+                                  [story['story_text'] for story in stories])
+        for story, text in zip(stories, texts):
+            story['story_text'] = text
+        return stories
+
+    def _plain_texts(self, conn: sqlite3.Connection, user_ids: list, values: list) -> list:
+        """Stored story_text values (compressed and/or sealed) as plain strings."""
+        try:
+            return self._decode_texts(conn, user_ids, values)
+        except KeyError:
+            # Another process trained a dictionary since we loaded ours
+            self._load_codec(conn)
+            return self._decode_texts(conn, user_ids, values)
+
+    def _decode_texts(self, conn: sqlite3.Connection, user_ids: list, values: list) -> list:
+        # One pass: each user's key is looked up once, every row is opened and
+        # decompressed as it comes
+        return open_rows(lambda user_id: self._cipher(conn, user_id), user_ids, values, self._codec.decode)
+
+    @staticmethod
+    def _archived_before(conn: sqlite3.Connection):
+        """Return the archive boundary timestamp, or None if nothing was ever archived."""
+        row = conn.execute("SELECT archived_before FROM archive_state WHERE id = 1").fetchone()
+        return row[0] if row else None
+
+    def _attach_archive(self, conn: sqlite3.Connection) -> None:
+        """Attach the archive tier as ``archive``, creating its schema on first use."""
+        if any(row[1] == 'archive' for row in conn.execute("PRAGMA database_list")):
+            return
+        conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive.stories (
+                id INTEGER PRIMARY KEY,
+                user_id INTEGER NOT NULL,
+                story_text TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE INDEX IF NOT EXISTS archive.idx_archive_user_created
+            ON stories(user_id, created_at)
+        """)
+
+    def _read_stories(self, conn: sqlite3.Connection, where: str, params: tuple,
+                      since: str = None, limit: int = None, columns: str = _STORY_COLUMNS) -> list:
+        """
+        Select stories newest first from the hot tier, and from the archive as
+        well only when the range can reach it: no ``since`` or one before the
+        archive boundary, and (with a limit) not enough hot rows to fill it.
+        ``columns`` must include id and created_at.
+        """
+        hot = f"SELECT {columns} FROM main.stories WHERE {where}"
+        order = " ORDER BY created_at DESC, id DESC" + (f" LIMIT {int(limit)}" if limit else "")
+
+        archived_before = self._archived_before(conn)
+        if archived_before is None or (since is not None and since >= archived_before):
+            return conn.execute(hot + order, params).fetchall()
+        if limit:
+            rows = conn.execute(hot + order, params).fetchall()
+            if len(rows) >= limit:
+                return rows
+
+        self._attach_archive(conn)
+        cold = f"SELECT {columns} FROM archive.stories WHERE {where}"
+        # UNION, not UNION ALL: a row caught between the two tiers' commits is
+        # identical in both and shows up once
+        return conn.execute(f"{hot} UNION {cold}{order}", params + params).fetchall()
+
+    @staticmethod
+    def _move_to_archive(conn: sqlite3.Connection, where: str, params) -> None:
+        """
+        Move the hot stories matching ``where`` into the attached archive.
+
+        Copied and committed first, deleted in a second transaction: in WAL
+        mode main and an attached database don't commit atomically, so a
+        crash in between must leave the rows in both tiers (reads take the
+        UNION), never in neither. INSERT OR REPLACE makes the retry harmless.
+        """
+        conn.execute(f"""
+            INSERT OR REPLACE INTO archive.stories ({_STORY_COLUMNS})
+            SELECT {_STORY_COLUMNS} FROM main.stories WHERE {where}
+        """, params)
+        conn.commit()
+        conn.execute(f"DELETE FROM main.stories WHERE {where}", params)
+        conn.commit()
+
+    @staticmethod
+    def _release_free_pages(conn: sqlite3.Connection, step: int = VACUUM_STEP_PAGES) -> int:
+        """
+        Truncate the hot database's free pages, ``step`` per transaction, so
+        the write lock is never held for long (a full VACUUM holds it for the
+        whole rewrite). Returns the number of pages released.
+        """
+        released = 0
+        free = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+        while free:
+            # executescript steps the pragma to completion; execute() frees one page
+            conn.executescript(f"PRAGMA main.incremental_vacuum({int(step)});")
+            left = conn.execute("PRAGMA main.freelist_count").fetchone()[0]
+            if left >= free:
+                # Not in incremental mode (e.g. a file not yet migrated)
+                break
+            released += free - left
+            free = left
+        return released
+
+    def archive_stories(self, older_than_days: int, batch_size: int = IN_BATCH_SIZE,
+                        vacuum: bool = True) -> int:
+        """
+        Move stories older than ``older_than_days`` into the archive tier
+        
+        Args:
+            older_than_days: Age in days from which stories are archived
+            batch_size: Rows moved per transaction
+            vacuum: Give the freed pages back afterwards so the hot database
+                shrinks on disk
             
+        Returns:
+            Number of stories moved
+        """
+        cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).strftime('%Y-%m-%d %H:%M:%S')
+        moved = 0
+        with self._connect() as conn:
+            self._attach_archive(conn)
+            # Publish the boundary before moving anything, so a read that
+            # reaches back past it already includes the archive
+            conn.execute("""
+                INSERT INTO archive_state (id, archived_before) VALUES (1, ?)
+                ON CONFLICT(id) DO UPDATE SET
+                    archived_before = MAX(archived_before, excluded.archived_before)
+            """, (cutoff,))
             conn.commit()
-            logger.info(f"Database initialized at {self.db_path}")
+
+            while True:
+                ids = [row[0] for row in conn.execute("""
+                    SELECT id FROM main.stories WHERE created_at < ? LIMIT ?
+                """, (cutoff, batch_size))]
+                if not ids:
+                    break
+                self._move_to_archive(conn, f"id IN ({','.join('?' * len(ids))})", ids)
+                moved += len(ids)
+
+            if moved and vacuum:
+                self._release_free_pages(conn)
+
+        if moved:
+            logger.info("Archived %s stories created before %s", moved, cutoff)
+        return moved
+
+    def train_compression_dictionary(self, sample_size: int = 5000,
+                                     dict_size: int = DEFAULT_DICT_SIZE, codec: str = None) -> int:
+        """
+        Train a shared compression dictionary from a sample of stored stories
+        (both tiers), streamed so only the sample is held in memory
+        
+        Args:
+            sample_size: Number of stories to sample
+            dict_size: Dictionary size in bytes
+            codec: 'zlib' or 'zstd' (default: the configured codec)
+            
+        Returns:
+            The new dictionary's ID
+        """
+        codec = resolve_codec(codec) if codec else self._compression
+        if codec is None:
+            raise ValueError("Story compression is off; pass codec= or set STORY_COMPRESSION")
+
+        with self._connect() as conn:
+            query = "SELECT user_id, story_text FROM main.stories"
+            if self._archived_before(conn) is not None:
+                self._attach_archive(conn)
+                query += " UNION ALL SELECT user_id, story_text FROM archive.stories"
+            # Sample the stored rows straight off the cursor and decode only the sample
+            rows = sample_texts(conn.execute(query), sample_size)
+            samples = [self._decode_story(conn, user_id, value) for user_id, value in rows]
+            data = train_dictionary(samples, codec, dict_size)
+            cursor = conn.execute("""
+                INSERT INTO compression_dicts (codec, data) VALUES (?, ?)
+            """, (codec, data))
+            conn.commit()
+            dict_id = cursor.lastrowid
+            self._load_codec(conn)
+
+        logger.info("Trained %s compression dictionary %s (%s bytes) from %s stories",
+                    codec, dict_id, len(data), len(samples))
+        return dict_id
+
+    def compress_stories(self, batch_size: int = 1000) -> int:
+        """
+        Re-encode stored stories in both tiers with the current codec,
+        dictionary and encryption setting (encrypting plain rows when a
+        master key is set)
+        
+        Args:
+            batch_size: Rows rewritten per transaction
+            
+        Returns:
+            Number of rows rewritten
+        """
+        rewritten = 0
+        with self._connect() as conn:
+            tables = ['main.stories']
+            if self._archived_before(conn) is not None:
+                self._attach_archive(conn)
+                tables.append('archive.stories')
+            for table in tables:
+                last_id = 0
+                while True:
+                    rows = conn.execute(f"""
+                        SELECT id, user_id, story_text FROM {table} WHERE id > ? ORDER BY id LIMIT ?
+                    """, (last_id, batch_size)).fetchall()
+                    if not rows:
+                        break
+                    last_id = rows[-1][0]
+                    updates = []
+                    for story_id, user_id, value in rows:
+                        sealed = isinstance(value, bytes) and value[0] == FORMAT_ENCRYPTED
+                        inner = open_sealed(self._cipher(conn, user_id), user_id, value) if sealed else value
+                        encoded = self._codec.encode(self._codec.decode(inner))
+                        # Nonces are random, so compare what is inside the envelope
+                        if encoded == inner and sealed == (self._keys is not None):
+                            continue
+                        if self._keys is not None:
+                            encoded = seal(self._keys.cipher(conn, user_id, create=True), user_id, encoded)
+                        updates.append((encoded, story_id))
+                    conn.executemany(f"UPDATE {table} SET story_text = ? WHERE id = ?", updates)
+                    conn.commit()
+                    rewritten += len(updates)
+        return rewritten
+
+    def upsert_user(self, user_id: int, username: str = None, first_name: str = None) -> bool:
+        """
+        Record a user's current names, writing only when they changed
+        
+        Args:
+            user_id: Telegram user ID
+            username: Telegram username
+            first_name: User's first name
+            
+        Returns:
+            True if the users row was inserted or updated
+        """
+        names = (username, first_name)
+        cache = self._user_cache
+        if cache.get(user_id) == names:
+            cache.move_to_end(user_id)
+            return False
+
+        with self._connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                INSERT INTO users (user_id, username, first_name)
+                VALUES (?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    username = excluded.username,
+                    first_name = excluded.first_name,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE users.username IS NOT excluded.username
+                   OR users.first_name IS NOT excluded.first_name
+            """, (user_id, username, first_name))
+            conn.commit()
+            changed = cursor.rowcount > 0
+
+        cache[user_id] = names
+        cache.move_to_end(user_id)
+        if len(cache) > USER_CACHE_SIZE:
+            cache.popitem(last=False)
+        return changed
+
+    def get_user(self, user_id: int):
+        """
+        Get a user's stored names
+        
+        Args:
+            user_id: Telegram user ID
+            
+        Returns:
+            Dictionary with user_id, username and first_name, or None
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("""
+                SELECT user_id, username, first_name FROM users WHERE user_id = ?
+            """, (user_id,)).fetchone()
+            return dict(row) if row else None
+
+    def get_first_names(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Look up first names for many users at once
+        
+        Args:
+            user_ids: Telegram user IDs
+            
+        Returns:
+            Mapping of user ID to first name (users without a name are left out)
+        """
+        ids = list(dict.fromkeys(user_ids))
+        names = {}
+        with self._connect() as conn:
+            for start in range(0, len(ids), IN_BATCH_SIZE):
+                batch = ids[start:start + IN_BATCH_SIZE]
+                placeholders = ','.join('?' * len(batch))
+                names.update(conn.execute(f"""
+                    SELECT user_id, first_name FROM users
+                    WHERE user_id IN ({placeholders}) AND first_name IS NOT NULL
+                """, batch).fetchall())
+        return names
     
     def save_story(self, user_id: int, story_text: str, 
                    username: str = None, first_name: str = None) -> int:
@@ -87,53 +687,177 @@ class StoryDatabase:
         Args:
             user_id: Telegram user ID
             story_text: The story content
-            username: Optional Telegram username
-            first_name: Optional user's first name
+            username: Optional Telegram username (stored in users)
+            first_name: Optional user's first name (stored in users)
             
         Returns:
             The ID of the saved story
         """
-        with sqlite3.connect(self.db_path) as conn:
+        if username is not None or first_name is not None:
+            self.upsert_user(user_id, username, first_name)
+
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO stories (user_id, username, first_name, story_text)
-                VALUES (?, ?, ?, ?)
-            """, (user_id, username, first_name, story_text))
+                INSERT INTO stories (user_id, story_text)
+                VALUES (?, ?)
+            """, (user_id, self._encode_story(conn, user_id, story_text)))
             
             conn.commit()
             story_id = cursor.lastrowid
-            logger.info(f"Story {story_id} saved for user {user_id}")
+            logger.info("Story %s saved for user %s", story_id, user_id)
             return story_id
     
-    def get_user_stories(self, user_id: int, limit: int = None):
+    def import_stories(self, user_id: int, entries: Iterable[tuple]) -> int:
+        """
+        Insert a batch of dated stories for one user in a single transaction
+        
+        Args:
+            user_id: Telegram user ID
+            entries: (created_at, story_text) pairs; created_at as
+                'YYYY-MM-DD HH:MM:SS' UTC
+            
+        Returns:
+            Number of stories inserted
+            
+        Stories older than the archive boundary go to the archive tier, where
+        archive_stories() would have put them: reads that fill a limit from
+        the hot tier alone would otherwise stop short of them.
+        """
+        entries = list(entries)
+        with self._connect() as conn:
+            archived_before = self._archived_before(conn)
+            back_dated = archived_before is not None and any(created_at < archived_before
+                                                              for created_at, _ in entries)
+            if back_dated:
+                # ATTACH is refused inside a transaction, so before any insert
+                self._attach_archive(conn)
+            # Encoded up front: sealing may create the user's key on this connection
+            rows = [(user_id, self._encode_story(conn, user_id, text), created_at) for created_at, text in entries]
+            cursor = conn.executemany("""
+                INSERT INTO stories (user_id, story_text, created_at)
+                VALUES (?, ?, ?)
+            """, rows)
+            inserted = cursor.rowcount
+            conn.commit()
+            if back_dated:
+                # Inserted through main first so ids still come from its sequence.
+                # A crash before the move leaves them hot, where the next
+                # archive_stories run picks them up.
+                self._move_to_archive(conn, "user_id = ? AND created_at < ?", (user_id, archived_before))
+            return inserted
+
+    def get_user_stories(self, user_id: int, limit: int = None, since: datetime = None):
         """
         Get all stories for a specific user
         
         Args:
             user_id: Telegram user ID
             limit: Optional limit on number of stories to return
+            since: Optional UTC datetime; only stories created at or after it
             
         Returns:
-            List of story dictionaries
+            List of story dictionaries, newest first (see get_story_dates and
+            get_story_texts for callers that need less)
         """
-        with sqlite3.connect(self.db_path) as conn:
+        where, params, since_str = self._user_range(user_id, since)
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+            rows = self._read_stories(conn, where, params, since=since_str, limit=limit)
+            return self._decode_stories(conn, rows)
+    
+    @staticmethod
+    def _user_range(user_id: int, since: datetime = None, before: tuple = None):
+        """WHERE clause, params and since string for one user's stories."""
+        where, params, since_str = "user_id = ?", (user_id,), None
+        if since is not None:
+            since_str = since.strftime('%Y-%m-%d %H:%M:%S')
+            where += " AND created_at >= ?"
+            params += (since_str,)
+        if before is not None:
+            where += " AND (created_at, id) < (?, ?)"
+            params += tuple(before)
+        return where, params, since_str
+
+    def get_story_dates(self, user_id: int, since: datetime = None, limit: int = None) -> List[str]:
+        """
+        Get just the created_at of a user's stories, newest first: read from
+        the (user_id, created_at) indexes alone, nothing decoded
+        
+        Args:
+            user_id: Telegram user ID
+            since: Optional UTC datetime; only stories created at or after it
+            limit: Optional limit on number of dates to return
             
-            query = """
-                SELECT id, user_id, username, first_name, story_text, created_at
-                FROM stories
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-            """
+        Returns:
+            List of 'YYYY-MM-DD HH:MM:SS' strings
+        """
+        where, params, since_str = self._user_range(user_id, since)
+        with self._connect() as conn:
+            rows = self._read_stories(conn, where, params, since=since_str, limit=limit, columns=_DATE_COLUMNS)
+        return [created_at for _, created_at in rows]
+
+    def get_story_texts(self, user_id: int, since: datetime = None, limit: int = None) -> List[StoryText]:
+        """
+        Get a user's stories as (created_at, story_text) records, newest first
+        
+        Args:
+            user_id: Telegram user ID
+            since: Optional UTC datetime; only stories created at or after it
+            limit: Optional limit on number of stories to return
             
-            if limit:
-                query += f" LIMIT {limit}"
+        Returns:
+            List of StoryText
+        """
+        where, params, since_str = self._user_range(user_id, since)
+        with self._connect() as conn:
+            rows = self._read_stories(conn, where, params, since=since_str, limit=limit, columns=_TEXT_COLUMNS)
+            texts = self._plain_texts(conn, [user_id] * len(rows), [row[2] for row in rows])
+        return [StoryText(row[1], text) for row, text in zip(rows, texts)]
+
+    def iter_story_texts(self, user_id: int, batch_size: int = IN_BATCH_SIZE) -> Iterator[StoryText]:
+        """
+        Yield all of a user's stories as StoryText, newest first, one batch
+        per query, so a long history is never held in memory at once
+        
+        Args:
+            user_id: Telegram user ID
+            batch_size: Stories read per query
+        """
+        before = None
+        while True:
+            where, params, _ = self._user_range(user_id, before=before)
+            with self._connect() as conn:
+                rows = self._read_stories(conn, where, params, limit=batch_size, columns=_TEXT_COLUMNS)
+                texts = self._plain_texts(conn, [user_id] * len(rows), [row[2] for row in rows])
+            yield from (StoryText(row[1], text) for row, text in zip(rows, texts))
+            if len(rows) < batch_size:
+                return
+            before = rows[-1][1], rows[-1][0]
+
+    def get_story_page(self, user_id: int, limit: int = 20, before: str = None):
+        """
+        Get one page of a user's stories, newest first, by keyset pagination
+        
+        Args:
+            user_id: Telegram user ID
+            limit: Page size
+            before: Cursor from the previous page (page_cursor of its last story)
             
-            cursor.execute(query, (user_id,))
-            rows = cursor.fetchall()
+        Returns:
+            (stories, next_cursor) where next_cursor is None on the last page
             
-            return [dict(row) for row in rows]
+        Raises:
+            ValueError: if ``before`` is not a valid cursor
+        """
+        where, params, _ = self._user_range(user_id, before=_parse_cursor(before) if before is not None else None)
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            # One extra row tells whether there is a next page
+            stories = self._decode_stories(conn, self._read_stories(conn, where, params, limit=limit + 1))
+
+        page = stories[:limit]
+        return page, page_cursor(page[-1]) if len(stories) > limit else None
     
     def get_stories_by_date(self, user_id: int, date: datetime):
         """
@@ -146,32 +870,30 @@ class StoryDatabase:
         Returns:
             List of story dictionaries
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
             
             date_str = date.strftime('%Y-%m-%d')
             
-            cursor.execute("""
-                SELECT id, user_id, username, first_name, story_text, created_at
-                FROM stories
-                WHERE user_id = ? 
-                AND DATE(created_at) = ?
-                ORDER BY created_at DESC
-            """, (user_id, date_str))
-            
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
+            rows = self._read_stories(conn, "user_id = ? AND DATE(created_at) = ?", (user_id, date_str),
+                                      since=date_str)
+            return self._decode_stories(conn, rows)
     
     def count_user_stories(self, user_id: int) -> int:
-        """Count total stories for a user"""
-        with sqlite3.connect(self.db_path) as conn:
+        """Count total stories for a user, in both tiers"""
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT COUNT(*) FROM stories WHERE user_id = ?
             """, (user_id,))
-            
-            return cursor.fetchone()[0]
+            count = cursor.fetchone()[0]
+
+            if self._archived_before(conn) is not None:
+                self._attach_archive(conn)
+                count += conn.execute("""
+                    SELECT COUNT(*) FROM archive.stories WHERE user_id = ?
+                """, (user_id,)).fetchone()[0]
+            return count
     
     def set_reminder(self, user_id: int, reminder_time: str, timezone: str = 'UTC') -> None:
         """
@@ -182,7 +904,7 @@ class StoryDatabase:
             reminder_time: Time in HH:MM format (24-hour)
             timezone: User's timezone (default UTC)
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO reminder_preferences (user_id, reminder_time, timezone, enabled)
@@ -195,7 +917,7 @@ class StoryDatabase:
             """, (user_id, reminder_time, timezone))
             
             conn.commit()
-            logger.info(f"Reminder set for user {user_id} at {reminder_time} {timezone}")
+            logger.info("Reminder set for user %s at %s %s", user_id, reminder_time, timezone)
     
     def disable_reminder(self, user_id: int) -> bool:
         """
@@ -207,7 +929,7 @@ class StoryDatabase:
         Returns:
             True if reminder was disabled, False if no reminder existed
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 UPDATE reminder_preferences
@@ -219,7 +941,7 @@ class StoryDatabase:
             rows_affected = cursor.rowcount
             
             if rows_affected > 0:
-                logger.info(f"Reminder disabled for user {user_id}")
+                logger.info("Reminder disabled for user %s", user_id)
                 return True
             return False
     
@@ -233,7 +955,7 @@ class StoryDatabase:
         Returns:
             Dictionary with reminder settings or None
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -253,7 +975,7 @@ class StoryDatabase:
         Returns:
             List of dictionaries with reminder settings
         """
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
@@ -275,22 +997,25 @@ class StoryDatabase:
         Args:
             user_id: Telegram user ID
             feedback_text: The feedback content
-            username: Optional Telegram username
-            first_name: Optional user's first name
+            username: Optional Telegram username (stored in users)
+            first_name: Optional user's first name (stored in users)
             
         Returns:
             The ID of the saved feedback
         """
-        with sqlite3.connect(self.db_path) as conn:
+        if username is not None or first_name is not None:
+            self.upsert_user(user_id, username, first_name)
+
+        with self._connect() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                INSERT INTO feedback (user_id, username, first_name, feedback_text)
-                VALUES (?, ?, ?, ?)
-            """, (user_id, username, first_name, feedback_text))
+                INSERT INTO feedback (user_id, feedback_text)
+                VALUES (?, ?)
+            """, (user_id, feedback_text))
             
             conn.commit()
             feedback_id = cursor.lastrowid
-            logger.info(f"Feedback {feedback_id} saved from user {user_id}")
+            logger.info("Feedback %s saved from user %s", feedback_id, user_id)
             return feedback_id
     
     def get_all_feedback(self):
@@ -298,17 +1023,346 @@ class StoryDatabase:
         Get all feedback from all users
         
         Returns:
-            List of feedback dictionaries
+            List of feedback dictionaries, newest first (prefer iter_feedback
+            or get_feedback_page, which don't load the whole table)
         """
-        with sqlite3.connect(self.db_path) as conn:
+        return list(self.iter_feedback())
+
+    def get_feedback_page(self, limit: int = 20, before: str = None, since: datetime = None,
+                          until: datetime = None, user_id: int = None):
+        """
+        Get one page of feedback, newest first, by keyset pagination
+        
+        Args:
+            limit: Page size
+            before: Cursor from the previous page (page_cursor of its last row)
+            since: Optional UTC datetime; only feedback created at or after it
+            until: Optional UTC datetime; only feedback created before it
+            user_id: Optional Telegram user ID to filter by
+            
+        Returns:
+            (rows, next_cursor) where next_cursor is None on the last page
+            
+        Raises:
+            ValueError: if ``before`` is not a valid cursor
+        """
+        conditions, params = [], []
+        if before is not None:
+            # Row value comparison walks idx_feedback_created_id from the cursor on
+            conditions.append("(f.created_at, f.id) < (?, ?)")
+            params.extend(_parse_cursor(before))
+        if since is not None:
+            conditions.append("f.created_at >= ?")
+            params.append(since.strftime('%Y-%m-%d %H:%M:%S'))
+        if until is not None:
+            conditions.append("f.created_at < ?")
+            params.append(until.strftime('%Y-%m-%d %H:%M:%S'))
+        if user_id is not None:
+            conditions.append("f.user_id = ?")
+            params.append(user_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        with self._connect() as conn:
             conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+            rows = conn.execute(f"""
+                SELECT f.id, f.user_id, u.username, u.first_name, f.feedback_text, f.created_at
+                FROM feedback f
+                LEFT JOIN users u ON u.user_id = f.user_id
+                {where}
+                ORDER BY f.created_at DESC, f.id DESC
+                LIMIT ?
+            """, params + [limit + 1]).fetchall()
+
+        page = [dict(row) for row in rows[:limit]]
+        next_cursor = page_cursor(page[-1]) if len(rows) > limit else None
+        return page, next_cursor
+
+    def iter_feedback(self, batch_size: int = IN_BATCH_SIZE, **filters) -> Iterator[dict]:
+        """
+        Yield feedback newest first, one page at a time, so the whole table is
+        never in memory and no read transaction spans the iteration
+        
+        Args:
+            batch_size: Rows read per query
+            **filters: since, until and user_id as for get_feedback_page
+        """
+        cursor = None
+        while True:
+            page, cursor = self.get_feedback_page(batch_size, before=cursor, **filters)
+            yield from page
+            if cursor is None:
+                return
+
+    def _activity(self, conn: sqlite3.Connection, since: str, until: str = None) -> str:
+        """
+        Subquery of (user_id, created_at, is_story) for stories and feedback
+        created at or after ``since`` (and before ``until``, bound as
+        ``:until``, if given), reaching into the archive only if needed.
+        """
+        where = "created_at >= :since" + (" AND created_at < :until" if until is not None else "")
+        stories = f"SELECT id, user_id, created_at FROM main.stories WHERE {where}"
+        archived_before = self._archived_before(conn)
+        if archived_before is not None and since < archived_before:
+            self._attach_archive(conn)
+            stories += f" UNION SELECT id, user_id, created_at FROM archive.stories WHERE {where}"
+        return f"""
+            SELECT user_id, created_at, 1 AS is_story FROM ({stories})
+            UNION ALL
+            SELECT user_id, created_at, 0 FROM feedback WHERE {where}
+        """
+
+    def ping(self, timeout: float = 1.0) -> float:
+        """
+        Database round trip for readiness checks: a plain read, which in WAL
+        mode never waits for writers. If the database stays locked past
+        ``timeout`` (an exclusive lock, WAL recovery) the wait is returned as
+        latency, so contention shows up as slow rather than down.
+        
+        Args:
+            timeout: Seconds to wait on a locked database
             
-            cursor.execute("""
-                SELECT id, user_id, username, first_name, feedback_text, created_at
-                FROM feedback
-                ORDER BY created_at DESC
-            """)
+        Returns:
+            Seconds the round trip took
             
-            rows = cursor.fetchall()
+        Raises:
+            sqlite3.Error: if the database can't be opened or read
+        """
+        started = time.perf_counter()
+        conn = sqlite3.connect(self.db_path, timeout=timeout)
+        try:
+            conn.execute("SELECT 1 FROM stories LIMIT 1").fetchall()
+        except sqlite3.OperationalError as e:
+            if e.sqlite_errorcode != sqlite3.SQLITE_BUSY:
+                raise
+        finally:
+            conn.close()
+        return time.perf_counter() - started
+
+    def refresh_rollups(self, now: datetime = None) -> int:
+        """
+        Bring stats_hourly and stats_daily up to date
+        
+        Each run recomputes from the latest hour (and day) already rolled up,
+        which may have been partial, so only recent rows are read. The first
+        run backfills from the beginning. Today's row also records how many
+        users have reminders enabled.
+        
+        Args:
+            now: Current UTC time (for tests)
+            
+        Returns:
+            Number of hourly and daily rows written
+        """
+        now = now or datetime.utcnow()
+        written = 0
+        with self._connect() as conn:
+            hour_from = conn.execute("SELECT MAX(hour) FROM stats_hourly").fetchone()[0] or ''
+            rows = conn.execute(f"""
+                SELECT strftime('%Y-%m-%d %H:00:00', created_at) AS hour,
+                       SUM(is_story), COUNT(*) - SUM(is_story), COUNT(DISTINCT user_id)
+                FROM ({self._activity(conn, hour_from)})
+                GROUP BY hour
+            """, {'since': hour_from}).fetchall()
+            conn.executemany("""
+                INSERT OR REPLACE INTO stats_hourly (hour, stories, feedback, active_users)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            written += len(rows)
+
+            day_from = conn.execute("SELECT MAX(day) FROM stats_daily").fetchone()[0] or ''
+            rows = conn.execute(f"""
+                SELECT DATE(created_at) AS day,
+                       SUM(is_story), COUNT(*) - SUM(is_story), COUNT(DISTINCT user_id)
+                FROM ({self._activity(conn, day_from)})
+                GROUP BY day
+            """, {'since': day_from}).fetchall()
+            new_users = dict(conn.execute("""
+                SELECT DATE(created_at), COUNT(*) FROM users WHERE created_at >= ? GROUP BY 1
+            """, (day_from,)).fetchall())
+            days = {day: [day, stories, feedback, active, 0] for day, stories, feedback, active in rows}
+            days.setdefault(now.strftime('%Y-%m-%d'), [now.strftime('%Y-%m-%d'), 0, 0, 0, 0])
+            for day, count in new_users.items():
+                days.setdefault(day, [day, 0, 0, 0, 0])[4] = count
+            conn.executemany("""
+                INSERT INTO stats_daily (day, stories, feedback, active_users, new_users)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(day) DO UPDATE SET
+                    stories = excluded.stories,
+                    feedback = excluded.feedback,
+                    active_users = excluded.active_users,
+                    new_users = excluded.new_users,
+                    updated_at = CURRENT_TIMESTAMP
+            """, days.values())
+            written += len(days)
+
+            conn.execute("""
+                UPDATE stats_daily SET reminders_enabled = (
+                    SELECT COUNT(*) FROM reminder_preferences WHERE enabled = 1
+                ) WHERE day = ?
+            """, (now.strftime('%Y-%m-%d'),))
+            keep_from = (now - timedelta(days=HOURLY_STATS_DAYS)).strftime('%Y-%m-%d %H:00:00')
+            conn.execute("DELETE FROM stats_hourly WHERE hour < ?", (keep_from,))
+            conn.commit()
+        return written
+
+    def refresh_rollup_days(self, days: Iterable[str]) -> int:
+        """
+        Recompute the rollup rows of past days that gained rows behind
+        refresh_rollups()' back, e.g. back-dated stories from an import
+        
+        refresh_rollups() only moves forward from the latest rolled-up hour
+        and day, so it never revisits these. Days after the latest rolled-up
+        day are left to it, and nothing is done before its first run, which
+        backfills everything. new_users and reminders_enabled are kept.
+        
+        Args:
+            days: 'YYYY-MM-DD' UTC days to recompute
+            
+        Returns:
+            Number of hourly and daily rows written
+        """
+        written = 0
+        with self._connect() as conn:
+            day_to = conn.execute("SELECT MAX(day) FROM stats_daily").fetchone()[0]
+            days = sorted({day for day in days if day_to is not None and day <= day_to})
+            if not days:
+                return 0
+            until = (datetime.strptime(days[-1], '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+            params = {'since': days[0], 'until': until}
+            totals = {day: (day, 0, 0, 0) for day in days}
+            for row in conn.execute(f"""
+                SELECT DATE(created_at) AS day,
+                       SUM(is_story), COUNT(*) - SUM(is_story), COUNT(DISTINCT user_id)
+                FROM ({self._activity(conn, days[0], until)})
+                GROUP BY day
+            """, params):
+                if row[0] in totals:
+                    totals[row[0]] = tuple(row)
+            conn.executemany("""
+                INSERT INTO stats_daily (day, stories, feedback, active_users)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(day) DO UPDATE SET
+                    stories = excluded.stories,
+                    feedback = excluded.feedback,
+                    active_users = excluded.active_users,
+                    updated_at = CURRENT_TIMESTAMP
+            """, totals.values())
+            written += len(totals)
+
+            hour_from, hour_to = conn.execute("SELECT MIN(hour), MAX(hour) FROM stats_hourly").fetchone()
+            if hour_from is not None and days[-1] >= hour_from[:10]:
+                params['since'] = max(days[0], hour_from)
+                rows = [row for row in conn.execute(f"""
+                    SELECT strftime('%Y-%m-%d %H:00:00', created_at) AS hour,
+                           SUM(is_story), COUNT(*) - SUM(is_story), COUNT(DISTINCT user_id)
+                    FROM ({self._activity(conn, params['since'], until)})
+                    GROUP BY hour
+                """, params) if row[0][:10] in totals and row[0] <= hour_to]
+                conn.executemany("""
+                    INSERT OR REPLACE INTO stats_hourly (hour, stories, feedback, active_users)
+                    VALUES (?, ?, ?, ?)
+                """, rows)
+                written += len(rows)
+            conn.commit()
+        return written
+
+    def get_stats(self, days: int = 7, now: datetime = None) -> dict:
+        """
+        Read admin stats from the rollup tables (never from stories itself)
+        
+        Args:
+            days: Number of days of daily rows to return
+            now: Current UTC time (for tests)
+            
+        Returns:
+            Dictionary with updated_at, totals, last_24h and daily rows (newest
+            first, one per day including quiet days)
+        """
+        now = now or datetime.utcnow()
+        first_day = (now - timedelta(days=days - 1)).date()
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            totals = dict(conn.execute("""
+                SELECT COALESCE(SUM(stories), 0) AS stories, COALESCE(SUM(feedback), 0) AS feedback,
+                       COALESCE(SUM(new_users), 0) AS users, MAX(updated_at) AS updated_at
+                FROM stats_daily
+            """).fetchone())
+            reminders = conn.execute("""
+                SELECT reminders_enabled FROM stats_daily
+                WHERE reminders_enabled IS NOT NULL ORDER BY day DESC LIMIT 1
+            """).fetchone()
+            last_24h = dict(conn.execute("""
+                SELECT COALESCE(SUM(stories), 0) AS stories, COALESCE(SUM(feedback), 0) AS feedback
+                FROM stats_hourly WHERE hour > ?
+            """, ((now - timedelta(hours=24)).strftime('%Y-%m-%d %H:00:00'),)).fetchone())
+            rows = {row['day']: dict(row) for row in conn.execute("""
+                SELECT day, active_users, stories, feedback, new_users, reminders_enabled
+                FROM stats_daily WHERE day >= ?
+            """, (first_day.isoformat(),))}
+
+        daily = []
+        for offset in range(days):
+            day = (now - timedelta(days=offset)).strftime('%Y-%m-%d')
+            daily.append(rows.get(day) or {'day': day, 'active_users': 0, 'stories': 0, 'feedback': 0,
+                                           'new_users': 0, 'reminders_enabled': None})
+        updated_at = totals.pop('updated_at')
+        totals['reminders_enabled'] = reminders[0] if reminders else 0
+        return {'updated_at': updated_at, 'totals': totals, 'last_24h': last_24h, 'daily': daily}
+
+    def record_reminder_events(self, events: Iterable[tuple]) -> int:
+        """
+        Append reminder events in one transaction
+        
+        Args:
+            events: (user_id, event, scheduled_at, occurred_at, lag_ms,
+                latency_ms, response_seconds, error) tuples
+            
+        Returns:
+            Number of events written
+        """
+        with self._connect() as conn:
+            cursor = conn.executemany("""
+                INSERT INTO reminder_events
+                    (user_id, event, scheduled_at, occurred_at, lag_ms, latency_ms, response_seconds, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, events)
+            conn.commit()
+            return cursor.rowcount
+
+    def get_reminder_delivery(self, since: datetime):
+        """
+        Scheduling lag and Telegram latency of reminders sent (or failed) since a time
+        
+        Returns:
+            List of dictionaries with event, lag_ms, latency_ms and error
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("""
+                SELECT event, lag_ms, latency_ms, error FROM reminder_events
+                WHERE occurred_at >= ? AND event IN ('sent', 'failed')
+            """, (since.strftime('%Y-%m-%d %H:%M:%S'),)).fetchall()
+            return [dict(row) for row in rows]
+
+    def get_reminder_conversion(self, since: datetime):
+        """
+        Reminders sent and answered with a story, per scheduled time slot (UTC HH:MM)
+        
+        Returns:
+            List of dictionaries with slot, sent, failed, stories and
+            avg_response_seconds, ordered by slot
+        """
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("""
+                SELECT strftime('%H:%M', scheduled_at) AS slot,
+                       SUM(event = 'sent') AS sent,
+                       SUM(event = 'failed') AS failed,
+                       SUM(event = 'story') AS stories,
+                       AVG(CASE WHEN event = 'story' THEN response_seconds END) AS avg_response_seconds
+                FROM reminder_events
+                WHERE occurred_at >= ? AND scheduled_at IS NOT NULL
+                GROUP BY slot
+                ORDER BY slot
+            """, (since.strftime('%Y-%m-%d %H:%M:%S'),)).fetchall()
             return [dict(row) for row in rows]
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Create, list, verify and restore online database snapshots.
+
+The bot takes snapshots on its own every BACKUP_INTERVAL_HOURS; this is for
+doing it by hand and for getting data back. Restores copy through the SQLite
+backup API, so they are safe with the bot running, but anything written
+since the snapshot is lost.
+
+Usage:
+    python scripts/backup_db.py create
+    python scripts/backup_db.py list
+    python scripts/backup_db.py verify [SNAPSHOT ...]
+    python scripts/backup_db.py restore SNAPSHOT [--db PATH]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import from services
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from services.backup import (SnapshotError, backup_databases, list_snapshots, restore_snapshot,
+                             snapshot_stem, verify_snapshot)
+
+def _db_paths():
+    from models.story import StoryDatabase
+    db = StoryDatabase()
+    return db.db_path, db.archive_path
+
+def create(args):
+    for snapshot in backup_databases(_db_paths(), args.dir, settings.BACKUP_KEEP):
+        print(f"✅ {snapshot}")
+
+def show(args):
+    snapshots = list_snapshots(args.dir)
+    if not snapshots:
+        print(f"📭 No snapshots in {args.dir}")
+        return
+    for snapshot in snapshots:
+        print(f"   {snapshot.name}  {snapshot.stat().st_size / 2**20:8.2f} MiB")
+
+def verify(args):
+    snapshots = [Path(path) for path in args.snapshots] or list_snapshots(args.dir)
+    failed = 0
+    for snapshot in snapshots:
+        try:
+            counts = verify_snapshot(snapshot)
+        except (SnapshotError, OSError) as e:
+            failed += 1
+            print(f"❌ {e}")
+            continue
+        rows = ', '.join(f"{table}={count}" for table, count in counts.items())
+        print(f"✅ {snapshot.name}: {rows}")
+    sys.exit(1 if failed else 0)
+
+def restore(args):
+    snapshot = Path(args.snapshot)
+    db_path = args.db or Path(os.getenv('DB_DIR', 'data')) / f"{snapshot_stem(snapshot)}.db"
+    try:
+        restore_snapshot(snapshot, db_path)
+    except SnapshotError as e:
+        print(f"❌ Not restoring: {e}")
+        sys.exit(1)
+    print(f"✅ Restored {db_path} from {snapshot.name}")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Online database snapshots")
+    parser.add_argument('--dir', default=settings.BACKUP_DIR, help="snapshot directory (default: $BACKUP_DIR)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('create', help="snapshot stories.db and the archive now").set_defaults(func=create)
+    commands.add_parser('list', help="list snapshots").set_defaults(func=show)
+    verify_parser = commands.add_parser('verify', help="check checksums and integrity (default: all)")
+    verify_parser.add_argument('snapshots', nargs='*')
+    verify_parser.set_defaults(func=verify)
+    restore_parser = commands.add_parser('restore', help="restore a database from a snapshot")
+    restore_parser.add_argument('snapshot')
+    restore_parser.add_argument('--db', help="database to overwrite (default: $DB_DIR/<name>.db)")
+    restore_parser.set_defaults(func=restore)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
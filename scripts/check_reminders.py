@@ -38,12 +38,14 @@ def list_active_reminders():
         print("📭 No active reminders found")
         return
     
+    names = db.get_first_names(reminder['user_id'] for reminder in reminders)
     print(f"📋 Active Reminders ({len(reminders)} total):\n")
     for reminder in reminders:
         user_id = reminder['user_id']
         time_str = reminder['reminder_time']
         status = "✅ Enabled" if reminder['enabled'] else "🔕 Disabled"
-        print(f"   User {user_id}: {time_str} UTC - {status}")
+        name = f" ({names[user_id]})" if user_id in names else ""
+        print(f"   User {user_id}{name}: {time_str} UTC - {status}")
     print()
 
 def show_user_reminder(user_id):
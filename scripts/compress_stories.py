@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Train a story compression dictionary and recompress existing stories.
+
+Run once after enabling STORY_COMPRESSION, and again whenever the stories
+have drifted enough that a fresh dictionary is worth it. Safe to run while
+the bot is up: rows are rewritten in small transactions and the bot picks up
+new dictionaries on its own.
+
+Rows are also brought in line with STORY_ENCRYPTION_KEY: with a key set,
+existing plain rows are encrypted as they are rewritten.
+
+Usage: python scripts/compress_stories.py [--codec zlib|zstd] [--sample 5000] [--no-train]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import from models
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.story import StoryDatabase
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Compress stored stories with a trained dictionary")
+    parser.add_argument('--codec', default='auto', help="zlib, zstd or auto (default)")
+    parser.add_argument('--sample', type=int, default=5000, help="stories sampled for training")
+    parser.add_argument('--no-train', action='store_true', help="reuse the newest dictionary")
+    args = parser.parse_args()
+
+    db = StoryDatabase(compression=args.codec)
+    if not args.no_train:
+        dict_id = db.train_compression_dictionary(sample_size=args.sample)
+        print(f"📚 Trained dictionary {dict_id}")
+    rewritten = db.compress_stories()
+    print(f"✅ Rewrote {rewritten} stories in {db.db_path}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Report on reminder delivery and how often reminders turn into stories.
+
+Reads the reminder_events table the bot appends to: scheduling lag (how
+late a reminder went out) and Telegram send latency as percentiles, failure
+reasons, and per time slot how many reminders were answered with a story.
+
+Usage:
+    python scripts/reminder_report.py [--days 7] [--conversion-days 30]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import from models and services
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.story import StoryDatabase
+from services.reminder_events import conversion_report, delivery_report
+
+def _ms(value):
+    return "—" if value is None else f"{value:,} ms"
+
+def show_delivery(db, days):
+    report = delivery_report(db, days)
+    print(f"📬 Delivery, last {days} day(s): {report['sent']} sent, {report['failed']} failed\n")
+    for name, label in (('lag_ms', "Scheduling lag"), ('latency_ms', "Telegram latency")):
+        values = '  '.join(f"{pct} {_ms(value)}" for pct, value in report[name].items())
+        print(f"   {label:<17} {values}")
+    for reason, count in sorted(report['failures'].items(), key=lambda item: -item[1]):
+        print(f"   ❌ {reason}: {count}")
+    print()
+
+def show_conversion(db, days):
+    slots = conversion_report(db, days)
+    print(f"✍️  Conversion by slot (UTC), last {days} day(s)\n")
+    if not slots:
+        print("   📭 No reminder events yet")
+        return
+    print(f"   {'Slot':<6} {'Sent':>6} {'Failed':>6} {'Stories':>7} {'Rate':>6} {'Avg reply':>10}")
+    for slot in slots:
+        rate = "—" if slot['conversion'] is None else f"{slot['conversion']:.0%}"
+        reply = "—" if slot['avg_response_seconds'] is None else f"{slot['avg_response_seconds'] / 60:.0f} min"
+        print(f"   {slot['slot']:<6} {slot['sent']:>6} {slot['failed']:>6} {slot['stories']:>7} {rate:>6} {reply:>10}")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Reminder delivery and conversion report")
+    parser.add_argument('--days', type=int, default=7, help="window for delivery percentiles")
+    parser.add_argument('--conversion-days', type=int, default=30, help="window for conversion by slot")
+    args = parser.parse_args()
+
+    db = StoryDatabase()
+    show_delivery(db, args.days)
+    show_conversion(db, args.conversion_days)
+
+if __name__ == '__main__':
+    main()
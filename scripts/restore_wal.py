@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+List WAL archive generations and restore stories.db to a point in time.
+
+The bot ships committed WAL frames every WAL_ARCHIVE_INTERVAL seconds.
+Restoring unpacks the newest base snapshot taken before the requested time
+and replays the segments shipped up to it into a new file; copy it over the
+live database (or restore it with scripts/backup_db.py) once you have
+checked it.
+
+Usage:
+    python scripts/restore_wal.py list
+    python scripts/restore_wal.py restore --to restored.db [--until "YYYY-MM-DD HH:MM:SS"]
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add parent directory to path to import from services
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.settings import settings
+from services.wal_archive import LocalWalStore, segment_time, parse_stamp, restore_to_time
+
+def show(args):
+    store = LocalWalStore(args.dir)
+    generations = store.generations()
+    if not generations:
+        print(f"📭 No WAL archive in {args.dir}")
+        return
+    for generation in generations:
+        segments = store.segments(generation)
+        last = segment_time(segments[-1]) if segments else parse_stamp(generation)
+        print(f"   {parse_stamp(generation):%Y-%m-%d %H:%M:%S} → {last:%Y-%m-%d %H:%M:%S}  "
+              f"{len(segments)} segment(s)")
+
+def restore(args):
+    until = datetime.strptime(args.until, '%Y-%m-%d %H:%M:%S') if args.until else None
+    target = Path(args.to)
+    if target.exists():
+        print(f"❌ {target} already exists; not overwriting it")
+        sys.exit(1)
+    try:
+        result = restore_to_time(LocalWalStore(args.dir), target, until=until)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    restored_to = result['restored_to']
+    print(f"✅ Restored {target} as of {restored_to:%Y-%m-%d %H:%M:%S} UTC "
+          f"({result['segments']} segment(s), {result['frames']} frame(s))")
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Point-in-time restore from the WAL archive")
+    parser.add_argument('--dir', default=settings.WAL_ARCHIVE_DIR, help="archive directory (default: $WAL_ARCHIVE_DIR)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="list generations and what they cover").set_defaults(func=show)
+    restore_parser = commands.add_parser('restore', help="rebuild the database as of a time")
+    restore_parser.add_argument('--to', required=True, help="file to write the restored database to")
+    restore_parser.add_argument('--until', help="UTC time to restore to (default: latest)")
+    restore_parser.set_defaults(func=restore)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,242 @@
+"""
+Online SQLite snapshots with the backup API.
+
+Copying the database file while the bot writes to it can capture a torn
+page or miss the journal. The SQLite backup API copies a consistent image
+instead, a few pages per step; the source is only read-locked during a step,
+and we pause between steps so writers are never held up for long. A write
+from another connection restarts a paged copy, so after a few restarts the
+rest is copied in one step (in WAL mode that doesn't block writers either).
+
+Each snapshot is gzipped to ``<stem>-<UTC timestamp>.db.gz`` in the backup
+directory, next to a ``.sha256`` file in ``sha256sum`` format. Only the
+newest BACKUP_KEEP snapshots of each database are kept. Restoring goes
+through the backup API too, so it is safe with the bot still running.
+"""
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from utils.metrics import BACKUP_DURATION, BACKUPS
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SUFFIX = '.db.gz'
+CHECKSUM_SUFFIX = '.sha256'
+
+# Pages copied per backup step (4 KiB each) and the pause after each step
+PAGES_PER_STEP = 256
+STEP_PAUSE = 0.005
+# Restarts (a write between steps) before the copy is done in one step
+MAX_RESTARTS = 3
+
+_STAMP = '%Y%m%dT%H%M%SZ'
+_CHUNK = 1 << 20
+
+
+class SnapshotError(ValueError):
+    """A snapshot is missing its checksum, doesn't match it, or isn't a sound database."""
+
+
+class _Restarting(Exception):
+    """Raised from the backup progress callback to give up on a paged copy."""
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _checksum_path(snapshot: Path) -> Path:
+    return snapshot.with_name(snapshot.name + CHECKSUM_SUFFIX)
+
+
+def snapshot_stem(snapshot: Path) -> str:
+    """The database a snapshot was taken from, e.g. 'stories' for stories-20260101T000000Z.db.gz."""
+    return Path(snapshot).name[:-len(SNAPSHOT_SUFFIX)].rsplit('-', 1)[0]
+
+
+def list_snapshots(backup_dir, stem: str = None) -> List[Path]:
+    """Snapshots in ``backup_dir``, oldest first, optionally only those of one database."""
+    backup_dir = Path(backup_dir)
+    if not backup_dir.is_dir():
+        return []
+    snapshots = [path for path in backup_dir.iterdir() if path.name.endswith(SNAPSHOT_SUFFIX)]
+    if stem is not None:
+        snapshots = [path for path in snapshots if snapshot_stem(path) == stem]
+    # The timestamp sorts lexically, and within one database that is its age
+    return sorted(snapshots, key=lambda path: path.name.rsplit('-', 1)[-1])
+
+
+def create_snapshot(db_path, backup_dir, pages: int = PAGES_PER_STEP, pause: float = STEP_PAUSE,
+                    max_restarts: int = MAX_RESTARTS) -> Path:
+    """
+    Take a consistent snapshot of a live database.
+
+    Args:
+        db_path: Database to back up
+        backup_dir: Directory for the snapshot and its checksum
+        pages: Pages copied per backup step
+        pause: Seconds to sleep between steps, when writers can get in
+        max_restarts: Restarts of the paged copy before it is redone in one step
+
+    Returns:
+        Path of the gzipped snapshot
+    """
+    db_path = Path(db_path)
+    backup_dir = Path(backup_dir)
+    backup_dir.mkdir(parents=True, exist_ok=True)
+    target = backup_dir / f"{db_path.stem}-{datetime.utcnow().strftime(_STAMP)}{SNAPSHOT_SUFFIX}"
+    restarts = 0
+    last_remaining = None
+
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        # Each step shrinks what is left, unless a write sent the copy back to the start
+        if last_remaining is not None and remaining >= last_remaining:
+            restarts += 1
+            if restarts > max_restarts:
+                raise _Restarting
+        last_remaining = remaining
+        if remaining:
+            time.sleep(pause)
+
+    with tempfile.TemporaryDirectory(dir=backup_dir) as tmp:
+        copy_path = Path(tmp) / db_path.name
+        source = sqlite3.connect(db_path)
+        try:
+            copy = sqlite3.connect(copy_path)
+            try:
+                source.backup(copy, pages=pages, progress=progress)
+            except _Restarting:
+                logger.info("Backup of %s restarted %s times; copying it in one step", db_path, restarts)
+                source.backup(copy)
+            finally:
+                copy.close()
+        finally:
+            source.close()
+
+        partial = Path(tmp) / target.name
+        with open(copy_path, 'rb') as raw, gzip.open(partial, 'wb', compresslevel=6) as packed:
+            shutil.copyfileobj(raw, packed, _CHUNK)
+        checksum = _sha256(partial)
+        # Checksum first: a snapshot without one is never mistaken for a good one
+        _checksum_path(target).write_text(f"{checksum}  {target.name}\n")
+        os.replace(partial, target)
+
+    return target
+
+
+def prune_snapshots(backup_dir, stem: str, keep: int) -> List[Path]:
+    """Delete all but the newest ``keep`` snapshots of a database; returns what was deleted."""
+    snapshots = list_snapshots(backup_dir, stem)
+    expired = snapshots[:-keep] if keep > 0 else []
+    for snapshot in expired:
+        snapshot.unlink(missing_ok=True)
+        _checksum_path(snapshot).unlink(missing_ok=True)
+    return expired
+
+
+def verify_snapshot(snapshot) -> Dict[str, int]:
+    """
+    Check a snapshot against its checksum and run SQLite's integrity check on it.
+
+    Returns:
+        Row count of every table in the snapshot
+
+    Raises:
+        SnapshotError: if the snapshot fails either check
+    """
+    snapshot = Path(snapshot)
+    checksum_file = _checksum_path(snapshot)
+    if not checksum_file.exists():
+        raise SnapshotError(f"{snapshot.name}: no {CHECKSUM_SUFFIX} file")
+    expected = checksum_file.read_text().split()[0]
+    if _sha256(snapshot) != expected:
+        raise SnapshotError(f"{snapshot.name}: checksum mismatch")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = _unpack(snapshot, Path(tmp))
+        conn = sqlite3.connect(db_path)
+        try:
+            result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+            if result != 'ok':
+                raise SnapshotError(f"{snapshot.name}: integrity check failed: {result}")
+            tables = [row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+            )]
+            return {table: conn.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0] for table in tables}
+        finally:
+            conn.close()
+
+
+def restore_snapshot(snapshot, db_path) -> None:
+    """
+    Verify a snapshot and copy it over ``db_path`` through the backup API,
+    so connections the bot holds see the restored contents, not a replaced file.
+    """
+    snapshot = Path(snapshot)
+    verify_snapshot(snapshot)
+    with tempfile.TemporaryDirectory() as tmp:
+        source = sqlite3.connect(_unpack(snapshot, Path(tmp)))
+        target = sqlite3.connect(db_path)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    logger.info("Restored %s from %s", db_path, snapshot.name)
+
+
+def _unpack(snapshot: Path, directory: Path) -> Path:
+    db_path = directory / snapshot.name[:-len('.gz')]
+    with gzip.open(snapshot, 'rb') as packed, open(db_path, 'wb') as raw:
+        shutil.copyfileobj(packed, raw, _CHUNK)
+    return db_path
+
+
+def backup_databases(db_paths: Iterable, backup_dir, keep: int) -> List[Path]:
+    """
+    Snapshot each database that exists and prune old snapshots.
+
+    Returns:
+        The new snapshots
+    """
+    created = []
+    for db_path in db_paths:
+        db_path = Path(db_path)
+        if not db_path.exists():
+            continue
+        started = time.perf_counter()
+        try:
+            snapshot = create_snapshot(db_path, backup_dir)
+        except Exception:
+            BACKUPS.labels(db_path.stem, 'failed').inc()
+            logger.exception("Backup of %s failed", db_path)
+            continue
+        BACKUP_DURATION.labels(db_path.stem).observe(time.perf_counter() - started)
+        BACKUPS.labels(db_path.stem, 'ok').inc()
+        created.append(snapshot)
+        expired = prune_snapshots(backup_dir, db_path.stem, keep)
+        logger.info("Backed up %s to %s (%s old snapshot(s) pruned)", db_path, snapshot.name, len(expired))
+    return created
+
+
+def seconds_until_due(backup_dir, stem: str, interval: float) -> float:
+    """Seconds until the next backup is due, given the newest snapshot's age (0 if none)."""
+    snapshots = list_snapshots(backup_dir, stem)
+    if not snapshots:
+        return 0.0
+    age = time.time() - snapshots[-1].stat().st_mtime
+    return max(interval - age, 0.0)
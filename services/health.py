@@ -0,0 +1,121 @@
+"""
+Readiness probing for the bot process.
+
+The web server answers health checks from its own thread and loop, so it
+can't see a wedged bot loop by looking at itself. Instead a small task on
+the bot's loop sleeps for a fixed interval and records how late it woke up
+(event loop lag), when it last ran (a heartbeat that stops when the loop is
+blocked), and a snapshot of the JobQueue: how many jobs there are and how
+far past due the earliest one is. The update timing middleware notes each
+processed update. ``/ready`` combines this with a database round trip.
+
+State is written on the bot loop and only read elsewhere; each field is a
+single float or tuple assignment, so readers never see a torn value.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from utils.metrics import EVENT_LOOP_LAG
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 1.0
+
+
+class ReadinessMonitor:
+    """Liveness signals gathered on the bot loop, read by the readiness endpoint."""
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = interval
+        self.loop_lag: Optional[float] = None
+        self.heartbeat: Optional[float] = None
+        self.last_update: Optional[float] = None
+        # (job count, seconds the earliest job is overdue), from the last probe
+        self.jobs: Optional[tuple] = None
+
+    def update_processed(self) -> None:
+        self.last_update = time.monotonic()
+
+    def snapshot_jobs(self, job_queue) -> None:
+        """Record the JobQueue's size and next-fire lag (call on the bot loop)."""
+        jobs = job_queue.jobs()
+        due = [job.next_t for job in jobs if job.next_t is not None]
+        overdue = (datetime.now(timezone.utc) - min(due)).total_seconds() if due else 0.0
+        self.jobs = (len(jobs), max(0.0, overdue))
+
+    async def run(self, job_queue=None) -> None:
+        """Probe the current loop until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            self.loop_lag = max(0.0, loop.time() - started - self.interval)
+            EVENT_LOOP_LAG.set(self.loop_lag)
+            self.heartbeat = time.monotonic()
+            if job_queue is not None:
+                try:
+                    self.snapshot_jobs(job_queue)
+                except Exception:
+                    logger.exception("Could not snapshot the job queue")
+
+    def check(self, db_latency: Optional[float], max_loop_lag: float, max_db_latency: float,
+              max_job_lag: float, max_update_age: float = 0, now: float = None) -> dict:
+        """
+        Evaluate the latest signals against their limits.
+
+        Args:
+            db_latency: Seconds for the database probe, or None if it failed
+            max_loop_lag: Most event loop lag (and heartbeat staleness beyond
+                the probe interval) still considered ready
+            max_db_latency: Slowest acceptable database round trip
+            max_job_lag: How far past due the next job may be
+            max_update_age: Seconds since the last processed update (0 = not checked,
+                since a quiet bot legitimately sees no updates)
+            now: time.monotonic() value to evaluate at (for tests)
+
+        Returns:
+            ``{'ready': bool, 'failing': [...], 'checks': {...}}`` with times in milliseconds
+        """
+        now = time.monotonic() if now is None else now
+        heartbeat_age = now - self.heartbeat if self.heartbeat is not None else None
+        update_age = now - self.last_update if self.last_update is not None else None
+        job_count, job_lag = self.jobs if self.jobs is not None else (None, None)
+
+        failing = []
+        if heartbeat_age is None:
+            failing.append('loop_probe_not_started')
+        elif heartbeat_age > self.interval + max_loop_lag:
+            failing.append('loop_heartbeat_stale')
+        if self.loop_lag is not None and self.loop_lag > max_loop_lag:
+            failing.append('loop_lag')
+        if db_latency is None:
+            failing.append('db_unavailable')
+        elif db_latency > max_db_latency:
+            failing.append('db_slow')
+        if job_lag is not None and job_lag > max_job_lag:
+            failing.append('job_queue_behind')
+        if max_update_age and update_age is not None and update_age > max_update_age:
+            failing.append('updates_stale')
+
+        def ms(seconds):
+            return None if seconds is None else round(seconds * 1000, 1)
+
+        return {
+            'ready': not failing,
+            'failing': failing,
+            'checks': {
+                'loop_lag_ms': ms(self.loop_lag),
+                'loop_heartbeat_age_ms': ms(heartbeat_age),
+                'db_latency_ms': ms(db_latency),
+                'jobs': job_count,
+                'next_job_lag_ms': ms(job_lag),
+                'last_update_age_ms': ms(update_age),
+            },
+        }
+
+
+# Shared by the bot loop (writer) and the web server (reader)
+readiness = ReadinessMonitor()
@@ -1,17 +1,21 @@
 import logging
-from typing import Optional
-from openai import AsyncOpenAI
+from typing import TYPE_CHECKING, Optional
 from config.settings import settings
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
 logger = logging.getLogger(__name__)
 
-_client: Optional[AsyncOpenAI] = None
+_client: Optional['AsyncOpenAI'] = None
 
 
-def get_openai_client() -> AsyncOpenAI:
+def get_openai_client() -> 'AsyncOpenAI':
     global _client
     if _client is None:
         if not settings.OPENAI_API_KEY:
             raise RuntimeError("OPENAI_API_KEY is not set")
+        # openai takes ~0.5 s to import, so load it on the first report instead of at startup
+        from openai import AsyncOpenAI
         _client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
     return _client
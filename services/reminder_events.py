@@ -0,0 +1,131 @@
+"""
+Reminder delivery and response events.
+
+The send path only appends a tuple to an in-memory buffer; a job flushes it
+to the append-only reminder_events table every few seconds with one
+executemany, off the event loop. If the database is unavailable the batch
+is kept for the next flush, up to MAX_PENDING events, after which new
+events are dropped (and counted) rather than letting memory grow.
+
+Events:
+    sent / failed   scheduled_at, lag_ms (scheduled to send start),
+                    latency_ms (the Telegram call), error for failures
+    story           the reminder's scheduled_at and response_seconds from
+                    the reminder being sent to the story being saved
+"""
+import logging
+import math
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+
+from utils.metrics import REMINDER_EVENTS_DROPPED
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING = 10_000
+
+_TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _format(moment: Optional[datetime]) -> Optional[str]:
+    return moment.strftime(_TIME_FORMAT) if moment else None
+
+
+def _ms(delta: timedelta) -> int:
+    return round(delta.total_seconds() * 1000)
+
+
+class ReminderEventWriter:
+    """Buffers reminder events and writes them to the database in batches."""
+
+    def __init__(self, db, max_pending: int = MAX_PENDING):
+        self._db = db
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._flush_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _append(self, event: tuple) -> None:
+        if len(self._pending) >= self.max_pending:
+            REMINDER_EVENTS_DROPPED.inc()
+            return
+        self._pending.append(event)
+
+    def sent(self, user_id: int, scheduled_at: Optional[datetime], started_at: datetime,
+             latency: float, error: str = None) -> None:
+        """
+        Record a delivery attempt.
+
+        Args:
+            scheduled_at: When the reminder was due (UTC), if known
+            started_at: When sending began (UTC)
+            latency: Seconds the Telegram call took
+            error: Why it failed, for failed sends
+        """
+        lag_ms = _ms(started_at - scheduled_at) if scheduled_at else None
+        self._append((user_id, 'failed' if error else 'sent', _format(scheduled_at), _format(started_at),
+                      lag_ms, round(latency * 1000), None, error))
+
+    def story(self, user_id: int, scheduled_at: Optional[datetime], sent_at: datetime,
+              saved_at: datetime) -> None:
+        """Record a story saved in reply to the reminder sent at ``sent_at``."""
+        self._append((user_id, 'story', _format(scheduled_at), _format(saved_at), None, None,
+                      round((saved_at - sent_at).total_seconds()), None))
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of events written."""
+        with self._flush_lock:
+            # popleft is atomic, so events appended meanwhile wait for the next flush
+            batch = [self._pending.popleft() for _ in range(len(self._pending))]
+            if not batch:
+                return 0
+            try:
+                return self._db.record_reminder_events(batch)
+            except Exception:
+                logger.exception("Writing %s reminder events failed; keeping them for the next flush", len(batch))
+                room = max(self.max_pending - len(self._pending), 0)
+                self._pending.extendleft(reversed(batch[:room]))
+                if len(batch) > room:
+                    REMINDER_EVENTS_DROPPED.inc(len(batch) - room)
+                return 0
+
+
+def percentile(values: Sequence[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (None if empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+def delivery_report(db, days: int = 7, percentiles=(50, 90, 99)) -> Dict:
+    """
+    Scheduling lag and Telegram latency percentiles (ms) for reminders sent
+    in the last ``days`` days, with failure counts by reason.
+    """
+    rows = db.get_reminder_delivery(datetime.utcnow() - timedelta(days=days))
+    lags = [row['lag_ms'] for row in rows if row['lag_ms'] is not None]
+    latencies = [row['latency_ms'] for row in rows if row['latency_ms'] is not None]
+    failures: Dict[str, int] = {}
+    for row in rows:
+        if row['event'] == 'failed':
+            failures[row['error']] = failures.get(row['error'], 0) + 1
+    return {
+        'sent': sum(row['event'] == 'sent' for row in rows),
+        'failed': sum(failures.values()),
+        'lag_ms': {f'p{pct}': percentile(lags, pct) for pct in percentiles},
+        'latency_ms': {f'p{pct}': percentile(latencies, pct) for pct in percentiles},
+        'failures': failures,
+    }
+
+
+def conversion_report(db, days: int = 30) -> List[Dict]:
+    """Per time slot: reminders sent, stories in reply, and the conversion rate."""
+    slots = db.get_reminder_conversion(datetime.utcnow() - timedelta(days=days))
+    for slot in slots:
+        slot['conversion'] = slot['stories'] / slot['sent'] if slot['sent'] else None
+    return slots
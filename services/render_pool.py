@@ -0,0 +1,80 @@
+"""
+Process pool for CPU-heavy HTML rendering.
+
+Rendering a large export (per-row date formatting, escaping and a big string
+join) takes long enough to stall every other update on the event loop. Renders
+whose input is at least RENDER_OFFLOAD_MIN_BYTES go to a small pool of worker
+processes; smaller ones stay inline, where the pickling round trip would cost
+more than it saves. Either way the result is UTF-8 bytes, ready to upload.
+
+Workers are started with ``forkserver`` where available: forking the bot
+process itself would copy its threads' locks (logging, scheduler) mid-state.
+The fork server preloads services/render_worker.py, the only code a task
+needs. Each worker still re-imports the main module as ``__mp_main__``, as
+multiprocessing always does, which is why bot.py keeps its top level to the
+standard library and does its imports and logging setup in main().
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Sequence, Tuple
+
+from config.settings import settings
+from services import render_worker
+from utils.metrics import RENDER_LATENCY
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if _pool is None and settings.RENDER_WORKERS > 0:
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        if context.get_start_method() == 'forkserver':
+            # Imported once in the fork server, so each worker starts with it
+            context.set_forkserver_preload([render_worker.__name__])
+        _pool = ProcessPoolExecutor(max_workers=settings.RENDER_WORKERS, mp_context=context)
+    return _pool
+
+
+def shutdown_render_pool() -> None:
+    """Stop the worker processes (a new pool is started on the next offloaded render)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def _render(name: str, func, size: int, *args) -> bytes:
+    pool = _get_pool() if size >= settings.RENDER_OFFLOAD_MIN_BYTES else None
+    started = time.perf_counter()
+    if pool is not None:
+        try:
+            result = await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+            RENDER_LATENCY.labels(name, 'pool').observe(time.perf_counter() - started)
+            return result
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); render this one inline and start fresh next time
+            logger.warning("Render pool broken, rendering %s inline", name)
+            shutdown_render_pool()
+            started = time.perf_counter()
+    result = func(*args)
+    RENDER_LATENCY.labels(name, 'inline').observe(time.perf_counter() - started)
+    return result
+
+
+async def render_export(entries: Sequence[Tuple[str, str]], first_name: str, export_date: str) -> bytes:
+    """Render the /export page from ``(created_at, story_text)`` pairs."""
+    size = sum(len(text) for _, text in entries)
+    return await _render('export', render_worker.render_export, size, entries, first_name, export_date)
+
+
+async def render_report(markdown_text: str, period: str) -> bytes:
+    """Render the report details page from the model's markdown."""
+    return await _render('report', render_worker.render_report, len(markdown_text), markdown_text, period)
@@ -0,0 +1,16 @@
+"""
+Functions run inside the render pool's worker processes.
+
+Kept out of services/render_pool.py so that unpickling a task imports only
+this module, utils/renderers.py and the StoryText records the entries arrive
+as (models/records.py), and not config.settings or the metrics registry.
+"""
+from utils import renderers
+
+
+def render_export(entries, first_name: str, export_date: str) -> bytes:
+    return renderers.build_export_content(entries, first_name, export_date).encode('utf-8')
+
+
+def render_report(markdown_text: str, period: str) -> bytes:
+    return renderers.build_report_html(markdown_text, period).encode('utf-8')
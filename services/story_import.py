@@ -0,0 +1,386 @@
+"""
+Bulk import of dated moments from an uploaded file.
+
+Four formats are read, picked by file extension or, failing that, by the
+first non-blank line:
+
+* our own /export page (``<article><time>March 1, 2026</time><p>…``)
+* JSONL, one object per line with ``created_at``/``date``/``at`` and
+  ``story_text``/``text``/``story`` (so GET /api/stories items import as is);
+  a JSON array with one object per line reads the same
+* CSV with a header naming the same columns (comma, semicolon or tab)
+* plain text, each entry starting with a date, e.g. ``2024-03-01: …`` or
+  ``[2024-03-01 21:30] …``; lines without a date continue the entry above
+
+The file is streamed line by line, never read whole. Entries are validated
+(a parseable date, not in the future, non-empty text of at most
+MAX_STORY_CHARS) and deduplicated by day and text, both within the file and
+against the stories the user already has, so importing the same export twice
+adds nothing.
+
+A date without a time is the day the user lived it, so it is stored at noon
+in their reminder timezone (UTC if they never set one). Zones span 26 hours,
+so no single UTC hour is the same day everywhere: noon UTC is already the next
+day at UTC+12 and later (e.g. Pacific/Auckland, Pacific/Kiritimati). The
+/export page is the exception: it prints UTC days, so its dates get noon UTC
+and an export imports back onto itself.
+
+StoryImporter.run() is a generator that inserts one batch per step and
+yields running totals after each, so the caller decides where each step runs
+(the bot uses a worker thread) and when to report progress.
+"""
+import csv
+import hashlib
+import html.parser
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from services.timezones import get_zone
+from utils.metrics import IMPORTED_STORIES
+
+logger = logging.getLogger(__name__)
+
+# Longest message Telegram accepts, so the longest story /story can save
+MAX_STORY_CHARS = 4096
+DEFAULT_BATCH_SIZE = 1000
+# Invalid entries described in the summary; the rest are only counted
+MAX_ERROR_SAMPLES = 5
+
+FORMATS = ('html', 'jsonl', 'csv', 'text')
+_EXTENSIONS = {
+    '.html': 'html', '.htm': 'html',
+    '.jsonl': 'jsonl', '.ndjson': 'jsonl', '.json': 'jsonl',
+    '.csv': 'csv', '.tsv': 'csv',
+    '.txt': 'text', '.md': 'text',
+}
+_DATE_KEYS = ('created_at', 'date', 'at')
+_TEXT_KEYS = ('story_text', 'text', 'story')
+
+# A plain text entry: optional brackets around the date, then an optional separator
+_DATED_LINE = re.compile(
+    r'^\s*\[?(\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2})?)?)\]?\s*(?:[:|\-–—]\s*)?(.*)$'
+)
+
+
+class ImportFormatError(ValueError):
+    """The file can't be read as any supported format (as opposed to a bad entry in it)."""
+
+
+def parse_created_at(value: str, tz_name: str = 'UTC') -> str:
+    """
+    Normalize an imported date to a stored created_at string.
+
+    Accepts ISO dates and datetimes (with or without an offset; naive ones are
+    taken as UTC) and the export's 'March 1, 2026'. Dates without a time get
+    noon in ``tz_name``. Raises ValueError.
+    """
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value)
+        date_only = len(value) <= 10
+    except ValueError:
+        parsed = datetime.strptime(value, '%B %d, %Y')
+        date_only = True
+    if date_only and parsed.tzinfo is None:
+        parsed = parsed.replace(hour=12, tzinfo=get_zone(tz_name))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def fingerprint(created_at: str, text: str) -> bytes:
+    """Dedup key: the same text on the same day is the same moment."""
+    return hashlib.blake2b(f"{created_at[:10]}\0{text}".encode(), digest_size=16).digest()
+
+
+def detect_format(filename: Optional[str], first_line: str) -> str:
+    """Pick the parser from the file extension, else from the first non-blank line."""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension in _EXTENSIONS:
+        return _EXTENSIONS[extension]
+    line = first_line.lstrip()
+    if line.startswith('<'):
+        return 'html'
+    if line.startswith('{'):
+        return 'jsonl'
+    if _DATED_LINE.match(line):
+        return 'text'
+    return 'csv'
+
+
+class _ExportParser(html.parser.HTMLParser):
+    """Collects (line, date, text) from the /export page's <article> elements."""
+
+    def __init__(self):
+        super().__init__()
+        self.entries: List[Tuple[int, str, str]] = []
+        self._field = None
+        self._time: List[str] = []
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'article':
+            self._time, self._text = [], []
+        elif tag in ('time', 'p'):
+            self._field = self._time if tag == 'time' else self._text
+        elif tag == 'br' and self._field is self._text:
+            self._text.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in ('time', 'p'):
+            self._field = None
+        elif tag == 'article':
+            self.entries.append((self.getpos()[0], ''.join(self._time), ''.join(self._text)))
+
+    def handle_data(self, data):
+        if self._field is not None:
+            self._field.append(data)
+
+
+def _parse_html(lines) -> Iterator[Tuple[int, str, str]]:
+    parser = _ExportParser()
+    for line_no, line in lines:
+        parser.feed(line)
+        yield from parser.entries
+        parser.entries.clear()
+    parser.close()
+    yield from parser.entries
+
+
+def _pick(fields: dict, keys) -> Optional[str]:
+    for key in keys:
+        if fields.get(key) not in (None, ''):
+            return fields[key]
+    return None
+
+
+def _parse_jsonl(lines) -> Iterator[Tuple[int, Optional[str], Optional[str]]]:
+    for line_no, line in lines:
+        line = line.strip().rstrip(',')
+        if line in ('', '[', ']'):
+            continue
+        try:
+            fields = json.loads(line)
+        except json.JSONDecodeError:
+            yield line_no, None, None
+            continue
+        if not isinstance(fields, dict):
+            yield line_no, None, None
+            continue
+        yield line_no, _pick(fields, _DATE_KEYS), _pick(fields, _TEXT_KEYS)
+
+
+def _parse_csv(lines) -> Iterator[Tuple[int, Optional[str], Optional[str]]]:
+    lines = iter(lines)
+    header_line = next(lines, (0, ''))[1]
+    try:
+        dialect = csv.Sniffer().sniff(header_line, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    header = [name.strip().lower() for name in next(csv.reader([header_line], dialect), [])]
+    date_key = next((key for key in _DATE_KEYS if key in header), None)
+    text_key = next((key for key in _TEXT_KEYS if key in header), None)
+    if date_key is None or text_key is None:
+        raise ImportFormatError("The CSV needs a header with a date column (created_at or date) "
+                                "and a text column (story_text or text)")
+    date_index, text_index = header.index(date_key), header.index(text_key)
+
+    # Line numbers of where each row started, for error messages
+    current = [0]
+
+    def tracked():
+        for line_no, line in lines:
+            current[0] = current[0] or line_no
+            yield line
+
+    try:
+        for row in csv.reader(tracked(), dialect):
+            line_no, current[0] = current[0], 0
+            if not any(field.strip() for field in row):
+                continue
+            if max(date_index, text_index) >= len(row):
+                yield line_no, None, None
+                continue
+            yield line_no, row[date_index], row[text_index]
+    except csv.Error as e:
+        # e.g. a field over csv's size limit: an unterminated quote swallowing the file
+        raise ImportFormatError(f"Line {current[0]}: {e}")
+
+
+def _parse_text(lines) -> Iterator[Tuple[int, Optional[str], Optional[str]]]:
+    entry = None
+    for line_no, line in lines:
+        line = line.rstrip('\r\n')
+        match = _DATED_LINE.match(line)
+        if match:
+            if entry is not None:
+                yield entry[0], entry[1], '\n'.join(entry[2])
+            entry = (line_no, match.group(1), [match.group(2)])
+        elif entry is not None:
+            entry[2].append(line)
+        elif line.strip():
+            yield line_no, None, line
+    if entry is not None:
+        yield entry[0], entry[1], '\n'.join(entry[2])
+
+
+_PARSERS = {'html': _parse_html, 'jsonl': _parse_jsonl, 'csv': _parse_csv, 'text': _parse_text}
+
+
+class ImportStats:
+    """Running totals of one import, updated after every batch."""
+
+    __slots__ = ('bytes_read', 'total_bytes', 'imported', 'duplicates', 'invalid', 'errors', 'file_format')
+
+    def __init__(self, total_bytes: int, file_format: str):
+        self.bytes_read = 0
+        self.total_bytes = total_bytes
+        self.imported = 0
+        self.duplicates = 0
+        self.invalid = 0
+        # (line number, reason) of the first few invalid entries
+        self.errors: List[Tuple[int, str]] = []
+        self.file_format = file_format
+
+    @property
+    def fraction(self) -> float:
+        return min(1.0, self.bytes_read / self.total_bytes) if self.total_bytes else 1.0
+
+    def reject(self, line_no: int, reason: str) -> None:
+        self.invalid += 1
+        if len(self.errors) < MAX_ERROR_SAMPLES:
+            self.errors.append((line_no, reason))
+
+
+class StoryImporter:
+    """
+    Import one file of moments for one user.
+
+    Args:
+        story_db: StoryDatabase to insert into
+        user_id: Telegram user ID the moments belong to
+        path: The uploaded file on disk
+        filename: Its original name, for format detection
+        batch_size: Stories inserted per transaction
+        now: Current UTC time; later entries are rejected (for tests)
+        tz_name: Timezone of dates without a time (default: the user's
+            reminder timezone, else UTC)
+    """
+
+    def __init__(self, story_db, user_id: int, path, filename: str = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, now: datetime = None, tz_name: str = None):
+        self.story_db = story_db
+        self.user_id = user_id
+        self.path = path
+        self.filename = filename
+        self.batch_size = batch_size
+        self.tz_name = tz_name
+        # A day of slack for clocks ahead of UTC
+        self.latest = ((now or datetime.utcnow()) + timedelta(days=1)).strftime('%Y-%m-%d %H:%M:%S')
+
+    def _lines(self, f, stats: ImportStats) -> Iterator[Tuple[int, str]]:
+        for line_no, raw in enumerate(f, 1):
+            stats.bytes_read += len(raw)
+            try:
+                yield line_no, raw.decode('utf-8-sig' if line_no == 1 else 'utf-8')
+            except UnicodeDecodeError:
+                raise ImportFormatError(f"Line {line_no} isn't UTF-8 text")
+
+    def _first_line(self, f) -> str:
+        for raw in f:
+            if raw.strip():
+                break
+        else:
+            raise ImportFormatError("The file is empty")
+        f.seek(0)
+        return raw.decode('utf-8-sig', errors='replace')
+
+    def _validate(self, stats: ImportStats, line_no: int, when: Optional[str], text: Optional[str],
+                  tz_name: str):
+        """(created_at, text) for a good entry, or None after counting it as invalid."""
+        if when is None and text is None:
+            stats.reject(line_no, "unreadable entry")
+            return None
+        if not when:
+            stats.reject(line_no, "no date")
+            return None
+        when = str(when)
+        try:
+            created_at = parse_created_at(when, tz_name)
+        except ValueError:
+            stats.reject(line_no, f"unknown date {when[:30]!r}")
+            return None
+        if created_at > self.latest:
+            stats.reject(line_no, "date in the future")
+            return None
+        text = str(text or '').replace('\r\n', '\n').strip()
+        if not text:
+            stats.reject(line_no, "no text")
+            return None
+        if len(text) > MAX_STORY_CHARS:
+            stats.reject(line_no, f"longer than {MAX_STORY_CHARS} characters")
+            return None
+        return created_at, text
+
+    def _insert(self, batch: list, days: set) -> int:
+        """Insert one batch and note the days it touched."""
+        inserted = self.story_db.import_stories(self.user_id, batch)
+        days.update(created_at[:10] for created_at, _ in batch)
+        return inserted
+
+    def run(self) -> Iterator[ImportStats]:
+        """
+        Parse, validate, dedup and insert the file, one batch per step.
+
+        Yields:
+            The same ImportStats after each inserted batch (and once at the end)
+
+        Raises:
+            ImportFormatError: The file isn't in a supported format
+        """
+        tz_name = self.tz_name
+        if tz_name is None:
+            reminder = self.story_db.get_reminder_preference(self.user_id)
+            tz_name = reminder['timezone'] if reminder else 'UTC'
+        # What the user already has: fingerprints only, not the texts
+        seen = {fingerprint(created_at, text) for created_at, text in self.story_db.iter_story_texts(self.user_id)}
+
+        # Days that gained stories: their rollups are recomputed even if a later batch fails
+        days = set()
+        try:
+            with open(self.path, 'rb') as f:
+                file_format = detect_format(self.filename, self._first_line(f))
+                stats = ImportStats(os.fstat(f.fileno()).st_size, file_format)
+                # The export shows UTC days
+                day_zone = 'UTC' if file_format == 'html' else tz_name
+                batch = []
+                for line_no, when, text in _PARSERS[file_format](self._lines(f, stats)):
+                    entry = self._validate(stats, line_no, when, text, day_zone)
+                    if entry is None:
+                        continue
+                    key = fingerprint(*entry)
+                    if key in seen:
+                        stats.duplicates += 1
+                        continue
+                    seen.add(key)
+                    batch.append(entry)
+                    if len(batch) >= self.batch_size:
+                        stats.imported += self._insert(batch, days)
+                        batch = []
+                        yield stats
+                if batch:
+                    stats.imported += self._insert(batch, days)
+        finally:
+            if days:
+                self.story_db.refresh_rollup_days(days)
+
+        IMPORTED_STORIES.labels('imported').inc(stats.imported)
+        IMPORTED_STORIES.labels('duplicate').inc(stats.duplicates)
+        IMPORTED_STORIES.labels('invalid').inc(stats.invalid)
+        logger.info("Imported %s stories (%s) for user %s: %s duplicate, %s invalid",
+                    stats.imported, file_format, self.user_id, stats.duplicates, stats.invalid)
+        yield stats
@@ -0,0 +1,195 @@
+"""
+Timezone helpers for reminder scheduling, built on the standard library zoneinfo.
+
+Reminder times are stored in the database as UTC ``HH:MM`` strings together with
+the user's IANA timezone name. The helpers here convert between the two without
+pulling in pytz:
+
+- ``ZoneInfo`` objects are memoized per name.
+- For every zone that is in use, a per-day table of UTC offsets is precomputed.
+  Days on which the offset is constant (almost all of them) convert with plain
+  integer arithmetic; days near a DST transition fall back to zoneinfo.
+"""
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+logger = logging.getLogger(__name__)
+
+UTC = timezone.utc
+
+# Number of days covered by each offset table, starting the day before first use
+OFFSET_TABLE_DAYS = 400
+
+_SECONDS_PER_DAY = 86400
+
+
+class UnknownTimezoneError(ValueError):
+    """Raised when a timezone name is not in the IANA database."""
+
+
+@lru_cache(maxsize=None)
+def get_zone(name: str) -> ZoneInfo:
+    """
+    Return the (memoized) ZoneInfo for an IANA timezone name.
+
+    Raises:
+        UnknownTimezoneError: If the name is not a valid timezone
+    """
+    if not name:
+        raise UnknownTimezoneError(name)
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise UnknownTimezoneError(name) from e
+
+
+def is_valid_timezone(name: str) -> bool:
+    """Check whether a timezone name is known."""
+    if not isinstance(name, str):
+        return False
+    try:
+        get_zone(name)
+    except UnknownTimezoneError:
+        return False
+    return True
+
+
+class _OffsetTable:
+    """UTC offsets (in seconds) per calendar day for a single zone.
+
+    ``offsets[i]`` is the offset for ``start + i days`` when it is constant over
+    both the UTC day and the local day with that date, or ``None`` when a
+    transition happens nearby and the slow path must be used.
+    """
+
+    __slots__ = ('start', 'offsets')
+
+    def __init__(self, start: date, offsets: List[Optional[int]]):
+        self.start = start
+        self.offsets = offsets
+
+    def get(self, day: date) -> Optional[int]:
+        index = (day - self.start).days
+        if 0 <= index < len(self.offsets):
+            return self.offsets[index]
+        raise IndexError(day)
+
+
+_offset_tables: Dict[str, _OffsetTable] = {}
+
+
+def _build_offset_table(zone: ZoneInfo, start: date, days: int) -> _OffsetTable:
+    # Offsets at each UTC midnight from start-1 to start+days+1. A local day
+    # never extends more than a day either side of the UTC day with the same
+    # date, so four equal midnights in a row mean no transition can affect it.
+    first = datetime.combine(start - timedelta(days=1), time(), tzinfo=UTC)
+    midnights = [
+        int((first + timedelta(days=i)).astimezone(zone).utcoffset().total_seconds())
+        for i in range(days + 3)
+    ]
+    offsets: List[Optional[int]] = []
+    for i in range(days):
+        window = midnights[i:i + 4]
+        offsets.append(window[0] if min(window) == max(window) else None)
+    return _OffsetTable(start, offsets)
+
+
+def _day_offset(name: str, day: date) -> Optional[int]:
+    """Return the constant UTC offset in seconds for ``day`` in zone ``name``, or None."""
+    table = _offset_tables.get(name)
+    if table is not None:
+        try:
+            return table.get(day)
+        except IndexError:
+            pass
+    table = _build_offset_table(get_zone(name), day - timedelta(days=1), OFFSET_TABLE_DAYS)
+    _offset_tables[name] = table
+    return table.get(day)
+
+
+def preload_zones(names: Iterable[str]) -> int:
+    """
+    Build offset tables for all given zones up front (e.g. every zone with an
+    active reminder). Unknown names are skipped.
+
+    Returns:
+        The number of zones with a table
+    """
+    today = datetime.now(UTC).date()
+    for name in set(names):
+        try:
+            _day_offset(name, today)
+        except UnknownTimezoneError:
+            logger.warning("Skipping unknown timezone %r", name)
+    return len(_offset_tables)
+
+
+def _parse_hhmm(time_str: str) -> int:
+    hour, minute = map(int, time_str.split(':'))
+    return hour * 3600 + minute * 60
+
+
+def _format_seconds(seconds: int) -> str:
+    seconds %= _SECONDS_PER_DAY
+    return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}"
+
+
+def local_now(tz_name: str) -> datetime:
+    """Current time as an aware datetime in the given timezone."""
+    return datetime.now(get_zone(tz_name))
+
+
+def local_today(tz_name: str) -> date:
+    """Current calendar date in the given timezone."""
+    now_utc = datetime.now(UTC)
+    offset = _day_offset(tz_name, now_utc.date())
+    if offset is None:
+        return now_utc.astimezone(get_zone(tz_name)).date()
+    return (now_utc + timedelta(seconds=offset)).date()
+
+
+def local_to_utc(time_str: str, tz_name: str, on: date = None) -> str:
+    """
+    Convert a local ``HH:MM`` reminder time to UTC ``HH:MM``.
+
+    Args:
+        time_str: Local time in HH:MM format (24-hour)
+        tz_name: IANA timezone name
+        on: Local date the time falls on (defaults to today in tz_name)
+
+    Raises:
+        UnknownTimezoneError: If tz_name is not a valid timezone
+    """
+    if on is None:
+        on = local_today(tz_name)
+    seconds = _parse_hhmm(time_str)
+    offset = _day_offset(tz_name, on)
+    if offset is not None:
+        return _format_seconds(seconds - offset)
+    local = datetime.combine(on, time(seconds // 3600, seconds // 60 % 60), tzinfo=get_zone(tz_name))
+    return local.astimezone(UTC).strftime('%H:%M')
+
+
+def utc_to_local(time_str: str, tz_name: str, on: date = None) -> str:
+    """
+    Convert a UTC ``HH:MM`` reminder time to local ``HH:MM``.
+
+    Args:
+        time_str: UTC time in HH:MM format (24-hour)
+        tz_name: IANA timezone name
+        on: UTC date the time falls on (defaults to today in UTC)
+
+    Raises:
+        UnknownTimezoneError: If tz_name is not a valid timezone
+    """
+    if on is None:
+        on = datetime.now(UTC).date()
+    seconds = _parse_hhmm(time_str)
+    offset = _day_offset(tz_name, on)
+    if offset is not None:
+        return _format_seconds(seconds + offset)
+    utc = datetime.combine(on, time(seconds // 3600, seconds // 60 % 60), tzinfo=UTC)
+    return utc.astimezone(get_zone(tz_name)).strftime('%H:%M')
@@ -0,0 +1,129 @@
+"""
+Compact, bounded per-user conversation state.
+
+PTB's ``application.user_data`` creates a dict for every user it is asked
+about and never lets go of it, so every user who was ever sent a reminder
+kept a dict (holding another dict) for the life of the process. This store
+keeps only the few fields the handlers actually use, in ``__slots__``
+objects, and forgets users:
+
+* after ``ttl`` seconds without being touched (``evict()``, run by a job), and
+* least recently touched first once ``max_users`` is reached.
+
+A forgotten user only loses transient state: a reminder reply is then no
+longer taken as a story, and a half-finished /setreminder starts over.
+
+Accessed from the bot's event loop only, so there is no locking.
+"""
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+
+from utils.metrics import USER_STATE_EVICTIONS
+
+# Long enough for a reply to the day's reminder
+DEFAULT_TTL = 24 * 3600
+DEFAULT_MAX_USERS = 50_000
+
+
+class UserState:
+    """Transient state for one user."""
+
+    __slots__ = ('touched', 'timezone', 'reminder_scheduled_at', 'reminder_sent_at')
+
+    def __init__(self, touched: float):
+        self.touched = touched
+        # Timezone picked in the /setreminder conversation, until a time is chosen
+        self.timezone: Optional[str] = None
+        # Set while a reminder's reply would be taken as the story
+        self.reminder_scheduled_at: Optional[datetime] = None
+        self.reminder_sent_at: Optional[datetime] = None
+
+    def is_empty(self) -> bool:
+        return self.timezone is None and self.reminder_sent_at is None
+
+
+class UserStateStore:
+    """User ID -> UserState, least recently written first."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_users: int = DEFAULT_MAX_USERS, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_users = max_users
+        self._clock = clock
+        self._states: "OrderedDict[int, UserState]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _touch(self, user_id: int) -> UserState:
+        now = self._clock()
+        state = self._states.get(user_id)
+        if state is None or now - state.touched > self.ttl:
+            state = self._states[user_id] = UserState(now)
+            if len(self._states) > self.max_users:
+                self._states.popitem(last=False)
+                USER_STATE_EVICTIONS.labels('capacity').inc()
+        else:
+            state.touched = now
+        self._states.move_to_end(user_id)
+        return state
+
+    def _get(self, user_id: int) -> Optional[UserState]:
+        state = self._states.get(user_id)
+        if state is not None and self._clock() - state.touched > self.ttl:
+            del self._states[user_id]
+            USER_STATE_EVICTIONS.labels('expired').inc()
+            return None
+        return state
+
+    def _drop_if_empty(self, user_id: int, state: UserState) -> None:
+        if state.is_empty():
+            self._states.pop(user_id, None)
+
+    def expect_story(self, user_id: int, scheduled_at: Optional[datetime], sent_at: datetime) -> None:
+        """Take the user's next plain message as their story for this reminder."""
+        state = self._touch(user_id)
+        state.reminder_scheduled_at = scheduled_at
+        state.reminder_sent_at = sent_at
+
+    def pop_awaiting_story(self, user_id: int) -> Optional[Tuple[Optional[datetime], datetime]]:
+        """(scheduled_at, sent_at) of the reminder awaiting a reply, clearing it; None if there is none."""
+        state = self._get(user_id)
+        if state is None or state.reminder_sent_at is None:
+            return None
+        reminder = state.reminder_scheduled_at, state.reminder_sent_at
+        state.reminder_scheduled_at = state.reminder_sent_at = None
+        self._drop_if_empty(user_id, state)
+        return reminder
+
+    def set_timezone(self, user_id: int, timezone: str) -> None:
+        self._touch(user_id).timezone = timezone
+
+    def get_timezone(self, user_id: int, default: str = None) -> Optional[str]:
+        state = self._get(user_id)
+        return state.timezone if state is not None and state.timezone is not None else default
+
+    def clear_timezone(self, user_id: int) -> None:
+        state = self._get(user_id)
+        if state is not None:
+            state.timezone = None
+            self._drop_if_empty(user_id, state)
+
+    def evict(self) -> int:
+        """Forget users idle for longer than the TTL. Returns how many were dropped."""
+        cutoff = self._clock() - self.ttl
+        evicted = 0
+        # Ordered by last touch, so stop at the first one still fresh
+        while self._states:
+            user_id, state = next(iter(self._states.items()))
+            if state.touched >= cutoff:
+                break
+            del self._states[user_id]
+            evicted += 1
+        if evicted:
+            USER_STATE_EVICTIONS.labels('expired').inc(evicted)
+        if evicted > len(self._states):
+            # Dicts never shrink on delete: copy to give the table back
+            self._states = OrderedDict(self._states)
+        return evicted
@@ -0,0 +1,415 @@
+"""
+Continuous WAL archiving for point-in-time restore.
+
+Backups (services/backup.py) are taken once a day; this ships every commit
+in between. stories.db runs in WAL mode, so each commit appends frames (a
+page image each) to stories.db-wal. The archiver polls that file and copies
+new committed frames to the archive as segments. It also owns checkpointing:
+the bot's connections have wal_autocheckpoint turned off, so the WAL is only
+reset after the archiver has copied all of it.
+
+Archive layout, one directory per generation::
+
+    <archive>/<generation>/base.db.gz          snapshot the frames apply to
+    <archive>/<generation>/<seq>-<stamp>.wal   committed frames, in order
+
+A generation starts when the archiver starts, once a day, and whenever it
+finds the WAL was reset behind its back (another process checkpointed), as
+frames may have been missed. Restoring to a time unpacks the newest base
+from before it and replays the segments shipped up to it, so the restore
+point is accurate to the poll interval.
+
+Segments go through a small store interface (LocalWalStore) so an object
+store can be plugged in later.
+"""
+import gzip
+import logging
+import os
+import shutil
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from utils.metrics import WAL_ARCHIVE_LAG, WAL_ARCHIVED_BYTES, WAL_LOCK_PAUSE
+
+logger = logging.getLogger(__name__)
+
+WAL_HEADER = struct.Struct('>IIIIIIII')
+FRAME_HEADER = struct.Struct('>IIIIII')
+_MAGIC_LE = 0x377f0682
+_MAGIC_BE = 0x377f0683
+
+_STAMP = '%Y%m%dT%H%M%S.%fZ'
+BASE_NAME = 'base.db.gz'
+SEGMENT_SUFFIX = '.wal'
+
+# Checkpoint when this long has passed or the WAL has grown this much
+CHECKPOINT_INTERVAL = 300
+CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+
+def _checksum(data: bytes, s0: int, s1: int, byteorder: str) -> Tuple[int, int]:
+    """SQLite's WAL checksum, continued from (s0, s1) over ``data``."""
+    words = struct.unpack(f'{byteorder}{len(data) // 4}I', data)
+    for i in range(0, len(words), 2):
+        s0 = (s0 + words[i] + s1) & 0xFFFFFFFF
+        s1 = (s1 + words[i + 1] + s0) & 0xFFFFFFFF
+    return s0, s1
+
+
+class WalReader:
+    """
+    Incrementally reads committed frames from a WAL file.
+
+    Frames are only returned up to the last commit frame whose salts and
+    running checksum are valid, so a frame still being written (or one left
+    over from before the WAL was reset) is never shipped.
+    """
+
+    def __init__(self, wal_path):
+        self.wal_path = Path(wal_path)
+        self.salts: Optional[Tuple[int, int]] = None
+        self.page_size = 0
+        self.offset = 0
+        self._byteorder = '>'
+        self._checksum = (0, 0)
+
+    def read_header(self) -> Optional[Tuple[int, int]]:
+        """Return the current WAL's salts, or None if there is no valid WAL."""
+        try:
+            with open(self.wal_path, 'rb') as f:
+                header = f.read(WAL_HEADER.size)
+        except FileNotFoundError:
+            return None
+        if len(header) < WAL_HEADER.size:
+            return None
+        magic, _, page_size, _, salt1, salt2, ck1, ck2 = WAL_HEADER.unpack(header)
+        if magic not in (_MAGIC_LE, _MAGIC_BE):
+            return None
+        byteorder = '<' if magic == _MAGIC_LE else '>'
+        if _checksum(header[:24], 0, 0, byteorder) != (ck1, ck2):
+            return None
+        return salt1, salt2
+
+    def reset(self) -> None:
+        """Start reading the current WAL from its first frame."""
+        with open(self.wal_path, 'rb') as f:
+            header = f.read(WAL_HEADER.size)
+        magic, _, page_size, _, salt1, salt2, ck1, ck2 = WAL_HEADER.unpack(header)
+        self._byteorder = '<' if magic == _MAGIC_LE else '>'
+        self.page_size = page_size
+        self.salts = (salt1, salt2)
+        self.offset = WAL_HEADER.size
+        self._checksum = (ck1, ck2)
+
+    def read_committed(self) -> bytes:
+        """Return the committed frames after ``offset`` and advance past them."""
+        frame_size = FRAME_HEADER.size + self.page_size
+        committed = b''
+        with open(self.wal_path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        checksum = self._checksum
+        pos = 0
+        end = 0
+        while pos + frame_size <= len(data):
+            pgno, commit, salt1, salt2, ck1, ck2 = FRAME_HEADER.unpack_from(data, pos)
+            if (salt1, salt2) != self.salts:
+                break
+            checksum = _checksum(data[pos:pos + 8], *checksum, self._byteorder)
+            checksum = _checksum(data[pos + FRAME_HEADER.size:pos + frame_size], *checksum, self._byteorder)
+            if checksum != (ck1, ck2):
+                break
+            pos += frame_size
+            if commit:
+                end = pos
+                self._checksum = checksum
+        if end:
+            committed = data[:end]
+            self.offset += end
+        return committed
+
+
+class LocalWalStore:
+    """Generations and segments in a local directory."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def generations(self) -> List[str]:
+        """Generation names, oldest first (only those with a base snapshot)."""
+        if not self.root.is_dir():
+            return []
+        return sorted(path.name for path in self.root.iterdir() if (path / BASE_NAME).exists())
+
+    def put_base(self, generation: str, db_path: Path) -> None:
+        directory = self.root / generation
+        directory.mkdir(parents=True, exist_ok=True)
+        partial = directory / (BASE_NAME + '.partial')
+        with open(db_path, 'rb') as raw, gzip.open(partial, 'wb', compresslevel=6) as packed:
+            shutil.copyfileobj(raw, packed)
+        os.replace(partial, directory / BASE_NAME)
+
+    def get_base(self, generation: str, db_path: Path) -> None:
+        with gzip.open(self.root / generation / BASE_NAME, 'rb') as packed, open(db_path, 'wb') as raw:
+            shutil.copyfileobj(packed, raw)
+
+    def put_segment(self, generation: str, name: str, data: bytes) -> None:
+        directory = self.root / generation
+        partial = directory / (name + '.partial')
+        partial.write_bytes(data)
+        os.replace(partial, directory / name)
+
+    def segments(self, generation: str) -> List[str]:
+        """Segment names in replay order."""
+        directory = self.root / generation
+        return sorted(path.name for path in directory.iterdir() if path.name.endswith(SEGMENT_SUFFIX))
+
+    def get_segment(self, generation: str, name: str) -> bytes:
+        return (self.root / generation / name).read_bytes()
+
+    def delete_generation(self, generation: str) -> None:
+        shutil.rmtree(self.root / generation, ignore_errors=True)
+
+
+def _stamp(moment: datetime = None) -> str:
+    return (moment or datetime.utcnow()).strftime(_STAMP)
+
+
+def parse_stamp(stamp: str) -> datetime:
+    return datetime.strptime(stamp, _STAMP)
+
+
+def segment_time(name: str) -> datetime:
+    return parse_stamp(name[:-len(SEGMENT_SUFFIX)].split('-', 1)[1])
+
+
+class WalArchiver:
+    """
+    Ships committed WAL frames of one database to a store.
+
+    Call poll() every few seconds from one thread at a time. The archiver
+    keeps a connection open for its lifetime: when the last connection to a
+    WAL database closes, SQLite checkpoints and deletes the WAL, frames and all.
+
+    Args:
+        db_path: Database in WAL mode
+        store: Where generations go (e.g. LocalWalStore)
+        keep: Generations kept; older ones are deleted
+        generation_interval: Seconds after which a new base snapshot is taken
+        checkpoint_interval: Seconds between checkpoints
+        checkpoint_bytes: WAL size that triggers a checkpoint sooner
+    """
+
+    def __init__(self, db_path, store: LocalWalStore, keep: int = 7, generation_interval: float = 86400,
+                 checkpoint_interval: float = CHECKPOINT_INTERVAL, checkpoint_bytes: int = CHECKPOINT_BYTES):
+        self.db_path = Path(db_path)
+        self.store = store
+        self.keep = keep
+        self.generation_interval = generation_interval
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_bytes = checkpoint_bytes
+        self.generation: Optional[str] = None
+        self._reader = WalReader(str(self.db_path) + '-wal')
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._generation_started = 0.0
+        self._last_checkpoint = 0.0
+        self._caught_up = time.time()
+        # True once our own checkpoint finished; the next WAL reset is then expected
+        self._reset_expected = False
+        WAL_ARCHIVE_LAG.set_function(lambda: time.time() - self._caught_up)
+
+    def poll(self) -> int:
+        """
+        Ship new committed frames, checkpointing or starting a new generation when due.
+
+        Returns:
+            Bytes shipped
+        """
+        with self._lock:
+            if self._conn is None:
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+                self._conn.execute("PRAGMA wal_autocheckpoint = 0")
+            now = time.monotonic()
+            if self.generation is None or now - self._generation_started >= self.generation_interval:
+                self._new_generation()
+                return 0
+
+            shipped = self._ship()
+            if shipped is None:
+                # The WAL was reset without us copying all of it
+                logger.warning("WAL of %s was reset outside the archiver; starting a new generation",
+                               self.db_path)
+                self._new_generation()
+                return 0
+
+            wal_size = os.path.getsize(self._reader.wal_path) if self._reader.wal_path.exists() else 0
+            if (now - self._last_checkpoint >= self.checkpoint_interval
+                    or wal_size >= self.checkpoint_bytes):
+                shipped += self._checkpoint()
+            self._caught_up = time.time()
+            return shipped
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _ship(self) -> Optional[int]:
+        """Copy newly committed frames; None if the WAL was reset unexpectedly."""
+        salts = self._reader.read_header()
+        if salts is None:
+            return 0
+        if salts != self._reader.salts:
+            if not self._reset_expected:
+                return None
+            self._reader.reset()
+            self._reset_expected = False
+        data = self._reader.read_committed()
+        if not data:
+            return 0
+        # New frames in the old WAL: a reader held back the reset, and these
+        # frames must be archived before one is safe again
+        self._reset_expected = False
+        self._seq += 1
+        self.store.put_segment(self.generation, f"{self._seq:08d}-{_stamp()}{SEGMENT_SUFFIX}", data)
+        WAL_ARCHIVED_BYTES.inc(len(data))
+        return len(data)
+
+    def _checkpoint(self) -> int:
+        """
+        Block writers, ship what is left, and checkpoint. Holding the write
+        lock means nothing is committed between the last copy and the
+        checkpoint, so the reset that follows cannot lose a frame.
+        """
+        started = time.perf_counter()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            shipped = self._ship() or 0
+            self._reset_expected = self._passive_checkpoint()
+        finally:
+            self._conn.execute("ROLLBACK")
+            WAL_LOCK_PAUSE.labels('checkpoint').observe(time.perf_counter() - started)
+        self._last_checkpoint = time.monotonic()
+        return shipped
+
+    def _passive_checkpoint(self) -> bool:
+        """
+        Checkpoint from a second connection (PASSIVE needs no write lock, so
+        it runs while ours is held). Returns whether the whole WAL was copied
+        back, after which the next writer resets it; readers on old snapshots
+        can hold that back, and the WAL then grows until the next try.
+        """
+        checkpointer = sqlite3.connect(self.db_path)
+        try:
+            busy, log_frames, checkpointed = checkpointer.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone()
+        finally:
+            checkpointer.close()
+        return not busy and log_frames == checkpointed
+
+    def _new_generation(self) -> None:
+        """
+        Snapshot the database and continue from the WAL's end at that snapshot.
+        The write lock is held only to pin the snapshot and record the WAL
+        position; the copy itself runs from a WAL reader while writers go on.
+        """
+        generation = _stamp()
+        started = time.perf_counter()
+        with tempfile.TemporaryDirectory() as tmp:
+            copy_path = Path(tmp) / 'base.db'
+            source = sqlite3.connect(self.db_path, isolation_level=None)
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # A read transaction keeps the source at this snapshot, and
+                    # its read mark holds back a WAL reset until the copy is done
+                    source.execute("BEGIN")
+                    source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+                    if self._reader.read_header() is not None:
+                        self._reader.reset()
+                        self._reader.read_committed()
+                    else:
+                        self._reader.salts = None
+                    # Everything so far is in the base; frames committed after
+                    # this are not checkpointed, so no reset can skip them
+                    self._passive_checkpoint()
+                    self._reset_expected = True
+                finally:
+                    self._conn.execute("ROLLBACK")
+                    WAL_LOCK_PAUSE.labels('base').observe(time.perf_counter() - started)
+                copy = sqlite3.connect(copy_path)
+                try:
+                    source.backup(copy)
+                finally:
+                    copy.close()
+            finally:
+                source.close()
+            self.store.put_base(generation, copy_path)
+
+        self.generation = generation
+        self._seq = 0
+        self._generation_started = self._last_checkpoint = time.monotonic()
+        self._caught_up = time.time()
+        logger.info("Started WAL archive generation %s for %s", generation, self.db_path)
+
+        for old in self.store.generations()[:-self.keep]:
+            self.store.delete_generation(old)
+
+
+def restore_to_time(store: LocalWalStore, target, until: datetime = None) -> dict:
+    """
+    Rebuild a database as of ``until`` (UTC; default: everything archived).
+
+    Returns:
+        The generation used, segments and frames replayed, and the time of the last segment applied
+
+    Raises:
+        ValueError: if no generation starts before ``until``
+    """
+    target = Path(target)
+    generations = [g for g in store.generations() if until is None or parse_stamp(g) <= until]
+    if not generations:
+        raise ValueError("No WAL archive generation starts before the requested time")
+    generation = generations[-1]
+
+    store.get_base(generation, target)
+    with open(target, 'rb') as f:
+        header = f.read(100)
+    page_size = struct.unpack_from('>H', header, 16)[0]
+    page_size = 65536 if page_size == 1 else page_size
+    frame_size = FRAME_HEADER.size + page_size
+
+    applied = frames = 0
+    restored_to = parse_stamp(generation)
+    with open(target, 'r+b') as db:
+        for name in store.segments(generation):
+            shipped_at = segment_time(name)
+            if until is not None and shipped_at > until:
+                break
+            data = store.get_segment(generation, name)
+            for pos in range(0, len(data), frame_size):
+                pgno, commit = FRAME_HEADER.unpack_from(data, pos)[:2]
+                db.seek((pgno - 1) * page_size)
+                db.write(data[pos + FRAME_HEADER.size:pos + frame_size])
+                if commit:
+                    db.truncate(commit * page_size)
+                frames += 1
+            applied += 1
+            restored_to = shipped_at
+
+    conn = sqlite3.connect(target)
+    try:
+        result = conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+    if result != 'ok':
+        raise ValueError(f"Restored database failed its integrity check: {result}")
+    return {'generation': generation, 'segments': applied, 'frames': frames, 'restored_to': restored_to}
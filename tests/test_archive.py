@@ -0,0 +1,153 @@
+"""
+Tests for the hot/cold story tiers in models/story.py: archiving old stories
+into stories_archive.db and reading across both tiers.
+"""
+import sys
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def _seed(db, path, user_id, ages_in_days):
+    """Save one story per age and backdate it."""
+    now = datetime.utcnow()
+    for age in ages_in_days:
+        story_id = db.save_story(user_id, f"{age} days ago")
+        with sqlite3.connect(path) as conn:
+            created_at = (now - timedelta(days=age)).strftime('%Y-%m-%d %H:%M:%S')
+            conn.execute("UPDATE stories SET created_at = ? WHERE id = ?", (created_at, story_id))
+
+
+def test_archive_moves_old_stories(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _seed(db, path, 1, [1, 5, 40, 400, 800])
+    _seed(db, path, 2, [900])
+
+    assert db.archive_stories(older_than_days=365, batch_size=1) == 3
+    assert db.archive_stories(older_than_days=365) == 0
+
+    assert db.archive_path == str(tmp_path / "stories_archive.db")
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM stories").fetchone()[0] == 3
+    with sqlite3.connect(db.archive_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM stories").fetchone()[0] == 3
+
+    texts = [s['story_text'] for s in db.get_user_stories(1)]
+    assert texts == ["1 days ago", "5 days ago", "40 days ago", "400 days ago", "800 days ago"]
+    assert db.count_user_stories(1) == 5
+    assert [s['story_text'] for s in db.get_user_stories(2)] == ["900 days ago"]
+    assert [s['story_text'] for s in db.get_user_stories(1, limit=4)][-1] == "400 days ago"
+
+    old_day = datetime.utcnow() - timedelta(days=800)
+    assert [s['story_text'] for s in db.get_stories_by_date(1, old_day)] == ["800 days ago"]
+
+    print("  PASS  old stories move to the archive and still read back in order")
+
+
+def test_recent_reads_skip_the_archive(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _seed(db, path, 1, [1, 3, 400])
+    db.archive_stories(older_than_days=30)
+
+    # Make the archive unreadable: any read that touches it now fails
+    os.remove(db.archive_path)
+    os.mkdir(db.archive_path)
+
+    since = datetime.utcnow() - timedelta(weeks=2)
+    assert [s['story_text'] for s in db.get_user_stories(1, since=since)] == ["1 days ago", "3 days ago"]
+    assert [s['story_text'] for s in db.get_user_stories(1, limit=2)] == ["1 days ago", "3 days ago"]
+    try:
+        db.get_user_stories(1)
+        assert False, "a full read should reach the archive"
+    except sqlite3.OperationalError:
+        pass
+
+    print("  PASS  reads within the hot window never attach the archive")
+
+
+def test_interrupted_move_keeps_both_copies(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _seed(db, path, 1, [1, 400, 500])
+    # Fail every delete from the hot tier, as a crash after the archive commit would
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TRIGGER no_delete BEFORE DELETE ON stories BEGIN SELECT RAISE(ABORT, 'crash'); END")
+    try:
+        db.archive_stories(older_than_days=30)
+        assert False, "the delete should have failed"
+    except sqlite3.IntegrityError:
+        pass
+
+    with sqlite3.connect(db.archive_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM stories").fetchone()[0] == 2
+    assert [s['story_text'] for s in db.get_user_stories(1)] == ["1 days ago", "400 days ago", "500 days ago"]
+
+    with sqlite3.connect(path) as conn:
+        conn.execute("DROP TRIGGER no_delete")
+    assert db.archive_stories(older_than_days=30) == 2
+    assert db.count_user_stories(1) == 3
+
+    print("  PASS  a move interrupted after the archive commit loses nothing and retries cleanly")
+
+
+def test_archive_shrinks_hot_file(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _seed(db, path, 1, [400] * 300)
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        conn.execute("UPDATE stories SET story_text = story_text || ?", ('x' * 3000,))
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    size = os.path.getsize(path)
+
+    assert db.archive_stories(older_than_days=30) == 300
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+    assert os.path.getsize(path) < size / 4
+
+    print("  PASS  archiving gives the freed pages back without a full VACUUM")
+
+
+def test_archived_stories_stay_encrypted(tmp_path):
+    import pytest
+    pytest.importorskip("cryptography")
+    from models.encryption import generate_master_key
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path, compression='zlib', encryption_key=generate_master_key())
+    _seed(db, path, 1, [2, 500])
+    db.archive_stories(older_than_days=30)
+
+    with sqlite3.connect(db.archive_path) as conn:
+        assert conn.execute("SELECT typeof(story_text) FROM stories").fetchone()[0] == 'blob'
+    assert [s['story_text'] for s in db.get_user_stories(1)] == ["2 days ago", "500 days ago"]
+
+    print("  PASS  archived rows keep their encoding and decrypt with the hot tier's keys")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running archive tests...\n")
+    for test in (test_archive_moves_old_stories, test_recent_reads_skip_the_archive,
+                 test_interrupted_move_keeps_both_copies, test_archive_shrinks_hot_file,
+                 test_archived_stories_stay_encrypted):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\nAll tests passed.")
@@ -0,0 +1,142 @@
+"""
+Tests for online snapshots in services/backup.py.
+"""
+import sys
+import os
+import sqlite3
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def _database(path, rows=2000):
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE stories (id INTEGER PRIMARY KEY, story_text TEXT NOT NULL)")
+        conn.executemany("INSERT INTO stories (story_text) VALUES (?)",
+                         ((f"moment {i} " * 20,) for i in range(rows)))
+
+
+def test_snapshot_verify_and_restore(tmp_path):
+    from services.backup import create_snapshot, restore_snapshot, snapshot_stem, verify_snapshot
+
+    db_path = tmp_path / "stories.db"
+    _database(db_path)
+    snapshot = create_snapshot(db_path, tmp_path / "backups", pages=16, pause=0)
+
+    assert snapshot.name.startswith("stories-") and snapshot.name.endswith(".db.gz")
+    assert snapshot_stem(snapshot) == "stories"
+    assert verify_snapshot(snapshot) == {'stories': 2000}
+
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM stories WHERE id > 10")
+    restore_snapshot(snapshot, db_path)
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM stories").fetchone()[0] == 2000
+
+    print("  PASS  snapshots verify and restore over the live database")
+
+
+def test_writers_proceed_during_snapshot(tmp_path):
+    from services.backup import create_snapshot, verify_snapshot
+
+    db_path = tmp_path / "stories.db"
+    _database(db_path, rows=20000)
+    written = []
+
+    def writer():
+        conn = sqlite3.connect(db_path, timeout=5)
+        for i in range(20):
+            conn.execute("INSERT INTO stories (story_text) VALUES (?)", (f"during {i}",))
+            conn.commit()
+            written.append(i)
+        conn.close()
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    snapshot = create_snapshot(db_path, tmp_path / "backups", pages=8, pause=0.001)
+    thread.join()
+
+    assert len(written) == 20
+    assert verify_snapshot(snapshot)['stories'] >= 20000
+
+    print("  PASS  writes go through while a snapshot is being taken")
+
+
+def test_constant_writes_fall_back_to_one_step(tmp_path):
+    from unittest.mock import patch
+    from services.backup import create_snapshot, verify_snapshot
+
+    db_path = tmp_path / "stories.db"
+    _database(db_path)
+    writer = sqlite3.connect(db_path, isolation_level=None)
+    steps = []
+
+    def write_between_steps(seconds):
+        # Every step is followed by a write, so the paged copy never gets past its first step
+        steps.append(seconds)
+        writer.execute("INSERT INTO stories (story_text) VALUES ('between steps')")
+
+    with patch("services.backup.time.sleep", write_between_steps):
+        snapshot = create_snapshot(db_path, tmp_path / "backups", pages=16, pause=0, max_restarts=3)
+    writer.close()
+
+    assert len(steps) == 4
+    assert verify_snapshot(snapshot) == {'stories': 2000 + len(steps)}
+
+    print("  PASS  a paged copy that keeps restarting is finished in one step")
+
+
+def test_corrupt_snapshot_is_rejected(tmp_path):
+    from services.backup import SnapshotError, create_snapshot, restore_snapshot, verify_snapshot
+
+    db_path = tmp_path / "stories.db"
+    _database(db_path, rows=10)
+    snapshot = create_snapshot(db_path, tmp_path / "backups")
+    data = bytearray(snapshot.read_bytes())
+    data[len(data) // 2] ^= 0xFF
+    snapshot.write_bytes(bytes(data))
+
+    for check in (lambda: verify_snapshot(snapshot), lambda: restore_snapshot(snapshot, db_path)):
+        try:
+            check()
+            assert False, "a corrupt snapshot should be rejected"
+        except SnapshotError:
+            pass
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM stories").fetchone()[0] == 10
+
+    print("  PASS  corrupt snapshots fail verification and are never restored")
+
+
+def test_retention_keeps_newest(tmp_path):
+    from services import backup
+
+    backup_dir = tmp_path / "backups"
+    backup_dir.mkdir()
+    for stem in ("stories", "stories_archive"):
+        for day in range(1, 6):
+            name = f"{stem}-202601{day:02d}T000000Z{backup.SNAPSHOT_SUFFIX}"
+            (backup_dir / name).write_bytes(b"")
+            (backup_dir / (name + backup.CHECKSUM_SUFFIX)).write_text("")
+
+    expired = backup.prune_snapshots(backup_dir, "stories", keep=2)
+
+    assert [path.name[:16] for path in expired] == ["stories-20260101", "stories-20260102", "stories-20260103"]
+    assert [path.name[:16] for path in backup.list_snapshots(backup_dir, "stories")] == \
+        ["stories-20260104", "stories-20260105"]
+    assert len(backup.list_snapshots(backup_dir, "stories_archive")) == 5
+    assert not (backup_dir / ("stories-20260101T000000Z.db.gz" + backup.CHECKSUM_SUFFIX)).exists()
+
+    print("  PASS  pruning keeps the newest snapshots of each database")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running backup tests...\n")
+    for test in (test_snapshot_verify_and_restore, test_writers_proceed_during_snapshot,
+                 test_constant_writes_fall_back_to_one_step, test_corrupt_snapshot_is_rejected, test_retention_keeps_newest):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\nAll tests passed.")
@@ -0,0 +1,61 @@
+"""
+Tests for the benchmark dataset generator and result comparison.
+"""
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_generate_dataset(tmp_path):
+    from benchmarks.datagen import generate
+
+    path = generate(tmp_path / "stories.db", stories=2000, users=40, seed=3)
+
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM stories").fetchone()[0] == 2000
+        assert conn.execute("SELECT COUNT(DISTINCT user_id) FROM stories").fetchone()[0] <= 40
+        assert conn.execute("SELECT COUNT(*) FROM reminder_preferences").fetchone()[0] > 0
+        assert conn.execute("SELECT COUNT(*) FROM feedback").fetchone()[0] > 0
+
+    print("  PASS  generate builds a populated database")
+
+
+def test_generate_is_deterministic(tmp_path):
+    from benchmarks.datagen import generate
+
+    rows = []
+    for name in ("a.db", "b.db"):
+        path = generate(tmp_path / name, stories=500, users=20, seed=7)
+        with sqlite3.connect(path) as conn:
+            rows.append(conn.execute("SELECT user_id, story_text, created_at FROM stories ORDER BY id").fetchall())
+
+    assert rows[0] == rows[1]
+
+    print("  PASS  the same seed produces the same dataset")
+
+
+def test_compare_flags_regressions():
+    from benchmarks.compare import compare
+
+    base = {'results': {'10k': {'a': {'median_ms': 1.0}, 'b': {'median_ms': 1.0}}}}
+    new = {'results': {'10k': {'a': {'median_ms': 1.05}, 'b': {'median_ms': 2.0}, 'c': {'median_ms': 1.0}}}}
+
+    rows = {name: regressed for _, name, _, _, _, regressed in compare(base, new, 0.10)}
+    assert rows == {'a': False, 'b': True}
+
+    print("  PASS  compare flags benchmarks slower than the threshold")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running benchmark tooling tests...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_generate_dataset(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_generate_is_deterministic(Path(tmp))
+    test_compare_flags_regressions()
+    print("\nAll tests passed.")
@@ -0,0 +1,111 @@
+"""
+Tests for compressed story storage (models/compression.py and StoryDatabase).
+"""
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+STORIES = [
+    "Today I noticed my daughter laughing at the kitchen table while rain hit the window.",
+    "The bus driver waited for a woman running with groceries and everyone clapped.",
+    "My father called just to say he found an old photo of us at the lake.",
+    "A colleague remembered my birthday when nobody else did, and I felt seen.",
+] * 25
+
+
+def test_codec_round_trip():
+    from models.compression import StoryCodec, train_dictionary
+
+    dictionary = train_dictionary(STORIES, 'zlib', 4096)
+    codec = StoryCodec({1: ('zlib', dictionary)}, 'zlib', 1)
+    plain = StoryCodec({1: ('zlib', dictionary)})
+
+    text = "Today I noticed the bus driver laughing at the kitchen table. ünïcode ✨"
+    encoded = codec.encode(text)
+    assert isinstance(encoded, bytes) and len(encoded) < len(text.encode('utf-8'))
+    assert codec.decode(encoded) == text
+    assert plain.decode(encoded) == text
+    assert plain.encode(text) == text
+    # Too short to gain anything: stored as plain text
+    assert codec.encode("ok") == "ok"
+
+    print("  PASS  codec round-trips text and leaves short stories uncompressed")
+
+
+def test_dictionary_improves_ratio():
+    from models.compression import StoryCodec, train_dictionary
+
+    text = "My father called and the bus driver waited while rain hit the window."
+    without = StoryCodec(codec='zlib').encode(text)
+    with_dict = StoryCodec({1: ('zlib', train_dictionary(STORIES, 'zlib'))}, 'zlib', 1).encode(text)
+
+    def stored_size(value):
+        return len(value) if isinstance(value, bytes) else len(value.encode('utf-8'))
+
+    assert isinstance(with_dict, bytes)
+    assert stored_size(with_dict) < stored_size(without)
+
+    print("  PASS  a trained dictionary compresses short stories better")
+
+
+def test_database_mixed_rows(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    plain_db = StoryDatabase(path, compression='off')
+    for i, text in enumerate(STORIES[:8]):
+        plain_db.save_story(1, f"{text} ({i})")
+
+    db = StoryDatabase(path, compression='zlib')
+    db.train_compression_dictionary(sample_size=100, dict_size=4096)
+    db.save_story(1, STORIES[0] + " Written compressed.")
+    assert db.compress_stories(batch_size=3) == 8
+
+    with sqlite3.connect(path) as conn:
+        kinds = {row[0] for row in conn.execute("SELECT typeof(story_text) FROM stories")}
+    assert kinds == {'blob'}
+
+    expected = [f"{text} ({i})" for i, text in enumerate(STORIES[:8])] + [STORIES[0] + " Written compressed."]
+    for reader in (db, StoryDatabase(path, compression='off')):
+        texts = sorted(s['story_text'] for s in reader.get_user_stories(1))
+        assert texts == sorted(expected)
+
+    print("  PASS  compressed and plain rows coexist and read back transparently")
+
+
+def test_dictionary_samples_both_tiers(tmp_path):
+    from unittest.mock import patch
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path, compression='zlib')
+    for i, text in enumerate(STORIES[:6]):
+        db.save_story(1, f"{text} ({i})")
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE stories SET created_at = '2020-01-01 12:00:00' WHERE id <= 3")
+    assert db.archive_stories(older_than_days=365) == 3
+
+    with patch('models.story.train_dictionary', return_value=b'dictionary') as train:
+        db.train_compression_dictionary(sample_size=100)
+    assert sorted(train.call_args.args[0]) == sorted(f"{text} ({i})" for i, text in enumerate(STORIES[:6]))
+    with patch('models.story.train_dictionary', return_value=b'dictionary') as train:
+        db.train_compression_dictionary(sample_size=4)
+    assert len(train.call_args.args[0]) == 4
+
+    print("  PASS  dictionary training samples archived stories too")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running compression tests...\n")
+    test_codec_round_trip()
+    test_dictionary_improves_ratio()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_database_mixed_rows(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_dictionary_samples_both_tiers(Path(tmp))
+    print("\nAll tests passed.")
@@ -0,0 +1,177 @@
+"""
+Tests for story encryption at rest (models/encryption.py and StoryDatabase).
+"""
+import sys
+import os
+import sqlite3
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+pytest.importorskip("cryptography")
+
+STORIES = [
+    "Today I noticed my daughter laughing at the kitchen table while rain hit the window.",
+    "The bus driver waited for a woman running with groceries and everyone clapped.",
+    "ok",
+]
+
+
+def test_encrypted_round_trip(tmp_path):
+    from models.encryption import FORMAT_ENCRYPTED, generate_master_key
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    key = generate_master_key()
+    db = StoryDatabase(path, compression='zlib', encryption_key=key)
+    for text in STORIES:
+        db.save_story(1, text)
+    db.save_story(2, "Somebody else's moment ✨")
+
+    with sqlite3.connect(path) as conn:
+        values = [row[0] for row in conn.execute("SELECT story_text FROM stories")]
+        assert conn.execute("SELECT COUNT(*) FROM user_keys").fetchone()[0] == 2
+    assert all(isinstance(v, bytes) and v[0] == FORMAT_ENCRYPTED for v in values)
+    assert not any(b'kitchen' in v for v in values)
+
+    reader = StoryDatabase(path, encryption_key=key)
+    assert sorted(s['story_text'] for s in reader.get_user_stories(1)) == sorted(STORIES)
+    assert reader.get_user_stories(2)[0]['story_text'] == "Somebody else's moment ✨"
+
+    try:
+        StoryDatabase(path).get_user_stories(1)
+        assert False, "reading encrypted stories without a key should fail"
+    except RuntimeError:
+        pass
+
+    print("  PASS  stories are encrypted per user and read back with the master key")
+
+
+def test_rows_are_bound_to_their_user(tmp_path):
+    from cryptography.exceptions import InvalidTag
+    from models.encryption import generate_master_key
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path, encryption_key=generate_master_key())
+    db.save_story(1, STORIES[0])
+    db.save_story(2, STORIES[1])
+
+    # Copy user 1's ciphertext over user 2's row
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE stories SET story_text = (SELECT story_text FROM stories WHERE user_id = 1) "
+                     "WHERE user_id = 2")
+    try:
+        db.get_user_stories(2)
+        assert False, "a row moved to another user should not decrypt"
+    except InvalidTag:
+        pass
+
+    # A different master key can't unwrap the user keys
+    try:
+        StoryDatabase(path, encryption_key=generate_master_key()).get_user_stories(1)
+        assert False, "the wrong master key should not unwrap user keys"
+    except InvalidTag:
+        pass
+
+    print("  PASS  ciphertext is bound to its user and master key")
+
+
+def test_key_cache_and_batch_decrypt(tmp_path):
+    from models.encryption import generate_master_key
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path, encryption_key=generate_master_key())
+    db._keys.cache_size = 2
+    for user_id in (1, 2, 3):
+        db.save_story(user_id, f"Moment for {user_id}")
+    assert list(db._keys._ciphers) == [2, 3]
+
+    unwraps = []
+    db._keys._master = _CountingCipher(db._keys._master, unwraps)
+    db._keys._ciphers.clear()
+    for i in range(20):
+        db.save_story(1, f"Another moment {i}")
+
+    assert len(db.get_user_stories(1)) == 21
+    assert len(db.get_user_stories(1)) == 21
+    assert len(unwraps) == 1
+
+    print("  PASS  user keys are unwrapped once and cached in an LRU")
+
+
+class _CountingCipher:
+    """Wraps the master cipher to count key unwraps."""
+
+    def __init__(self, cipher, calls):
+        self._cipher = cipher
+        self._calls = calls
+
+    def encrypt(self, *args):
+        return self._cipher.encrypt(*args)
+
+    def decrypt(self, *args):
+        self._calls.append(args)
+        return self._cipher.decrypt(*args)
+
+
+def test_compress_stories_encrypts_existing_rows(tmp_path):
+    from models.encryption import generate_master_key
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    plain = StoryDatabase(path, compression='off')
+    for text in STORIES:
+        plain.save_story(1, text)
+
+    key = generate_master_key()
+    db = StoryDatabase(path, compression='zlib', encryption_key=key)
+    db.save_story(1, "Written encrypted.")
+    assert db.compress_stories(batch_size=2) == len(STORIES)
+    assert db.compress_stories(batch_size=2) == 0
+
+    with sqlite3.connect(path) as conn:
+        kinds = {row[0] for row in conn.execute("SELECT typeof(story_text) FROM stories")}
+    assert kinds == {'blob'}
+    texts = sorted(s['story_text'] for s in StoryDatabase(path, encryption_key=key).get_user_stories(1))
+    assert texts == sorted(STORIES + ["Written encrypted."])
+
+    print("  PASS  compress_stories encrypts existing plain rows once")
+
+
+def test_settings_reject_unusable_keys(tmp_path):
+    import io
+    from contextlib import redirect_stdout
+    from unittest.mock import patch
+    from config.settings import Settings
+    from models.encryption import AESGCM, generate_master_key
+
+    def validate(key, aesgcm=AESGCM):
+        out = io.StringIO()
+        with patch.object(Settings, 'BOT_TOKEN', 'token'), patch.object(Settings, 'STORY_ENCRYPTION_KEY', key), \
+                patch('models.encryption.AESGCM', aesgcm), redirect_stdout(out):
+            return Settings.validate(), out.getvalue()
+
+    assert validate(generate_master_key()) == (True, '')
+    # Without the package the bot stops at startup with the reason, not at the first import
+    ok, out = validate(generate_master_key(), aesgcm=None)
+    assert not ok and "cryptography package is not installed" in out
+    ok, out = validate('dG9vIHNob3J0')
+    assert not ok and "must decode to 32 bytes" in out
+
+    print("  PASS  startup validation explains a missing package or a bad key")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running encryption tests...\n")
+    for test in (test_encrypted_round_trip, test_rows_are_bound_to_their_user,
+                 test_key_cache_and_batch_decrypt, test_compress_stories_encrypts_existing_rows,
+                 test_settings_reject_unusable_keys):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\nAll tests passed.")
@@ -0,0 +1,99 @@
+"""
+Tests for the fake Bot API server used by the load test.
+No network or Telegram bot token required.
+"""
+import sys
+import os
+import asyncio
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+FORM = 'application/x-www-form-urlencoded'
+
+
+def _call(server, method, params=None):
+    from urllib.parse import urlencode
+
+    body = urlencode(params or {}).encode()
+    return asyncio.run(server.handle(f"/bot123:abc/{method}", FORM, body))
+
+
+def test_send_message_returns_message():
+    from benchmarks.fake_telegram import FakeTelegramServer
+
+    delivered = []
+    server = FakeTelegramServer(on_bot_call=lambda method, params, result: delivered.append((method, params)))
+    status, first = _call(server, 'sendMessage', {'chat_id': '42', 'text': 'hi'})
+    _, second = _call(server, 'sendMessage', {'chat_id': '42', 'text': 'again'})
+
+    assert status == 200 and first['ok']
+    assert first['result']['chat']['id'] == 42
+    assert first['result']['text'] == 'hi'
+    assert second['result']['message_id'] > first['result']['message_id']
+    assert [method for method, _ in delivered] == ['sendMessage', 'sendMessage']
+    assert server.calls['sendMessage'] == 2
+
+    print("  PASS  sendMessage returns a message and notifies the hook")
+
+
+def test_get_updates_respects_offset():
+    from benchmarks.fake_telegram import FakeTelegramServer
+
+    server = FakeTelegramServer()
+    first = server.push_update({'message': {'text': 'a'}})
+    second = server.push_update({'message': {'text': 'b'}})
+
+    _, payload = _call(server, 'getUpdates', {'offset': '0'})
+    assert [u['update_id'] for u in payload['result']] == [first, second]
+
+    _, payload = _call(server, 'getUpdates', {'offset': str(second)})
+    assert [u['update_id'] for u in payload['result']] == [second]
+    assert server.pending_updates == 1
+
+    print("  PASS  getUpdates drops confirmed updates")
+
+
+def test_rate_limit_injection():
+    from benchmarks.fake_telegram import FakeTelegramServer
+
+    server = FakeTelegramServer(rate_429=1.0, retry_after=3)
+    status, payload = _call(server, 'sendMessage', {'chat_id': '1', 'text': 'x'})
+
+    assert status == 429
+    assert payload['parameters']['retry_after'] == 3
+    assert server.throttled['sendMessage'] == 1
+
+    print("  PASS  429 responses carry retry_after")
+
+
+def test_multipart_document_upload():
+    from benchmarks.fake_telegram import FakeTelegramServer
+
+    server = FakeTelegramServer()
+    boundary = 'xyz'
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="chat_id"\r\n\r\n7\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="document"; filename="a.html"\r\n'
+        f'Content-Type: text/html\r\n\r\n<p>hello</p>\r\n'
+        f'--{boundary}--\r\n'
+    ).encode()
+    status, payload = asyncio.run(server.handle(
+        '/bot123:abc/sendDocument', f'multipart/form-data; boundary={boundary}', body
+    ))
+
+    assert status == 200
+    assert payload['result']['chat']['id'] == 7
+    assert payload['result']['document']['file_size'] == len('<p>hello</p>')
+    json.dumps(payload)
+
+    print("  PASS  sendDocument accepts multipart uploads")
+
+
+if __name__ == "__main__":
+    print("Running fake Bot API tests...\n")
+    test_send_message_returns_message()
+    test_get_updates_respects_offset()
+    test_rate_limit_injection()
+    test_multipart_document_upload()
+    print("\nAll tests passed.")
@@ -0,0 +1,123 @@
+"""
+Tests for keyset-paginated feedback in models/story.py, the streaming CSV
+export and the admin feedback endpoints.
+"""
+import sys
+import os
+import csv
+import io
+import sqlite3
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def _seed(path):
+    """25 feedback rows over three days; several share a timestamp."""
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO feedback (user_id, feedback_text, created_at) VALUES (?, ?, ?)", [
+            (i % 3, f"note {i}, with \"quotes\"\nand a newline", f"2026-03-{1 + i // 10:02d} 12:00:{i % 4:02d}")
+            for i in range(25)
+        ])
+        conn.execute("INSERT INTO users (user_id, username, first_name) VALUES (1, 'ana', 'Ana')")
+
+
+def test_pages_cover_everything_once(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _seed(path)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        rows, cursor = db.get_feedback_page(limit=4, before=cursor)
+        seen.extend(rows)
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 7 and len(seen) == 25
+    assert len({row['id'] for row in seen}) == 25
+    keys = [(row['created_at'], row['id']) for row in seen]
+    assert keys == sorted(keys, reverse=True)
+    assert next(row for row in seen if row['user_id'] == 1)['first_name'] == 'Ana'
+    assert [row['id'] for row in db.get_all_feedback()] == [row['id'] for row in seen]
+
+    print("  PASS  keyset pages are newest first, without gaps or repeats")
+
+
+def test_filters(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _seed(path)
+
+    rows, cursor = db.get_feedback_page(limit=50, since=datetime(2026, 3, 2), until=datetime(2026, 3, 3))
+    assert len(rows) == 10 and cursor is None
+    assert {row['created_at'][:10] for row in rows} == {'2026-03-02'}
+    assert {row['user_id'] for row in db.iter_feedback(batch_size=3, user_id=2)} == {2}
+    assert len(list(db.iter_feedback(batch_size=3, user_id=2))) == 8
+    try:
+        db.get_feedback_page(before="not a cursor")
+        assert False, "a malformed cursor should be rejected"
+    except ValueError:
+        pass
+
+    print("  PASS  date range and user filters combine with the cursor")
+
+
+def test_csv_streams_in_chunks():
+    from utils.renderers import FEEDBACK_CSV_COLUMNS, feedback_csv
+
+    rows = ({'id': i, 'created_at': '2026-03-01 12:00:00', 'user_id': 1, 'username': None,
+             'first_name': 'Ana', 'feedback_text': f"line {i}\n\"quoted\", comma"} for i in range(7))
+    chunks = list(feedback_csv(rows, rows_per_chunk=3))
+
+    assert len(chunks) == 3
+    parsed = list(csv.reader(io.StringIO(''.join(chunks))))
+    assert tuple(parsed[0]) == FEEDBACK_CSV_COLUMNS
+    assert len(parsed) == 8 and parsed[7][5] == "line 6\n\"quoted\", comma"
+
+    print("  PASS  CSV is produced a chunk at a time and round-trips")
+
+
+def test_admin_feedback_endpoints(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from config.settings import settings
+    from models.story import StoryDatabase
+    from webapp.app import webapp_app
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _seed(path)
+    monkeypatch.setattr("handlers.shared.story_db", db)
+    monkeypatch.setattr(settings, 'ADMIN_API_TOKEN', 's3cret')
+    client = TestClient(webapp_app, headers={"Authorization": "Bearer s3cret"})
+
+    first = client.get("/api/admin/feedback?limit=20").json()
+    second = client.get("/api/admin/feedback", params={"limit": 20, "before": first['next']}).json()
+    assert len(first['items']) == 20 and len(second['items']) == 5 and second['next'] is None
+    assert client.get("/api/admin/feedback?before=oops").status_code == 400
+
+    response = client.get("/api/admin/feedback.csv?user_id=1")
+    assert response.headers["content-type"].startswith("text/csv")
+    assert len(list(csv.reader(io.StringIO(response.text)))) == 1 + 8
+    assert TestClient(webapp_app).get("/api/admin/feedback.csv").status_code == 401
+
+    print("  PASS  feedback pages and CSV are served to admins")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    import pytest
+
+    print("Running feedback tests...\n")
+    for test in (test_pages_cover_everything_once, test_filters):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    test_csv_streams_in_chunks()
+    pytest.main([__file__, "-q", "-k", "endpoints"])
+    print("\nAll tests passed.")
@@ -0,0 +1,119 @@
+"""
+Tests for readiness probing: services/health.py, StoryDatabase.ping and
+GET /ready in webapp/app.py.
+"""
+import sys
+import os
+import asyncio
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+LIMITS = dict(max_loop_lag=0.5, max_db_latency=0.5, max_job_lag=60)
+
+
+def test_probe_measures_loop_lag_and_jobs():
+    from services.health import ReadinessMonitor
+
+    overdue = SimpleNamespace(next_t=datetime.now(timezone.utc) - timedelta(seconds=120))
+    later = SimpleNamespace(next_t=datetime.now(timezone.utc) + timedelta(hours=1))
+    job_queue = SimpleNamespace(jobs=lambda: (overdue, later, SimpleNamespace(next_t=None)))
+    monitor = ReadinessMonitor(interval=0.01)
+
+    async def scenario():
+        probe = asyncio.create_task(monitor.run(job_queue))
+        await asyncio.sleep(0.03)
+        time.sleep(0.3)  # a handler blocking the loop
+        await asyncio.sleep(0)  # the probe wakes up here, ~0.3 s late
+        await asyncio.sleep(0)
+        probe.cancel()
+
+    asyncio.run(scenario())
+    assert monitor.loop_lag > 0.2 and monitor.heartbeat is not None
+    assert monitor.jobs[0] == 3 and 119 < monitor.jobs[1] < 130
+
+    print("  PASS  the probe records event loop lag and the most overdue job")
+
+
+def test_check_names_failing_signals():
+    from services.health import ReadinessMonitor
+
+    monitor = ReadinessMonitor(interval=1)
+    assert monitor.check(0.001, **LIMITS)['failing'] == ['loop_probe_not_started']
+
+    monitor.heartbeat, monitor.loop_lag, monitor.jobs = 100.0, 0.01, (4, 0.0)
+    monitor.last_update = 50.0
+    healthy = monitor.check(0.002, now=100.5, **LIMITS)
+    assert healthy['ready'] and healthy['checks']['jobs'] == 4
+    assert healthy['checks']['last_update_age_ms'] == 50500.0
+
+    assert monitor.check(0.002, now=110.0, **LIMITS)['failing'] == ['loop_heartbeat_stale']
+    monitor.loop_lag, monitor.jobs = 2.0, (4, 300.0)
+    assert monitor.check(None, now=100.5, max_update_age=30, **LIMITS)['failing'] == \
+        ['loop_lag', 'db_unavailable', 'job_queue_behind', 'updates_stale']
+    assert monitor.check(0.9, now=100.5, **LIMITS)['failing'][-2:] == ['db_slow', 'job_queue_behind']
+
+    print("  PASS  readiness fails on a stalled loop, slow or missing database and overdue jobs")
+
+
+def test_ready_endpoint(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from models.story import StoryDatabase
+    from services.health import readiness
+    from webapp.app import webapp_app
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    monkeypatch.setattr("handlers.shared.story_db", db)
+    monkeypatch.setattr(readiness, 'heartbeat', time.monotonic())
+    monkeypatch.setattr(readiness, 'loop_lag', 0.003)
+    monkeypatch.setattr(readiness, 'jobs', (2, 0.0))
+    monkeypatch.setattr("config.settings.settings.READY_MAX_DB_LATENCY", 0.2)
+    client = TestClient(webapp_app)
+
+    response = client.get("/ready")
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body['status'] == "ok" and body['loop_lag_ms'] == 3.0 and body['db_latency_ms'] is not None
+
+    # A writer doesn't hold up the probe's read
+    writer = sqlite3.connect(db.db_path)
+    writer.execute("BEGIN IMMEDIATE")
+    try:
+        writing = client.get("/ready")
+    finally:
+        writer.rollback()
+        writer.close()
+    assert writing.status_code == 200, writing.text
+
+    # An exclusive lock is contention: the database counts as slow, not down
+    locker = sqlite3.connect(db.db_path, isolation_level=None)
+    locker.execute("PRAGMA locking_mode = EXCLUSIVE")
+    locker.execute("BEGIN EXCLUSIVE")
+    try:
+        locked = client.get("/ready")
+    finally:
+        locker.execute("ROLLBACK")
+        locker.close()
+    assert locked.status_code == 503 and locked.json()['failing'] == ['db_slow']
+    assert locked.json()['db_latency_ms'] >= 200
+
+    # A database that can't be read at all is down
+    os.remove(db.db_path)
+    os.mkdir(db.db_path)
+    missing = client.get("/ready")
+    assert missing.status_code == 503 and missing.json()['failing'] == ['db_unavailable']
+
+    print("  PASS  GET /ready reports the probes, a locked database as slow")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    print("Running health tests...\n")
+    test_probe_measures_loop_lag_and_jobs()
+    test_check_names_failing_signals()
+    pytest.main([__file__, "-q", "-k", "endpoint"])
+    print("\nAll tests passed.")
@@ -0,0 +1,261 @@
+"""
+Tests for /import: the file parsers and StoryImporter in
+services/story_import.py, StoryDatabase.import_stories and the handler.
+"""
+import sys
+import os
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+NOW = datetime(2026, 3, 1, 12, 0)
+
+
+def _import(db, path, filename, user_id=1, batch_size=2):
+    from services.story_import import StoryImporter
+
+    steps = list(StoryImporter(db, user_id, path, filename, batch_size=batch_size, now=NOW).run())
+    return steps[-1], len(steps)
+
+
+def test_formats_validate_and_dedup(tmp_path):
+    from models.story import StoryDatabase
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    db.import_stories(1, [('2024-01-05 12:00:00', "Already saved")])
+    files = {
+        'moments.jsonl': (
+            '{"created_at": "2024-01-01 08:30:00", "story_text": "Snow on the bakery roof"}\n'
+            '{"at": "2024-01-02T10:00:00+02:00", "text": "Tram driver waved"}\n'
+            '{"date": "2024-01-05", "text": "Already saved"}\n'
+            'not json\n'
+            '{"date": "2027-01-01", "text": "From the future"}\n'
+        ),
+        'moments.csv': (
+            'date;text\n'
+            '2024-02-01;"Two lines,\nin one moment"\n'
+            '2024-02-01;"Two lines,\nin one moment"\n'
+            ';no date here\n'
+        ),
+        'journal': (
+            '﻿2024-03-01: Found my old camera\n'
+            'and the film was still in it\n'
+            '\n'
+            '[2024-03-02 21:15] Long call with Dad\n'
+            '2024-03-03 —    \n'
+        ),
+    }
+    results = {}
+    for name, content in files.items():
+        path = tmp_path / name
+        path.write_text(content, encoding='utf-8')
+        results[name] = _import(db, str(path), name)
+
+    stats, steps = results['moments.jsonl']
+    assert (stats.file_format, stats.imported, stats.duplicates, stats.invalid, steps) == ('jsonl', 2, 1, 2, 2)
+    assert stats.errors == [(4, "unreadable entry"), (5, "date in the future")]
+    stats, _ = results['moments.csv']
+    assert (stats.file_format, stats.imported, stats.duplicates, stats.errors) == ('csv', 1, 1, [(6, "no date")])
+    stats, _ = results['journal']
+    assert (stats.file_format, stats.imported, stats.errors) == ('text', 2, [(5, "no text")])
+    assert stats.fraction == 1.0
+
+    stories = {s['created_at']: s['story_text'] for s in db.get_user_stories(1)}
+    assert stories == {
+        '2024-01-01 08:30:00': "Snow on the bakery roof",
+        '2024-01-02 08:00:00': "Tram driver waved",
+        '2024-01-05 12:00:00': "Already saved",
+        '2024-02-01 12:00:00': "Two lines,\nin one moment",
+        '2024-03-01 12:00:00': "Found my old camera\nand the film was still in it",
+        '2024-03-02 21:15:00': "Long call with Dad",
+    }
+
+    print("  PASS  JSONL, CSV and dated text import with validation and dedup")
+
+
+def test_export_round_trip(tmp_path):
+    from models.encryption import generate_master_key
+    from models.story import StoryDatabase
+    from services.story_import import ImportFormatError
+    from utils.renderers import build_export_content
+
+    db = StoryDatabase(str(tmp_path / "stories.db"), compression='zlib', encryption_key=generate_master_key())
+    texts = [f"Moment {i} <with> & \"quotes\"\nand a second line" for i in range(25)]
+    db.import_stories(1, [(f"2023-05-{i + 1:02d} 18:00:00", text) for i, text in enumerate(texts)])
+    export = tmp_path / "moments_Ana_2026-03-01.html"
+    export.write_text(build_export_content(db.get_story_texts(1), "Ana", "2026-03-01"), encoding='utf-8')
+
+    # The export prints UTC days, whatever the importing user's timezone
+    db.set_reminder(2, "21:00", "Pacific/Kiritimati")
+    stats, _ = _import(db, str(export), export.name, user_id=2, batch_size=10)
+    assert (stats.file_format, stats.imported, stats.invalid) == ('html', 25, 0)
+    assert [text for _, text in db.get_story_texts(2)] == [text for _, text in db.get_story_texts(1)]
+    assert all(created_at.endswith(' 12:00:00') for created_at in db.get_story_dates(2))
+
+    # The export only shows days: importing it back over the originals adds nothing
+    stats, _ = _import(db, str(export), export.name, user_id=1)
+    assert (stats.imported, stats.duplicates) == (0, 25)
+
+    bad = tmp_path / "notes.csv"
+    bad.write_text("when,what\n2024-01-01,hello\n", encoding='utf-8')
+    try:
+        _import(db, str(bad), bad.name)
+        assert False, "a CSV without known columns should be rejected"
+    except ImportFormatError:
+        pass
+
+    print("  PASS  an /export page imports back with its texts and days, once")
+
+
+def test_bare_dates_are_local_noon(tmp_path):
+    from zoneinfo import ZoneInfo
+    from models.story import StoryDatabase
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    source = tmp_path / "journal.txt"
+    source.write_text("2024-03-01: Ferry to Waiheke\n2024-07-01 08:30: Frost on the deck\n")
+    db.set_reminder(1, "21:00", "Pacific/Auckland")
+
+    stats, _ = _import(db, str(source), source.name)
+    assert stats.imported == 2
+    # Noon NZDT is the evening before in UTC; explicit times are still UTC
+    dates = db.get_story_dates(1)
+    assert dates == ['2024-07-01 08:30:00', '2024-02-29 23:00:00']
+    local = datetime.fromisoformat(dates[1] + '+00:00').astimezone(ZoneInfo("Pacific/Auckland"))
+    assert local.strftime('%Y-%m-%d %H:%M') == '2024-03-01 12:00'
+
+    stats, _ = _import(db, str(source), source.name)
+    assert (stats.imported, stats.duplicates) == (0, 2)
+    # Without a reminder timezone, UTC
+    _import(db, str(source), source.name, user_id=2)
+    assert db.get_story_dates(2)[1] == '2024-03-01 12:00:00'
+
+    print("  PASS  dates without a time are noon in the user's timezone")
+
+
+def test_back_dated_import_lands_in_archive(tmp_path):
+    from models.story import StoryDatabase
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    db.import_stories(1, [(f"2024-06-{day:02d} 09:00:00", f"Archived {day}") for day in range(1, 11)])
+    db.archive_stories(older_than_days=365)
+    db.save_story(1, "Today")
+    source = tmp_path / "old.jsonl"
+    source.write_text("".join(f'{{"date": "2020-01-{day:02d}", "text": "Old {day}"}}\n' for day in range(1, 11)))
+
+    stats, _ = _import(db, str(source), source.name, batch_size=4)
+    assert (stats.imported, stats.duplicates) == (10, 0)
+    assert db.count_user_stories(1) == 21
+
+    # Reads that fill a limit from the hot tier must still reach the imported rows
+    everything = db.get_story_texts(1)
+    assert len(everything) == 21 and everything[-1].story_text == "Old 1"
+    assert db.get_story_texts(1, limit=5) == everything[:5]
+    paged, cursor = [], None
+    while True:
+        page, cursor = db.get_story_page(1, limit=5, before=cursor)
+        paged.extend(story['story_text'] for story in page)
+        if cursor is None:
+            break
+    assert paged == [text for _, text in everything]
+    assert list(db.iter_story_texts(1, batch_size=3)) == everything
+
+    # Archived moments, old and new, count as already there
+    stats, _ = _import(db, str(source), source.name)
+    assert (stats.imported, stats.duplicates) == (0, 10)
+
+    # A crash between the archive commit and the hot delete leaves both copies, never neither
+    import sqlite3
+    with sqlite3.connect(db.db_path) as conn:
+        conn.execute("CREATE TRIGGER no_delete BEFORE DELETE ON stories BEGIN SELECT RAISE(ABORT, 'crash'); END")
+    try:
+        _import(db, str(source), source.name, user_id=2, batch_size=10)
+        assert False, "the delete should have failed"
+    except sqlite3.IntegrityError:
+        pass
+    assert [text for _, text in db.get_story_texts(2)] == [f"Old {day}" for day in range(10, 0, -1)]
+
+    print("  PASS  back-dated imports go to the archive tier and page with the rest")
+
+
+def test_import_recomputes_rolled_up_days(tmp_path):
+    from models.story import StoryDatabase
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    db.import_stories(1, [('2026-02-28 10:00:00', "Before"), ('2026-03-01 11:00:00', "This morning")])
+    db.refresh_rollups(now=NOW)
+    source = tmp_path / "old.csv"
+    source.write_text("date,text\n2024-01-03,Snowman\n2024-01-03,Sledging\n2026-03-01 08:15,Early walk\n")
+
+    stats, _ = _import(db, str(source), source.name)
+    assert stats.imported == 3
+    report = db.get_stats(days=2, now=NOW)
+    assert report['totals']['stories'] == 5
+    assert [day['stories'] for day in report['daily']] == [2, 1]
+    with db._connect() as conn:
+        assert conn.execute("SELECT stories, active_users FROM stats_daily WHERE day = '2024-01-03'").fetchone() == (2, 1)
+        assert conn.execute("SELECT stories FROM stats_hourly WHERE hour = '2026-03-01 08:00:00'").fetchone() == (1,)
+
+    # The next regular refresh doesn't count them twice
+    db.refresh_rollups(now=NOW)
+    assert db.get_stats(days=2, now=NOW)['totals']['stories'] == 5
+
+    print("  PASS  an import recomputes the rollups of the days it back-fills")
+
+
+def test_import_handler_reports_progress(tmp_path):
+    from config.settings import settings
+    from handlers import import_commands
+    from handlers.import_commands import ImportCommandHandlers
+    from models.story import StoryDatabase
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    source = tmp_path / "upload.txt"
+    source.write_text("no date\n" + "".join(f"2024-01-{day:02d}: Moment {day}\n" for day in range(1, 31)))
+
+    async def download_to_drive(path):
+        with open(path, 'wb') as f:
+            f.write(source.read_bytes())
+
+    document = SimpleNamespace(file_name="journal.txt", file_size=source.stat().st_size,
+                               get_file=AsyncMock(return_value=SimpleNamespace(download_to_drive=download_to_drive)))
+    status = AsyncMock()
+    update = SimpleNamespace(effective_user=SimpleNamespace(id=5),
+                             message=AsyncMock(document=document, reply_text=AsyncMock(return_value=status)))
+    tasks = []
+    context = SimpleNamespace(application=MagicMock(create_task=lambda coro, update=None: tasks.append(coro)))
+
+    with patch.object(ImportCommandHandlers, 'story_db', db), patch.object(settings, 'IMPORT_BATCH_SIZE', 10), \
+            patch.object(settings, 'IMPORT_PROGRESS_SECONDS', 0):
+        asyncio.run(ImportCommandHandlers.receive_import_file(update, context))
+        # A second upload while the first runs is turned away
+        asyncio.run(ImportCommandHandlers.receive_import_file(update, context))
+        assert len(tasks) == 1 and "still running" in update.message.reply_text.await_args.args[0]
+        asyncio.run(tasks[0])
+
+    edits = [call.args[0] for call in status.edit_text.await_args_list]
+    assert len(edits) == 5 and "Importing… <b>" in edits[0]
+    assert "Imported <b>30</b> moments" in edits[-1] and "line 1: no date" in edits[-1]
+    assert db.count_user_stories(5) == 30 and 5 not in import_commands._importing
+
+    with patch.object(settings, 'IMPORT_MAX_BYTES', 10):
+        assert asyncio.run(ImportCommandHandlers.receive_import_file(update, context)) == -1
+    assert "too big" in update.message.reply_text.await_args.args[0] and len(tasks) == 1
+
+    print("  PASS  /import runs in the background and edits its status as batches land")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running import tests...\n")
+    for test in (test_formats_validate_and_dedup, test_export_round_trip, test_bare_dates_are_local_noon,
+                 test_back_dated_import_lands_in_archive, test_import_recomputes_rolled_up_days,
+                 test_import_handler_reports_progress):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\nAll tests passed.")
@@ -0,0 +1,129 @@
+"""
+Tests for the queue-backed logging pipeline in utils/logging_config.py.
+"""
+import sys
+import os
+import io
+import json
+import logging
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+class _RecordsThread:
+    """Argument whose str() records which thread rendered it."""
+
+    def __init__(self):
+        self.rendered_in = None
+
+    def __str__(self):
+        self.rendered_in = threading.current_thread().name
+        return "rendered"
+
+
+def _configure(**kwargs):
+    from utils.logging_config import configure_logging
+
+    stream = io.StringIO()
+    configure_logging(stream=stream, **kwargs)
+    return stream
+
+
+def _flush():
+    from utils.logging_config import stop_logging
+
+    stop_logging()
+
+
+def test_json_output_with_extra_fields():
+    stream = _configure(level='INFO', module_levels='', fmt='json')
+    try:
+        logging.getLogger('tests.json').info("Story %s saved", 7, extra={'user_id': 42})
+    finally:
+        _flush()
+
+    entry = json.loads(stream.getvalue().strip().splitlines()[-1])
+    assert entry['msg'] == "Story 7 saved"
+    assert entry['level'] == 'INFO'
+    assert entry['logger'] == 'tests.json'
+    assert entry['user_id'] == 42
+
+    print("  PASS  records are written as JSON lines")
+
+
+def test_formatting_happens_off_the_calling_thread():
+    stream = _configure(level='INFO', module_levels='', fmt='text')
+    arg = _RecordsThread()
+    try:
+        logging.getLogger('tests.lazy').info("value: %s", arg)
+    finally:
+        _flush()
+
+    assert "value: rendered" in stream.getvalue()
+    assert arg.rendered_in not in (None, threading.current_thread().name)
+
+    print("  PASS  message arguments are formatted by the listener thread")
+
+
+def test_disabled_levels_are_never_formatted():
+    stream = _configure(level='WARNING', module_levels='', fmt='json')
+    arg = _RecordsThread()
+    try:
+        logging.getLogger('tests.disabled').info("value: %s", arg)
+    finally:
+        _flush()
+
+    assert arg.rendered_in is None
+    assert stream.getvalue() == ""
+
+    print("  PASS  records below the level cost no formatting")
+
+
+def test_per_module_levels():
+    from utils.logging_config import parse_module_levels
+
+    assert parse_module_levels("handlers.shared=info, httpx=ERROR,bogus,x=NOPE") == {
+        'handlers.shared': logging.INFO,
+        'httpx': logging.ERROR,
+    }
+
+    stream = _configure(level='WARNING', module_levels='tests.verbose=DEBUG', fmt='text')
+    try:
+        logging.getLogger('tests.verbose').debug("shown")
+        logging.getLogger('tests.quiet').info("hidden")
+    finally:
+        _flush()
+        logging.getLogger('tests.verbose').setLevel(logging.NOTSET)
+
+    assert "shown" in stream.getvalue()
+    assert "hidden" not in stream.getvalue()
+
+    print("  PASS  per-module levels override the root level")
+
+
+def test_exceptions_keep_tracebacks():
+    stream = _configure(level='INFO', module_levels='', fmt='json')
+    try:
+        try:
+            raise ValueError("bad value")
+        except ValueError:
+            logging.getLogger('tests.exc').exception("Failed")
+    finally:
+        _flush()
+
+    entry = json.loads(stream.getvalue().strip().splitlines()[-1])
+    assert entry['msg'] == "Failed"
+    assert "ValueError: bad value" in entry['exc']
+
+    print("  PASS  exception tracebacks are captured")
+
+
+if __name__ == "__main__":
+    print("Running logging tests...\n")
+    test_json_output_with_extra_fields()
+    test_formatting_happens_off_the_calling_thread()
+    test_disabled_levels_are_never_formatted()
+    test_per_module_levels()
+    test_exceptions_keep_tracebacks()
+    print("\nAll tests passed.")
@@ -0,0 +1,161 @@
+"""
+Memory budget tests for the 512 MB VM, plus the tracemalloc profiler in
+utils/memory.py.
+
+Each budget test drives a handler at scale and fails if the peak of traced
+Python allocations exceeds its budget. Budgets are in MiB and can be
+overridden with MEMORY_BUDGET_<NAME>_MB, e.g. MEMORY_BUDGET_EXPORT_MB=48.
+"""
+import sys
+import os
+import asyncio
+import sqlite3
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+# Ten years of daily stories for one user
+STORIES = 3650
+STORY_TEXT = "Walked the dog past the bakery and the owner waved me in for a warm roll. " * 4
+REMINDERS = 5000
+
+# Roughly twice the measured peaks (6.7, 2.6 and 19.1 MiB): room for noise,
+# not for a regression that copies the stories again
+BUDGETS_MB = {
+    'export': 14,
+    'report': 6,
+    'reminders': 40,
+}
+
+
+def _budget(name: str) -> int:
+    return int(float(os.getenv(f"MEMORY_BUDGET_{name.upper()}_MB", BUDGETS_MB[name])) * 2**20)
+
+
+def _assert_within_budget(name: str, peak: int) -> None:
+    budget = _budget(name)
+    print(f"        {name}: peak {peak / 2**20:.1f} MiB of {budget / 2**20:.0f} MiB")
+    assert peak <= budget, f"{name} peaked at {peak / 2**20:.1f} MiB, over its {budget / 2**20:.0f} MiB budget"
+
+
+def _user_with_stories(path, user_id=1):
+    from models.story import StoryDatabase
+
+    db = StoryDatabase(path)
+    with sqlite3.connect(path) as conn:
+        conn.executemany(
+            "INSERT INTO stories (user_id, story_text, created_at) VALUES (?, ?, datetime('now', ?))",
+            ((user_id, f"{i}: {STORY_TEXT}", f"-{i} days") for i in range(STORIES)),
+        )
+    return db
+
+
+def _update(user_id=1):
+    user = SimpleNamespace(id=user_id, first_name="Ana")
+    return SimpleNamespace(effective_user=user, message=AsyncMock())
+
+
+def test_export_within_budget(tmp_path):
+    from config.settings import settings
+    from handlers.story_commands import StoryCommandHandlers
+    from utils.memory import traced_peak
+
+    db = _user_with_stories(str(tmp_path / "stories.db"))
+    update = _update()
+    # Render inline so the page is built (and traced) in this process
+    with patch.object(StoryCommandHandlers, 'story_db', db), \
+            patch.object(settings, 'RENDER_OFFLOAD_MIN_BYTES', 2**62), traced_peak() as usage:
+        asyncio.run(StoryCommandHandlers.export_command(update, SimpleNamespace()))
+
+    assert update.message.reply_document.await_args.kwargs['document'].count(b'<article>') == STORIES
+    _assert_within_budget('export', usage['peak'])
+    print("  PASS  /export of 10 years of stories stays within its memory budget")
+
+
+def test_report_within_budget(tmp_path):
+    from config.settings import settings
+    from handlers import report_commands
+    from handlers.report_commands import ReportCommandHandlers
+    from utils.memory import traced_peak
+
+    db = _user_with_stories(str(tmp_path / "stories.db"))
+    output = "## Themes\n" + "You notice kindness. " * 200 + "\n\n## Small moments that were bigger\n" + \
+        "- **A warm roll** from the baker.\n" * 2000
+    client = SimpleNamespace(responses=SimpleNamespace(create=AsyncMock(return_value=SimpleNamespace(
+        output_text=output))))
+    query = AsyncMock()
+    query.from_user.id = 1
+    update = SimpleNamespace(callback_query=query)
+
+    with patch.object(ReportCommandHandlers, 'story_db', db), \
+            patch.object(report_commands, 'get_openai_client', lambda: client), \
+            patch.object(settings, 'RENDER_OFFLOAD_MIN_BYTES', 2**62), traced_peak() as usage:
+        asyncio.run(ReportCommandHandlers.report_all_callback(update, SimpleNamespace()))
+
+    prompt = client.responses.create.await_args.kwargs['prompt']['variables']['moments']
+    assert prompt.count(STORY_TEXT) == STORIES
+    assert query.message.reply_document.await_count == 1
+    _assert_within_budget('report', usage['peak'])
+    print("  PASS  /report over all stories stays within its memory budget")
+
+
+def test_reminder_scheduling_within_budget(tmp_path):
+    from telegram.ext import Application
+    from handlers import shared
+    from models.story import StoryDatabase
+    from utils.memory import traced_peak
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    zones = ['UTC', 'America/New_York', 'Europe/London', 'Asia/Tokyo', 'Asia/Kolkata', 'Australia/Sydney']
+    with sqlite3.connect(db.db_path) as conn:
+        conn.executemany(
+            "INSERT INTO reminder_preferences (user_id, reminder_time, timezone, enabled) VALUES (?, ?, ?, 1)",
+            ((i, f"{i % 24:02d}:{i % 60:02d}", zones[i % len(zones)]) for i in range(1, REMINDERS + 1)),
+        )
+    # PTB's real JobQueue, so the APScheduler jobs themselves are counted
+    job_queue = Application.builder().token("123:TEST").build().job_queue
+
+    with patch.object(shared, 'story_db', db), traced_peak() as usage:
+        assert shared.schedule_all_reminders(job_queue) == REMINDERS
+
+    assert len(job_queue.jobs()) == REMINDERS
+    _assert_within_budget('reminders', usage['peak'])
+    print("  PASS  scheduling every reminder at startup stays within its memory budget")
+
+
+def test_profiler_top_and_diff():
+    import tracemalloc
+    from utils.memory import MemoryProfiler
+
+    profiler = MemoryProfiler()
+    was_tracing = tracemalloc.is_tracing()
+    if was_tracing:
+        tracemalloc.stop()
+    try:
+        assert "Tracing is off" in profiler.run('top')
+        assert profiler.run('start').startswith("Tracing started")
+        assert "Baseline taken" in profiler.run('diff')
+        hoard = [bytearray(4096) for _ in range(500)]
+        diff = profiler.run('diff', limit=3)
+        assert sum(map(len, hoard)) == 500 * 4096
+        assert "test_memory.py" in diff.splitlines()[3]
+        assert "test_memory.py" in profiler.run('top', limit=5)
+        assert profiler.run('stop') == "Tracing stopped." and not tracemalloc.is_tracing()
+    finally:
+        if was_tracing:
+            tracemalloc.start()
+
+    print("  PASS  the profiler lists top allocators and what grew between snapshots")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running memory tests...\n")
+    for test in (test_export_within_budget, test_report_within_budget, test_reminder_scheduling_within_budget):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    test_profiler_top_and_diff()
+    print("\nAll tests passed.")
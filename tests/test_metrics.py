@@ -0,0 +1,164 @@
+"""
+Tests for the in-process metrics registry in utils/metrics.py.
+"""
+import sys
+import os
+import asyncio
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_counter_and_histogram_render():
+    from utils.metrics import Counter, Histogram, MetricsRegistry
+
+    registry = MetricsRegistry()
+    counter = Counter('test_events_total', 'Events.', ['kind'], registry=registry)
+    histogram = Histogram('test_latency_seconds', 'Latency.', buckets=(0.1, 1.0), registry=registry)
+
+    counter.labels('a').inc()
+    counter.labels('a').inc(2)
+    counter.labels('b').inc()
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    text = registry.render()
+    assert '# TYPE test_events_total counter' in text
+    assert 'test_events_total{kind="a"} 3' in text
+    assert 'test_events_total{kind="b"} 1' in text
+    assert '# TYPE test_latency_seconds histogram' in text
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_latency_seconds_bucket{le="1"} 2' in text
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in text
+    assert 'test_latency_seconds_sum 5.55' in text
+    assert 'test_latency_seconds_count 3' in text
+
+    print("  PASS  counters and histograms render in Prometheus text format")
+
+
+def test_label_values_are_escaped():
+    from utils.metrics import Counter, MetricsRegistry
+
+    registry = MetricsRegistry()
+    counter = Counter('test_escape_total', 'Escaping.', ['name'], registry=registry)
+    counter.labels('say "hi"\n').inc()
+
+    assert 'test_escape_total{name="say \\"hi\\"\\n"} 1' in registry.render()
+
+    print("  PASS  label values are escaped")
+
+
+def test_instrument_handlers_times_async_staticmethods():
+    from utils.metrics import HANDLER_LATENCY, instrument_handlers
+
+    @instrument_handlers
+    class DummyHandlers:
+        @staticmethod
+        async def ping(update, context):
+            return 7
+
+    assert DummyHandlers.ping.__name__ == 'ping'
+    assert asyncio.run(DummyHandlers.ping(None, None)) == 7
+    _, _, count = HANDLER_LATENCY.labels('DummyHandlers.ping').snapshot()
+    assert count == 1
+
+    print("  PASS  instrument_handlers times handler calls")
+
+
+def test_instrument_handlers_counts_errors():
+    from utils.metrics import HANDLER_ERRORS, instrument_handlers
+
+    @instrument_handlers
+    class FailingHandlers:
+        @staticmethod
+        async def boom(update, context):
+            raise RuntimeError("boom")
+
+    try:
+        asyncio.run(FailingHandlers.boom(None, None))
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("exception was swallowed")
+    assert HANDLER_ERRORS.labels('FailingHandlers.boom').value == 1
+
+    print("  PASS  instrument_handlers counts exceptions and re-raises")
+
+
+def test_story_database_is_instrumented(tmp_path):
+    from models.story import StoryDatabase
+    from utils.metrics import DB_LATENCY
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    _, _, before = DB_LATENCY.labels('count_user_stories').snapshot()
+    db.count_user_stories(1)
+    _, _, after = DB_LATENCY.labels('count_user_stories').snapshot()
+    assert after == before + 1
+
+    # Generators are timed over their whole iteration, once, not at creation
+    import time
+    from unittest.mock import patch
+    db.import_stories(1, [(f"2024-01-{day:02d} 12:00:00", f"moment {day}") for day in range(1, 8)])
+    _, total_before, count_before = DB_LATENCY.labels('iter_story_texts').snapshot()
+    read_batch = StoryDatabase._read_stories
+
+    def slow_batch(*args, **kwargs):
+        time.sleep(0.01)
+        return read_batch(*args, **kwargs)
+
+    with patch.object(StoryDatabase, '_read_stories', slow_batch):
+        stories = db.iter_story_texts(1, batch_size=3)
+        _, _, count = DB_LATENCY.labels('iter_story_texts').snapshot()
+        assert count == count_before
+        assert len(list(stories)) == 7
+    _, total, count = DB_LATENCY.labels('iter_story_texts').snapshot()
+    assert count == count_before + 1 and total - total_before >= 0.03
+
+    print("  PASS  StoryDatabase methods are timed")
+
+
+def test_metrics_endpoint():
+    from fastapi.testclient import TestClient
+    from webapp.app import webapp_app
+
+    response = TestClient(webapp_app).get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "moments_handler_duration_seconds" in response.text
+    assert "moments_db_query_duration_seconds" in response.text
+
+    print("  PASS  /metrics serves the registry")
+
+
+def test_observation_overhead_is_microseconds():
+    from utils.metrics import Histogram, MetricsRegistry
+
+    histogram = Histogram('test_overhead_seconds', 'Overhead.', ['op'], registry=MetricsRegistry())
+    child = histogram.labels('x')
+    n = 100_000
+    start = time.perf_counter()
+    for i in range(n):
+        child.observe(i * 1e-6)
+    per_observation = (time.perf_counter() - start) / n
+
+    # Typically well under 1µs; generous bound to stay stable on shared CI
+    assert per_observation < 10e-6, per_observation
+
+    print(f"  PASS  observe() costs {per_observation * 1e6:.2f}µs")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running metrics tests...\n")
+    test_counter_and_histogram_render()
+    test_label_values_are_escaped()
+    test_instrument_handlers_times_async_staticmethods()
+    test_instrument_handlers_counts_errors()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_story_database_is_instrumented(Path(tmp))
+    test_metrics_endpoint()
+    test_observation_overhead_is_microseconds()
+    print("\nAll tests passed.")
@@ -0,0 +1,128 @@
+"""
+Tests for the Mini App reminder API: initData validation in
+services/telegram_auth.py and POST /api/reminder in webapp/app.py.
+"""
+import sys
+import os
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+TOKEN = "123456:TEST-token"
+
+
+def _init_data(user_id=42, auth_date=None, token=TOKEN):
+    from services.telegram_auth import sign_init_data
+    return sign_init_data({
+        'auth_date': str(int(auth_date or time.time())),
+        'query_id': 'AAE',
+        'user': json.dumps({'id': user_id, 'first_name': 'Ana'}),
+    }, token)
+
+
+def test_validate_init_data():
+    from services.telegram_auth import InitDataError, validate_init_data
+
+    fields = validate_init_data(_init_data(), TOKEN)
+    assert fields['user']['id'] == 42 and isinstance(fields['auth_date'], int)
+
+    for bad in (_init_data(token="other:token"),
+                _init_data().replace("Ana", "Bob"),
+                _init_data(auth_date=time.time() - 2 * 86400),
+                "hash=abc",
+                "not a query string"):
+        try:
+            validate_init_data(bad, TOKEN)
+            assert False, f"should be rejected: {bad}"
+        except InitDataError:
+            pass
+    assert validate_init_data(_init_data(auth_date=1), TOKEN, max_age=0)['auth_date'] == 1
+
+    print("  PASS  initData is accepted only when signed with the bot token and fresh")
+
+
+def test_reminder_endpoint_runs_on_the_bot_loop(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from config.settings import settings
+    from models.story import StoryDatabase
+    from webapp.app import webapp_app
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    monkeypatch.setattr("handlers.reminder_commands.story_db", db)
+    monkeypatch.setattr(settings, 'BOT_TOKEN', TOKEN)
+
+    bot_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=bot_loop.run_forever, daemon=True)
+    thread.start()
+    scheduled_on = []
+    job_queue = MagicMock()
+    job_queue.get_jobs_by_name.return_value = []
+    job_queue.run_daily.side_effect = lambda *args, **kwargs: scheduled_on.append(threading.current_thread())
+    telegram_app = MagicMock(job_queue=job_queue)
+    monkeypatch.setattr(webapp_app.state, 'telegram_app', telegram_app, raising=False)
+    monkeypatch.setattr(webapp_app.state, 'bot_loop', bot_loop, raising=False)
+    client = TestClient(webapp_app)
+
+    try:
+        response = client.post("/api/reminder", json={"init_data": _init_data(), "time": "09:30", "timezone": "UTC"})
+        assert response.status_code == 200, response.text
+        assert response.json()['utc_time'] == "09:30"
+        assert db.get_reminder_preference(42)['reminder_time'] == "09:30"
+        assert scheduled_on == [thread]
+        assert job_queue.run_daily.call_args.kwargs['name'] == "reminder_42"
+
+        bad_time = client.post("/api/reminder", json={"init_data": _init_data(), "time": "25:00", "timezone": "UTC"})
+        assert bad_time.status_code == 400
+        forged = client.post("/api/reminder", json={"init_data": _init_data(token="x:y"), "time": "09:30",
+                                                    "timezone": "UTC"})
+        assert forged.status_code == 401
+    finally:
+        bot_loop.call_soon_threadsafe(bot_loop.stop)
+        thread.join()
+        bot_loop.close()
+
+    print("  PASS  POST /api/reminder saves and reschedules on the bot's loop")
+
+
+def test_mini_app_opens_from_inline_buttons():
+    from telegram import InlineKeyboardMarkup
+    from handlers.reminder_commands import ReminderCommandHandlers
+
+    def web_app_buttons(call):
+        markup = call.kwargs['reply_markup']
+        assert isinstance(markup, InlineKeyboardMarkup), "reply keyboards launch the app without initData"
+        return [button for row in markup.inline_keyboard for button in row if button.web_app]
+
+    user = SimpleNamespace(id=42, first_name="Ana")
+    message = AsyncMock()
+    query = AsyncMock(from_user=user, message=message, data="reminder:set")
+    with patch.object(ReminderCommandHandlers, "story_db") as db:
+        db.get_reminder_preference.return_value = None
+        asyncio.run(ReminderCommandHandlers.reminders_command(
+            SimpleNamespace(effective_user=user, message=message), MagicMock()))
+        asyncio.run(ReminderCommandHandlers.reminder_callback(SimpleNamespace(callback_query=query), MagicMock()))
+        asyncio.run(ReminderCommandHandlers.reminder_menu_callback(SimpleNamespace(callback_query=query),
+                                                                   MagicMock()))
+
+    calls = message.reply_text.call_args_list + query.edit_message_text.call_args_list
+    assert len(calls) == 3
+    for call in calls:
+        (button,) = web_app_buttons(call)
+        assert "reminder" in button.web_app.url
+
+    print("  PASS  the reminder Mini App is launched from inline buttons")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    print("Running reminder API tests...\n")
+    test_validate_init_data()
+    test_mini_app_opens_from_inline_buttons()
+    pytest.main([__file__, "-q", "-k", "endpoint"])
+    print("\nAll tests passed.")
@@ -0,0 +1,99 @@
+"""
+Tests for reminder event tracking: the batched writer in
+services/reminder_events.py, the send path in handlers/shared.py and the
+delivery/conversion reports.
+"""
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_writer_batches_and_reports(tmp_path):
+    from models.story import StoryDatabase
+    from services.reminder_events import ReminderEventWriter, conversion_report, delivery_report
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    writer = ReminderEventWriter(db)
+    due = datetime.utcnow().replace(hour=9, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    for user_id in range(1, 11):
+        sent_at = due + timedelta(milliseconds=100 * user_id)
+        writer.sent(user_id, due, sent_at, latency=0.05)
+        if user_id <= 4:
+            writer.story(user_id, due, sent_at, sent_at + timedelta(minutes=10))
+    writer.sent(11, due.replace(hour=21), due.replace(hour=21), latency=1.5, error="Forbidden")
+
+    assert len(writer) == 15
+    assert writer.flush() == 15
+    assert len(writer) == 0 and writer.flush() == 0
+
+    delivery = delivery_report(db, days=7)
+    assert (delivery['sent'], delivery['failed']) == (10, 1)
+    assert delivery['lag_ms']['p50'] == 500 and delivery['lag_ms']['p90'] == 900
+    assert delivery['latency_ms']['p99'] == 1500
+    assert delivery['failures'] == {'Forbidden': 1}
+
+    slots = {slot['slot']: slot for slot in conversion_report(db, days=7)}
+    assert (slots['09:00']['sent'], slots['09:00']['stories'], slots['09:00']['conversion']) == (10, 4, 0.4)
+    assert slots['09:00']['avg_response_seconds'] == 600
+    assert (slots['21:00']['failed'], slots['21:00']['conversion']) == (1, None)
+
+    print("  PASS  events are written in one batch and reported per slot")
+
+
+def test_failed_flush_keeps_events():
+    from services.reminder_events import ReminderEventWriter
+
+    db = MagicMock()
+    db.record_reminder_events.side_effect = [RuntimeError("disk full"), 3]
+    writer = ReminderEventWriter(db, max_pending=3)
+    now = datetime.utcnow()
+    for user_id in range(4):
+        writer.sent(user_id, None, now, latency=0.01)
+
+    assert len(writer) == 3
+    assert writer.flush() == 0 and len(writer) == 3
+    assert writer.flush() == 3
+    assert [event[0] for event in db.record_reminder_events.call_args[0][0]] == [0, 1, 2]
+
+    print("  PASS  a failed flush is retried and the buffer stays bounded")
+
+
+def test_send_path_records_events():
+    from handlers import shared
+    from services.user_state import UserStateStore
+
+    due = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(seconds=2)
+    context = MagicMock()
+    context.job.next_t = due + timedelta(days=1)
+    context.bot.send_message = AsyncMock()
+
+    store = UserStateStore()
+    with patch.object(shared, "reminder_events") as events, patch.object(shared, "user_state", store):
+        asyncio.run(shared.send_reminder_to_user(context, 7, "Ana"))
+        context.bot.send_message.side_effect = RuntimeError("blocked")
+        asyncio.run(shared.send_reminder_to_user(context, 8, "Bo"))
+
+    (ok_args, ok_kwargs), (failed_args, failed_kwargs) = events.sent.call_args_list
+    assert ok_args[:2] == (7, due.replace(tzinfo=None)) and 'error' not in ok_kwargs
+    assert (ok_args[2] - ok_args[1]).total_seconds() >= 2
+    assert failed_args[0] == 8 and failed_kwargs['error'] == 'RuntimeError'
+    assert store.pop_awaiting_story(7)[0] == due.replace(tzinfo=None)
+    assert store.pop_awaiting_story(8) is None
+
+    print("  PASS  sends and failures are recorded with their scheduled time")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running reminder event tests...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_writer_batches_and_reports(Path(tmp))
+    test_failed_flush_keeps_events()
+    test_send_path_records_events()
+    print("\nAll tests passed.")
@@ -34,7 +34,6 @@ def make_mock_job_queue():
 
 def test_schedule_reminder_job():
     from handlers.shared import schedule_reminder_job
-    import pytz
 
     jq = make_mock_job_queue()
     schedule_reminder_job(jq, user_id=12345, reminder_time_str="14:30", timezone_str="UTC")
@@ -123,15 +122,16 @@ def test_daily_reminder_callback():
     context.application.user_data = {42: {}}
     context.bot.send_message = AsyncMock()
 
-    mock_stories = [{"first_name": "Alice"}]
+    mock_user = {"user_id": 42, "username": "alice", "first_name": "Alice"}
 
     with patch("handlers.shared.story_db") as mock_db:
-        mock_db.get_user_stories.return_value = mock_stories
+        mock_db.get_user.return_value = mock_user
         with patch("handlers.shared.send_reminder_to_user", new_callable=AsyncMock) as mock_send:
             import asyncio
             asyncio.run(daily_reminder_callback(context))
 
             mock_send.assert_called_once_with(context, 42, "Alice")
+            mock_db.get_user.assert_called_once_with(42)
 
     print("  PASS  daily_reminder_callback extracts user_id and looks up name")
 
@@ -145,7 +145,7 @@ def test_daily_reminder_callback_no_name():
     context.bot.send_message = AsyncMock()
 
     with patch("handlers.shared.story_db") as mock_db:
-        mock_db.get_user_stories.return_value = []
+        mock_db.get_user.return_value = None
         with patch("handlers.shared.send_reminder_to_user", new_callable=AsyncMock) as mock_send:
             import asyncio
             asyncio.run(daily_reminder_callback(context))
@@ -157,7 +157,7 @@ def test_daily_reminder_callback_no_name():
 
 def test_timezone_parsing():
     from handlers.shared import schedule_reminder_job
-    import pytz
+    from datetime import timezone
 
     jq = make_mock_job_queue()
     schedule_reminder_job(jq, user_id=1, reminder_time_str="09:00", timezone_str="America/New_York")
@@ -166,7 +166,7 @@ def test_timezone_parsing():
     t = call_args.kwargs["time"]
     assert t.hour == 9
     assert t.minute == 0
-    assert t.tzinfo == pytz.UTC
+    assert t.tzinfo == timezone.utc
 
     print("  PASS  scheduling uses UTC (DB stores UTC time)")
 
@@ -0,0 +1,95 @@
+"""
+Tests for the export/report renderers and the render process pool.
+"""
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+STORIES = [
+    {'created_at': '2026-02-03 21:00:00', 'story_text': 'Second <b>moment</b>\nwith a line break'},
+    {'created_at': '2026-02-03 08:00:00', 'story_text': 'Same day'},
+    {'created_at': '2026-01-15 20:00:00', 'story_text': 'First moment'},
+]
+
+
+def test_export_content():
+    from utils.renderers import build_export_content, export_entries
+
+    content = build_export_content(export_entries(STORIES), "Ana", "2026-02-04")
+
+    assert content.count('<section>') == 2
+    assert '<h2>February 2026</h2>' in content and '<h2>January 2026</h2>' in content
+    assert content.count('<time>February 3, 2026</time>') == 2
+    assert 'Second &lt;b&gt;moment&lt;/b&gt;<br>with a line break' in content
+    assert 'Ana &middot; 2026-02-04 &middot; 3 moments' in content
+
+    print("  PASS  export groups stories by month and escapes text")
+
+
+def test_small_renders_stay_inline():
+    from services import render_pool
+    from utils.metrics import RENDER_LATENCY
+    from utils.renderers import build_export_content, export_entries
+
+    entries = export_entries(STORIES)
+    _, _, before = RENDER_LATENCY.labels('export', 'inline').snapshot()
+    content = asyncio.run(render_pool.render_export(entries, "Ana", "2026-02-04"))
+
+    assert content == build_export_content(entries, "Ana", "2026-02-04").encode('utf-8')
+    assert RENDER_LATENCY.labels('export', 'inline').snapshot()[2] == before + 1
+    assert render_pool._pool is None
+
+    print("  PASS  small renders run inline without starting the pool")
+
+
+def test_large_renders_use_pool():
+    from config.settings import settings
+    from services import render_pool
+    from utils.renderers import build_report_html
+
+    markdown = "## Small moments that were bigger\n\n- A *quiet* walk\n- **Rain** on the window"
+    settings.RENDER_WORKERS = 1
+    settings.RENDER_OFFLOAD_MIN_BYTES = 0
+    try:
+        content = asyncio.run(render_pool.render_report(markdown, "2026-01-01 to 2026-01-14"))
+        assert render_pool._pool is not None
+    finally:
+        render_pool.shutdown_render_pool()
+        settings.RENDER_OFFLOAD_MIN_BYTES = 65536
+
+    assert content == build_report_html(markdown, "2026-01-01 to 2026-01-14").encode('utf-8')
+
+    print("  PASS  large renders run in the worker pool with identical output")
+
+
+def test_workers_import_only_the_renderers():
+    import subprocess
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Workers re-import the main module as __mp_main__; make that bot.py, as in production
+    code = (
+        "import sys; sys.modules['__main__'].__file__ = 'bot.py'\n"
+        "from services import render_pool\n"
+        "pool = render_pool._get_pool()\n"
+        "print(' '.join(pool.submit(eval, 'sorted(__import__(\"sys\").modules)').result()))\n"
+        "render_pool.shutdown_render_pool()\n"
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+    modules = set(result.stdout.split())
+
+    assert {'__mp_main__', 'services.render_worker', 'utils.renderers'} <= modules
+    loaded = sorted(modules & {'telegram', 'dotenv', 'config.settings', 'utils.metrics', 'utils.logging_config'})
+    assert not loaded, f"imported in a render worker: {loaded}"
+
+    print("  PASS  render workers load the renderers, not the bot")
+
+
+if __name__ == "__main__":
+    print("Running render tests...\n")
+    test_export_content()
+    test_small_renders_stay_inline()
+    test_large_renders_use_pool()
+    test_workers_import_only_the_renderers()
+    print("\nAll tests passed.")
@@ -0,0 +1,63 @@
+"""
+Cold-start regression test: measures `import bot` with `python -X importtime`.
+Heavy dependencies must stay deferred until first use, and the import has to
+fit in a time budget (override with STARTUP_BUDGET_MS on slow machines).
+"""
+import sys
+import os
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS', '1000'))
+
+# Only needed once a report is generated or the web server starts
+DEFERRED_MODULES = ('openai', 'fastapi', 'uvicorn', 'starlette', 'webapp.app')
+
+
+def _import_times(code: str, tmp_path) -> dict:
+    """Run ``code`` in a fresh interpreter; map module name to cumulative import time (us)."""
+    env = dict(os.environ, BOT_TOKEN='', DB_DIR=str(tmp_path), PYTHONDONTWRITEBYTECODE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def test_heavy_dependencies_are_deferred(tmp_path):
+    # Building the Application loads every handler module
+    times = _import_times("import bot; bot.build_application('123:abc')", tmp_path)
+
+    assert 'handlers.report_commands' in times
+    loaded = [name for name in DEFERRED_MODULES if name in times]
+    assert not loaded, f"imported at startup: {loaded}"
+
+    print("  PASS  openai, fastapi and uvicorn are not imported at startup")
+
+
+def test_startup_import_budget(tmp_path):
+    # Best of three, so a busy machine doesn't fail the build on one slow run
+    elapsed_ms = min(_import_times('import bot', tmp_path)['bot'] for _ in range(3)) / 1000
+
+    assert elapsed_ms < STARTUP_BUDGET_MS, f"import bot took {elapsed_ms:.0f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)"
+
+    print(f"  PASS  import bot in {elapsed_ms:.0f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running startup tests...\n")
+    for test in (test_heavy_dependencies_are_deferred, test_startup_import_budget):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\nAll tests passed.")
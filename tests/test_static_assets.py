@@ -0,0 +1,85 @@
+"""
+Tests for in-memory static asset serving: webapp/static_assets.py and the
+routes in webapp/app.py.
+"""
+import sys
+import os
+import gzip
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_assets_are_hashed_and_compressed(tmp_path):
+    from webapp.static_assets import StaticAssets
+
+    (tmp_path / "page.html").write_text("<p>moment</p>\n" * 100)
+    (tmp_path / "js").mkdir()
+    (tmp_path / "js" / "tiny.js").write_text("x()")
+    assets = StaticAssets(tmp_path)
+
+    page = assets.get("page.html")
+    assert page.content_type == "text/html; charset=utf-8"
+    assert gzip.decompress(page.bodies['gzip']) == page.bodies['identity']
+    assert page.etags['identity'] != page.etags['gzip']
+    assert assets.url("page.html") == f"/static/page.{page.digest}.html"
+    assert assets.resolve(f"page.{page.digest}.html") == (page, True)
+    assert assets.resolve("page.0123456789.html") == (page, False)
+    assert assets.resolve("page.html") == (page, False)
+    assert assets.resolve("missing.html") == (None, False)
+    # Too small to be worth compressing
+    assert list(assets.get("js/tiny.js").bodies) == ['identity']
+    assert assets.url("js/tiny.js").startswith("/static/js/tiny.")
+
+    print("  PASS  assets load with content hashes and precompressed bodies")
+
+
+def test_encoding_negotiation():
+    from webapp.static_assets import StaticAsset, etag_matches
+
+    asset = StaticAsset("page.html", b"<p>moment</p>\n" * 100)
+    assert asset.negotiate("gzip, deflate, br") in asset.bodies
+    assert asset.negotiate("gzip;q=0, identity") == 'identity'
+    assert asset.negotiate("") == 'identity'
+    assert asset.negotiate("*") != 'identity'
+
+    etag = asset.etags['gzip']
+    assert etag_matches(etag, etag) and etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches('*', etag) and not etag_matches('"other"', etag) and not etag_matches(None, etag)
+
+    print("  PASS  Accept-Encoding and If-None-Match are honoured")
+
+
+def test_routes_cache_and_revalidate():
+    from fastapi.testclient import TestClient
+    from webapp.app import static_assets, webapp_app
+
+    client = TestClient(webapp_app)
+    response = client.get("/webapp/reminder", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert "Telegram" in response.text
+
+    etag = response.headers["etag"]
+    again = client.get("/webapp/reminder", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+
+    hashed = client.get(static_assets.url("reminder.html"))
+    assert hashed.status_code == 200 and "immutable" in hashed.headers["cache-control"]
+    assert client.get("/static/reminder.0000000000.html").headers["cache-control"] == "no-cache"
+    assert client.get("/static/nope.js").status_code == 404
+
+    print("  PASS  the Mini App page is served from memory with ETags and long-lived hashed URLs")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running static asset tests...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_assets_are_hashed_and_compressed(Path(tmp))
+    test_encoding_negotiation()
+    test_routes_cache_and_revalidate()
+    print("\nAll tests passed.")
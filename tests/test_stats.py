@@ -0,0 +1,121 @@
+"""
+Tests for the admin stats rollups in models/story.py and the endpoint
+serving them.
+"""
+import sys
+import os
+import sqlite3
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+NOW = datetime(2026, 3, 10, 15, 30)
+
+
+def _add(path, table, user_id, created_at):
+    text_column = 'story_text' if table == 'stories' else 'feedback_text'
+    with sqlite3.connect(path) as conn:
+        conn.execute(f"INSERT INTO {table} (user_id, {text_column}, created_at) VALUES (?, 'x', ?)",
+                     (user_id, created_at))
+
+
+def test_rollups_count_activity(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    for user_id, created_at in ((1, '2026-03-09 08:10:00'), (1, '2026-03-09 08:50:00'),
+                                (2, '2026-03-09 21:00:00'), (1, '2026-03-10 14:05:00')):
+        _add(path, 'stories', user_id, created_at)
+    _add(path, 'feedback', 3, '2026-03-10 09:00:00')
+    db.upsert_user(1, 'ana', 'Ana')
+    db.set_reminder(1, '21:00')
+
+    db.refresh_rollups(now=NOW)
+    stats = db.get_stats(days=3, now=NOW)
+
+    assert [row['day'] for row in stats['daily']] == ['2026-03-10', '2026-03-09', '2026-03-08']
+    today, yesterday, quiet = stats['daily']
+    assert (today['stories'], today['feedback'], today['active_users']) == (1, 1, 2)
+    assert (yesterday['stories'], yesterday['active_users']) == (3, 2)
+    assert quiet['stories'] == 0 and quiet['active_users'] == 0
+    assert stats['last_24h'] == {'stories': 2, 'feedback': 1}
+    assert stats['totals']['stories'] == 4 and stats['totals']['reminders_enabled'] == 1
+    with sqlite3.connect(path) as conn:
+        assert conn.execute("SELECT stories, active_users FROM stats_hourly WHERE hour = '2026-03-09 08:00:00'"
+                            ).fetchone() == (2, 1)
+
+    print("  PASS  rollups count stories, feedback and active users per hour and day")
+
+
+def test_refresh_only_recomputes_recent_rows(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _add(path, 'stories', 1, '2026-03-01 10:00:00')
+    _add(path, 'stories', 1, '2026-03-10 10:00:00')
+    db.refresh_rollups(now=NOW)
+
+    # Rows before the last rolled-up hour are final and no longer read
+    _add(path, 'stories', 2, '2026-03-01 11:00:00')
+    _add(path, 'stories', 2, '2026-03-10 10:20:00')
+    _add(path, 'stories', 3, '2026-03-10 15:00:00')
+    db.refresh_rollups(now=NOW)
+
+    daily = {row['day']: row for row in db.get_stats(days=10, now=NOW)['daily']}
+    assert daily['2026-03-01']['stories'] == 1
+    assert (daily['2026-03-10']['stories'], daily['2026-03-10']['active_users']) == (3, 3)
+
+    print("  PASS  refreshes pick up new activity without rescanning history")
+
+
+def test_rollups_include_archived_stories(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _add(path, 'stories', 1, '2020-01-01 10:00:00')
+    _add(path, 'stories', 1, datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'))
+    db.archive_stories(older_than_days=30)
+
+    db.refresh_rollups()
+    assert db.get_stats()['totals']['stories'] == 2
+
+    print("  PASS  the first rollup backfills from the archive tier too")
+
+
+def test_admin_endpoint_requires_token(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from config.settings import settings
+    from models.story import StoryDatabase
+    from webapp.app import webapp_app
+
+    monkeypatch.setattr("handlers.shared.story_db", StoryDatabase(str(tmp_path / "stories.db")))
+    client = TestClient(webapp_app)
+    monkeypatch.setattr(settings, 'ADMIN_API_TOKEN', '')
+    assert client.get("/api/admin/stats").status_code == 404
+
+    monkeypatch.setattr(settings, 'ADMIN_API_TOKEN', 's3cret')
+    assert client.get("/api/admin/stats").status_code == 401
+    assert client.get("/api/admin/stats", headers={"Authorization": "Bearer nope"}).status_code == 401
+
+    response = client.get("/api/admin/stats?days=2", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert len(response.json()['daily']) == 2
+
+    print("  PASS  admin stats need the bearer token")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    import pytest
+
+    print("Running stats tests...\n")
+    for test in (test_rollups_count_activity, test_refresh_only_recomputes_recent_rows,
+                 test_rollups_include_archived_stories):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    pytest.main([__file__, "-q", "-k", "endpoint"])
+    print("\nAll tests passed.")
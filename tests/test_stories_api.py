@@ -0,0 +1,101 @@
+"""
+Tests for the Mini App moments browser: StoryDatabase.get_story_page and
+GET /api/stories in webapp/app.py.
+"""
+import sys
+import os
+import sqlite3
+import time
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+TOKEN = "123456:TEST-token"
+
+
+def _add_stories(path, user_id, timestamps):
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO stories (user_id, story_text, created_at) VALUES (?, ?, ?)",
+                         ((user_id, f"moment at {at}", at) for at in timestamps))
+
+
+def _init_data(user_id):
+    from services.telegram_auth import sign_init_data
+    return sign_init_data({'auth_date': str(int(time.time())),
+                           'user': json.dumps({'id': user_id, 'first_name': 'Ana'})}, TOKEN)
+
+
+def test_story_pages_span_tiers_and_ties(tmp_path):
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    # Three stories share a timestamp, and the oldest go to the archive
+    _add_stories(path, 1, ['2020-01-01 10:00:00', '2020-01-02 10:00:00', '2020-01-02 10:00:00'])
+    _add_stories(path, 1, ['2099-01-01 10:00:00'] * 3 + ['2099-01-02 10:00:00'])
+    _add_stories(path, 2, ['2099-01-01 10:00:00'])
+    db.archive_stories(older_than_days=30)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = db.get_story_page(1, limit=2, before=cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert len(seen) == 7 and len({story['id'] for story in seen}) == 7
+    assert all(story['user_id'] == 1 for story in seen)
+    order = [(story['created_at'], story['id']) for story in seen]
+    assert order == sorted(order, reverse=True)
+
+    try:
+        db.get_story_page(1, before="not-a-cursor")
+        assert False, "a malformed cursor should be rejected"
+    except ValueError:
+        pass
+
+    print("  PASS  story pages walk hot and archived stories without gaps or repeats")
+
+
+def test_stories_endpoint(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from config.settings import settings
+    from models.story import StoryDatabase
+    from webapp.app import webapp_app
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _add_stories(path, 42, [f'2099-01-01 10:00:0{i}' for i in range(3)])
+    monkeypatch.setattr("handlers.shared.story_db", db)
+    monkeypatch.setattr(settings, 'BOT_TOKEN', TOKEN)
+    client = TestClient(webapp_app)
+    auth = {"Authorization": f"tma {_init_data(42)}"}
+
+    assert client.get("/api/stories").status_code == 401
+    assert client.get("/api/stories", headers={"Authorization": "tma hash=forged"}).status_code == 401
+    assert client.get("/api/stories?before=oops", headers=auth).status_code == 400
+
+    first = client.get("/api/stories?limit=2", headers=auth)
+    assert first.status_code == 200
+    body = first.json()
+    assert [item['at'] for item in body['items']] == ['2099-01-01 10:00:02', '2099-01-01 10:00:01']
+    assert b", " not in first.content and first.headers['cache-control'] == "private, no-cache"
+
+    rest = client.get("/api/stories", params={"limit": 2, "before": body['next']}, headers=auth).json()
+    assert [item['at'] for item in rest['items']] == ['2099-01-01 10:00:00'] and rest['next'] is None
+
+    unchanged = client.get("/api/stories?limit=2", headers={**auth, "If-None-Match": first.headers['etag']})
+    assert unchanged.status_code == 304 and not unchanged.content
+
+    print("  PASS  GET /api/stories pages the caller's stories with initData auth and ETags")
+
+
+if __name__ == "__main__":
+    import tempfile
+    import pytest
+    from pathlib import Path
+
+    print("Running stories API tests...\n")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_story_pages_span_tiers_and_ties(Path(tmp))
+    pytest.main([__file__, "-q", "-k", "endpoint"])
+    print("\nAll tests passed.")
@@ -0,0 +1,104 @@
+"""
+Tests for the story projection reads in models/story.py (get_story_dates,
+get_story_texts, iter_story_texts) and the handlers that use them.
+"""
+import sys
+import os
+import asyncio
+import sqlite3
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def _seed(db, path, user_id, ages_in_days):
+    """Save one story per age and backdate it; equal ages share a created_at."""
+    now = datetime.utcnow().replace(microsecond=0)
+    for age in ages_in_days:
+        story_id = db.save_story(user_id, f"{age} days ago ✨ {'warm roll ' * 20}")
+        with sqlite3.connect(path) as conn:
+            created_at = (now - timedelta(days=age)).strftime('%Y-%m-%d %H:%M:%S')
+            conn.execute("UPDATE stories SET created_at = ? WHERE id = ?", (created_at, story_id))
+
+
+@pytest.mark.parametrize("encrypted", [False, True])
+def test_projections_match_full_rows(tmp_path, encrypted):
+    from models.records import StoryText
+    from models.story import StoryDatabase
+
+    if encrypted:
+        pytest.importorskip("cryptography")
+        from models.encryption import generate_master_key
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path, compression='zlib', encryption_key=generate_master_key() if encrypted else None)
+    _seed(db, path, 1, [1, 3, 3, 3, 40, 400, 800, 800])
+    _seed(db, path, 2, [2])
+    db.archive_stories(older_than_days=365)
+
+    full = db.get_user_stories(1)
+    expected = [StoryText(s['created_at'], s['story_text']) for s in full]
+    assert db.get_story_dates(1) == [s['created_at'] for s in full]
+    assert db.get_story_texts(1) == expected and type(db.get_story_texts(1)[0]) is StoryText
+
+    since = datetime.utcnow() - timedelta(days=10)
+    assert db.get_story_texts(1, since=since) == expected[:4]
+    assert db.get_story_dates(1, since=since, limit=2) == [s['created_at'] for s in full[:2]]
+    assert db.get_story_texts(1, limit=7) == expected[:7]
+
+    # Batches split the created_at ties and the hot/cold boundary: nothing lost or repeated
+    assert list(db.iter_story_texts(1, batch_size=2)) == expected
+    assert list(db.iter_story_texts(1, batch_size=8)) == expected
+    assert list(db.iter_story_texts(3)) == [] and db.get_story_dates(3) == []
+
+    print(f"  PASS  projections read the same stories as get_user_stories (encrypted={encrypted})")
+
+
+def test_handlers_use_projections(tmp_path):
+    from handlers.report_commands import ReportCommandHandlers
+    from handlers.story_commands import StoryCommandHandlers
+    from models.story import StoryDatabase
+
+    path = str(tmp_path / "stories.db")
+    db = StoryDatabase(path)
+    _seed(db, path, 1, [1, 20, 30])
+    user = SimpleNamespace(id=1, first_name="Ana")
+
+    def update():
+        return SimpleNamespace(effective_user=user, message=AsyncMock())
+
+    # Full dict rows are not read by any of these
+    with patch.object(StoryCommandHandlers, 'story_db', db), patch.object(ReportCommandHandlers, 'story_db', db), \
+            patch.object(StoryDatabase, 'get_user_stories', side_effect=AssertionError):
+        summary = update()
+        asyncio.run(StoryCommandHandlers.mystories_command(summary, SimpleNamespace()))
+        text = summary.message.reply_text.await_args.args[0]
+        assert "Total recorded: <b>3</b>" in text and "Last 2 weeks: <b>1</b>" in text
+
+        export = update()
+        asyncio.run(StoryCommandHandlers.export_command(export, SimpleNamespace()))
+        assert export.message.reply_document.await_args.kwargs['document'].count(b'<article>') == 3
+
+        _seed(db, path, 2, [20])
+        report = SimpleNamespace(effective_user=SimpleNamespace(id=2), message=AsyncMock())
+        asyncio.run(ReportCommandHandlers.report_command(report, SimpleNamespace()))
+        last_date = (datetime.utcnow() - timedelta(days=20)).strftime('%Y-%m-%d')
+        assert f"your last entry was on <b>{last_date}</b>" in report.message.reply_text.await_args.args[0]
+
+    print("  PASS  /mystories, /export and /report read projections, not full rows")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running story projection tests...\n")
+    for encrypted in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            test_projections_match_full_rows(Path(tmp), encrypted)
+    with tempfile.TemporaryDirectory() as tmp:
+        test_handlers_use_projections(Path(tmp))
+    print("\nAll tests passed.")
@@ -0,0 +1,193 @@
+"""
+Tests for the zoneinfo-based timezone service in services/timezones.py.
+Results are checked against fixed offsets and, with requirements-dev.txt
+installed, against pytz for every zone (pytz is a reference only).
+"""
+import sys
+import os
+from datetime import date, datetime, timedelta
+from zoneinfo import available_timezones
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+try:
+    import pytz
+except ImportError:
+    pytz = None
+
+needs_pytz = pytest.mark.skipif(pytz is None, reason="pytz is in requirements-dev.txt")
+
+# Reference dates: the 1st and 15th of every month of a year both pytz and the
+# system tz database agree on, so pending rule changes don't cause false failures
+REFERENCE_DATES = [date(2023, month, day) for month in range(1, 13) for day in (1, 15)]
+REFERENCE_TIMES = ["00:00", "02:30", "09:15", "14:45", "23:59"]
+
+
+def _all_zones():
+    return sorted(available_timezones() & pytz.all_timezones_set)
+
+
+def _pytz_local_to_utc(time_str, tz_name, on):
+    hour, minute = map(int, time_str.split(':'))
+    tz = pytz.timezone(tz_name)
+    try:
+        local = tz.localize(datetime(on.year, on.month, on.day, hour, minute), is_dst=None)
+    except (pytz.exceptions.AmbiguousTimeError, pytz.exceptions.NonExistentTimeError):
+        return None
+    return local.astimezone(pytz.UTC).strftime('%H:%M')
+
+
+def _pytz_utc_to_local(time_str, tz_name, on):
+    hour, minute = map(int, time_str.split(':'))
+    utc = pytz.UTC.localize(datetime(on.year, on.month, on.day, hour, minute))
+    return utc.astimezone(pytz.timezone(tz_name)).strftime('%H:%M')
+
+
+def test_get_zone_is_memoized():
+    from services.timezones import get_zone
+
+    assert get_zone("Europe/London") is get_zone("Europe/London")
+
+    print("  PASS  get_zone returns cached ZoneInfo objects")
+
+
+def test_unknown_timezone():
+    from services.timezones import UnknownTimezoneError, get_zone, is_valid_timezone, local_to_utc
+
+    assert not is_valid_timezone("Mars/Olympus_Mons")
+    assert not is_valid_timezone("")
+    assert not is_valid_timezone(None)
+    assert not is_valid_timezone("../etc/passwd")
+    assert is_valid_timezone("Asia/Kolkata")
+
+    with pytest.raises(UnknownTimezoneError):
+        get_zone("Mars/Olympus_Mons")
+    with pytest.raises(UnknownTimezoneError):
+        local_to_utc("09:00", "Mars/Olympus_Mons")
+
+    print("  PASS  unknown timezones are rejected")
+
+
+def test_fixed_offsets_around_transitions():
+    from services.timezones import local_to_utc, utc_to_local
+
+    cases = [
+        # (zone, local date, local time, UTC time)
+        ("America/New_York", date(2023, 3, 11), "09:00", "14:00"),
+        ("America/New_York", date(2023, 3, 12), "01:30", "06:30"),
+        ("America/New_York", date(2023, 3, 12), "09:00", "13:00"),
+        ("America/New_York", date(2023, 11, 5), "09:00", "14:00"),
+        ("Europe/London", date(2023, 3, 26), "00:30", "00:30"),
+        ("Europe/London", date(2023, 3, 26), "09:00", "08:00"),
+        ("Australia/Lord_Howe", date(2023, 9, 30), "09:00", "22:30"),
+        ("Australia/Lord_Howe", date(2023, 10, 1), "09:00", "22:00"),
+        ("Asia/Kolkata", date(2023, 6, 15), "12:00", "06:30"),
+        ("Asia/Kathmandu", date(2023, 6, 15), "00:10", "18:25"),
+    ]
+    for tz_name, on, local, utc in cases:
+        assert local_to_utc(local, tz_name, on=on) == utc, (tz_name, on, local)
+    assert utc_to_local("13:00", "America/New_York", on=date(2023, 7, 1)) == "09:00"
+    assert utc_to_local("13:00", "America/New_York", on=date(2023, 12, 1)) == "08:00"
+    assert utc_to_local("23:30", "Pacific/Kiritimati", on=date(2023, 6, 15)) == "13:30"
+
+    print("  PASS  conversions match known offsets, DST and half-hour zones included")
+
+
+@needs_pytz
+def test_local_to_utc_matches_pytz_for_every_zone():
+    from services.timezones import local_to_utc
+
+    for tz_name in _all_zones():
+        for on in REFERENCE_DATES:
+            for time_str in REFERENCE_TIMES:
+                expected = _pytz_local_to_utc(time_str, tz_name, on)
+                if expected is None:
+                    continue
+                assert local_to_utc(time_str, tz_name, on=on) == expected, (tz_name, on, time_str)
+
+    print("  PASS  local_to_utc matches pytz for every zone")
+
+
+@needs_pytz
+def test_utc_to_local_matches_pytz_for_every_zone():
+    from services.timezones import utc_to_local
+
+    for tz_name in _all_zones():
+        for on in REFERENCE_DATES:
+            for time_str in REFERENCE_TIMES:
+                expected = _pytz_utc_to_local(time_str, tz_name, on)
+                assert utc_to_local(time_str, tz_name, on=on) == expected, (tz_name, on, time_str)
+
+    print("  PASS  utc_to_local matches pytz for every zone")
+
+
+@needs_pytz
+def test_transition_days_match_pytz():
+    from services.timezones import local_to_utc, utc_to_local
+
+    cases = [
+        ("America/New_York", date(2023, 3, 12)),
+        ("America/New_York", date(2023, 11, 5)),
+        ("Europe/London", date(2023, 3, 26)),
+        ("Australia/Sydney", date(2023, 4, 2)),
+        ("Australia/Lord_Howe", date(2023, 10, 1)),
+    ]
+    for tz_name, day in cases:
+        for on in (day - timedelta(days=1), day, day + timedelta(days=1)):
+            for minutes in range(0, 24 * 60, 15):
+                time_str = f"{minutes // 60:02d}:{minutes % 60:02d}"
+                expected = _pytz_local_to_utc(time_str, tz_name, on)
+                if expected is not None:
+                    assert local_to_utc(time_str, tz_name, on=on) == expected, (tz_name, on, time_str)
+                assert utc_to_local(time_str, tz_name, on=on) == _pytz_utc_to_local(time_str, tz_name, on)
+
+    print("  PASS  conversions around DST transitions match pytz")
+
+
+def test_offset_table_marks_transition_days():
+    from services.timezones import _build_offset_table, get_zone
+
+    table = _build_offset_table(get_zone("America/New_York"), date(2023, 1, 1), 365)
+
+    assert table.get(date(2023, 1, 15)) == -5 * 3600
+    assert table.get(date(2023, 7, 15)) == -4 * 3600
+    assert table.get(date(2023, 3, 12)) is None
+    assert table.get(date(2023, 11, 5)) is None
+
+    print("  PASS  offset table falls back to zoneinfo near transitions")
+
+
+def test_preload_zones_skips_unknown():
+    from services.timezones import _offset_tables, preload_zones
+
+    preload_zones(["Asia/Tokyo", "Not/AZone", "Asia/Tokyo"])
+    assert "Asia/Tokyo" in _offset_tables
+    assert "Not/AZone" not in _offset_tables
+
+    print("  PASS  preload_zones builds tables for known zones only")
+
+
+def test_defaults_use_current_date():
+    from services.timezones import local_to_utc, utc_to_local
+
+    assert local_to_utc("12:00", "Asia/Kolkata") == "06:30"
+    assert utc_to_local("06:30", "Asia/Kolkata") == "12:00"
+
+    print("  PASS  conversions default to today's date")
+
+
+if __name__ == "__main__":
+    print("Running timezone service tests...\n")
+    test_get_zone_is_memoized()
+    test_unknown_timezone()
+    test_fixed_offsets_around_transitions()
+    if pytz is not None:
+        test_local_to_utc_matches_pytz_for_every_zone()
+        test_utc_to_local_matches_pytz_for_every_zone()
+        test_transition_days_match_pytz()
+    test_offset_table_marks_transition_days()
+    test_preload_zones_skips_unknown()
+    test_defaults_use_current_date()
+    print("\nAll tests passed.")
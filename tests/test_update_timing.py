@@ -0,0 +1,119 @@
+"""
+Tests for the update timing middleware in handlers/update_timing.py.
+No Telegram bot token required.
+"""
+import sys
+import os
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def _process(middleware, handler, update_id=1):
+    """Run an update through the middleware the way Application.process_update does."""
+    update = MagicMock()
+    update.update_id = update_id
+
+    async def run():
+        await middleware.start_update(update, None)
+        await handler(update, None)
+        await middleware.finish_update(update, None)
+
+    asyncio.run(run())
+
+
+def test_update_attributed_to_first_handler(tmp_path):
+    from handlers.update_timing import UpdateTimingMiddleware
+    from utils.metrics import UPDATE_LATENCY, instrument_handlers
+
+    @instrument_handlers
+    class TimingHandlers:
+        @staticmethod
+        async def outer(update, context):
+            await TimingHandlers.inner(update, context)
+
+        @staticmethod
+        async def inner(update, context):
+            return None
+
+    middleware = UpdateTimingMiddleware(threshold_ms=10_000, profile_dir=str(tmp_path))
+    _process(middleware, TimingHandlers.outer)
+
+    _, _, count = UPDATE_LATENCY.labels('TimingHandlers.outer').snapshot()
+    assert count == 1
+    assert not list(tmp_path.iterdir())
+
+    print("  PASS  update time is attributed to the first matched handler")
+
+
+def test_slow_update_writes_stack_samples(tmp_path):
+    from handlers.update_timing import UpdateTimingMiddleware
+    from utils.metrics import SLOW_UPDATES, instrument_handlers
+
+    @instrument_handlers
+    class SlowHandlers:
+        @staticmethod
+        async def crunch(update, context):
+            # Blocks the event loop, as CPU-heavy rendering would
+            time.sleep(0.2)
+
+    middleware = UpdateTimingMiddleware(threshold_ms=20, profile_dir=str(tmp_path), sample_interval=0.005)
+    middleware.start_watchdog()
+    try:
+        _process(middleware, SlowHandlers.crunch, update_id=77)
+    finally:
+        middleware.stop_watchdog()
+
+    assert SLOW_UPDATES.labels('SlowHandlers.crunch').value == 1
+    dumps = list(tmp_path.glob('*_77_SlowHandlers.crunch.stacks.txt'))
+    assert len(dumps) == 1
+    content = dumps[0].read_text()
+    assert 'handler=SlowHandlers.crunch' in content
+    assert ':crunch:' in content
+
+    print("  PASS  slow updates dump sampled stacks of the event loop thread")
+
+
+def test_sampled_cprofile(tmp_path):
+    from handlers.update_timing import UpdateTimingMiddleware
+
+    async def busy(update, context):
+        sum(i * i for i in range(200_000))
+
+    middleware = UpdateTimingMiddleware(threshold_ms=0, profile_dir=str(tmp_path), profile_rate=1.0)
+    _process(middleware, busy, update_id=5)
+
+    assert list(tmp_path.glob('*_5_unhandled.prof'))
+    assert list(tmp_path.glob('*_5_unhandled.prof.txt'))
+    assert not middleware._profiling
+
+    print("  PASS  sampled updates are profiled with cProfile")
+
+
+def test_profile_directory_rotates(tmp_path):
+    from handlers.update_timing import UpdateTimingMiddleware
+
+    async def noop(update, context):
+        return None
+
+    middleware = UpdateTimingMiddleware(threshold_ms=0, profile_dir=str(tmp_path), max_files=3)
+    for update_id in range(6):
+        _process(middleware, noop, update_id=update_id)
+
+    assert len(list(tmp_path.iterdir())) == 3
+
+    print("  PASS  profile directory keeps only the newest files")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running update timing tests...\n")
+    for test in (test_update_attributed_to_first_handler, test_slow_update_writes_stack_samples,
+                 test_sampled_cprofile, test_profile_directory_rotates):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\nAll tests passed.")
@@ -0,0 +1,105 @@
+"""
+Tests for the bounded per-user state store in services/user_state.py and
+the handlers that use it instead of PTB's user_data.
+"""
+import sys
+import os
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def test_store_expires_and_bounds_users():
+    from services.user_state import UserStateStore
+
+    clock = [0.0]
+    store = UserStateStore(ttl=100, max_users=3, clock=lambda: clock[0])
+    sent = datetime(2026, 1, 1, 9, 0)
+
+    store.expect_story(1, None, sent)
+    store.set_timezone(2, "Europe/London")
+    clock[0] = 50
+    store.set_timezone(3, "Asia/Tokyo")
+    assert store.get_timezone(2) == "Europe/London" and store.get_timezone(9, "UTC") == "UTC"
+
+    # Past the TTL for users 1 and 2 only; touching 1 again starts it afresh
+    clock[0] = 120
+    assert store.pop_awaiting_story(1) is None
+    assert store.evict() == 1 and len(store) == 1
+
+    # At capacity the least recently written user goes first
+    for user_id in (4, 5, 6):
+        store.expect_story(user_id, None, sent)
+    assert len(store) == 3 and store.get_timezone(3) is None
+
+    # Taking the pending reply clears the last field and drops the entry
+    assert store.pop_awaiting_story(5) == (None, sent)
+    assert store.pop_awaiting_story(5) is None
+    assert len(store) == 2
+
+    print("  PASS  idle users expire and the store never holds more than max_users")
+
+
+def test_reminder_reply_survives_setreminder():
+    from handlers import reminder_commands, shared, story_commands
+    from handlers.reminder_commands import ReminderCommandHandlers
+    from handlers.story_commands import StoryCommandHandlers
+    from services.user_state import UserStateStore
+
+    store = UserStateStore()
+    user = SimpleNamespace(id=7, first_name="Ana")
+    context = MagicMock()
+    context.bot.send_message = AsyncMock()
+    context.job.next_t = None
+
+    def message(text):
+        return SimpleNamespace(effective_user=user, message=AsyncMock(text=text))
+
+    with patch.object(shared, "user_state", store), patch.object(reminder_commands, "user_state", store), \
+            patch.object(story_commands, "user_state", store), patch.object(shared, "reminder_events"), \
+            patch.object(story_commands, "reminder_events") as events, \
+            patch.object(ReminderCommandHandlers, "story_db"), \
+            patch.object(reminder_commands, "schedule_reminder_job") as schedule, \
+            patch.object(StoryCommandHandlers, "receive_story", AsyncMock()) as receive_story:
+        asyncio.run(shared.send_reminder_to_user(context, 7, "Ana"))
+
+        # A /setreminder run in between keeps the pending reply
+        asyncio.run(ReminderCommandHandlers.receive_timezone(message("Asia/Tokyo"), context))
+        asyncio.run(ReminderCommandHandlers.receive_reminder_time(message("09:00"), context))
+        assert schedule.call_args.args[2:] == ("00:00", "Asia/Tokyo")
+        assert store.get_timezone(7) is None
+
+        asyncio.run(StoryCommandHandlers.receive_story_after_reminder(message("A warm roll"), context))
+        asyncio.run(StoryCommandHandlers.receive_story_after_reminder(message("Just chatting"), context))
+
+    assert receive_story.await_count == 1 and events.story.call_count == 1
+    assert len(store) == 0
+    assert not context.application.user_data.__getitem__.called
+
+    print("  PASS  reminder replies and /setreminder use the store, not user_data")
+
+
+def test_conversations_time_out():
+    from telegram.ext import ConversationHandler
+    from bot import build_application
+    from config.settings import settings
+
+    with patch.object(settings, 'CONVERSATION_TIMEOUT_MINUTES', 15):
+        application = build_application("123:TEST")
+    conversations = [handler for group in application.handlers.values() for handler in group
+                     if isinstance(handler, ConversationHandler)]
+    assert len(conversations) == 4
+    assert all(handler.conversation_timeout == 900 for handler in conversations)
+
+    print("  PASS  story, reminder and import conversations end after CONVERSATION_TIMEOUT_MINUTES")
+
+
+if __name__ == "__main__":
+    print("Running user state tests...\n")
+    test_store_expires_and_bounds_users()
+    test_reminder_reply_survives_setreminder()
+    test_conversations_time_out()
+    print("\nAll tests passed.")
@@ -0,0 +1,120 @@
+"""
+Tests for the users table in models/story.py: upserts and the migration
+from per-row username/first_name columns.
+"""
+import sys
+import os
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def _legacy_database(path):
+    """Create a database with the pre-users schema and some history."""
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE stories (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                username TEXT,
+                first_name TEXT,
+                story_text TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE feedback (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER NOT NULL,
+                username TEXT,
+                first_name TEXT,
+                feedback_text TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            INSERT INTO stories (user_id, username, first_name, story_text, created_at) VALUES
+                (1, 'ana', 'Ana', 'first', '2025-01-01 10:00:00'),
+                (1, 'ana_b', 'Ana B', 'renamed', '2025-03-01 10:00:00'),
+                (1, 'ana', 'Ana', 'older again', '2025-02-01 10:00:00'),
+                (2, 'bo', 'Bo', 'only story', '2025-01-05 10:00:00');
+            INSERT INTO feedback (user_id, username, first_name, feedback_text, created_at) VALUES
+                (2, 'bo_new', 'Bodhi', 'later feedback', '2025-06-01 10:00:00'),
+                (3, NULL, 'Cy', 'feedback only', '2025-04-01 10:00:00');
+        """)
+
+
+def test_migration_moves_latest_names(tmp_path):
+    from models.story import SCHEMA_VERSION, StoryDatabase
+
+    path = tmp_path / "stories.db"
+    _legacy_database(path)
+    db = StoryDatabase(str(path))
+
+    assert db.get_user(1) == {'user_id': 1, 'username': 'ana_b', 'first_name': 'Ana B'}
+    assert db.get_user(2)['first_name'] == 'Bodhi'
+    assert db.get_user(3)['first_name'] == 'Cy'
+    assert db.count_user_stories(1) == 3
+
+    with sqlite3.connect(path) as conn:
+        for table in ('stories', 'feedback'):
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+            assert 'first_name' not in columns and 'username' not in columns
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        # v2 switched the existing file to incremental auto_vacuum
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    feedback = {row['user_id']: row for row in db.get_all_feedback()}
+    assert feedback[2]['first_name'] == 'Bodhi'
+
+    # Reopening an up-to-date database leaves it alone
+    StoryDatabase(str(path))
+    assert db.get_user(1)['username'] == 'ana_b'
+
+    print("  PASS  migration keeps each user's latest names and drops the copies")
+
+
+def test_upsert_writes_only_on_change(tmp_path):
+    from models.story import StoryDatabase
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+
+    assert db.upsert_user(7, 'kai', 'Kai') is True
+    assert db.upsert_user(7, 'kai', 'Kai') is False
+
+    db._user_cache.clear()
+    assert db.upsert_user(7, 'kai', 'Kai') is False
+    assert db.upsert_user(7, 'kai', 'Kai L') is True
+    assert db.get_user(7)['first_name'] == 'Kai L'
+
+    story_id = db.save_story(8, "A moment", username='mo', first_name='Mo')
+    assert story_id and db.get_user(8)['first_name'] == 'Mo'
+    assert set(db.get_user_stories(8)[0]) == {'id', 'user_id', 'story_text', 'created_at'}
+
+    print("  PASS  upsert_user skips writes when names are unchanged")
+
+
+def test_get_first_names_batches(tmp_path):
+    from models import story
+    from models.story import StoryDatabase
+
+    db = StoryDatabase(str(tmp_path / "stories.db"))
+    for user_id in range(1, 1201):
+        db.upsert_user(user_id, None, None if user_id % 100 == 0 else f"U{user_id}")
+
+    names = db.get_first_names(range(1, 1301))
+
+    assert len(names) == 1200 - 12
+    assert names[1199] == 'U1199'
+    assert 1200 not in names
+    assert story.IN_BATCH_SIZE < 1200
+
+    print("  PASS  get_first_names looks up users in batches")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running users table tests...\n")
+    for test in (test_migration_moves_latest_names, test_upsert_writes_only_on_change,
+                 test_get_first_names_batches):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\nAll tests passed.")
@@ -0,0 +1,174 @@
+"""
+Tests for continuous WAL archiving and point-in-time restore in
+services/wal_archive.py.
+"""
+import sys
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM stories").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_restore_to_a_point_in_time(tmp_path):
+    from models.story import StoryDatabase
+    from services.wal_archive import LocalWalStore, WalArchiver, restore_to_time
+
+    db = StoryDatabase(str(tmp_path / "stories.db"), wal_autocheckpoint=0)
+    db.save_story(1, "before archiving")
+    store = LocalWalStore(tmp_path / "wal")
+    archiver = WalArchiver(db.db_path, store, checkpoint_interval=0)
+    archiver.poll()
+
+    marks = []
+    for i in range(12):
+        db.save_story(1, f"moment {i} " * 50)
+        archiver.poll()
+        marks.append(datetime.utcnow())
+        time.sleep(0.002)
+    # Checkpointing after every poll keeps the WAL from growing
+    assert os.path.getsize(db.db_path + "-wal") < 64 * 1024
+    archiver.close()
+
+    middle = restore_to_time(store, tmp_path / "middle.db", until=marks[5])
+    assert _count(tmp_path / "middle.db") == 7
+    assert middle['generation'] == store.generations()[-1]
+    latest = restore_to_time(store, tmp_path / "latest.db")
+    assert _count(tmp_path / "latest.db") == 13
+    assert latest['segments'] > middle['segments']
+
+    print("  PASS  restores replay the WAL up to the chosen moment")
+
+
+def test_external_checkpoint_starts_a_new_generation(tmp_path):
+    from models.story import StoryDatabase
+    from services.wal_archive import LocalWalStore, WalArchiver, restore_to_time
+
+    db = StoryDatabase(str(tmp_path / "stories.db"), wal_autocheckpoint=0)
+    store = LocalWalStore(tmp_path / "wal")
+    archiver = WalArchiver(db.db_path, store)
+    archiver.poll()
+    db.save_story(1, "shipped")
+    archiver.poll()
+    assert len(store.generations()) == 1
+
+    # Someone else checkpoints and the next commit resets the WAL before it is shipped
+    conn = sqlite3.connect(db.db_path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    db.save_story(1, "possibly missed")
+    archiver.poll()
+    archiver.close()
+
+    assert len(store.generations()) == 2
+    restore_to_time(store, tmp_path / "restored.db")
+    assert _count(tmp_path / "restored.db") == 2
+
+    print("  PASS  a WAL reset behind the archiver's back starts a fresh base")
+
+
+def test_writers_go_on_while_the_base_is_copied(tmp_path):
+    from unittest.mock import patch
+    from models.story import StoryDatabase
+    from services.wal_archive import LocalWalStore, WalArchiver, restore_to_time
+
+    db = StoryDatabase(str(tmp_path / "stories.db"), wal_autocheckpoint=0)
+    db.save_story(1, "before the base")
+    store = LocalWalStore(tmp_path / "wal")
+    archiver = WalArchiver(db.db_path, store)
+    connect = sqlite3.connect
+
+    def connect_and_write(path, *args, **kwargs):
+        if str(path).endswith("base.db"):
+            # The copy is about to start; a writer that had to wait would fail at once
+            writer = connect(db.db_path, timeout=0)
+            writer.execute("INSERT INTO stories (user_id, story_text) VALUES (1, 'during the copy')")
+            writer.commit()
+            writer.close()
+        return connect(path, *args, **kwargs)
+
+    with patch("sqlite3.connect", connect_and_write):
+        archiver.poll()
+    db.save_story(1, "after the base")
+    archiver.poll()
+    archiver.close()
+
+    # The base is the snapshot from before the write; the write is replayed from the WAL
+    store.get_base(store.generations()[-1], tmp_path / "base.db")
+    assert _count(tmp_path / "base.db") == 1
+    restore_to_time(store, tmp_path / "restored.db")
+    assert _count(tmp_path / "restored.db") == 3
+
+    print("  PASS  the base snapshot is copied without blocking writers")
+
+
+def test_failing_archiver_hands_checkpointing_back(tmp_path):
+    import asyncio
+    from types import SimpleNamespace
+    from unittest.mock import patch
+    import handlers.shared as shared
+
+    outcomes = []
+
+    def poll():
+        if outcomes.pop(0):
+            raise OSError("archive volume full")
+        return 0
+
+    db = SimpleNamespace(wal_autocheckpoint=0)
+    context = SimpleNamespace(job=SimpleNamespace(data=SimpleNamespace(poll=poll)))
+    with patch.object(shared, "story_db", db), patch.object(shared, "_wal_archive_failures", 0):
+        outcomes[:] = [True] * (shared.WAL_ARCHIVE_MAX_FAILURES - 1) + [False, True]
+        for _ in outcomes[:]:
+            asyncio.run(shared.wal_archive_callback(context))
+        assert db.wal_autocheckpoint == 0, "a success in between resets the count"
+
+        outcomes[:] = [True] * shared.WAL_ARCHIVE_MAX_FAILURES
+        for _ in outcomes[:]:
+            asyncio.run(shared.wal_archive_callback(context))
+        assert db.wal_autocheckpoint is None
+
+        outcomes[:] = [False]
+        asyncio.run(shared.wal_archive_callback(context))
+        assert db.wal_autocheckpoint == 0
+
+    print("  PASS  repeated archiver failures re-enable SQLite's autocheckpoint")
+
+
+def test_restore_before_the_first_base_fails(tmp_path):
+    from models.story import StoryDatabase
+    from services.wal_archive import LocalWalStore, WalArchiver, restore_to_time
+
+    db = StoryDatabase(str(tmp_path / "stories.db"), wal_autocheckpoint=0)
+    store = LocalWalStore(tmp_path / "wal")
+    WalArchiver(db.db_path, store).poll()
+
+    try:
+        restore_to_time(store, tmp_path / "restored.db", until=datetime(2000, 1, 1))
+        assert False, "there is nothing to restore from before the first base"
+    except ValueError:
+        pass
+
+    print("  PASS  restoring to before the oldest generation is refused")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    print("Running WAL archive tests...\n")
+    for test in (test_restore_to_a_point_in_time, test_external_checkpoint_starts_a_new_generation,
+                 test_writers_go_on_while_the_base_is_copied, test_failing_archiver_hands_checkpointing_back,
+                 test_restore_before_the_first_base_fails):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+    print("\nAll tests passed.")
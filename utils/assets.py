@@ -40,5 +40,5 @@ def load_about_message(user_first_name: str = "") -> str:
     except Exception as e:
         # Log error and return fallback
         import logging
-        logging.error(f"Error loading about message: {e}")
+        logging.error("Error loading about message: %s", e)
         return f"Hello {user_first_name}! 👋 Welcome to the Moments Bot!"
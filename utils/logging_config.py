@@ -0,0 +1,130 @@
+"""
+Non-blocking logging setup.
+
+Log calls on the bot's event loop only put the record on an in-memory queue;
+a QueueListener thread formats it (JSON lines by default) and writes it to
+stdout. Message arguments are merged in the listener thread, so use lazy
+``logger.info("... %s", value)`` calls rather than f-strings.
+
+Environment:
+    LOG_LEVEL   Root level (default WARNING)
+    LOG_LEVELS  Per-module overrides, e.g. ``handlers.shared=INFO,httpx=ERROR``
+    LOG_FORMAT  ``json`` (default) or ``text``
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else was passed via ``extra=``
+_STANDARD_ATTRS = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[logging.Handler] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that defers message formatting to the listener thread.
+
+    The stock QueueHandler formats the message before enqueueing, which puts
+    the cost back on the caller. Only the traceback is rendered eagerly, since
+    it has to be captured while the frames still exist.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def parse_module_levels(spec: str) -> Dict[str, int]:
+    """Parse ``name=LEVEL,name=LEVEL`` into a mapping of logger name to level."""
+    levels = {}
+    for item in spec.split(','):
+        if '=' not in item:
+            continue
+        name, level = (part.strip() for part in item.split('=', 1))
+        value = logging.getLevelName(level.upper())
+        if name and isinstance(value, int):
+            levels[name] = value
+    return levels
+
+
+def configure_logging(level: str = None, module_levels: str = None, fmt: str = None,
+                      stream=None) -> logging.handlers.QueueListener:
+    """
+    Route all logging through a queue drained by a background listener thread.
+
+    Safe to call more than once; the previous listener is stopped first.
+
+    Returns:
+        The running QueueListener
+    """
+    global _listener, _queue_handler
+    level = level or os.getenv('LOG_LEVEL', 'WARNING')
+    module_levels = module_levels if module_levels is not None else os.getenv('LOG_LEVELS', '')
+    fmt = fmt or os.getenv('LOG_FORMAT', 'json')
+
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    _queue_handler = LazyQueueHandler(log_queue)
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper())
+
+    for name, module_level in parse_module_levels(module_levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def stop_logging() -> None:
+    """Flush queued records, stop the listener thread and detach the queue handler."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,144 @@
+"""
+Memory footprint inspection with tracemalloc.
+
+The bot runs on a 512 MB VM, so RSS is worth watching. Tracing is off by
+default because it slows every allocation and keeps a traceback per live
+block; turn it on at startup with ``PYTHONTRACEMALLOC=<frames>`` (which
+also catches import-time allocations) or at runtime via ``/admin mem start``
+or ``GET /api/admin/memory?action=start``. While tracing, ``top`` lists the
+biggest allocation sites and ``diff`` shows what grew since the previous
+snapshot, which is the quickest way to find a leak: take one, wait, diff.
+
+Only the standard library is used, so this loads nothing extra.
+"""
+import os
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from typing import Optional
+
+from utils.metrics import PROCESS_RSS
+
+DEFAULT_FRAMES = 10
+DEFAULT_LIMIT = 15
+
+# Our own bookkeeping shouldn't show up in the listings
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def _mib(size: float) -> str:
+    return f"{size / 2**20:.1f} MiB"
+
+
+def rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux), or None where /proc isn't available."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class MemoryProfiler:
+    """Starts and stops tracing and renders top allocators and snapshot diffs as text."""
+
+    def __init__(self):
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._lock = threading.Lock()
+
+    def start(self, frames: int = DEFAULT_FRAMES) -> str:
+        if tracemalloc.is_tracing():
+            return "Already tracing."
+        tracemalloc.start(frames)
+        return f"Tracing started ({frames} frames per allocation)."
+
+    def stop(self) -> str:
+        with self._lock:
+            self._baseline = None
+        if not tracemalloc.is_tracing():
+            return "Not tracing."
+        tracemalloc.stop()
+        return "Tracing stopped."
+
+    def run(self, action: str = 'top', limit: int = DEFAULT_LIMIT) -> str:
+        """Do one of 'start', 'stop', 'top' or 'diff' (anything else: summary) and describe the result."""
+        if action == 'start':
+            return self.start()
+        if action == 'stop':
+            return self.stop()
+        if action == 'top':
+            return self.top(limit)
+        if action == 'diff':
+            return self.diff(limit)
+        return self.summary()
+
+    def summary(self) -> str:
+        rss = rss_bytes()
+        lines = [f"RSS: {_mib(rss) if rss is not None else 'n/a'}"]
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines.append(f"Traced: {_mib(current)} now, {_mib(peak)} peak "
+                         f"(tracemalloc itself: {_mib(tracemalloc.get_tracemalloc_memory())})")
+        else:
+            lines.append("Tracing is off.")
+        return "\n".join(lines)
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    def top(self, limit: int = DEFAULT_LIMIT, key_type: str = 'lineno') -> str:
+        """The biggest live allocation sites, grouped by line (or 'filename'/'traceback')."""
+        if not tracemalloc.is_tracing():
+            return self.summary()
+        stats = self._snapshot().statistics(key_type)
+        lines = [self.summary(), ""]
+        lines += [f"{_mib(stat.size):>10} {stat.count:>8} blocks  {stat.traceback[0]}" for stat in stats[:limit]]
+        return "\n".join(lines)
+
+    def diff(self, limit: int = DEFAULT_LIMIT, key_type: str = 'lineno') -> str:
+        """
+        Growth per allocation site since the previous diff; the first call
+        only takes the baseline.
+        """
+        if not tracemalloc.is_tracing():
+            return self.summary()
+        snapshot = self._snapshot()
+        with self._lock:
+            baseline, self._baseline = self._baseline, snapshot
+        if baseline is None:
+            return f"{self.summary()}\n\nBaseline taken; diff again to see what changed."
+        stats = snapshot.compare_to(baseline, key_type)
+        lines = [self.summary(), ""]
+        lines += [f"{stat.size_diff / 2**20:>+9.2f} MiB {stat.count_diff:>+8} blocks  {stat.traceback[0]}"
+                  for stat in stats[:limit]]
+        return "\n".join(lines)
+
+
+@contextmanager
+def traced_peak():
+    """
+    Measure the peak of traced allocations made inside the block, above
+    what was live when it started. Yields a dict whose ``peak`` (bytes) is
+    filled in on exit. Starts tracing for the block if it isn't on.
+    """
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start()
+    result = {'peak': None}
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    try:
+        yield result
+    finally:
+        result['peak'] = tracemalloc.get_traced_memory()[1] - baseline
+        if started_here:
+            tracemalloc.stop()
+
+
+profiler = MemoryProfiler()
+PROCESS_RSS.set_function(lambda: rss_bytes() or 0)
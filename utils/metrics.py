@@ -0,0 +1,452 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms live in memory and are rendered on demand by the
+webapp's /metrics endpoint. There is no client library or network dependency;
+an observation is a lock, a bisect and a couple of additions.
+"""
+import functools
+import inspect
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond DB calls to slow OpenAI requests
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{n}="{_escape_label(v)}"' for n, v in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, '_Metric'] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: '_Metric') -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str):
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 registry: MetricsRegistry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+        if registry is not None:
+            registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Return the child metric for a set of label values (created on first use)."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _items(self):
+        with self._lock:
+            return sorted(self._children.items())
+
+    def collect(self) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ('_value', '_lock')
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self._default.inc(amount)
+
+    def collect(self):
+        for key, child in self._items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _GaugeChild:
+    __slots__ = ('_value', '_function')
+
+    def __init__(self):
+        self._value = 0.0
+        self._function = None
+
+    def set(self, value: float) -> None:
+        self._value = float(value)
+
+    def set_function(self, function) -> None:
+        """Report ``function()`` at collection time instead of a stored value."""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        return float(self._function()) if self._function is not None else self._value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, optionally computed when collected."""
+
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def set_function(self, function) -> None:
+        self._default.set_function(function)
+
+    def collect(self):
+        for key, child in self._items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _HistogramChild:
+    __slots__ = ('_upper_bounds', '_counts', '_sum', '_count', '_lock')
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self._upper_bounds = upper_bounds
+        # One slot per bucket plus the implicit +Inf bucket
+        self._counts = [0] * (len(upper_bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def time(self):
+        """Context manager observing the elapsed wall time."""
+        return _Timer(self)
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._counts), self._sum, self._count
+
+
+class _Timer:
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child: _HistogramChild):
+        self._child = child
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: MetricsRegistry = REGISTRY):
+        self.upper_bounds = tuple(sorted(float(b) for b in buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.upper_bounds)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def collect(self):
+        bucket_names = self.labelnames + ('le',)
+        bounds = self.upper_bounds + (float('inf'),)
+        for key, child in self._items():
+            counts, total, count = child.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_names, key + (_format_value(bound),))
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+# --- Application metrics ---
+
+HANDLER_LATENCY = Histogram(
+    'moments_handler_duration_seconds',
+    'Time spent in Telegram update handlers.',
+    ['handler'],
+)
+HANDLER_ERRORS = Counter(
+    'moments_handler_errors_total',
+    'Exceptions raised out of Telegram update handlers.',
+    ['handler'],
+)
+DB_LATENCY = Histogram(
+    'moments_db_query_duration_seconds',
+    'Time spent in StoryDatabase methods.',
+    ['method'],
+)
+REMINDER_LAG = Histogram(
+    'moments_reminder_lag_seconds',
+    'Delay between a reminder job\'s scheduled time and its callback running.',
+)
+REMINDERS_SENT = Counter(
+    'moments_reminders_sent_total',
+    'Reminder messages by delivery outcome.',
+    ['status'],
+)
+REMINDER_EVENTS_DROPPED = Counter(
+    'moments_reminder_events_dropped_total',
+    'Reminder events dropped because the write buffer was full.',
+)
+OPENAI_LATENCY = Histogram(
+    'moments_openai_request_duration_seconds',
+    'Latency of OpenAI report requests.',
+    ['status'],
+)
+REPORT_LATENCY = Histogram(
+    'moments_report_duration_seconds',
+    'End-to-end time to generate and send a story report.',
+)
+UPDATE_LATENCY = Histogram(
+    'moments_update_duration_seconds',
+    'End-to-end time to process a Telegram update, by the first handler that matched.',
+    ['handler'],
+)
+RENDER_LATENCY = Histogram(
+    'moments_render_duration_seconds',
+    'Time to render export and report HTML, inline or in the render pool.',
+    ['renderer', 'mode'],
+)
+SLOW_UPDATES = Counter(
+    'moments_slow_updates_total',
+    'Updates that exceeded the slow update threshold.',
+    ['handler'],
+)
+BACKUP_DURATION = Histogram(
+    'moments_backup_duration_seconds',
+    'Time to snapshot, compress and checksum a database.',
+    ['database'],
+)
+BACKUPS = Counter(
+    'moments_backups_total',
+    'Database snapshots by outcome.',
+    ['database', 'status'],
+)
+WAL_LOCK_PAUSE = Histogram(
+    'moments_wal_lock_pause_seconds',
+    'Time the WAL archiver held the write lock, by operation (checkpoint or base snapshot).',
+    ['operation'],
+)
+WAL_ARCHIVED_BYTES = Counter(
+    'moments_wal_archived_bytes_total',
+    'Committed WAL frame bytes copied to the WAL archive.',
+)
+WAL_ARCHIVE_LAG = Gauge(
+    'moments_wal_archive_lag_seconds',
+    'Seconds since the WAL archive last caught up with the live WAL.',
+)
+USER_STATES = Gauge(
+    'moments_user_states',
+    'Users with transient conversation state held in memory.',
+)
+USER_STATE_EVICTIONS = Counter(
+    'moments_user_state_evictions_total',
+    'Users whose transient state was forgotten, by reason (expired or capacity).',
+    ['reason'],
+)
+PROCESS_RSS = Gauge(
+    'moments_process_resident_memory_bytes',
+    'Resident set size of the bot process.',
+)
+EVENT_LOOP_LAG = Gauge(
+    'moments_event_loop_lag_seconds',
+    'How late the bot loop\'s readiness probe last woke up.',
+)
+IMPORTED_STORIES = Counter(
+    'moments_imported_stories_total',
+    'Entries read by /import, by result (imported, duplicate or invalid).',
+    ['result'],
+)
+
+# Handler labels entered while processing the current update, in call order.
+# Set by the update timing middleware; None outside of an update.
+matched_handlers: ContextVar[Optional[List[str]]] = ContextVar('matched_handlers', default=None)
+
+
+def _timed(func, histogram_child, error_child=None, label=None):
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if label is not None:
+                handlers = matched_handlers.get()
+                if handlers is not None:
+                    handlers.append(label)
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                if error_child is not None:
+                    error_child.inc()
+                raise
+            finally:
+                histogram_child.observe(time.perf_counter() - start)
+        return async_wrapper
+
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            # Time spent producing items, not the consumer's time between
+            # them; observed once, when the iteration ends or is abandoned
+            generator = func(*args, **kwargs)
+            elapsed = 0.0
+            try:
+                while True:
+                    start = time.perf_counter()
+                    try:
+                        item = next(generator)
+                    except StopIteration:
+                        return
+                    except Exception:
+                        if error_child is not None:
+                            error_child.inc()
+                        raise
+                    finally:
+                        elapsed += time.perf_counter() - start
+                    yield item
+            finally:
+                generator.close()
+                histogram_child.observe(elapsed)
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            if error_child is not None:
+                error_child.inc()
+            raise
+        finally:
+            histogram_child.observe(time.perf_counter() - start)
+    return wrapper
+
+
+def instrument_handlers(cls):
+    """
+    Class decorator timing every public async staticmethod of a handler class.
+
+    Observations go to HANDLER_LATENCY labelled ``ClassName.method``, and the
+    label is recorded in ``matched_handlers`` for update timing attribution.
+    """
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_') or not isinstance(attr, staticmethod):
+            continue
+        func = attr.__func__
+        if not inspect.iscoroutinefunction(func):
+            continue
+        label = f"{cls.__name__}.{name}"
+        wrapped = _timed(func, HANDLER_LATENCY.labels(label), HANDLER_ERRORS.labels(label), label)
+        setattr(cls, name, staticmethod(wrapped))
+    return cls
+
+
+def instrument_methods(cls):
+    """
+    Class decorator timing every public method of a database class.
+
+    Observations go to DB_LATENCY labelled with the method name. Generator
+    methods record one observation per iteration: the time spent inside
+    the generator, summed over its steps.
+    """
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_') or not inspect.isfunction(attr):
+            continue
+        setattr(cls, name, _timed(attr, DB_LATENCY.labels(name)))
+    return cls
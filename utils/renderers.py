@@ -0,0 +1,289 @@
+"""
+Pure renderers for story exports and reports (HTML) and feedback exports (CSV).
+
+Only the standard library is imported here, so the render worker processes
+in services/render_pool.py can load this module without the bot's
+dependencies.
+"""
+import csv
+import html
+import io
+import re
+from datetime import datetime
+from typing import Iterable, Iterator, List, Sequence, Tuple
+
+
+def export_entries(stories: Iterable[dict]) -> List[Tuple[str, str]]:
+    """
+    Reduce story dicts to the ``(created_at, story_text)`` pairs the export
+    renderer reads. StoryDatabase.get_story_texts already returns such pairs.
+    """
+    return [(story['created_at'], story['story_text']) for story in stories]
+
+
+def build_export_content(entries: Sequence[Tuple[str, str]], first_name: str, export_date: str) -> str:
+    """
+    Render the /export HTML page.
+
+    Args:
+        entries: ``(created_at, story_text)`` pairs, newest first (see export_entries)
+        first_name: Shown in the page header
+        export_date: 'YYYY-MM-DD' shown in the page header
+    """
+    count = len(entries)
+    story_word = 'moment' if count == 1 else 'moments'
+
+    entries_html = []
+    current_month = None
+    headings = {}
+    for created_at, story_text in entries:  # newest first
+        raw_date = created_at[:10]
+        # Users write about one story a day, so most dates repeat
+        heading = headings.get(raw_date)
+        if heading is None:
+            dt = datetime.strptime(raw_date, '%Y-%m-%d')
+            heading = headings[raw_date] = (dt.strftime('%B %Y'), dt.strftime('%B %-d, %Y'))
+        month_heading, day_heading = heading
+
+        if month_heading != current_month:
+            if current_month is not None:
+                entries_html.append('</section>')
+            entries_html.append(f'<section><h2>{month_heading}</h2>')
+            current_month = month_heading
+
+        text = html.escape(story_text).replace('\n', '<br>')
+        entries_html.append(
+            f'<article><time>{day_heading}</time><p>{text}</p></article>'
+        )
+
+    if current_month is not None:
+        entries_html.append('</section>')
+
+    body = "\n".join(entries_html)
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>My Storyworthy Moments</title>
+  <style>
+    body {{
+      font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
+      max-width: 680px;
+      margin: 0 auto;
+      padding: 24px 20px 60px;
+      background: #fafaf8;
+      color: #1a1a1a;
+    }}
+    header {{
+      border-bottom: 2px solid #e8e4de;
+      padding-bottom: 20px;
+      margin-bottom: 36px;
+    }}
+    header h1 {{
+      font-size: 1.8rem;
+      font-weight: 700;
+      margin: 0 0 6px;
+    }}
+    header p {{
+      color: #888;
+      font-size: 0.9rem;
+      margin: 0;
+    }}
+    section {{ margin-bottom: 40px; }}
+    h2 {{
+      font-size: 1rem;
+      font-weight: 600;
+      text-transform: uppercase;
+      letter-spacing: 0.08em;
+      color: #888;
+      border-bottom: 1px solid #e8e4de;
+      padding-bottom: 6px;
+      margin-bottom: 20px;
+    }}
+    article {{
+      margin-bottom: 24px;
+      padding-left: 14px;
+      border-left: 3px solid #d4c9b8;
+    }}
+    time {{
+      display: block;
+      font-size: 0.78rem;
+      font-weight: 600;
+      color: #aaa;
+      text-transform: uppercase;
+      letter-spacing: 0.05em;
+      margin-bottom: 6px;
+    }}
+    p {{
+      margin: 0;
+      font-size: 1rem;
+      line-height: 1.65;
+      color: #2d2d2d;
+    }}
+    footer {{
+      margin-top: 48px;
+      padding-top: 20px;
+      border-top: 1px solid #e8e4de;
+      font-style: italic;
+      color: #aaa;
+      font-size: 0.88rem;
+      line-height: 1.6;
+    }}
+  </style>
+</head>
+<body>
+  <header>
+    <h1>My Storyworthy Moments</h1>
+    <p>{html.escape(first_name)} &middot; {export_date} &middot; {count} {story_word}</p>
+  </header>
+
+  {body}
+
+  <footer>
+    &ldquo;When you start looking for story-worthy moments in your life,
+    you start to see them everywhere.&rdquo;<br>
+    &mdash; Matthew Dicks
+  </footer>
+</body>
+</html>"""
+
+
+def build_report_html(markdown_text: str, period: str) -> str:
+    """Convert a markdown report section to a styled, phone-friendly HTML file."""
+    export_date = datetime.now().strftime('%Y-%m-%d')
+
+    def inline_md(text):
+        text = html.escape(text)
+        text = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', text, flags=re.DOTALL)
+        text = re.sub(r'__(.+?)__', r'<strong>\1</strong>', text, flags=re.DOTALL)
+        text = re.sub(r'\*(.+?)\*', r'<em>\1</em>', text, flags=re.DOTALL)
+        text = re.sub(r'(?<!\w)_(.+?)_(?!\w)', r'<em>\1</em>', text, flags=re.DOTALL)
+        return text
+
+    blocks = re.split(r'\n{2,}', markdown_text.strip())
+    parts = []
+
+    for block in blocks:
+        block = block.strip()
+        if not block:
+            continue
+
+        heading_match = re.match(r'^#{1,6} (.+)$', block)
+        if heading_match:
+            parts.append(f'<h3>{inline_md(heading_match.group(1))}</h3>')
+            continue
+
+        lines = block.split('\n')
+        if all(re.match(r'^[ \t]*[*\-] ', ln) for ln in lines if ln.strip()):
+            items = [re.sub(r'^[ \t]*[*\-] ', '', ln) for ln in lines if ln.strip()]
+            lis = ''.join(f'<li>{inline_md(item)}</li>' for item in items)
+            parts.append(f'<ul>{lis}</ul>')
+            continue
+
+        parts.append(f'<p>{inline_md(block)}</p>')
+
+    body = '\n'.join(parts)
+
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="UTF-8">
+  <meta name="viewport" content="width=device-width, initial-scale=1">
+  <title>Story Report — {html.escape(period)}</title>
+  <style>
+    body {{
+      font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", sans-serif;
+      max-width: 680px;
+      margin: 0 auto;
+      padding: 24px 20px 60px;
+      background: #fafaf8;
+      color: #1a1a1a;
+    }}
+    header {{
+      border-bottom: 2px solid #e8e4de;
+      padding-bottom: 20px;
+      margin-bottom: 36px;
+    }}
+    header h1 {{
+      font-size: 1.8rem;
+      font-weight: 700;
+      margin: 0 0 6px;
+    }}
+    header p {{
+      color: #888;
+      font-size: 0.9rem;
+      margin: 0;
+    }}
+    h3 {{
+      font-size: 1rem;
+      font-weight: 600;
+      text-transform: uppercase;
+      letter-spacing: 0.08em;
+      color: #888;
+      border-bottom: 1px solid #e8e4de;
+      padding-bottom: 6px;
+      margin: 32px 0 16px;
+    }}
+    p, li {{
+      font-size: 1rem;
+      line-height: 1.65;
+      color: #2d2d2d;
+    }}
+    p {{ margin: 0 0 16px; }}
+    ul {{
+      margin: 0 0 16px;
+      padding-left: 20px;
+    }}
+    li {{ margin-bottom: 8px; }}
+    strong {{ font-weight: 600; }}
+    em {{ font-style: italic; }}
+    footer {{
+      margin-top: 48px;
+      padding-top: 20px;
+      border-top: 1px solid #e8e4de;
+      font-style: italic;
+      color: #aaa;
+      font-size: 0.88rem;
+      line-height: 1.6;
+    }}
+  </style>
+</head>
+<body>
+  <header>
+    <h1>Story Report</h1>
+    <p>{html.escape(period)} &middot; {export_date}</p>
+  </header>
+
+  {body}
+
+  <footer>
+    &ldquo;When you start looking for story-worthy moments in your life,
+    you start to see them everywhere.&rdquo;<br>
+    &mdash; Matthew Dicks
+  </footer>
+</body>
+</html>"""
+
+
+FEEDBACK_CSV_COLUMNS = ('id', 'created_at', 'user_id', 'username', 'first_name', 'feedback_text')
+
+
+def feedback_csv(rows: Iterable[dict], rows_per_chunk: int = 500) -> Iterator[str]:
+    """
+    Render feedback rows as CSV, yielding a header and then chunks of
+    ``rows_per_chunk`` rows, so a streamed export holds one chunk at a time.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FEEDBACK_CSV_COLUMNS)
+    count = 0
+    for row in rows:
+        writer.writerow([row[column] for column in FEEDBACK_CSV_COLUMNS])
+        count += 1
+        if count % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -1,17 +1,39 @@
 """
-FastAPI app serving the Telegram Mini App for reminder time capture.
+FastAPI app serving the Telegram Mini App for reminder time capture,
+plus health, readiness, metrics and admin endpoints.
+
+The app runs on its own thread and event loop inside the bot process.
+bot.py stores the telegram Application and the bot's loop in
+``webapp_app.state`` so endpoints can hand work to it (the job queue is
+only safe to touch from that loop).
 """
+import asyncio
+import hashlib
+import hmac
+import json
 import logging
-from pathlib import Path
+import sqlite3
+from datetime import datetime
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from pydantic import BaseModel
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
-from fastapi import FastAPI
-from fastapi.responses import FileResponse
+from config.settings import settings
+from services.health import readiness
+from services.telegram_auth import InitDataError, validate_init_data
+from utils.metrics import REGISTRY
+from utils.renderers import feedback_csv
+from webapp.static_assets import IMMUTABLE, REVALIDATE, StaticAsset, default_assets, etag_matches
 
 logger = logging.getLogger(__name__)
 
-static_dir = Path(__file__).parent / "static"
+# Read and compressed once, at startup (see webapp/static_assets.py)
+static_assets = default_assets()
 
 webapp_app = FastAPI(title="Moments Bot WebApp")
+webapp_app.state.telegram_app = None
+webapp_app.state.bot_loop = None
 
 
 @webapp_app.get("/")
@@ -19,9 +41,197 @@ async def health_check():
     return {"status": "ok"}
 
 
+@webapp_app.get("/ready")
+def readiness_check():
+    """
+    Deep readiness: 200 only if the bot loop is responsive, the database
+    answers in time, and jobs fire on time; 503 otherwise, with
+    the failing checks named. Liveness stays on ``/``.
+    """
+    from handlers.shared import story_db
+    try:
+        db_latency = story_db.ping(timeout=settings.READY_MAX_DB_LATENCY)
+    except sqlite3.Error as e:
+        logger.warning("Readiness database probe failed: %s", e)
+        db_latency = None
+
+    result = readiness.check(
+        db_latency,
+        max_loop_lag=settings.READY_MAX_LOOP_LAG,
+        max_db_latency=settings.READY_MAX_DB_LATENCY,
+        max_job_lag=settings.READY_MAX_JOB_LAG,
+        max_update_age=settings.READY_MAX_UPDATE_AGE,
+    )
+    body = {"status": "ok" if result['ready'] else "degraded", "failing": result['failing'], **result['checks']}
+    return JSONResponse(body, status_code=200 if result['ready'] else 503)
+
+
+@webapp_app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(
+        REGISTRY.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def _asset_response(request: Request, asset: StaticAsset, immutable: bool) -> Response:
+    """Serve an asset from memory in the best accepted encoding, or 304 if the client has it."""
+    encoding = asset.negotiate(request.headers.get("accept-encoding"))
+    headers = {
+        "ETag": asset.etags[encoding],
+        "Cache-Control": IMMUTABLE if immutable else REVALIDATE,
+        "Vary": "Accept-Encoding",
+    }
+    if etag_matches(request.headers.get("if-none-match"), asset.etags[encoding]):
+        return Response(status_code=304, headers=headers)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(asset.bodies[encoding], media_type=asset.content_type, headers=headers)
+
+
 @webapp_app.get("/webapp/reminder")
-async def serve_reminder_page():
-    return FileResponse(
-        static_dir / "reminder.html",
-        media_type="text/html",
+async def serve_reminder_page(request: Request):
+    # Stable URL (menu buttons, old messages): revalidated on every open
+    return _asset_response(request, static_assets.get("reminder.html"), immutable=False)
+
+
+@webapp_app.get("/webapp/stories")
+async def serve_stories_page(request: Request):
+    return _asset_response(request, static_assets.get("stories.html"), immutable=False)
+
+
+@webapp_app.get("/static/{name:path}")
+async def serve_static(name: str, request: Request):
+    asset, immutable = static_assets.resolve(name)
+    if asset is None:
+        raise HTTPException(status_code=404)
+    return _asset_response(request, asset, immutable)
+
+
+def _mini_app_user_id(init_data: str) -> int:
+    """The Telegram user a Mini App request comes from; 401 unless initData is genuine."""
+    try:
+        return int(validate_init_data(init_data, settings.BOT_TOKEN)['user']['id'])
+    except InitDataError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+
+
+class ReminderRequest(BaseModel):
+    init_data: str
+    time: str
+    timezone: str
+
+
+@webapp_app.post("/api/reminder")
+async def set_reminder(body: ReminderRequest):
+    """
+    Set the caller's daily reminder straight from the Mini App, instead of
+    the sendData round trip through a service message. The caller is
+    whoever Telegram signed initData for.
+    """
+    user_id = _mini_app_user_id(body.init_data)
+    telegram_app, bot_loop = webapp_app.state.telegram_app, webapp_app.state.bot_loop
+    if telegram_app is None or bot_loop is None:
+        raise HTTPException(status_code=503, detail="bot is not running")
+
+    from handlers.reminder_commands import InvalidReminderError, apply_reminder
+    future = asyncio.run_coroutine_threadsafe(
+        apply_reminder(telegram_app.job_queue, user_id, body.time, body.timezone), bot_loop
+    )
+    try:
+        utc_time = await asyncio.wrap_future(future)
+    except InvalidReminderError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info("Mini App API reminder set for user %s at %s %s (UTC: %s)", user_id, body.time, body.timezone,
+                utc_time)
+    return {"ok": True, "time": body.time, "timezone": body.timezone, "utc_time": utc_time}
+
+
+@webapp_app.get("/api/stories")
+def list_stories(request: Request, limit: int = Query(20, ge=1, le=100), before: str = None,
+                 authorization: str = Header(None)):
+    """
+    One page of the caller's stories, newest first, for the Mini App
+    browser (``Authorization: tma <initData>``). Pass ``next`` back as
+    ``before`` for the following page. Compact JSON, with an ETag so an
+    unchanged page revalidates to a 304.
+    """
+    scheme, _, init_data = (authorization or '').partition(' ')
+    if scheme.lower() != 'tma':
+        raise HTTPException(status_code=401, detail="expected 'Authorization: tma <initData>'")
+    user_id = _mini_app_user_id(init_data)
+
+    from handlers.shared import story_db
+    try:
+        stories, next_cursor = story_db.get_story_page(user_id, limit, before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    body = json.dumps(
+        {"items": [{"id": s['id'], "at": s['created_at'], "text": s['story_text']} for s in stories],
+         "next": next_cursor},
+        separators=(',', ':'), ensure_ascii=False,
+    ).encode()
+    headers = {
+        "ETag": f'"{hashlib.sha256(body).hexdigest()[:16]}"',
+        "Cache-Control": "private, no-cache",
+        "Vary": "Authorization",
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _require_admin(authorization: str) -> None:
+    """404 while ADMIN_API_TOKEN is unset, 401 unless the bearer token matches."""
+    if not settings.ADMIN_API_TOKEN:
+        raise HTTPException(status_code=404)
+    scheme, _, token = (authorization or '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(token.encode(), settings.ADMIN_API_TOKEN.encode()):
+        raise HTTPException(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+
+
+@webapp_app.get("/api/admin/stats")
+def admin_stats(days: int = Query(7, ge=1, le=90), authorization: str = Header(None)):
+    """Same numbers as /admin stats, from the rollup tables (sync: runs in the threadpool)."""
+    _require_admin(authorization)
+    # The web server runs inside the bot process; share its database instance
+    from handlers.shared import story_db
+    return story_db.get_stats(days)
+
+
+@webapp_app.get("/api/admin/feedback")
+def admin_feedback(limit: int = Query(50, ge=1, le=500), before: str = None, since: datetime = None,
+                   until: datetime = None, user_id: int = None, authorization: str = Header(None)):
+    """One page of feedback, newest first; pass ``next`` back as ``before`` for the next page."""
+    _require_admin(authorization)
+    from handlers.shared import story_db
+    try:
+        items, next_cursor = story_db.get_feedback_page(limit, before=before, since=since, until=until,
+                                                        user_id=user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next": next_cursor}
+
+
+@webapp_app.get("/api/admin/memory")
+def admin_memory(action: str = Query('top', pattern='^(summary|start|stop|top|diff)$'),
+                 limit: int = Query(15, ge=1, le=200), authorization: str = Header(None)):
+    """RSS and tracemalloc top allocators or snapshot diff, as text (see utils/memory.py)."""
+    _require_admin(authorization)
+    from utils.memory import profiler
+    return PlainTextResponse(profiler.run(action, limit))
+
+
+@webapp_app.get("/api/admin/feedback.csv")
+def admin_feedback_csv(since: datetime = None, until: datetime = None, user_id: int = None,
+                       authorization: str = Header(None)):
+    """All matching feedback as CSV, streamed page by page."""
+    _require_admin(authorization)
+    from handlers.shared import story_db
+    rows = story_db.iter_feedback(since=since, until=until, user_id=user_id)
+    return StreamingResponse(
+        feedback_csv(rows),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": 'attachment; filename="feedback.csv"'},
     )
@@ -0,0 +1,154 @@
+"""
+In-memory static assets for the Mini App.
+
+Every file under webapp/static is read once, hashed and compressed ahead of
+time (gzip, and brotli when the ``brotli`` package is installed), so a
+request is a dictionary lookup and never touches the disk or compresses
+anything. Each representation gets a strong ETag, so clients revalidate
+with If-None-Match and get a 304 instead of the page again.
+
+Assets are also reachable under a content-hashed name, e.g.
+``reminder.3f2a9c1b0d.html``: that URL changes whenever the file does, so
+it can be cached for a year as immutable. A stale hash (from a message sent
+before a deploy) still gets the current file, just without the long-lived
+caching.
+
+Only the standard library is imported here, so the bot can build asset URLs
+without loading the web stack.
+"""
+import gzip
+import hashlib
+import mimetypes
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = Path(__file__).parent / "static"
+
+# Hex digits of the content hash in hashed names and ETags
+HASH_LENGTH = 10
+
+# Below this, compression doesn't pay for its headers
+MIN_COMPRESS_BYTES = 256
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+_COMPRESSIBLE = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+_HASHED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<suffix>\.[^.]+)$' % HASH_LENGTH)
+
+
+class StaticAsset:
+    """One file's bytes in every encoding worth serving, with their ETags."""
+
+    __slots__ = ('name', 'content_type', 'digest', 'bodies', 'etags')
+
+    def __init__(self, name: str, data: bytes):
+        self.name = name
+        content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type == 'application/javascript':
+            content_type += '; charset=utf-8'
+        self.content_type = content_type
+        self.digest = hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+        self.bodies: Dict[str, bytes] = {'identity': data}
+        if content_type.startswith(_COMPRESSIBLE) and len(data) >= MIN_COMPRESS_BYTES:
+            # mtime=0 keeps the gzip bytes (and so the ETag's meaning) stable across restarts
+            candidates = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                candidates['br'] = brotli.compress(data, quality=11)
+            self.bodies.update((encoding, body) for encoding, body in candidates.items() if len(body) < len(data))
+        # Strong ETags must differ between representations of the same resource
+        self.etags = {encoding: f'"{self.digest}"' if encoding == 'identity' else f'"{self.digest}-{encoding}"'
+                      for encoding in self.bodies}
+
+    @property
+    def hashed_name(self) -> str:
+        path = Path(self.name)
+        return str(path.with_name(f"{path.stem}.{self.digest}{path.suffix}").as_posix())
+
+    def negotiate(self, accept_encoding: str) -> str:
+        """Pick the smallest encoding the client accepts ('identity' if none)."""
+        accepted = parse_accept_encoding(accept_encoding)
+        options = [encoding for encoding in self.bodies if encoding != 'identity'
+                   and accepted.get(encoding, accepted.get('*', 0)) > 0]
+        return min(options, key=lambda encoding: len(self.bodies[encoding])) if options else 'identity'
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Map each coding in an Accept-Encoding header to its q-value."""
+    accepted = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches ``etag`` (weak comparison, as RFC 9110 asks)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(tag.strip().removeprefix('W/') == etag for tag in if_none_match.split(','))
+
+
+class StaticAssets:
+    """All assets under a directory, loaded and compressed up front."""
+
+    def __init__(self, directory=STATIC_DIR):
+        self.directory = Path(directory)
+        self._assets: Dict[str, StaticAsset] = {}
+        for path in sorted(self.directory.rglob('*')):
+            if path.is_file():
+                name = path.relative_to(self.directory).as_posix()
+                self._assets[name] = StaticAsset(name, path.read_bytes())
+        self._hashed = {asset.hashed_name: asset for asset in self._assets.values()}
+
+    def __iter__(self) -> Iterable[StaticAsset]:
+        return iter(self._assets.values())
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        return self._assets.get(name)
+
+    def resolve(self, name: str) -> Tuple[Optional[StaticAsset], bool]:
+        """
+        Look up a plain or hashed name.
+
+        Returns:
+            (asset or None, whether the name carries the current hash and may be cached as immutable)
+        """
+        asset = self._hashed.get(name)
+        if asset is not None:
+            return asset, True
+        match = _HASHED_NAME.match(name)
+        if match:
+            # Hash from an older deploy: serve what's current, revalidated
+            return self._assets.get(f"{match['stem']}{match['suffix']}"), False
+        return self._assets.get(name), False
+
+    def url(self, name: str) -> str:
+        """Long-lived URL path for an asset, e.g. /static/reminder.3f2a9c1b0d.html."""
+        return f"/static/{self._assets[name].hashed_name}"
+
+
+@lru_cache(maxsize=None)
+def default_assets() -> StaticAssets:
+    """The assets in webapp/static, loaded on first use and shared by the bot and the web server."""
+    return StaticAssets()